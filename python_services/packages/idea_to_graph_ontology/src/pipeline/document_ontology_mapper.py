@@ -3,6 +3,7 @@
 import json
 import os
 import re
+import threading
 from typing import Dict, List, Any, TypedDict, Optional
 
 from pydantic import BaseModel, Field
@@ -84,6 +85,9 @@ class DocumentOntologyMapper:
         self.ontology_updater = ontology_updater
         self.debug = debug
         
+        # 병렬 모드에서 스테이징 그래프 쓰기(단일 writer)와 읽기(worker)를 직렬화
+        self.graph_lock = threading.RLock()
+        
         # 한글 description 생성을 위한 LLM 초기화
         model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.llm = ChatOpenAI(model=model, temperature=0)
@@ -112,11 +116,94 @@ class DocumentOntologyMapper:
         Returns:
             매핑 결과 딕셔너리
         """
+        initial_state = self._initial_state(concept, chunk_text, source, section_title, metadata)
+        
+        # stream 사용하여 각 노드 실행 확인 (디버그 모드에서)
+        if self.debug:
+            final_state = initial_state
+            for step in self.workflow.stream(initial_state):
+                # 각 step은 {node_name: state} 형태
+                if step:
+                    final_state = list(step.values())[0]
+            result = final_state
+        else:
+            # 일반 모드에서는 invoke 사용
+            result = self.workflow.invoke(initial_state)
+        
+        return result
+
+    def analyze_concept(
+        self,
+        concept: str,
+        chunk_text: str,
+        source: str,
+        section_title: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> MappingState:
+        """매핑의 읽기 전용 단계 (병렬 모드에서 worker 스레드로 실행).
+        
+        noun phrase 추출, 벡터 검색, LLM 매칭, 신규 개념의 한글 설명 생성까지
+        수행하며 NewConceptManager / 스테이징에는 쓰지 않습니다.
+        이어서 commit_concept()을 단일 writer에서 입력 순서대로 호출해야 합니다.
+        
+        Args:
+            concept: 매핑할 개념
+            chunk_text: 개념이 추출된 원본 텍스트
+            source: 출처
+            section_title: 섹션 제목 (매칭 시 활용)
+            metadata: 추가 메타데이터
+            
+        Returns:
+            match_with_llm까지 진행된 상태
+        """
+        state = self._initial_state(concept, chunk_text, source, section_title, metadata)
+        state = self.extract_noun_phrases(state)
+        state = self.search_similar_concepts(state)
+        state = self.match_with_llm(state)
+        
+        for new_concept_info in state.get("new_concepts") or []:
+            new_concept_info["description"] = self._generate_korean_description(
+                new_concept_info.get("concept", ""),
+                new_concept_info.get("context", chunk_text)
+            )
+        
+        return state
+
+    def commit_concept(self, state: MappingState) -> MappingState:
+        """매핑의 쓰기 단계 (신규 개념 저장, 클러스터 확인, 온톨로지 추가).
+        
+        워크플로우의 match_with_llm 이후 분기와 같습니다.
+        
+        Args:
+            state: analyze_concept()의 결과 상태
+            
+        Returns:
+            최종 매핑 결과
+        """
+        if not state.get("new_concepts"):
+            return state
+        
+        state = self.save_new_concept(state)
+        state = self.check_new_concept_clusters(state)
+        if state.get("should_add_to_ontology", False):
+            state = self.add_to_ontology(state)
+        
+        return state
+
+    def _initial_state(
+        self,
+        concept: str,
+        chunk_text: str,
+        source: str,
+        section_title: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> MappingState:
+        """워크플로우 초기 상태 생성."""
         metadata_dict = metadata or {}
         if section_title:
             metadata_dict["section_title"] = section_title
         
-        initial_state: MappingState = {
+        return {
             "concept": concept,
             "chunk_text": chunk_text,
             "source": source,
@@ -134,20 +221,6 @@ class DocumentOntologyMapper:
             "matched_concepts": None,
             "new_concepts": None,
         }
-        
-        # stream 사용하여 각 노드 실행 확인 (디버그 모드에서)
-        if self.debug:
-            final_state = initial_state
-            for step in self.workflow.stream(initial_state):
-                # 각 step은 {node_name: state} 형태
-                if step:
-                    final_state = list(step.values())[0]
-            result = final_state
-        else:
-            # 일반 모드에서는 invoke 사용
-            result = self.workflow.invoke(initial_state)
-        
-        return result
 
     def create_mapping_workflow(self) -> Any:
         """LangGraph StateGraph 생성 및 노드 연결.
@@ -257,16 +330,17 @@ class DocumentOntologyMapper:
         excluded_concept_ids = ["LLMConcept"]
         
         if self.ontology_updater.graph_manager:
-            graph = self.ontology_updater.graph_manager.staging_graph
-            if "LLMConcept" in graph:
-                llm_children = list(graph.successors("LLMConcept"))
-                excluded_concept_ids.extend(llm_children)
-            
-            # real_graph에도 확인
-            if "LLMConcept" in self.ontology_updater.graph_manager.real_graph:
-                real_graph = self.ontology_updater.graph_manager.real_graph
-                llm_children_real = list(real_graph.successors("LLMConcept"))
-                excluded_concept_ids.extend(llm_children_real)
+            with self.graph_lock:
+                graph = self.ontology_updater.graph_manager.staging_graph
+                if "LLMConcept" in graph:
+                    llm_children = list(graph.successors("LLMConcept"))
+                    excluded_concept_ids.extend(llm_children)
+                
+                # real_graph에도 확인
+                if "LLMConcept" in self.ontology_updater.graph_manager.real_graph:
+                    real_graph = self.ontology_updater.graph_manager.real_graph
+                    llm_children_real = list(real_graph.successors("LLMConcept"))
+                    excluded_concept_ids.extend(llm_children_real)
         
         # 중복 제거
         excluded_concept_ids = list(set(excluded_concept_ids))
@@ -284,20 +358,23 @@ class DocumentOntologyMapper:
             
             korean_description = self._generate_korean_description(concept_name, concept_context)
             korean_descriptions.append(korean_description)
+        
+        # 모든 설명을 한 번에 임베딩하여 실제/스테이징 컬렉션 검색 (제외할 개념들 전달)
+        candidates_per_concept = self.vector_store.find_similar_many(
+            korean_descriptions, 
+            k=5, 
+            include_staging=True,
+            exclude_concept_ids=excluded_concept_ids
+        )
+        
+        for extracted_concept, korean_description, candidates in zip(
+            concepts, korean_descriptions, candidates_per_concept
+        ):
+            concept_name = extracted_concept.get("concept", "")
             
             if self.debug:
                 print(f"\n개념: {concept_name}", flush=True)
                 print(f"생성된 한글 설명: {korean_description[:100]}...", flush=True)
-            
-            # 벡터 검색 시 제외할 개념들 전달
-            candidates = self.vector_store.find_similar(
-                korean_description, 
-                k=5, 
-                include_staging=True,
-                exclude_concept_ids=excluded_concept_ids
-            )
-            
-            if self.debug:
                 print(f"검색된 후보 수: {len(candidates)}", flush=True)
                 if candidates:
                     print(f"후보 개념 목록:", flush=True)
@@ -356,7 +433,8 @@ class DocumentOntologyMapper:
         # LLMConcept의 직접 자식 카테고리 정보 가져오기
         top_level_categories = []
         if self.ontology_updater and self.ontology_updater.graph_manager:
-            top_level_categories = self.ontology_updater.graph_manager.get_root_children()
+            with self.graph_lock:
+                top_level_categories = self.ontology_updater.graph_manager.get_root_children()
         
         noun_phrases = self.concept_matcher.extract_noun_phrases_from_keyword(
             original_keyword=original_keyword,
@@ -517,7 +595,8 @@ class DocumentOntologyMapper:
             noun_phrase_summary = match_result.get("noun_phrase_summary", "")
             reason = match_result.get("reason", "이유 없음")
             
-            korean_description = self._generate_korean_description(concept_name, concept_context)
+            # 병렬 모드에서는 analyze_concept()에서 미리 생성됨
+            korean_description = new_concept_info.get("description") or self._generate_korean_description(concept_name, concept_context)
             
             if self.debug:
                 print(f"\n[{idx}/{len(new_concepts)}] 개념: {concept_name}", flush=True)
@@ -868,16 +947,17 @@ class DocumentOntologyMapper:
                 print(f"  {idx}. {cand['concept']} (점수: {cand['score']})", flush=True)
         
         # 스테이징 모드로 먼저 추가 (임시)
-        self.ontology_updater.add_new_concept(
-            concept_id=concept_to_add['concept_id'],
-            label=concept_to_add['label'],
-            description=concept_to_add['description'],
-            parent_concept=parent_concept or "LLMConcept",
-            staging=True,
-            original_keywords=original_keywords,
-            parent_assignment_reason=reason,
-            parent_candidates=parent_candidates
-        )
+        with self.graph_lock:
+            self.ontology_updater.add_new_concept(
+                concept_id=concept_to_add['concept_id'],
+                label=concept_to_add['label'],
+                description=concept_to_add['description'],
+                parent_concept=parent_concept or "LLMConcept",
+                staging=True,
+                original_keywords=original_keywords,
+                parent_assignment_reason=reason,
+                parent_candidates=parent_candidates
+            )
         
         # 스테이징된 변경사항 확인 및 표시
         if self.debug and self.ontology_updater.graph_manager:
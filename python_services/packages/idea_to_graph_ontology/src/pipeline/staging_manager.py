@@ -42,10 +42,12 @@ class StagingManager:
             base_path = Path(vector_store.db_path).parent / "staged_result"
         
         self.staging_file_path = str(base_path / "staging_concepts.json")
+        # 스테이징 개념 추가 저널 (append-only, 개념당 한 줄)
+        self.journal_path = str(base_path / "staging_concepts.jsonl")
         base_path.mkdir(parents=True, exist_ok=True)
     
-    def _save_to_file(self) -> None:
-        """스테이징 데이터를 JSON 파일로 저장."""
+    def save_snapshot(self) -> None:
+        """스테이징 데이터를 JSON 파일로 저장 (전체 스냅샷, 작업 종료 시)."""
         data = {
             "staged_concepts": self.staged_concepts,
             "last_updated": datetime.now().isoformat()
@@ -53,6 +55,50 @@ class StagingManager:
         with open(self.staging_file_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
     
+    def _append_to_journal(self, concepts: List[Dict[str, Any]]) -> None:
+        """새로 스테이징된 개념만 저널에 추가."""
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            for concept in concepts:
+                f.write(json.dumps(concept, ensure_ascii=False) + "\n")
+    
+    @staticmethod
+    def load_journal(journal_path: str) -> List[Dict[str, Any]]:
+        """저널을 재생하여 스테이징 개념 리스트 복원.
+        
+        중단으로 잘린 마지막 줄은 무시합니다.
+        
+        Args:
+            journal_path: staging_concepts.jsonl 경로
+            
+        Returns:
+            스테이징 개념 리스트
+        """
+        concepts = []
+        if not os.path.exists(journal_path):
+            return concepts
+        
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    concepts.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return concepts
+    
+    def restore(self, staged_concepts: List[Dict[str, Any]]) -> None:
+        """스테이징 개념 복원 (--resume), 저널도 복원된 내용으로 다시 씀.
+        
+        Args:
+            staged_concepts: 복원할 스테이징 개념 리스트
+        """
+        self.staged_concepts = list(staged_concepts)
+        
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for concept in self.staged_concepts:
+                f.write(json.dumps(concept, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.journal_path)
+    
     def add_staged_concept(
         self,
         concept_id: str,
@@ -90,7 +136,7 @@ class StagingManager:
             concept_data["parent_candidates"] = parent_candidates
         
         self.staged_concepts.append(concept_data)
-        self._save_to_file()  # 자동 저장
+        self._append_to_journal([concept_data])  # 자동 저장
     
     def get_staging_summary(self) -> Dict[str, Any]:
         """스테이징된 변경사항 요약.
@@ -141,6 +187,7 @@ class StagingManager:
         if not staging_data["ids"]:
             return
         
+        synced = []
         for i, concept_id in enumerate(staging_data["ids"]):
             if concept_id in added_concept_ids:
                 metadata = staging_data["metadatas"][i]
@@ -162,15 +209,16 @@ class StagingManager:
                 
                 existing = any(c["concept_id"] == concept_id for c in self.staged_concepts)
                 if not existing:
-                    self.staged_concepts.append({
+                    synced.append({
                         "concept_id": concept_id,
                         "label": label,
                         "description": description,
                         "parent_concept": parent_concept
                     })
+                    self.staged_concepts.append(synced[-1])
         
-        if self.staged_concepts:
-            self._save_to_file()
+        if synced:
+            self._append_to_journal(synced)
     
     def print_staging_summary(self) -> None:
         """스테이징된 변경사항을 출력."""
@@ -203,8 +251,9 @@ class StagingManager:
         self.staged_concepts.clear()
         
         # 스테이징 파일도 삭제
-        if os.path.exists(self.staging_file_path):
-            os.remove(self.staging_file_path)
+        for path in (self.staging_file_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
         
         print(f"✓ 스테이징 롤백 완료")
         print(f"  - 그래프 매니저: 롤백 완료")
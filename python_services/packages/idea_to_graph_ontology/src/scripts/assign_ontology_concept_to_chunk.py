@@ -2,11 +2,15 @@
 """Assign ontology concepts to chunks with staging and checkpoint support."""
 
 import json
+import os
 import sys
 import argparse
 import shutil
+import sqlite3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -26,6 +30,9 @@ from packages.ontology.src.pipeline.staging_manager import StagingManager
 from packages.ontology.src.pipeline.rematch import rematch_all
 
 
+CHECKPOINT_JOURNAL = "journal.jsonl"
+CHECKPOINT_DB = "new_concepts.db"
+
 def load_jsonl(file_path: str) -> List[Dict[str, Any]]:
     """JSONL 파일 로드."""
     concepts = []
@@ -73,11 +80,139 @@ def find_latest_task_id(task_name: str, base_dir: Path) -> Optional[str]:
     return matching_dirs[0].name
 
 
+def backup_sqlite(src_path: str, dst_path: Path) -> None:
+    """SQLite online backup API로 일관된 DB 스냅샷 생성 (임시 파일에 쓴 뒤 교체)."""
+    tmp_path = Path(str(dst_path) + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(str(tmp_path))
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    os.replace(tmp_path, dst_path)
+
+
+def append_journal(checkpoint_dir: Path, entry: Dict[str, Any], sync: bool = False) -> None:
+    """체크포인트 저널에 한 줄 추가 (append-only)."""
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    
+    with open(checkpoint_dir / CHECKPOINT_JOURNAL, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def journal_result(
+    checkpoint_dir: Path,
+    idx: int,
+    result_entry: Dict[str, Any],
+    new_concept_manager: NewConceptManager,
+    staging_manager: StagingManager
+) -> None:
+    """처리된 개념 결과를 저널에 기록.
+    
+    재개 시 Stage DB와 스테이징 개념을 이 시점으로 맞추기 위해
+    new_concepts 최대 id와 스테이징 개념 수를 함께 기록합니다.
+    """
+    cursor = new_concept_manager.conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM new_concepts")
+    
+    append_journal(checkpoint_dir, {
+        "idx": idx,
+        "result": result_entry,
+        "db_max_id": cursor.fetchone()[0],
+        "staged_count": len(staging_manager.staged_concepts)
+    })
+
+
+def seed_journal(
+    checkpoint_dir: Path,
+    results: List[Dict[str, Any]],
+    processed_index: int,
+    new_concept_manager: NewConceptManager,
+    staging_manager: StagingManager
+) -> None:
+    """이전 형식 체크포인트에서 복원한 결과로 저널을 생성.
+    
+    이후 재개는 저널만 읽으므로, 복원된 결과를 먼저 저널에 기록해야 다시 중단되어도
+    이전 결과가 유지됩니다. 임시 파일에 쓴 뒤 교체하므로 도중에 중단되어도
+    이전 형식 체크포인트로 다시 재개할 수 있습니다.
+    """
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    
+    cursor = new_concept_manager.conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(id), 0) FROM new_concepts")
+    db_max_id = cursor.fetchone()[0]
+    staged_count = len(staging_manager.staged_concepts)
+    
+    journal_path = checkpoint_dir / CHECKPOINT_JOURNAL
+    tmp_path = journal_path.with_suffix(".jsonl.tmp")
+    
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for idx, result_entry in enumerate(results, start=1):
+            f.write(json.dumps({
+                "idx": idx,
+                "result": result_entry,
+                "db_max_id": db_max_id,
+                "staged_count": staged_count
+            }, ensure_ascii=False) + "\n")
+        f.write(json.dumps({
+            "processed_index": processed_index,
+            "checkpoint_timestamp": datetime.now().isoformat()
+        }) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    
+    os.replace(tmp_path, journal_path)
+    print(f"이전 형식 체크포인트를 저널로 변환: {len(results)}개 결과", flush=True)
+
+
 def load_checkpoint(checkpoint_dir: Path) -> Optional[Dict[str, Any]]:
-    """가장 최신 체크포인트 로드."""
+    """체크포인트 저널을 재생하여 복원 (이전 형식의 checkpoint_*.json도 지원)."""
     if not checkpoint_dir.exists():
         return None
     
+    journal_path = checkpoint_dir / CHECKPOINT_JOURNAL
+    if journal_path.exists():
+        checkpoint_data = {
+            "processed_index": 0,
+            "results": [],
+            "db_max_id": None,
+            "staged_count": None,
+            "journal": True
+        }
+        results_by_idx = {}
+        
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 중단으로 잘린 마지막 줄
+                    break
+                
+                if "result" in entry:
+                    results_by_idx[entry["idx"]] = entry["result"]
+                    checkpoint_data["db_max_id"] = entry["db_max_id"]
+                    checkpoint_data["staged_count"] = entry["staged_count"]
+                checkpoint_data["processed_index"] = max(
+                    checkpoint_data["processed_index"],
+                    entry.get("idx", entry.get("processed_index", 0))
+                )
+        
+        checkpoint_data["results"] = [results_by_idx[idx] for idx in sorted(results_by_idx)]
+        
+        snapshot_db = checkpoint_dir / CHECKPOINT_DB
+        if snapshot_db.exists():
+            checkpoint_data["snapshot_db_path"] = str(snapshot_db)
+        
+        return checkpoint_data
+    
     checkpoint_files = list(checkpoint_dir.glob("checkpoint_*.json"))
     if not checkpoint_files:
         return None
@@ -98,32 +233,121 @@ def load_checkpoint(checkpoint_dir: Path) -> Optional[Dict[str, Any]]:
 def save_checkpoint(
     checkpoint_dir: Path,
     processed_index: int,
-    results: List[Dict[str, Any]],
-    staging_concepts: List[Dict[str, Any]],
-    stage_db_path: str
+    stage_db_path: Optional[str] = None
 ) -> None:
-    """체크포인트 저장."""
-    checkpoint_dir.mkdir(parents=True, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    checkpoint_file = checkpoint_dir / f"checkpoint_{timestamp}.json"
-    checkpoint_db = checkpoint_dir / f"checkpoint_{timestamp}.db"
+    """체크포인트 저장.
     
-    checkpoint_data = {
+    결과는 개념마다 저널에 이미 기록되어 있으므로 체크포인트는 마커 한 줄을
+    추가하고 fsync만 합니다 (비용 O(1)). stage_db_path가 주어지면 (중단/오류 시)
+    online backup API로 Stage DB 스냅샷도 남깁니다.
+    """
+    append_journal(checkpoint_dir, {
         "processed_index": processed_index,
-        "results": results,
-        "staging_concepts": staging_concepts,
-        "checkpoint_timestamp": datetime.now().isoformat(),
-        "total_concepts": len(results)
-    }
+        "checkpoint_timestamp": datetime.now().isoformat()
+    }, sync=True)
     
-    with open(checkpoint_file, 'w', encoding='utf-8') as f:
-        json.dump(checkpoint_data, f, ensure_ascii=False, indent=2)
+    if stage_db_path and Path(stage_db_path).exists():
+        backup_sqlite(stage_db_path, checkpoint_dir / CHECKPOINT_DB)
     
-    if Path(stage_db_path).exists():
-        shutil.copy2(stage_db_path, checkpoint_db)
+    print(f"\n✓ 체크포인트 저장: {CHECKPOINT_JOURNAL} (처리된 개념: {processed_index}개)", flush=True)
+
+
+def restore_stage_db(stage_db_path: Path, checkpoint_data: Dict[str, Any]) -> None:
+    """Stage DB를 체크포인트 시점으로 복원.
+    
+    이전 형식은 스냅샷을 복사하고, 저널 형식은 (DB가 없을 때만 스냅샷에서 복원한 뒤)
+    마지막으로 기록된 개념 이후에 추가된 new_concepts 행을 삭제합니다.
+    """
+    stage_db_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    if not checkpoint_data.get("journal"):
+        if checkpoint_data.get("db_path"):
+            shutil.copy2(checkpoint_data["db_path"], stage_db_path)
+            print(f"Stage DB 복원: {stage_db_path}")
+        return
+    
+    if not stage_db_path.exists() and checkpoint_data.get("snapshot_db_path"):
+        backup_sqlite(checkpoint_data["snapshot_db_path"], stage_db_path)
+        print(f"Stage DB 복원 (스냅샷): {stage_db_path}")
+    
+    db_max_id = checkpoint_data.get("db_max_id")
+    if db_max_id is None or not stage_db_path.exists():
+        return
     
-    print(f"\n✓ 체크포인트 저장: {checkpoint_file.name} (처리된 개념: {processed_index}개)", flush=True)
+    conn = sqlite3.connect(str(stage_db_path))
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM new_concepts WHERE id > ?", (db_max_id,))
+        if cursor.rowcount:
+            print(f"Stage DB: 체크포인트 이후 저장된 신규 개념 {cursor.rowcount}개 제거")
+        conn.commit()
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+
+def mapping_kwargs(concept_data: Dict[str, Any]) -> Dict[str, Any]:
+    """입력 라인을 map_concept / analyze_concept 인자로 변환."""
+    section_id = concept_data["section_id"]
+    return {
+        "concept": concept_data["concept"],
+        "chunk_text": concept_data["chunk_text"],
+        "source": concept_data.get("source", f"section_{section_id}"),
+        "section_title": concept_data["section_title"],
+        "metadata": {k: v for k, v in concept_data.items()
+                     if k not in ["concept", "chunk_text", "section_id", "section_title"]},
+    }
+
+
+def iter_mapped_concepts(
+    mapper: DocumentOntologyMapper,
+    concepts: List[Dict[str, Any]],
+    start_index: int = 0,
+    workers: int = 1
+) -> Iterator[Tuple[int, Dict[str, Any], Callable[[], Dict[str, Any]]]]:
+    """입력 순서대로 (idx, concept_data, get_result) 생성.
+    
+    get_result()는 매핑 결과를 반환하거나 매핑 중 발생한 예외를 그대로 던집니다.
+    
+    workers > 1이면 읽기 전용 단계(analyze_concept: noun phrase 추출, 벡터 검색,
+    LLM 매칭, 한글 설명)를 worker 풀에서 최대 workers * 2개까지 앞서 실행하고,
+    쓰기 단계(commit_concept: NewConceptManager, 스테이징 그래프/컬렉션,
+    StagingManager)는 get_result()를 호출한 스레드 하나에서 입력 순서대로 실행합니다.
+    따라서 결과 순서와 체크포인트의 processed_index 의미는 순차 모드와 같습니다.
+    
+    Args:
+        mapper: DocumentOntologyMapper 인스턴스
+        concepts: 입력 개념 리스트
+        start_index: 이미 처리된 개념 수 (--resume)
+        workers: 동시에 분석할 개념 수 (LLM 동시 호출 상한)
+    """
+    items = list(enumerate(concepts[start_index:], start=start_index + 1))
+    
+    if workers <= 1:
+        for idx, concept_data in items:
+            kwargs = mapping_kwargs(concept_data)
+            yield idx, concept_data, lambda kwargs=kwargs: mapper.map_concept(**kwargs)
+        return
+    
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyze")
+    pending = deque()
+    
+    try:
+        for idx, concept_data in items:
+            future = executor.submit(mapper.analyze_concept, **mapping_kwargs(concept_data))
+            pending.append((idx, concept_data, future))
+            
+            if len(pending) >= workers * 2:
+                idx, concept_data, future = pending.popleft()
+                yield idx, concept_data, lambda future=future: mapper.commit_concept(future.result())
+        
+        while pending:
+            idx, concept_data, future = pending.popleft()
+            yield idx, concept_data, lambda future=future: mapper.commit_concept(future.result())
+    finally:
+        # 중단 시 아직 시작하지 않은 분석은 취소 (쓰기는 하지 않았으므로 --resume으로 다시 처리됨)
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def process_jsonl(
@@ -132,7 +356,8 @@ def process_jsonl(
     graph_endpoint: str,
     project_root: Path,
     resume: bool = False,
-    debug: bool = False
+    debug: bool = False,
+    workers: int = 1
 ) -> None:
     """JSONL 입력을 처리하여 개념 매핑 및 스테이징."""
     
@@ -174,12 +399,7 @@ def process_jsonl(
             start_index = checkpoint_data.get("processed_index", 0)
             print(f"체크포인트 로드: {start_index}개 개념까지 처리됨")
             
-            if checkpoint_data.get("db_path"):
-                stage_db_dir = project_root / "db" / "stage" / task_id
-                stage_db_dir.mkdir(parents=True, exist_ok=True)
-                stage_db_path = stage_db_dir / "new_concepts.db"
-                shutil.copy2(checkpoint_data["db_path"], stage_db_path)
-                print(f"Stage DB 복원: {stage_db_path}")
+            restore_stage_db(project_root / "db" / "stage" / task_id / "new_concepts.db", checkpoint_data)
         else:
             print("체크포인트를 찾을 수 없습니다. 처음부터 시작합니다.")
             resume = False
@@ -198,23 +418,19 @@ def process_jsonl(
         if Path(stage_vector_db_path).exists():
             shutil.rmtree(stage_vector_db_path)
         
-        if Path(real_vector_db_path).exists():
-            print(f"Real Vector DB를 Stage 디렉토리로 복사 중...")
-            shutil.copytree(real_vector_db_path, stage_vector_db_path)
-            print(f"  복사 완료: {stage_vector_db_path}")
-        else:
+        if not Path(real_vector_db_path).exists():
             print(f"경고: Real Vector DB가 없습니다: {real_vector_db_path}")
-            Path(stage_vector_db_path).mkdir(parents=True, exist_ok=True)
     
     print(f"Stage DB 경로: {stage_db_path}")
-    print(f"Stage Vector DB 경로: {stage_vector_db_path} (real DB 복사본)")
+    print(f"Stage Vector DB 경로: {stage_vector_db_path} (스테이징 델타, real DB 읽기 전용 오버레이)")
     print()
     
     print("컴포넌트 초기화 중...")
     graph_engine = GraphQueryEngine(graph_endpoint)
-    vector_store = VectorStore(stage_vector_db_path)
+    vector_store = VectorStore(stage_vector_db_path, base_db_path=real_vector_db_path)
     print(f"VectorStore 초기화 완료")
     print(f"  - DB 경로: {vector_store.db_path}")
+    print(f"  - 실제 컬렉션 경로: {vector_store.base_db_path or vector_store.db_path}")
     print(f"  - 컬렉션 이름: {vector_store.collection_name}")
     try:
         collections = vector_store.client.list_collections()
@@ -247,6 +463,16 @@ def process_jsonl(
         db_path=stage_vector_db_path
     )
     
+    if not resume:
+        # 같은 task 디렉토리에 남은 이전 저널은 새 실행과 섞이지 않도록 제거
+        stale_journals = [
+            Path(staging_manager.journal_path),
+            project_root / "db" / "stage" / task_id / "staged_result" / "checkpoints" / CHECKPOINT_JOURNAL
+        ]
+        for journal_path in stale_journals:
+            if journal_path.exists():
+                journal_path.unlink()
+    
     ontology_updater = OntologyUpdater(
         graph_engine=graph_engine,
         vector_store=vector_store,
@@ -267,122 +493,110 @@ def process_jsonl(
     
     if resume and checkpoint_data:
         results = checkpoint_data.get("results", [])
-        staging_concepts = checkpoint_data.get("staging_concepts", [])
-        staging_manager.staged_concepts = staging_concepts
+        if checkpoint_data.get("journal"):
+            staging_concepts = StagingManager.load_journal(staging_manager.journal_path)
+            staged_count = checkpoint_data.get("staged_count")
+            if staged_count is not None:
+                staging_concepts = staging_concepts[:staged_count]
+        else:
+            staging_concepts = checkpoint_data.get("staging_concepts", [])
+        staging_manager.restore(staging_concepts)
         print(f"체크포인트에서 {len(results)}개 결과 복원")
     else:
         results = []
     
     print(f"{'='*60}")
-    print(f"개념 매핑 시작 ({len(concepts)}개, {start_index}번부터)")
+    print(f"개념 매핑 시작 ({len(concepts)}개, {start_index}번부터, workers: {workers})")
     print(f"{'='*60}\n")
     
     checkpoint_interval = 10
     checkpoint_dir = project_root / "db" / "stage" / task_id / "staged_result" / "checkpoints"
     
-    for idx, concept_data in enumerate(concepts[start_index:], start=start_index + 1):
-        concept = concept_data["concept"]
-        chunk_text = concept_data["chunk_text"]
-        section_id = concept_data["section_id"]
-        section_title = concept_data["section_title"]
-        
-        source = concept_data.get("source", f"section_{section_id}")
-        metadata = {k: v for k, v in concept_data.items() 
-                   if k not in ["concept", "chunk_text", "section_id", "section_title"]}
-        
-        print(f"[{idx}/{len(concepts)}] 처리 중: {concept}", flush=True)
-        
-        try:
-            result = mapper.map_concept(
-                concept=concept,
-                chunk_text=chunk_text,
-                source=source,
-                section_title=section_title,
-                metadata=metadata
-            )
+    if resume and checkpoint_data and not checkpoint_data.get("journal"):
+        seed_journal(checkpoint_dir, results, start_index, new_concept_manager, staging_manager)
+    
+    mapped = iter_mapped_concepts(mapper, concepts, start_index, workers)
+    try:
+        for idx, concept_data, get_result in mapped:
+            concept = concept_data["concept"]
+            chunk_text = concept_data["chunk_text"]
+            section_id = concept_data["section_id"]
+            section_title = concept_data["section_title"]
+            source = concept_data.get("source", f"section_{section_id}")
             
-            matched_concept_ids = result.get("matched_concept_ids", [])
-            result_entry = {
-                "concept": concept,
-                "section_id": section_id,
-                "section_title": section_title,
-                "source": source,
-                "chunk_text": chunk_text,
-                "matched_concept_ids": matched_concept_ids,
-                "is_new": result.get("is_new", False)
-            }
+            print(f"[{idx}/{len(concepts)}] 처리 중: {concept}", flush=True)
             
-            if resume and idx <= start_index:
-                if idx < len(results):
-                    results[idx - 1] = result_entry
+            try:
+                result = get_result()
+                
+                matched_concept_ids = result.get("matched_concept_ids", [])
+                result_entry = {
+                    "concept": concept,
+                    "section_id": section_id,
+                    "section_title": section_title,
+                    "source": source,
+                    "chunk_text": chunk_text,
+                    "matched_concept_ids": matched_concept_ids,
+                    "is_new": result.get("is_new", False)
+                }
+                
+                if resume and idx <= start_index:
+                    if idx < len(results):
+                        results[idx - 1] = result_entry
+                    else:
+                        results.append(result_entry)
                 else:
                     results.append(result_entry)
-            else:
-                results.append(result_entry)
-            
-            if matched_concept_ids:
-                print(f"  ✓ 매칭됨: {', '.join(matched_concept_ids)}", flush=True)
-            else:
-                print(f"  • 신규 개념으로 저장됨", flush=True)
-        
-        except KeyboardInterrupt:
-            print(f"\n\n사용자에 의해 중단되었습니다.", flush=True)
-            print(f"체크포인트 저장 중...", flush=True)
-            save_checkpoint(
-                checkpoint_dir,
-                idx - 1,
-                results,
-                staging_manager.staged_concepts,
-                stage_db_path
-            )
-            raise
-        
-        except Exception as e:
-            error_msg = str(e).lower()
-            error_type = type(e).__name__
-            
-            is_critical_error = (
-                "api" in error_msg or
-                "openai" in error_msg or
-                "rate limit" in error_msg or
-                "authentication" in error_msg or
-                "connection" in error_msg or
-                "network" in error_msg or
-                "timeout" in error_msg or
-                "httpx" in error_type.lower() or
-                "requests" in error_type.lower() or
-                "urllib" in error_type.lower()
-            )
+                
+                journal_result(checkpoint_dir, idx, result_entry, new_concept_manager, staging_manager)
+                
+                if matched_concept_ids:
+                    print(f"  ✓ 매칭됨: {', '.join(matched_concept_ids)}", flush=True)
+                else:
+                    print(f"  • 신규 개념으로 저장됨", flush=True)
             
-            if is_critical_error:
-                print(f"\n✗ 치명적 오류 발생: {e}", flush=True)
-                print(f"오류 타입: {error_type}", flush=True)
-                print(f"처리 중이던 개념: [{idx}/{len(concepts)}] {concept}", flush=True)
-                print(f"\n체크포인트 저장 중...", flush=True)
-                save_checkpoint(
-                    checkpoint_dir,
-                    idx - 1,
-                    results,
-                    staging_manager.staged_concepts,
-                    stage_db_path
-                )
-                print(f"체크포인트 저장 완료. --resume 옵션으로 재개할 수 있습니다.", flush=True)
+            except KeyboardInterrupt:
+                print(f"\n\n사용자에 의해 중단되었습니다.", flush=True)
+                print(f"체크포인트 저장 중...", flush=True)
+                save_checkpoint(checkpoint_dir, idx - 1, stage_db_path)
                 raise
             
-            print(f"  ✗ 오류 (건너뜀): {e}", flush=True)
-            continue
-        
-        if idx % checkpoint_interval == 0:
-            try:
-                save_checkpoint(
-                    checkpoint_dir,
-                    idx,
-                    results,
-                    staging_manager.staged_concepts,
-                    stage_db_path
-                )
             except Exception as e:
-                print(f"경고: 체크포인트 저장 실패 (계속 진행): {e}", flush=True)
+                error_msg = str(e).lower()
+                error_type = type(e).__name__
+                
+                is_critical_error = (
+                    "api" in error_msg or
+                    "openai" in error_msg or
+                    "rate limit" in error_msg or
+                    "authentication" in error_msg or
+                    "connection" in error_msg or
+                    "network" in error_msg or
+                    "timeout" in error_msg or
+                    "httpx" in error_type.lower() or
+                    "requests" in error_type.lower() or
+                    "urllib" in error_type.lower()
+                )
+                
+                if is_critical_error:
+                    print(f"\n✗ 치명적 오류 발생: {e}", flush=True)
+                    print(f"오류 타입: {error_type}", flush=True)
+                    print(f"처리 중이던 개념: [{idx}/{len(concepts)}] {concept}", flush=True)
+                    print(f"\n체크포인트 저장 중...", flush=True)
+                    save_checkpoint(checkpoint_dir, idx - 1, stage_db_path)
+                    print(f"체크포인트 저장 완료. --resume 옵션으로 재개할 수 있습니다.", flush=True)
+                    raise
+                
+                print(f"  ✗ 오류 (건너뜀): {e}", flush=True)
+                continue
+            
+            if idx % checkpoint_interval == 0:
+                try:
+                    save_checkpoint(checkpoint_dir, idx)
+                except Exception as e:
+                    print(f"경고: 체크포인트 저장 실패 (계속 진행): {e}", flush=True)
+    finally:
+        mapped.close()
     
     print(f"\n{'='*60}")
     print(f"스테이징된 변경사항 확인")
@@ -391,6 +605,7 @@ def process_jsonl(
     staging_manager.print_staging_summary()
     
     if staging_manager.staged_concepts:
+        staging_manager.save_snapshot()
         print(f"\n✓ 스테이징 JSON 파일 저장됨: {staging_manager.staging_file_path}")
     
     if staging_manager.staged_concepts:
@@ -435,13 +650,7 @@ def process_jsonl(
     except KeyboardInterrupt:
         print(f"\n\n사용자에 의해 중단되었습니다.", flush=True)
         print(f"체크포인트 저장 중...", flush=True)
-        save_checkpoint(
-            checkpoint_dir,
-            len(results),
-            results,
-            staging_manager.staged_concepts,
-            stage_db_path
-        )
+        save_checkpoint(checkpoint_dir, len(results), stage_db_path)
         raise
     except Exception as e:
         error_msg = str(e).lower()
@@ -464,13 +673,7 @@ def process_jsonl(
             print(f"\n✗ 치명적 오류 발생 (재매칭 중): {e}", flush=True)
             print(f"오류 타입: {error_type}", flush=True)
             print(f"\n체크포인트 저장 중...", flush=True)
-            save_checkpoint(
-                checkpoint_dir,
-                len(results),
-                results,
-                staging_manager.staged_concepts,
-                stage_db_path
-            )
+            save_checkpoint(checkpoint_dir, len(results), stage_db_path)
             print(f"체크포인트 저장 완료. --resume 옵션으로 재개할 수 있습니다.", flush=True)
             raise
         
@@ -495,7 +698,7 @@ def process_jsonl(
     
     stage_db_copy = output_dir / "new_concepts.db"
     if Path(stage_db_path).exists():
-        shutil.copy2(stage_db_path, stage_db_copy)
+        backup_sqlite(stage_db_path, stage_db_copy)
     
     print(f"\n{'='*60}")
     print(f"결과물 저장 완료")
@@ -536,6 +739,12 @@ def main():
         action="store_true",
         help="Enable debug mode"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of concepts analyzed concurrently (bounds concurrent LLM calls, 1 = sequential)"
+    )
     
     args = parser.parse_args()
     
@@ -548,7 +757,8 @@ def main():
             graph_endpoint=args.graph_endpoint,
             project_root=project_root,
             resume=args.resume,
-            debug=args.debug
+            debug=args.debug,
+            workers=args.workers
         )
     except KeyboardInterrupt:
         print("\n\n중단되었습니다.")
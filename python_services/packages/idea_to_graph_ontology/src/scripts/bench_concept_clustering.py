@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""신규 개념 클러스터링 벤치마크 (증분 그래프 vs 전체 DBSCAN 재계산).
+
+합성 임베딩으로 N개 개념을 만든 뒤
+- build: 저장된 그래프 없이 처음 클러스터링 (이웃 그래프 전체 생성)
+- incremental: 이후 save_concept처럼 3개마다 클러스터링할 때의 평균 시간
+- legacy: 이전 방식 (N x N 코사인 행렬 + 이름 이중 루프 + DBSCAN), --legacy-max 이하에서만
+을 측정하고, legacy를 돌린 경우 두 결과의 클러스터가 같은지 확인합니다.
+
+Usage:
+    python bench_concept_clustering.py
+    python bench_concept_clustering.py --sizes 10000 --dim 1024 --inserts 30
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.ontology.src.storage.new_concept_manager import NewConceptManager
+
+
+def make_concepts(n: int, dim: int, seed: int = 0) -> Tuple[List[str], np.ndarray]:
+    """클러스터 구조가 있는 합성 개념 생성.
+
+    중심 주변에 퍼짐이 다른 그룹을 만들고 (조밀한 클러스터부터 노이즈까지),
+    일부는 같은 이름을 갖게 합니다.
+    """
+    rng = np.random.default_rng(seed)
+    n_centers = max(1, n // 8)
+    centers = rng.standard_normal((n_centers, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    spread = rng.uniform(0.3, 0.8, n_centers).astype(np.float32)
+
+    assign = rng.integers(0, n_centers, n)
+    noise = rng.standard_normal((n, dim)).astype(np.float32) / np.sqrt(dim)
+    embeddings = centers[assign] + spread[assign, None] * noise
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    names = [f"concept_{i}" for i in range(n)]
+    for i in rng.choice(n, n // 50, replace=False):
+        names[i] = f"concept_{rng.integers(0, n)}"
+    return names, embeddings.astype(np.float32)
+
+
+def insert_concepts(manager: NewConceptManager, names: List[str], embeddings: np.ndarray) -> None:
+    cursor = manager.conn.cursor()
+    cursor.executemany(
+        "INSERT INTO new_concepts (concept, description, source, embedding) VALUES (?, ?, ?, ?)",
+        [(name, name, "bench", emb.tobytes()) for name, emb in zip(names, embeddings)]
+    )
+    manager.conn.commit()
+
+
+def stored_clusters(manager: NewConceptManager) -> List[Tuple[str, ...]]:
+    cursor = manager.conn.cursor()
+    cursor.execute("SELECT concept_ids FROM concept_clusters")
+    return sorted(tuple(row[0].split(",")) for row in cursor.fetchall())
+
+
+def legacy_clusters(names: List[str], embeddings: np.ndarray) -> List[Tuple[str, ...]]:
+    """이전 _create_clusters의 real 모드 계산."""
+    from sklearn.cluster import DBSCAN
+    from sklearn.metrics.pairwise import cosine_similarity
+    from sklearn.preprocessing import normalize
+
+    embeddings_normalized = normalize(embeddings, norm='l2')
+    distance_matrix = np.clip(1 - cosine_similarity(embeddings_normalized), 0, 2)
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            if names[i] == names[j]:
+                distance_matrix[i, j] = 0.0
+                distance_matrix[j, i] = 0.0
+
+    labels = DBSCAN(eps=0.25, min_samples=3, metric='precomputed').fit_predict(distance_matrix)
+    clusters_dict = {}
+    for idx, label in enumerate(labels):
+        if label != -1:
+            clusters_dict.setdefault(label, []).append(names[idx])
+
+    result = []
+    for concept_list in clusters_dict.values():
+        if len(concept_list) < 2:
+            continue
+        if len(concept_list) <= 10:
+            result.append(tuple(concept_list))
+            continue
+        indices = [names.index(c) for c in concept_list]
+        sub_distance = np.clip(1 - cosine_similarity(embeddings_normalized[indices]), 0, 2)
+        sub_labels = DBSCAN(eps=0.15, min_samples=2, metric='precomputed').fit_predict(sub_distance)
+        sub_clusters = {}
+        for sub_idx, sub_label in enumerate(sub_labels):
+            if sub_label != -1:
+                sub_clusters.setdefault(sub_label, []).append(concept_list[sub_idx])
+        result.extend(tuple(c) for c in sub_clusters.values() if 2 <= len(c) <= 10)
+    return sorted(result)
+
+
+def run(n: int, args) -> None:
+    names, embeddings = make_concepts(n + args.inserts, args.dim, seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = NewConceptManager(str(Path(tmp_dir) / "new_concepts.db"), mode="real")
+        insert_concepts(manager, names[:n], embeddings[:n])
+
+        st = time.time()
+        manager._create_clusters()
+        build_time = time.time() - st
+
+        # 새 프로세스처럼 저장된 그래프에서 다시 시작
+        manager.close()
+        manager = NewConceptManager(str(Path(tmp_dir) / "new_concepts.db"), mode="real")
+
+        times = []
+        for i in range(n, n + args.inserts, 3):
+            insert_concepts(manager, names[i:i + 3], embeddings[i:i + 3])
+            st = time.time()
+            manager._create_clusters()
+            times.append(time.time() - st)
+
+        total = n + args.inserts
+        print(f"\n[N={n}] build: {build_time:.2f}s, "
+              f"incremental: first {times[0] * 1000:.1f}ms (그래프 로드 포함), "
+              f"avg {np.mean(times[1:] or times) * 1000:.1f}ms / 3개")
+
+        if total <= args.legacy_max:
+            st = time.time()
+            expected = legacy_clusters(names[:total], embeddings[:total])
+            legacy_time = time.time() - st
+            actual = stored_clusters(manager)
+            print(f"[N={n}] legacy full recompute: {legacy_time:.2f}s / 3개, "
+                  f"clusters: {len(actual)} (legacy {len(expected)}), "
+                  f"equivalent: {actual == expected}")
+        manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="신규 개념 클러스터링 벤치마크")
+    parser.add_argument("--sizes", default="10000,100000", help="개념 수 (콤마 구분)")
+    parser.add_argument("--dim", type=int, default=1024, help="임베딩 차원 (bge-m3: 1024)")
+    parser.add_argument("--inserts", type=int, default=30, help="증분으로 추가할 개념 수")
+    parser.add_argument("--legacy-max", type=int, default=12000, help="legacy 방식을 실행할 최대 개념 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for n in [int(x) for x in args.sizes.split(",")]:
+        run(n, args)
+
+
+if __name__ == "__main__":
+    main()
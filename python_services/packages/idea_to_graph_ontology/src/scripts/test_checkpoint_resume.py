@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""assign_ontology_concept_to_chunk 체크포인트 재개 테스트."""
+
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.ontology.src.scripts.assign_ontology_concept_to_chunk import (
+    journal_result,
+    load_checkpoint,
+    save_checkpoint,
+    seed_journal,
+)
+
+
+class FakeNewConceptManager:
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("CREATE TABLE new_concepts (id INTEGER PRIMARY KEY, name TEXT)")
+
+    def add(self, name):
+        self.conn.execute("INSERT INTO new_concepts (name) VALUES (?)", (name,))
+
+
+class FakeStagingManager:
+    def __init__(self, staged_concepts=None):
+        self.staged_concepts = list(staged_concepts or [])
+
+
+def result_entry(concept):
+    return {"concept": concept, "matched_concept_ids": [], "is_new": True}
+
+
+def test_resume_twice_from_legacy_checkpoint(tmp_path: Path):
+    """이전 형식 체크포인트로 재개 후 다시 중단되어도 이전 결과가 유지되는지 확인."""
+    checkpoint_dir = tmp_path / "checkpoints"
+    checkpoint_dir.mkdir()
+
+    legacy_results = [result_entry("RAG"), result_entry("Finetuning")]
+    with open(checkpoint_dir / "checkpoint_20250101_000000.json", 'w', encoding='utf-8') as f:
+        json.dump({
+            "processed_index": 2,
+            "results": legacy_results,
+            "staging_concepts": [{"concept": "RAG"}]
+        }, f)
+
+    new_concept_manager = FakeNewConceptManager()
+    new_concept_manager.add("RAG")
+    staging_manager = FakeStagingManager([{"concept": "RAG"}])
+
+    # 첫 번째 재개: 이전 형식에서 복원 후 저널 생성
+    checkpoint_data = load_checkpoint(checkpoint_dir)
+    assert not checkpoint_data.get("journal")
+    results = checkpoint_data["results"]
+    seed_journal(checkpoint_dir, results, checkpoint_data["processed_index"],
+                 new_concept_manager, staging_manager)
+
+    # 개념 하나를 더 처리한 뒤 중단
+    new_concept_manager.add("LLMTwin")
+    entry = result_entry("LLMTwin")
+    results.append(entry)
+    journal_result(checkpoint_dir, 3, entry, new_concept_manager, staging_manager)
+    save_checkpoint(checkpoint_dir, 3)
+
+    # 두 번째 재개: 저널만 읽어도 이전 결과가 모두 남아 있어야 함
+    checkpoint_data = load_checkpoint(checkpoint_dir)
+    assert checkpoint_data["journal"]
+    assert checkpoint_data["processed_index"] == 3
+    assert [x["concept"] for x in checkpoint_data["results"]] == ["RAG", "Finetuning", "LLMTwin"]
+    assert checkpoint_data["db_max_id"] == 2
+    assert checkpoint_data["staged_count"] == 1
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_resume_twice_from_legacy_checkpoint(Path(tmp_dir))
+    print("OK")
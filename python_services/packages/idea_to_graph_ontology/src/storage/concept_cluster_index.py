@@ -0,0 +1,564 @@
+"""Incremental DBSCAN clustering over a persisted neighbour graph."""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import sqlite3
+from collections import defaultdict
+import numpy as np
+
+
+# 한 번에 유사도를 계산할 행 수 (block x N 행렬만 메모리에 올림)
+SIMILARITY_BLOCK_SIZE = 1024
+
+
+def order_key(node: int) -> Tuple[int, int]:
+    """노드 정렬 키.
+
+    자기 DB 개념(양수 id)이 먼저, Real DB 개념(음수 id)이 뒤에 오며
+    각각 id 순서입니다. 기존 DBSCAN 입력 순서(Stage + Real)와 같습니다.
+    """
+    return (0, node) if node > 0 else (1, -node)
+
+
+def decode_embedding(data: Optional[bytes]) -> Optional[np.ndarray]:
+    """직렬화된 임베딩을 정규화된 float32 벡터로 복원."""
+    if not data:
+        return None
+    vec = np.frombuffer(data, dtype=np.float32).astype(np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm > 0 else vec
+
+
+class ConceptClusterIndex:
+    """신규 개념 클러스터링용 증분 인덱스.
+
+    eps 이내(코사인 거리)의 이웃 그래프를 SQLite에 저장해 두고, 새 개념이
+    들어오면 그 개념과 기존 개념 사이의 유사도만 계산합니다 (O(N) / 개념).
+    같은 이름의 개념은 이름 해시맵으로 거리 0의 이웃이 됩니다.
+
+    라벨은 DBSCAN(eps, min_samples)과 같은 의미를 유지합니다.
+    - core: 자신을 포함한 이웃 수 >= min_samples
+    - 클러스터: core 사이의 연결 요소, 라벨은 가장 앞선 core 노드
+    - border: 이웃 core 중 가장 앞선 클러스터에 속함 (sklearn 탐색 순서와 동일)
+
+    노드 id는 자기 DB 개념은 new_concepts.id, Real DB 개념(stage 모드)은 -id 입니다.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        eps: float = 0.25,
+        min_samples: int = 3,
+        compute_embedding: Optional[Callable[[str], Optional[bytes]]] = None
+    ) -> None:
+        """ConceptClusterIndex 초기화.
+
+        Args:
+            conn: 그래프를 저장할 SQLite 연결 (NewConceptManager DB)
+            eps: 최대 코사인 거리
+            min_samples: core 판정 최소 이웃 수 (자기 자신 포함)
+            compute_embedding: 임베딩이 없는 개념의 description 임베딩 계산 함수
+        """
+        self.conn = conn
+        self.eps = eps
+        self.min_samples = min_samples
+        self.compute_embedding = compute_embedding
+        self._create_tables()
+
+        self.loaded = False
+        self.names: Dict[int, str] = {}
+        self.name_map: Dict[str, Set[int]] = defaultdict(set)
+        self.adj: Dict[int, Set[int]] = {}
+        self.labels: Dict[int, Optional[int]] = {}
+        self.members: Dict[int, Set[int]] = defaultdict(set)
+
+        # DB별(자기 DB: 1, Real DB: -1) 노드 수와 최대 id
+        self.counts = {1: 0, -1: 0}
+        self.max_ids = {1: 0, -1: 0}
+
+        # 정규화된 임베딩 행렬 (필요할 때 한 번만 로드)
+        self.emb: Optional[np.ndarray] = None
+        self.emb_rows: Dict[int, int] = {}
+        self.row_ids = np.zeros(0, dtype=np.int64)
+        self.n_rows = 0
+
+    def _create_tables(self) -> None:
+        """그래프 테이블 생성."""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS concept_graph_nodes (
+                node INTEGER PRIMARY KEY,
+                concept TEXT,
+                label INTEGER
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS concept_graph_edges (
+                node_a INTEGER,
+                node_b INTEGER,
+                PRIMARY KEY (node_a, node_b)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS clustering_metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # 상태 로드 / 초기화
+    # ------------------------------------------------------------------
+
+    def _graph_params(self) -> str:
+        return f"{self.eps}:{self.min_samples}"
+
+    def _load(self) -> bool:
+        """저장된 그래프를 메모리로 로드.
+
+        Returns:
+            저장된 그래프를 재사용할 수 있으면 True, 새로 만들어야 하면 False
+        """
+        self.loaded = True
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT value FROM clustering_metadata WHERE key = 'graph_params'")
+        row = cursor.fetchone()
+        if not row or row[0] != self._graph_params():
+            self.reset()
+            return False
+
+        cursor.execute("SELECT node, concept, label FROM concept_graph_nodes")
+        for node, concept, label in cursor.fetchall():
+            self.names[node] = concept
+            self.name_map[concept].add(node)
+            self.adj[node] = set()
+            self.labels[node] = label
+            if label is not None:
+                self.members[label].add(node)
+            self._count(node, 1)
+
+        cursor.execute("SELECT node_a, node_b FROM concept_graph_edges")
+        for a, b in cursor.fetchall():
+            if a in self.adj and b in self.adj:
+                self.adj[a].add(b)
+                self.adj[b].add(a)
+        return True
+
+    def reset(self) -> None:
+        """저장된 그래프와 메모리 상태 초기화."""
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM concept_graph_nodes")
+        cursor.execute("DELETE FROM concept_graph_edges")
+        cursor.execute(
+            "INSERT OR REPLACE INTO clustering_metadata (key, value) VALUES ('graph_params', ?)",
+            (self._graph_params(),)
+        )
+        self.conn.commit()
+
+        self.names.clear()
+        self.name_map.clear()
+        self.adj.clear()
+        self.labels.clear()
+        self.members.clear()
+        self.counts = {1: 0, -1: 0}
+        self.max_ids = {1: 0, -1: 0}
+        self.emb = None
+        self.emb_rows = {}
+        self.row_ids = np.zeros(0, dtype=np.int64)
+        self.n_rows = 0
+
+    # ------------------------------------------------------------------
+    # 노드 동기화
+    # ------------------------------------------------------------------
+
+    def _count(self, node: int, delta: int) -> None:
+        sign = 1 if node > 0 else -1
+        self.counts[sign] += delta
+        if delta > 0:
+            self.max_ids[sign] = max(self.max_ids[sign], abs(node))
+
+    def _list_nodes(self, conn: sqlite3.Connection, sign: int) -> Tuple[Dict[int, str], Set[int]]:
+        """DB의 개념 중 새로 추가된 것과 삭제된 것 조회.
+
+        new_concepts.id는 AUTOINCREMENT라 재사용되지 않으므로 알려진 최대 id
+        이후만 읽고, 개수가 맞지 않을 때만 전체 id를 비교합니다.
+
+        Returns:
+            (추가된 {node: concept}, 삭제된 node 집합)
+        """
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, concept FROM new_concepts WHERE id > ?", (self.max_ids[sign],))
+        added = {sign * row[0]: row[1] for row in cursor.fetchall()}
+
+        cursor.execute("SELECT COUNT(*) FROM new_concepts")
+        count = cursor.fetchone()[0]
+
+        removed = set()
+        if count - len(added) != self.counts[sign]:
+            cursor.execute("SELECT id FROM new_concepts")
+            current = {sign * row[0] for row in cursor.fetchall()}
+            removed = {n for n in self.names if (n > 0) == (sign > 0)} - current
+        return added, removed
+
+    def _graph_covers(self, conn: sqlite3.Connection) -> bool:
+        """다른 DB(Real)의 그래프가 현재 개념 전체를 같은 파라미터로 덮고 있는지 확인."""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM clustering_metadata WHERE key = 'graph_params'")
+            row = cursor.fetchone()
+            if not row or row[0] != self._graph_params():
+                return False
+            cursor.execute("""SELECT COUNT(*) FROM new_concepts
+                            WHERE id NOT IN (SELECT node FROM concept_graph_nodes)""")
+            return cursor.fetchone()[0] == 0
+        except sqlite3.Error:
+            return False
+
+    def _load_embeddings(self, conn: sqlite3.Connection, sign: int, nodes: Iterable[int]) -> Dict[int, Optional[np.ndarray]]:
+        """노드 임베딩 로드 (없으면 계산, 자기 DB 개념은 계산 결과 저장)."""
+        ids = sorted(abs(n) for n in nodes)
+        result: Dict[int, Optional[np.ndarray]] = {}
+        cursor = conn.cursor()
+        updates = []
+
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT id, embedding, description FROM new_concepts WHERE id IN ({placeholders})",
+                chunk
+            )
+            for concept_id, embedding, description in cursor.fetchall():
+                if not embedding and self.compute_embedding and description:
+                    embedding = self.compute_embedding(description)
+                    # Real 개념은 저장하지 않음
+                    if embedding and sign > 0:
+                        updates.append((embedding, concept_id))
+                result[sign * concept_id] = decode_embedding(embedding)
+
+        if updates:
+            cursor.executemany("UPDATE new_concepts SET embedding = ? WHERE id = ?", updates)
+            conn.commit()
+        return result
+
+    def _append_embeddings(self, vectors: Dict[int, Optional[np.ndarray]]) -> None:
+        """임베딩 행렬에 노드 추가 (용량은 두 배씩 증가)."""
+        if not vectors:
+            return
+
+        dim = self.emb.shape[1] if self.emb is not None else next(
+            (len(v) for v in vectors.values() if v is not None), 1024
+        )
+        needed = self.n_rows + len(vectors)
+        if self.emb is None or needed > self.emb.shape[0]:
+            capacity = max(needed, 2 * (self.emb.shape[0] if self.emb is not None else 0), 1024)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown_ids = np.zeros(capacity, dtype=np.int64)
+            if self.emb is not None:
+                grown[:self.n_rows] = self.emb[:self.n_rows]
+                grown_ids[:self.n_rows] = self.row_ids[:self.n_rows]
+            self.emb = grown
+            self.row_ids = grown_ids
+
+        for node, vec in vectors.items():
+            row = self.n_rows
+            if vec is not None:
+                self.emb[row] = vec
+            self.emb_rows[node] = row
+            self.row_ids[row] = node
+            self.n_rows += 1
+
+    def _drop_embedding(self, node: int) -> None:
+        row = self.emb_rows.pop(node, None)
+        if row is not None:
+            self.emb[row] = 0
+            self.row_ids[row] = 0
+
+    def embedding(self, node: int) -> np.ndarray:
+        """정규화된 노드 임베딩."""
+        return self.emb[self.emb_rows[node]]
+
+    # ------------------------------------------------------------------
+    # 이웃 그래프 갱신
+    # ------------------------------------------------------------------
+
+    def _neighbors(self, new_nodes: List[int], skip_real_pairs: bool) -> List[Tuple[int, int]]:
+        """새 노드와 전체 노드 사이의 eps 이내 쌍을 블록 단위로 계산.
+
+        Args:
+            new_nodes: 새 노드 (임베딩 행렬에 이미 추가됨)
+            skip_real_pairs: Real-Real 쌍은 Real DB 그래프에서 가져오므로 건너뜀
+        """
+        if not new_nodes or self.n_rows == 0:
+            return []
+
+        threshold = 1.0 - self.eps
+        row_ids = self.row_ids[:self.n_rows]
+        active = row_ids != 0
+        is_real = row_ids < 0
+        matrix = self.emb[:self.n_rows]
+
+        pairs = []
+        for i in range(0, len(new_nodes), SIMILARITY_BLOCK_SIZE):
+            block = new_nodes[i:i + SIMILARITY_BLOCK_SIZE]
+            block_rows = np.array([self.emb_rows[n] for n in block])
+            sims = matrix[block_rows] @ matrix.T
+
+            mask = (sims >= threshold) & active
+            mask[np.arange(len(block)), block_rows] = False
+            if skip_real_pairs:
+                block_real = np.array([n < 0 for n in block])
+                mask[block_real] &= ~is_real
+
+            for bi, col in zip(*np.nonzero(mask)):
+                pairs.append((block[bi], int(row_ids[col])))
+        return pairs
+
+    def _add_edges(self, pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        added = []
+        for a, b in pairs:
+            if a == b or b in self.adj[a]:
+                continue
+            self.adj[a].add(b)
+            self.adj[b].add(a)
+            added.append((a, b) if a < b else (b, a))
+        return added
+
+    def _is_core(self, node: int) -> bool:
+        return len(self.adj[node]) + 1 >= self.min_samples
+
+    def update(
+        self,
+        real_conn: Optional[sqlite3.Connection] = None
+    ) -> Tuple[Set[int], bool]:
+        """DB의 현재 개념으로 그래프와 라벨을 증분 갱신.
+
+        Args:
+            real_conn: Real DB 연결 (stage 모드에서 Real 개념도 함께 클러스터링)
+
+        Returns:
+            (라벨이 바뀐 클러스터 라벨 집합, 그래프를 처음부터 다시 만들었는지 여부)
+        """
+        rebuilt = False
+        if not self.loaded:
+            rebuilt = not self._load()
+
+        added, removed = self._list_nodes(self.conn, 1)
+        real_reused = False
+        if real_conn is not None:
+            real_added, real_removed = self._list_nodes(real_conn, -1)
+            added.update(real_added)
+            removed |= real_removed
+            real_reused = bool(real_added) and self._graph_covers(real_conn)
+        else:
+            # Real DB 없이 실행되면 이전 Real 노드는 제외
+            if self.counts[-1]:
+                removed |= {n for n in self.names if n < 0}
+
+        if not added and not removed:
+            return set(), rebuilt
+
+        seeds: Set[int] = set()
+        old_labels: Set[int] = set()
+        deleted_edges: List[Tuple[int, int]] = []
+
+        # 삭제된 노드 제거
+        for node in removed:
+            for other in self.adj.pop(node, ()):
+                self.adj[other].discard(node)
+                seeds.add(other)
+                deleted_edges.append((node, other) if node < other else (other, node))
+            name = self.names.pop(node, None)
+            if name is not None:
+                self._count(node, -1)
+                self.name_map[name].discard(node)
+                if not self.name_map[name]:
+                    del self.name_map[name]
+            label = self.labels.pop(node, None)
+            if label is not None:
+                old_labels.add(label)
+                self.members[label].discard(node)
+            self._drop_embedding(node)
+        seeds -= removed
+
+        # 추가된 노드 임베딩 (처음이면 기존 노드 전체도 로드)
+        new_edges: List[Tuple[int, int]] = []
+        if added:
+            if self.emb is None and self.names:
+                self._append_embeddings(self._load_embeddings(self.conn, 1, [n for n in self.names if n > 0]))
+                if real_conn is not None:
+                    self._append_embeddings(self._load_embeddings(real_conn, -1, [n for n in self.names if n < 0]))
+            self._append_embeddings(self._load_embeddings(self.conn, 1, [n for n in added if n > 0]))
+            if real_conn is not None:
+                self._append_embeddings(self._load_embeddings(real_conn, -1, [n for n in added if n < 0]))
+
+            for node, name in added.items():
+                self.names[node] = name
+                self.adj[node] = set()
+                self.labels[node] = None
+                self._count(node, 1)
+
+            new_nodes = sorted(added, key=order_key)
+            pairs = self._neighbors(new_nodes, skip_real_pairs=real_reused)
+
+            # 같은 이름은 거리 0
+            for node in new_nodes:
+                name = added[node]
+                pairs.extend((node, other) for other in self.name_map[name])
+                self.name_map[name].add(node)
+
+            # Real-Real 쌍은 Real DB 그래프에서 복사
+            if real_reused:
+                real_added = {-n for n in added if n < 0}
+                cursor = real_conn.cursor()
+                cursor.execute("SELECT node_a, node_b FROM concept_graph_edges")
+                for a, b in cursor.fetchall():
+                    if (a in real_added or b in real_added) and -a in self.adj and -b in self.adj:
+                        pairs.append((-a, -b))
+
+            new_edges = self._add_edges(pairs)
+            seeds |= set(added)
+            for a, b in new_edges:
+                seeds.add(a)
+                seeds.add(b)
+
+        changed = self._relabel(seeds, old_labels)
+        self._persist(added, removed, new_edges, deleted_edges, changed["nodes"])
+        return changed["labels"], rebuilt
+
+    # ------------------------------------------------------------------
+    # 라벨 갱신
+    # ------------------------------------------------------------------
+
+    def _relabel(self, seeds: Set[int], old_labels: Set[int]) -> Dict[str, Set[int]]:
+        """영향받은 영역만 DBSCAN 라벨 재계산.
+
+        Args:
+            seeds: 이웃/core 여부가 바뀌었을 수 있는 노드
+            old_labels: 노드 삭제로 영향받은 기존 라벨
+
+        Returns:
+            {"labels": 바뀐 라벨(이전/이후), "nodes": 라벨이 바뀐 노드}
+        """
+        affected_labels = set(old_labels)
+        for node in seeds:
+            if self.labels.get(node) is not None:
+                affected_labels.add(self.labels[node])
+
+        region: Set[int] = set(seeds)
+        for label in affected_labels:
+            region |= self.members.get(label, set())
+
+        # core 연결 요소 탐색 (다른 클러스터와 이어지면 그 클러스터도 영역에 포함)
+        new_labels: Dict[int, Optional[int]] = {}
+        stack = [n for n in region if self._is_core(n)]
+        visited: Set[int] = set()
+        components = []
+        while stack:
+            start = stack.pop()
+            if start in visited or not self._is_core(start):
+                continue
+            component = []
+            todo = [start]
+            visited.add(start)
+            while todo:
+                node = todo.pop()
+                component.append(node)
+                label = self.labels.get(node)
+                if label is not None and label not in affected_labels:
+                    affected_labels.add(label)
+                    for member in self.members[label]:
+                        region.add(member)
+                        if self._is_core(member) and member not in visited:
+                            stack.append(member)
+                for other in self.adj[node]:
+                    if other not in visited and self._is_core(other):
+                        visited.add(other)
+                        todo.append(other)
+            components.append(component)
+
+        for component in components:
+            label = min(component, key=order_key)
+            for node in component:
+                new_labels[node] = label
+
+        # border / noise 재배치: 영역 내 non-core + 영역 core의 non-core 이웃
+        border_candidates = {n for n in region if not self._is_core(n)}
+        for node in visited:
+            border_candidates |= {o for o in self.adj[node] if not self._is_core(o)}
+
+        for node in border_candidates:
+            candidates = [
+                new_labels.get(o, self.labels.get(o))
+                for o in self.adj[node] if self._is_core(o)
+            ]
+            candidates = [c for c in candidates if c is not None]
+            new_labels[node] = min(candidates, key=order_key) if candidates else None
+
+        changed_nodes = set()
+        changed_labels = set(affected_labels)
+        for node, label in new_labels.items():
+            old = self.labels.get(node)
+            if old == label:
+                continue
+            changed_nodes.add(node)
+            if old is not None:
+                self.members[old].discard(node)
+                if not self.members[old]:
+                    del self.members[old]
+                changed_labels.add(old)
+            if label is not None:
+                self.members[label].add(node)
+                changed_labels.add(label)
+            self.labels[node] = label
+
+        return {"labels": changed_labels, "nodes": changed_nodes}
+
+    def _persist(
+        self,
+        added: Dict[int, str],
+        removed: Set[int],
+        new_edges: List[Tuple[int, int]],
+        deleted_edges: List[Tuple[int, int]],
+        changed_nodes: Set[int]
+    ) -> None:
+        cursor = self.conn.cursor()
+        if removed:
+            cursor.executemany("DELETE FROM concept_graph_nodes WHERE node = ?", [(n,) for n in removed])
+        if deleted_edges:
+            cursor.executemany(
+                "DELETE FROM concept_graph_edges WHERE node_a = ? AND node_b = ?", deleted_edges
+            )
+        if added:
+            cursor.executemany(
+                "INSERT OR REPLACE INTO concept_graph_nodes (node, concept, label) VALUES (?, ?, ?)",
+                [(n, name, self.labels.get(n)) for n, name in added.items()]
+            )
+        if new_edges:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO concept_graph_edges (node_a, node_b) VALUES (?, ?)", new_edges
+            )
+        updates = [(self.labels.get(n), n) for n in changed_nodes if n not in added]
+        if updates:
+            cursor.executemany("UPDATE concept_graph_nodes SET label = ? WHERE node = ?", updates)
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+
+    def cluster_members(self, label: int) -> List[int]:
+        """클러스터 노드 목록 (입력 순서)."""
+        return sorted(self.members.get(label, ()), key=order_key)
+
+    def first_node(self, name: str) -> Optional[int]:
+        """같은 이름의 노드 중 가장 앞선 노드."""
+        nodes = self.name_map.get(name)
+        return min(nodes, key=order_key) if nodes else None
+
+    def is_real_name(self, name: str) -> bool:
+        """Real DB에 같은 이름의 개념이 있는지 여부."""
+        return any(n < 0 for n in self.name_map.get(name, ()))
+
+    def __len__(self) -> int:
+        return len(self.names)
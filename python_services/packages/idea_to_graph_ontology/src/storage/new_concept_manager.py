@@ -6,8 +6,8 @@ from pathlib import Path
 import numpy as np
 from sklearn.cluster import DBSCAN
 from sklearn.metrics.pairwise import cosine_similarity
-from collections import defaultdict
-from sklearn.preprocessing import normalize
+
+from packages.ontology.src.storage.concept_cluster_index import ConceptClusterIndex, order_key
 
 
 class NewConceptManager:
@@ -49,6 +49,7 @@ class NewConceptManager:
         
         self.conn = sqlite3.connect(self.db_path)
         self.vector_store = vector_store
+        self.cluster_index: Optional[ConceptClusterIndex] = None
         self._create_tables()
         
         # 마지막 클러스터링 시점의 개념 개수 추적
@@ -77,10 +78,16 @@ class NewConceptManager:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 cluster_name TEXT,
                 concept_ids TEXT,
+                label INTEGER,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
         
+        # 증분 클러스터링 라벨 (이전 버전 DB 마이그레이션)
+        cursor.execute("PRAGMA table_info(concept_clusters)")
+        if "label" not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE concept_clusters ADD COLUMN label INTEGER")
+        
         # 클러스터링 추적용 테이블
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS clustering_metadata (
@@ -157,7 +164,7 @@ class NewConceptManager:
             return None
         
         try:
-            embedding_fn = self.vector_store.collection._embedding_function
+            embedding_fn = self.vector_store.embedding_function
             
             if hasattr(embedding_fn, 'embed'):
                 emb_list = embedding_fn.embed([description])
@@ -258,223 +265,116 @@ class NewConceptManager:
         
         return concepts
 
+    def _get_cluster_index(self) -> ConceptClusterIndex:
+        """클러스터 인덱스 (처음 사용할 때 생성)."""
+        if self.cluster_index is None:
+            self.cluster_index = ConceptClusterIndex(
+                self.conn,
+                eps=0.25,
+                min_samples=3,
+                compute_embedding=self._compute_embedding
+            )
+        return self.cluster_index
+
     def _create_clusters(self, real_new_concept_db_path: Optional[str] = None) -> None:
         """신규 개념들을 벡터 유사도 기반으로 클러스터링.
         
         description의 임베딩을 비교하여 유사한 개념들을 클러스터로 묶습니다.
-        DBSCAN 알고리즘을 사용하여 밀도 기반 클러스터링을 수행합니다.
+        DBSCAN(eps=0.25, min_samples=3)과 같은 밀도 기반 클러스터링을
+        ConceptClusterIndex의 이웃 그래프로 증분 수행하며, 새 개념이 영향을 준
+        클러스터만 다시 저장합니다.
         
         Args:
             real_new_concept_db_path: Real DB 경로 (stage 모드일 때 Real 개념도 함께 클러스터링)
         """
+        index = self._get_cluster_index()
         
-        # Stage DB의 모든 신규 개념 가져오기
-        stage_concepts = self.get_all_concepts()
-        
-        # Real DB의 개념도 함께 로드 (stage 모드이고 real 경로가 제공된 경우)
-        real_concepts = []
+        # Real DB의 개념도 함께 클러스터링 (stage 모드이고 real 경로가 제공된 경우)
+        real_conn = None
         if self.mode == "stage" and real_new_concept_db_path and Path(real_new_concept_db_path).exists():
             try:
                 real_conn = sqlite3.connect(real_new_concept_db_path)
-                real_cursor = real_conn.cursor()
-                real_cursor.execute("""SELECT concept, description, source, embedding, 
-                                    original_keyword, noun_phrase_summary, reason 
-                                    FROM new_concepts""")
-                for row in real_cursor.fetchall():
-                    real_concepts.append({
-                        "concept": row[0],
-                        "description": row[1],
-                        "source": row[2],
-                        "embedding": row[3],
-                        "original_keyword": row[4],
-                        "noun_phrase_summary": row[5],
-                        "reason": row[6]
-                    })
-                real_conn.close()
             except Exception as e:
                 print(f"[경고] Real DB 로드 실패: {e}")
         
-        # Stage + Real 개념 합치기
-        all_concepts = stage_concepts + real_concepts
+        try:
+            changed_labels, rebuilt = index.update(real_conn)
+        finally:
+            if real_conn is not None:
+                real_conn.close()
         
-        if len(all_concepts) < 2:
+        cursor = self.conn.cursor()
+        if rebuilt:
+            # 그래프를 새로 만들었으면 기존 클러스터(라벨 없는 이전 형식 포함) 전체 교체
+            cursor.execute("DELETE FROM concept_clusters")
+            changed_labels = set(index.members)
+        elif not changed_labels:
             return
+        else:
+            placeholders = ",".join("?" * len(changed_labels))
+            cursor.execute(
+                f"DELETE FROM concept_clusters WHERE label IN ({placeholders})",
+                list(changed_labels)
+            )
         
-        # 기존 클러스터 삭제 (Stage DB에만 저장)
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM concept_clusters")
-        self.conn.commit()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM concept_clusters")
+        cluster_id = cursor.fetchone()[0] + 1
         
-        # Stage 개념의 임베딩 가져오기
-        stage_concepts_with_emb = self.get_all_concepts(include_embedding=True)
-        
-        # Real 개념의 임베딩 처리
-        real_concepts_with_emb = []
-        if real_concepts:
-            for rc in real_concepts:
-                real_concept_dict = {
-                    "concept": rc["concept"],
-                    "description": rc["description"],
-                    "embedding": rc.get("embedding"),
-                    "is_real": True
-                }
-                real_concepts_with_emb.append(real_concept_dict)
-        
-        # Stage 개념에 is_real 플래그 추가
-        for sc in stage_concepts_with_emb:
-            sc["is_real"] = False
-        
-        # 모든 개념 합치기
-        all_concepts_with_emb = stage_concepts_with_emb + real_concepts_with_emb
-        concept_names = [c["concept"] for c in all_concepts_with_emb]
-        
-        # 임베딩 복원
-        try:
-            embeddings = []
-            cursor = self.conn.cursor()
-            zero_emb_count = 0
-            computed_emb_count = 0
-            for c in all_concepts_with_emb:
-                if c.get("embedding"):
-                    # bytes에서 numpy array로 복원
-                    emb_array = np.frombuffer(c["embedding"], dtype=np.float32)
-                    embeddings.append(emb_array)
-                else:
-                    # 임베딩이 없으면 계산
-                    if self.vector_store and c.get("description"):
-                        embedding_bytes = self._compute_embedding(c["description"])
-                        if embedding_bytes:
-                            emb_array = np.frombuffer(embedding_bytes, dtype=np.float32)
-                            embeddings.append(emb_array)
-                            computed_emb_count += 1
-                            # Stage 개념만 DB에 저장 (Real 개념은 저장하지 않음)
-                            if not c.get("is_real") and "id" in c:
-                                cursor.execute(
-                                    "UPDATE new_concepts SET embedding = ? WHERE id = ?",
-                                    (embedding_bytes, c["id"])
-                                )
-                        else:
-                            embeddings.append(np.zeros(1024))
-                            zero_emb_count += 1
-                    else:
-                        embeddings.append(np.zeros(1024))
-                        zero_emb_count += 1
-            
-            embeddings = np.array(embeddings, dtype=np.float32)
-            self.conn.commit()
-            
-            # 임베딩 정규화 (코사인 유사도 계산 전)
-            # sklearn cosine_similarity가 내부 정규화를 하지만, 명시적으로 정규화
-            embeddings_normalized = normalize(embeddings, norm='l2')
-            
-            # 코사인 유사도 행렬 계산
-            similarity_matrix = cosine_similarity(embeddings_normalized)
-            
-            # 거리 행렬로 변환 (1 - similarity)
-            # 수치 오차로 인한 음수 값 방지 (clip to [0, 2])
-            distance_matrix = np.clip(1 - similarity_matrix, 0, 2)
-            
-            # 정확히 일치하는 개념 이름들을 찾아서 거리를 0으로 설정
-            # 같은 이름의 개념들은 같은 클러스터에 묶이도록 함
-            for i in range(len(concept_names)):
-                for j in range(i + 1, len(concept_names)):
-                    if concept_names[i] == concept_names[j]:
-                        distance_matrix[i, j] = 0.0
-                        distance_matrix[j, i] = 0.0
-            
-            # 거리 행렬이 유효한지 확인
-            if np.any(np.isnan(distance_matrix)) or np.any(np.isinf(distance_matrix)):
-                raise ValueError("거리 행렬에 NaN 또는 Inf 값이 있습니다")
-            
-            if np.any(distance_matrix < 0):
-                raise ValueError(f"거리 행렬에 음수 값이 있습니다: min={distance_matrix.min()}")
-            
-            # DBSCAN 클러스터링
-            # eps: 최대 거리 (0.25 = 75% 이상 유사도)
-            # min_samples: 최소 샘플 수 (3개 이상)
-            clustering = DBSCAN(eps=0.25, min_samples=3, metric='precomputed')
-            cluster_labels = clustering.fit_predict(distance_matrix)
+        # 클러스터를 DB에 저장
+        # mode가 "real"이면 모든 개념을 저장, "stage"면 stage 개념만 저장
+        saved_cluster_count = 0
+        for label in sorted(changed_labels, key=order_key):
+            concept_list = [index.names[n] for n in index.cluster_members(label)]
+            if not concept_list:
+                continue
             
-            # 클러스터별로 개념 그룹화
-            clusters_dict = {}
-            # stage 모드일 때만 real 개념 구분
-            if self.mode == "stage":
-                concept_to_is_real = {c["concept"]: c.get("is_real", False) for c in all_concepts_with_emb}
+            if self.mode == "real":
+                # Real 모드: 모든 개념 포함
+                filtered_concept_list = concept_list
             else:
-                concept_to_is_real = {}
+                # Stage 모드: Stage 개념만 필터링
+                filtered_concept_list = [c for c in concept_list if not index.is_real_name(c)]
             
-            for idx, label in enumerate(cluster_labels):
-                if label == -1:  # 노이즈 (클러스터에 속하지 않음)
-                    continue
-                
-                if label not in clusters_dict:
-                    clusters_dict[label] = []
-                clusters_dict[label].append(concept_names[idx])
+            if len(filtered_concept_list) < 2:
+                continue
             
-            # 클러스터를 DB에 저장
-            # mode가 "real"이면 모든 개념을 저장, "stage"면 stage 개념만 저장
-            cluster_id = 1
-            saved_cluster_count = 0
-            for label, concept_list in clusters_dict.items():
-                if self.mode == "real":
-                    # Real 모드: 모든 개념 포함
-                    filtered_concept_list = concept_list
-                else:
-                    # Stage 모드: Stage 개념만 필터링
-                    filtered_concept_list = [c for c in concept_list if not concept_to_is_real.get(c, False)]
+            if len(filtered_concept_list) > 10:
+                # 클러스터 크기가 10개를 초과하면 필터링된 개념만으로 재분할
+                filtered_embeddings = np.array(
+                    [index.embedding(index.first_node(c)) for c in filtered_concept_list]
+                )
+                filtered_similarity = cosine_similarity(filtered_embeddings)
+                filtered_distance = np.clip(1 - filtered_similarity, 0, 2)
                 
-                if len(filtered_concept_list) >= 2:
-                    # 클러스터 크기가 10개를 초과하면 재분할
-                    if len(filtered_concept_list) > 10:
-                        # 필터링된 개념만으로 재분할
-                        filtered_indices = [concept_names.index(c) for c in filtered_concept_list]
-                        filtered_embeddings = embeddings_normalized[filtered_indices]
-                        filtered_similarity = cosine_similarity(filtered_embeddings)
-                        filtered_distance = np.clip(1 - filtered_similarity, 0, 2)
-                        
-                        # 작은 클러스터로 재분할
-                        sub_clustering = DBSCAN(eps=0.15, min_samples=2, metric='precomputed')
-                        sub_labels = sub_clustering.fit_predict(filtered_distance)
-                        
-                        # 서브클러스터별로 저장
-                        sub_clusters = {}
-                        for sub_idx, sub_label in enumerate(sub_labels):
-                            if sub_label == -1:
-                                continue
-                            if sub_label not in sub_clusters:
-                                sub_clusters[sub_label] = []
-                            sub_clusters[sub_label].append(filtered_concept_list[sub_idx])
-                        
-                        # 각 서브클러스터 저장 (2개 이상 10개 이하인 것만)
-                        for sub_concept_list in sub_clusters.values():
-                            if len(sub_concept_list) >= 2 and len(sub_concept_list) <= 10:
-                                cluster_name = f"cluster_{cluster_id}"
-                                concept_ids_str = ",".join(sub_concept_list)
-                                cursor.execute(
-                                    "INSERT INTO concept_clusters (cluster_name, concept_ids) VALUES (?, ?)",
-                                    (cluster_name, concept_ids_str)
-                                )
-                                cluster_id += 1
-                                saved_cluster_count += 1
-                    else:
-                        # 10개 이하면 그대로 저장
-                        cluster_name = f"cluster_{cluster_id}"
-                        concept_ids_str = ",".join(filtered_concept_list)
-                        cursor.execute(
-                            "INSERT INTO concept_clusters (cluster_name, concept_ids) VALUES (?, ?)",
-                            (cluster_name, concept_ids_str)
-                        )
-                        cluster_id += 1
-                        saved_cluster_count += 1
-            
-            self.conn.commit()
-            
-            print(f"[클러스터링 완료] 총 {len(all_concepts)}개 개념, {saved_cluster_count}개 클러스터")
+                # 작은 클러스터로 재분할
+                sub_clustering = DBSCAN(eps=0.15, min_samples=2, metric='precomputed')
+                sub_labels = sub_clustering.fit_predict(filtered_distance)
+                
+                sub_clusters = {}
+                for sub_idx, sub_label in enumerate(sub_labels):
+                    if sub_label == -1:
+                        continue
+                    sub_clusters.setdefault(sub_label, []).append(filtered_concept_list[sub_idx])
+                
+                # 각 서브클러스터 저장 (2개 이상 10개 이하인 것만)
+                to_save = [c for c in sub_clusters.values() if 2 <= len(c) <= 10]
+            else:
+                # 10개 이하면 그대로 저장
+                to_save = [filtered_concept_list]
             
-        except Exception as e:
-            raise e
-    
-
+            for sub_concept_list in to_save:
+                cursor.execute(
+                    "INSERT INTO concept_clusters (cluster_name, concept_ids, label) VALUES (?, ?, ?)",
+                    (f"cluster_{cluster_id}", ",".join(sub_concept_list), label)
+                )
+                cluster_id += 1
+                saved_cluster_count += 1
+        
+        self.conn.commit()
+        
+        cursor.execute("SELECT COUNT(*) FROM concept_clusters")
+        total_cluster_count = cursor.fetchone()[0]
+        print(f"[클러스터링 완료] 총 {len(index)}개 개념, {total_cluster_count}개 클러스터 (갱신 {saved_cluster_count}개)")
     
     def get_clusters(self, min_size: int = 5, concept: Optional[str] = None, debug: bool = False) -> List[Dict[str, Any]]:
         """클러스터 반환.
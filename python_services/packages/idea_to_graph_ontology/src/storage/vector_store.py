@@ -2,6 +2,7 @@
 
 from typing import Dict, List, Any, Optional
 from pathlib import Path
+import threading
 import chromadb
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
@@ -14,16 +15,23 @@ class VectorStore:
         self, 
         db_path: str, 
         collection_name: str = "ontology_concepts",
-        task_id: Optional[str] = None
+        task_id: Optional[str] = None,
+        base_db_path: Optional[str] = None
     ) -> None:
         """벡터 스토어 초기화.
         
+        base_db_path가 있으면 오버레이 모드로 동작합니다. 실제 컬렉션은 base_db_path의
+        스토어를 읽기 전용으로 열고, db_path에는 스테이징(델타) 컬렉션만 둡니다.
+        실제 스토어를 복사하지 않으므로 생성 비용이 실제 스토어 크기와 무관합니다.
+        
         Args:
             db_path: ChromaDB 저장 경로
             collection_name: 컬렉션 이름
-            task_id: task ID (stage 모드일 때 별도 디렉토리 사용)
+            task_id: task ID (stage 모드일 때 별도 디렉토리를 쓰고, db_path를 base로 사용)
+            base_db_path: 실제 컬렉션을 읽을 ChromaDB 경로 (오버레이 모드)
         """
         if task_id:
+            base_db_path = base_db_path or db_path
             db_path = str(Path(db_path).parent / "stage" / task_id / "vector_store")
         
         db_path = str(Path(db_path).resolve())
@@ -38,50 +46,107 @@ class VectorStore:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+        # 실제/스테이징 컬렉션이 함께 쓰는 임베딩 함수
+        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
             model_name="BAAI/bge-m3"
         )
         
-        # 실제 컬렉션
-        try:
-            self.collection = self.client.get_collection(
-                name=collection_name,
-                embedding_function=embedding_function
+        # 실제 컬렉션 (오버레이 모드면 base 스토어에서 읽기 전용)
+        self.base_db_path = None
+        base_client = self.client
+        if base_db_path and (Path(base_db_path) / "chroma.sqlite3").exists():
+            self.base_db_path = str(Path(base_db_path).resolve())
+            base_client = chromadb.PersistentClient(
+                path=self.base_db_path,
+                settings=Settings(anonymized_telemetry=False)
             )
-        except Exception:
-            try:
-                existing_collection = self.client.get_collection(name=collection_name)
-                self.collection = existing_collection
-            except Exception:
-                self.collection = self.client.create_collection(
-                    name=collection_name,
-                    embedding_function=embedding_function,
-                    metadata={"description": "LLM Ontology Concepts", "model": "BAAI/bge-m3"}
-                )
+        
+        self.collection = self._open_collection(
+            base_client,
+            collection_name,
+            self.embedding_function,
+            "LLM Ontology Concepts"
+        )
         
         # 스테이징 컬렉션
+        self.staging_collection = self._open_collection(
+            self.client,
+            self.staging_collection_name,
+            self.embedding_function,
+            "LLM Ontology Concepts (Staging)"
+        )
+        
+        # 컬렉션별 개수 캐시 (쓰기 시 무효화)
+        self._counts: Dict[str, int] = {}
+        self._counts_version = 0
+        self._counts_lock = threading.Lock()
+
+    @staticmethod
+    def _open_collection(client, name: str, embedding_function, description: str):
+        """컬렉션 조회 (없으면 생성)."""
         try:
-            self.staging_collection = self.client.get_collection(
-                name=self.staging_collection_name,
+            return client.get_collection(
+                name=name,
                 embedding_function=embedding_function
             )
         except Exception:
             try:
-                existing_staging = self.client.get_collection(name=self.staging_collection_name)
-                self.staging_collection = existing_staging
+                return client.get_collection(name=name)
             except Exception:
-                self.staging_collection = self.client.create_collection(
-                    name=self.staging_collection_name,
+                return client.create_collection(
+                    name=name,
                     embedding_function=embedding_function,
-                    metadata={"description": "LLM Ontology Concepts (Staging)", "model": "BAAI/bge-m3"}
+                    metadata={"description": description, "model": "BAAI/bge-m3"}
                 )
 
+    @property
+    def is_overlay(self) -> bool:
+        """실제 컬렉션을 다른 스토어에서 읽기 전용으로 쓰는지 여부."""
+        return self.base_db_path is not None
+
+    def _check_writable(self) -> None:
+        if self.is_overlay:
+            raise RuntimeError(
+                f"오버레이 모드의 실제 컬렉션은 읽기 전용입니다 (base: {self.base_db_path}). "
+                "staging=True로 추가하거나 commit_staging으로 반영하세요."
+            )
+
+    def _collection_count(self, collection) -> int:
+        """컬렉션 개수 (쓰기 전까지 캐시)."""
+        count = self._counts.get(collection.name)
+        if count is None:
+            version = self._counts_version
+            count = collection.count()
+            # 조회 중 다른 스레드가 썼으면 캐시하지 않음
+            with self._counts_lock:
+                if version == self._counts_version:
+                    self._counts[collection.name] = count
+        return count
+
+    def _invalidate_counts(self) -> None:
+        with self._counts_lock:
+            self._counts_version += 1
+            self._counts.clear()
+
+    def embed(self, texts: List[str]) -> List[Any]:
+        """텍스트 임베딩 (한 번의 forward pass).
+        
+        Args:
+            texts: 임베딩할 텍스트 리스트
+            
+        Returns:
+            임베딩 리스트
+        """
+        return list(self.embedding_function(texts))
+
     def initialize(self, concepts: List[Dict[str, str]]) -> None:
         """온톨로지 개념들로 벡터 스토어 초기화.
         
         Args:
             concepts: 개념 정보 리스트 (concept_id, description 포함)
         """
+        self._check_writable()
+        
         try:
             all_ids = self.collection.get()["ids"]
             if all_ids:
@@ -110,6 +175,7 @@ class VectorStore:
             documents=documents,
             metadatas=metadatas
         )
+        self._invalidate_counts()
 
     def find_similar(
         self, 
@@ -129,7 +195,37 @@ class VectorStore:
         Returns:
             유사 개념 리스트 (concept_id, description, distance 포함)
         """
-        similar_concepts = []
+        return self.find_similar_many(
+            [query],
+            k=k,
+            include_staging=include_staging,
+            exclude_concept_ids=exclude_concept_ids
+        )[0]
+
+    def find_similar_many(
+        self, 
+        queries: List[str], 
+        k: int = 5, 
+        include_staging: bool = True,
+        exclude_concept_ids: Optional[List[str]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """여러 쿼리의 유사 개념 일괄 검색.
+        
+        쿼리들을 한 번에 임베딩하고 (실제/스테이징 컬렉션은 같은 임베딩 함수를
+        쓰므로 한 번만), query_embeddings로 각 컬렉션을 한 번씩 검색합니다.
+        
+        Args:
+            queries: 검색할 쿼리 리스트 (키워드 또는 문장)
+            k: 쿼리별 반환할 유사 개념 개수
+            include_staging: 스테이징 컬렉션도 검색할지 여부
+            exclude_concept_ids: 검색에서 제외할 개념 ID 리스트
+            
+        Returns:
+            쿼리별 유사 개념 리스트 (concept_id, description, distance 포함)
+        """
+        similar_concepts = [[] for _ in queries]
+        if not queries:
+            return similar_concepts
         
         # 제외할 개념이 있으면 where 절 생성
         where_clause = None
@@ -138,61 +234,57 @@ class VectorStore:
                 "concept_id": {"$nin": exclude_concept_ids}
             }
         
-        # 1. 실제 컬렉션에서 검색
-        total_count = self.collection.count()
-        if total_count > 0:
+        targets = [(self.collection, "real")]
+        if include_staging:
+            targets.append((self.staging_collection, "staging"))
+        
+        # 검색할 컬렉션이 있을 때 한 번만 임베딩
+        embeddings = None
+        
+        for collection, source in targets:
+            total_count = self._collection_count(collection)
+            if total_count == 0:
+                continue
+            
+            if embeddings is None:
+                embeddings = self.embed(queries)
+            
             # 제외할 개념이 있으면 더 많이 가져온 후 필터링
             n_results = min(k * 2 if exclude_concept_ids else k, total_count)
             
             query_params = {
-                "query_texts": [query],
+                "query_embeddings": embeddings,
                 "n_results": n_results
             }
             
             if where_clause:
                 query_params["where"] = where_clause
             
-            results = self.collection.query(**query_params)
+            results = collection.query(**query_params)
             
-            if results["ids"] and results["ids"][0]:
-                for i in range(len(results["ids"][0])):
-                    similar_concepts.append({
-                        "concept_id": results["ids"][0][i],
-                        "description": results["documents"][0][i],
-                        "metadata": results["metadatas"][0][i],
-                        "distance": results["distances"][0][i] if "distances" in results else None,
-                        "source": "real"
+            for q, ids in enumerate(results["ids"] or []):
+                for i in range(len(ids)):
+                    similar_concepts[q].append({
+                        "concept_id": ids[i],
+                        "description": results["documents"][q][i],
+                        "metadata": results["metadatas"][q][i],
+                        "distance": results["distances"][q][i] if results.get("distances") else None,
+                        "source": source
                     })
         
-        # 2. 스테이징 컬렉션에서도 검색 (옵션)
-        if include_staging:
-            staging_count = self.staging_collection.count()
-            if staging_count > 0:
-                n_results = min(k * 2 if exclude_concept_ids else k, staging_count)
-                
-                query_params = {
-                    "query_texts": [query],
-                    "n_results": n_results
-                }
-                
-                if where_clause:
-                    query_params["where"] = where_clause
-                
-                staging_results = self.staging_collection.query(**query_params)
-                
-                if staging_results["ids"] and staging_results["ids"][0]:
-                    for i in range(len(staging_results["ids"][0])):
-                        similar_concepts.append({
-                            "concept_id": staging_results["ids"][0][i],
-                            "description": staging_results["documents"][0][i],
-                            "metadata": staging_results["metadatas"][0][i],
-                            "distance": staging_results["distances"][0][i] if "distances" in staging_results else None,
-                            "source": "staging"
-                        })
-        
         # 거리 순으로 정렬하고 k개만 반환
-        similar_concepts.sort(key=lambda x: x.get("distance", float("inf")))
-        return similar_concepts[:k]
+        # (오버레이 모드에서 작업 중 실제 스토어에 커밋된 개념은 양쪽에 있을 수 있으므로 ID 중복 제거)
+        results = []
+        for concepts in similar_concepts:
+            concepts.sort(key=lambda x: x.get("distance", float("inf")))
+            seen = set()
+            unique = []
+            for concept in concepts:
+                if concept["concept_id"] not in seen:
+                    seen.add(concept["concept_id"])
+                    unique.append(concept)
+            results.append(unique[:k])
+        return results
 
     def add_concept(
         self, 
@@ -220,12 +312,16 @@ class VectorStore:
             "parent": str(parent) if parent else ""
         }
         
+        if not staging:
+            self._check_writable()
+        
         target_collection = self.staging_collection if staging else self.collection
         target_collection.add(
             ids=[concept_id],
             documents=[description],
             metadatas=[metadata]
         )
+        self._invalidate_counts()
 
     def update_concept(self, concept_id: str, description: str) -> None:
         """개념의 description 업데이트.
@@ -234,6 +330,8 @@ class VectorStore:
             concept_id: 개념 ID
             description: 새 description
         """
+        self._check_writable()
+        
         try:
             existing = self.collection.get(ids=[concept_id])
             if existing["ids"]:
@@ -250,10 +348,13 @@ class VectorStore:
         Args:
             concept_id: 개념 ID
         """
+        self._check_writable()
+        
         try:
             self.collection.delete(ids=[concept_id])
         except Exception:
             pass
+        self._invalidate_counts()
 
     def get_concept(self, concept_id: str) -> Dict[str, Any]:
         """특정 개념 조회.
@@ -285,9 +386,9 @@ class VectorStore:
             개념 개수
         """
         try:
-            total = self.collection.count()
+            total = self._collection_count(self.collection)
             if include_staging:
-                total += self.staging_collection.count()
+                total += self._collection_count(self.staging_collection)
             return total
         except Exception as e:
             print(f"[경고] ChromaDB count() 실패: {e}")
@@ -301,13 +402,18 @@ class VectorStore:
             return 0
     
     def commit_staging(self) -> None:
-        """스테이징 컬렉션의 내용을 실제 컬렉션으로 복사."""
-        staging_data = self.staging_collection.get()
+        """스테이징 컬렉션의 내용을 실제 컬렉션으로 옮김.
+        
+        저장된 임베딩을 그대로 옮기므로 다시 임베딩하지 않습니다.
+        오버레이 모드에서는 base 스토어의 실제 컬렉션에 씁니다.
+        """
+        staging_data = self.staging_collection.get(include=["documents", "metadatas", "embeddings"])
         
         if staging_data["ids"]:
             # 스테이징된 개념들을 실제 컬렉션에 추가
-            self.collection.add(
+            self.collection.upsert(
                 ids=staging_data["ids"],
+                embeddings=staging_data["embeddings"],
                 documents=staging_data["documents"],
                 metadatas=staging_data["metadatas"]
             )
@@ -324,30 +430,23 @@ class VectorStore:
         if not concept_ids:
             return
         
-        staging_data = self.staging_collection.get()
+        staging_data = self.staging_collection.get(
+            ids=list(concept_ids),
+            include=["documents", "metadatas", "embeddings"]
+        )
         
         if not staging_data["ids"]:
             return
         
-        filtered_indices = []
-        for i, concept_id in enumerate(staging_data["ids"]):
-            if concept_id in concept_ids:
-                filtered_indices.append(i)
-        
-        if not filtered_indices:
-            return
-        
-        filtered_ids = [staging_data["ids"][i] for i in filtered_indices]
-        filtered_documents = [staging_data["documents"][i] for i in filtered_indices]
-        filtered_metadatas = [staging_data["metadatas"][i] for i in filtered_indices]
-        
-        self.collection.add(
-            ids=filtered_ids,
-            documents=filtered_documents,
-            metadatas=filtered_metadatas
+        self.collection.upsert(
+            ids=staging_data["ids"],
+            embeddings=staging_data["embeddings"],
+            documents=staging_data["documents"],
+            metadatas=staging_data["metadatas"]
         )
         
-        self.staging_collection.delete(ids=filtered_ids)
+        self.staging_collection.delete(ids=staging_data["ids"])
+        self._invalidate_counts()
     
     def clear_staging(self) -> None:
         """스테이징 컬렉션 초기화."""
@@ -357,6 +456,7 @@ class VectorStore:
                 self.staging_collection.delete(ids=all_ids)
         except Exception:
             pass
+        self._invalidate_counts()
     
     def rollback_staging(self) -> None:
         """스테이징 컬렉션의 변경사항 취소."""
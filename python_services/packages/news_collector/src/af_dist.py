@@ -4,12 +4,6 @@ from datetime import date, datetime, timedelta
 
 from dotenv import load_dotenv
 
-from ops_twitter import OperatorTwitter
-from ops_article import OperatorArticle
-from ops_youtube import OperatorYoutube
-from ops_obsidian import OperatorObsidian
-from ops_milvus import OperatorMilvus
-from ops_reddit import OperatorReddit
 import utils
 
 
@@ -44,6 +38,7 @@ def process_twitter(args, folders):
     print("#####################################################")
     print("# Process Twitter")
     print("#####################################################")
+    from ops_twitter import OperatorTwitter
     op = OperatorTwitter()
     data = op.load_folders(folders, "twitter.json")
     data_deduped = op.unique(data)
@@ -56,6 +51,7 @@ def process_article(args, folders):
     print("#####################################################")
     print("# Process Article")
     print("#####################################################")
+    from ops_article import OperatorArticle
     op = OperatorArticle()
 
     data = op.load_folders(folders, "article.json")
@@ -69,6 +65,7 @@ def process_youtube(args, folders):
     print("#####################################################")
     print(f"# Process Youtube, dedup: {args.dedup}")
     print("#####################################################")
+    from ops_youtube import OperatorYoutube
     op = OperatorYoutube()
 
     data = op.load_folders(folders, "youtube.json")
@@ -82,6 +79,7 @@ def process_rss(args, folders):
     print("#####################################################")
     print(f"# Process RSS, dedup: {args.dedup}")
     print("#####################################################")
+    from ops_youtube import OperatorYoutube
     op = OperatorYoutube()
 
     data = op.load_folders(folders, "rss.json")
@@ -95,6 +93,7 @@ def process_reddit(args, folders):
     print("#####################################################")
     print(f"# Process Reddit, dedup: {args.dedup}")
     print("#####################################################")
+    from ops_reddit import OperatorReddit
     op = OperatorReddit()
 
     data = op.load_folders(folders, "reddit.json")
@@ -129,6 +128,7 @@ def dist(args, data, source, target):
         pass
 
     elif target == "Milvus":
+        from ops_milvus import OperatorMilvus
         op = OperatorMilvus()
 
         data_deduped = []
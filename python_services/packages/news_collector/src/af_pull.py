@@ -4,14 +4,8 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 
-from ops_twitter import OperatorTwitter
-from ops_article import OperatorArticle
-from ops_youtube import OperatorYoutube
-from ops_rss import OperatorRSS
-from ops_reddit import OperatorReddit
-from ops_crawl_blog_superhuman import OperatorCrawlBlogSuperhuman
-from ops_crawl_rss_natolambert import OperatorCrawlRSSNatoLambert
 import utils
+import ops_stats
 
 
 parser = argparse.ArgumentParser()
@@ -110,12 +104,18 @@ def pull_rss(args, op):
     return utils.prun(run) or {}
 
 
-def save_rss(args, op, data):
+def save_rss(args, op, data, source="rss"):
     print("######################################################")
     print("# Save RSS articles to json file")
     print("######################################################")
     op.save2json(args.data_folder, args.run_id, "rss.json", data)
 
+    # The new feed validators are committed by af_save after the
+    # articles are saved, one file per source (RSS and the RSS based
+    # crawlers share save_rss)
+    op.save2json(args.data_folder, args.run_id, f"{source}_validators.json",
+                 getattr(op, "pending_validators", {}))
+
 
 def pull_reddit(args, op):
     """
@@ -166,46 +166,57 @@ def run(args):
     sources = args.sources.split(",")
     print(f"Sources: {sources}")
 
-    for source in sources:
-        print(f"Pulling from source: {source} ...")
-
-        if source == "Twitter":
-            op = OperatorTwitter()
-            data = pull_twitter(args, op)
-            save_twitter(args, op, data)
-
-        elif source == "Article":
-            op = OperatorArticle()
-            data = pull_article(args, op)
-            save_article(args, op, data)
-
-        elif source == "Youtube":
-            op = OperatorYoutube()
-            data = pull_youtube(args, op)
-            save_youtube(args, op, data)
-
-        elif source == "RSS":
-            op = OperatorRSS()
-            data = pull_rss(args, op)
-            save_rss(args, op, data)
-
-        elif source == "Reddit":
-            op = OperatorReddit()
-            data = pull_reddit(args, op)
-            save_reddit(args, op, data)
-
-        # NOTE: currently only crawl Zain Kahn's blog posts (superhuman.ai)
-        # NOTE: if need to crawl other blogs, maybe refactor the architecture for handle crawler operators
-        elif source == "CrawlBlogSuperhuman":
-            op = OperatorCrawlBlogSuperhuman()
-            data = pull_crawl(args, op)
-            save_crawl(args, op, data, source=source)
-        
-        elif source == "CrawlBlogNatoLambert":
-            op = OperatorCrawlRSSNatoLambert()
-            data = pull_rss(args, op)
-            save_rss(args, op, data)
-
+    try:
+        for source in sources:
+            print(f"Pulling from source: {source} ...")
+
+            if source == "Twitter":
+                from ops_twitter import OperatorTwitter
+                op = OperatorTwitter()
+                data = pull_twitter(args, op)
+                save_twitter(args, op, data)
+
+            elif source == "Article":
+                from ops_article import OperatorArticle
+                op = OperatorArticle()
+                data = pull_article(args, op)
+                save_article(args, op, data)
+
+            elif source == "Youtube":
+                from ops_youtube import OperatorYoutube
+                op = OperatorYoutube()
+                data = pull_youtube(args, op)
+                save_youtube(args, op, data)
+
+            elif source == "RSS":
+                from ops_rss import OperatorRSS
+                op = OperatorRSS()
+                data = pull_rss(args, op)
+                save_rss(args, op, data)
+
+            elif source == "Reddit":
+                from ops_reddit import OperatorReddit
+                op = OperatorReddit()
+                data = pull_reddit(args, op)
+                save_reddit(args, op, data)
+
+            # NOTE: currently only crawl Zain Kahn's blog posts (superhuman.ai)
+            # NOTE: if need to crawl other blogs, maybe refactor the architecture for handle crawler operators
+            elif source == "CrawlBlogSuperhuman":
+                from ops_crawl_blog_superhuman import OperatorCrawlBlogSuperhuman
+                op = OperatorCrawlBlogSuperhuman()
+                data = pull_crawl(args, op)
+                save_crawl(args, op, data, source=source)
+
+            elif source == "CrawlBlogNatoLambert":
+                from ops_crawl_rss_natolambert import OperatorCrawlRSSNatoLambert
+                op = OperatorCrawlRSSNatoLambert()
+                data = pull_rss(args, op)
+                save_rss(args, op, data, source=source)
+
+    finally:
+        # A failed or slow run still leaves its report
+        ops_stats.export("pull", args.data_folder, args.run_id)
 
 
 if __name__ == "__main__":
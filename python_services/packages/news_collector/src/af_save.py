@@ -4,14 +4,9 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 import utils
+import client_registry
+import ops_stats
 
-from ops_twitter import OperatorTwitter
-from ops_article import OperatorArticle
-from ops_youtube import OperatorYoutube
-from ops_rss import OperatorRSS
-from ops_reddit import OperatorReddit
-from ops_crawl_blog_superhuman import OperatorCrawlBlogSuperhuman
-from ops_crawl_rss_natolambert import OperatorCrawlRSSNatoLambert
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--prefix", help="runtime prefix path",
@@ -34,6 +29,8 @@ parser.add_argument("--categories-top-k", help="pick top-k categories to push",
                     default=3)
 parser.add_argument("--dedup", help="whether dedup item",
                     default=True)
+parser.add_argument("--near-dedup", help="whether drop the near-duplicates across sources",
+                    default=os.getenv("NEAR_DEDUP_ENABLED", "true"))
 parser.add_argument("--min-score-to-rank",
                     help="The minimum relevant score to start ranking",
                     default=4)
@@ -57,6 +54,7 @@ def process_twitter(args):
     print("#####################################################")
     print("# Process Twitter")
     print("#####################################################")
+    from ops_twitter import OperatorTwitter
     op = OperatorTwitter()
     data = op.readFromJson(args.data_folder, args.run_id, "twitter.json")
     data_deduped = op.dedup(data, target="toread")
@@ -85,6 +83,7 @@ def process_article(args):
     print("#####################################################")
     print("# Process Article")
     print("#####################################################")
+    from ops_article import OperatorArticle
     op = OperatorArticle()
 
     data = op.readFromJson(args.data_folder, args.run_id, "article.json")
@@ -108,6 +107,7 @@ def process_youtube(args):
     print("#####################################################")
     print(f"# Process Youtube, dedup: {args.dedup}")
     print("#####################################################")
+    from ops_youtube import OperatorYoutube
     op = OperatorYoutube()
 
     data = op.readFromJson(args.data_folder, args.run_id, "youtube.json")
@@ -133,10 +133,12 @@ def process_youtube(args):
         pushed_stats=pushed_stats)
 
 
-def process_rss(args):
+def process_rss(args, source="rss"):
     print("#####################################################")
     print(f"# Process RSS, dedup: {args.dedup}")
     print("#####################################################")
+    from ops_rss import OperatorRSS
+    from feed_cache import FeedValidatorCache
     op = OperatorRSS()
 
     data = op.readFromJson(args.data_folder, args.run_id, "rss.json")
@@ -148,6 +150,9 @@ def process_rss(args):
     else:
         data_deduped = [x for x in data.values()]
 
+    if utils.str2bool(args.near_dedup):
+        data_deduped = op.near_dedup(data_deduped, "rss")
+
     data_scored = op.score(
         data_deduped,
         start_date=args.start,
@@ -160,6 +165,14 @@ def process_rss(args):
     targets = args.targets.split(",")
     pushed_stats = op.push(data_summarized, targets)
 
+    if utils.str2bool(args.near_dedup):
+        op.near_dedup_commit()
+
+    # Articles are saved, the next poll can skip the unchanged feeds
+    validators = op.readFromJson(args.data_folder, args.run_id, f"{source}_validators.json")
+    if validators:
+        FeedValidatorCache().commit(validators)
+
     return op.createStats(
         "RSS",
         "",
@@ -186,10 +199,14 @@ def process_reddit(args):
     print("#####################################################")
     print("# Process Reddit")
     print("#####################################################")
+    from ops_reddit import OperatorReddit
     op = OperatorReddit()
     data = op.readFromJson(args.data_folder, args.run_id, "reddit.json")
     data_deduped = op.dedup(data, target="toread")
 
+    if utils.str2bool(args.near_dedup):
+        data_deduped = op.near_dedup(data_deduped, "reddit")
+
     # To save LLM tokens, do score on all deduped posts, then
     # do rank for score >= 4 posts
     data_scored = op.score(
@@ -205,6 +222,9 @@ def process_reddit(args):
     pushed_stats = op.push(
         data_summarized, targets, args.topics_top_k, args.categories_top_k)
 
+    if utils.str2bool(args.near_dedup):
+        op.near_dedup_commit()
+
     # Print and create stats
     op.printStats("Reddit", data, data_deduped, data_summarized)
 
@@ -219,11 +239,17 @@ def process_crawl(args, op, source="crawl"):
     print("#####################################################")
     data = op.readFromJson(args.data_folder, args.run_id, f"{source}.json")
     data_deduped = op.dedup(data, target="toread")
+
+    if utils.str2bool(args.near_dedup):
+        data_deduped = op.near_dedup(data_deduped, source)
     data_summarized = op.summarize(data_deduped)
 
     targets = args.targets.split(",")
     pushed_stats = op.push(data_summarized, targets)
 
+    if utils.str2bool(args.near_dedup):
+        op.near_dedup_commit()
+
     return op.createStats(
         source,
         "",
@@ -239,46 +265,58 @@ def run(args):
     sources = args.sources.split(",")
     stats = []
 
-    for source in sources:
-        print(f"Pushing data for source: {source} ...")
+    try:
+        for source in sources:
+            print(f"Pushing data for source: {source} ...")
 
-        # Notes: For twitter we don't need summary step
-        if source == "Twitter":
-            stat = process_twitter(args)
+            # The clients are shared across sources, evict the broken
+            # connections before next source
+            client_registry.health_check()
 
-        elif source == "Article":
-            stat = process_article(args)
+            # Notes: For twitter we don't need summary step
+            if source == "Twitter":
+                stat = process_twitter(args)
 
-        elif source == "Youtube":
-            stat = process_youtube(args)
+            elif source == "Article":
+                stat = process_article(args)
 
-        elif source == "RSS":
-            stat = process_rss(args)
+            elif source == "Youtube":
+                stat = process_youtube(args)
 
-        elif source == "Reddit":
-            stat = process_reddit(args)
+            elif source == "RSS":
+                stat = process_rss(args)
 
-        # NOTE: currently only crawl Zain Kahn's blog posts (superhuman.ai)
-        # NOTE: if need to crawl other blogs, maybe refactor the architecture for handle crawler operators
-        elif source == "CrawlBlogSuperhuman":
-            op = OperatorCrawlBlogSuperhuman()
-            stat = process_crawl(args, op, source=source)
+            elif source == "Reddit":
+                stat = process_reddit(args)
 
-        elif source == "CrawlBlogNatoLambert":
-            stat = process_rss(args)
-            
-        stats.extend(stat)
+            # NOTE: currently only crawl Zain Kahn's blog posts (superhuman.ai)
+            # NOTE: if need to crawl other blogs, maybe refactor the architecture for handle crawler operators
+            elif source == "CrawlBlogSuperhuman":
+                from ops_crawl_blog_superhuman import OperatorCrawlBlogSuperhuman
+                op = OperatorCrawlBlogSuperhuman()
+                stat = process_crawl(args, op, source=source)
 
-    # Print stats
-    print("#####################################################")
-    print("# Stats")
-    print("#####################################################")
-    for stat in stats:
-        stat.print()
+            elif source == "CrawlBlogNatoLambert":
+                stat = process_rss(args, source=source)
+
+            stats.extend(stat)
+
+    finally:
+        # Print stats, a failed or slow run still leaves its report
+        print("#####################################################")
+        print("# Stats")
+        print("#####################################################")
+        for stat in stats:
+            stat.print()
+
+        ops_stats.export("save", args.data_folder, args.run_id, stats)
 
 
 if __name__ == "__main__":
     args = parser.parse_args()
     load_dotenv()
 
-    run(args)
+    try:
+        run(args)
+    finally:
+        client_registry.shutdown()
@@ -4,12 +4,6 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 
-from ops_twitter import OperatorTwitter
-from ops_article import OperatorArticle
-from ops_youtube import OperatorYoutube
-from ops_rss import OperatorRSS
-from ops_reddit import OperatorReddit
-
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--prefix", help="runtime prefix path",
@@ -139,26 +133,31 @@ def run(args):
         print(f"Pulling from source: {source} ...")
 
         if source == "Twitter":
+            from ops_twitter import OperatorTwitter
             op = OperatorTwitter()
             data = pull_twitter(args, op, source)
             save_twitter(args, op, source, data)
 
         elif source == "Article":
+            from ops_article import OperatorArticle
             op = OperatorArticle()
             data = pull_article(args, op, source)
             save_article(args, op, source, data)
 
         elif source == "Youtube":
+            from ops_youtube import OperatorYoutube
             op = OperatorYoutube()
             data = pull_youtube(args, op, source)
             save_youtube(args, op, source, data)
 
         elif source == "RSS":
+            from ops_rss import OperatorRSS
             op = OperatorRSS()
             data = pull_rss(args, op, source)
             save_rss(args, op, source, data)
 
         elif source == "Reddit":
+            from ops_reddit import OperatorReddit
             op = OperatorReddit()
             data = pull_reddit(args, op, source)
             save_reddit(args, op, source, data)
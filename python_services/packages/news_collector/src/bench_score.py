@@ -0,0 +1,96 @@
+import argparse
+import time
+
+import numpy as np
+
+import embedding_utils as emb_utils
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--candidates", help="number of scored candidates",
+                    type=int,
+                    default=10000)
+parser.add_argument("--topk", help="neighbours per candidate",
+                    type=int,
+                    default=10)
+parser.add_argument("--metric", help="L2, IP or COSINE",
+                    default="L2")
+parser.add_argument("--half-life-days", help="rating age half life, 0 to disable",
+                    type=float,
+                    default=14)
+
+
+def make_data(args):
+    """
+    Batched search results, a random number of neighbours (0..topk)
+    per candidate
+    """
+    rng = np.random.default_rng(42)
+    n, k = args.candidates, args.topk
+
+    counts = rng.integers(0, k + 1, n)
+    mask = np.arange(k)[None, :] < counts[:, None]
+
+    ratings = rng.integers(1, 6, (n, k)).astype(np.float64)
+    distances = rng.uniform(0, 1, (n, k))
+    ages = rng.uniform(0, 60, (n, k))
+
+    return ratings, distances, ages, mask
+
+
+def score_loop(ratings, distances, ages, mask, args):
+    """
+    Per candidate python loop, the same formula as knn_scores
+    """
+    res = []
+
+    for i in range(len(ratings)):
+        tot = 0
+        wtot = 0
+
+        for j in range(len(ratings[i])):
+            if not mask[i][j]:
+                continue
+
+            if args.metric == "L2":
+                w = 1.0 / (distances[i][j] + 1e-6)
+            else:
+                w = max(distances[i][j], 1e-6)
+
+            if args.half_life_days > 0:
+                w *= 0.5 ** (ages[i][j] / args.half_life_days)
+
+            tot += w * ratings[i][j]
+            wtot += w
+
+        res.append(tot / wtot if wtot > 0 else -1)
+
+    return res
+
+
+def run(args):
+    ratings, distances, ages, mask = make_data(args)
+    print(f"candidates: {args.candidates}, topk: {args.topk}, metric: {args.metric}, half_life_days: {args.half_life_days}")
+
+    st = time.time()
+    expected = score_loop(ratings, distances, ages, mask, args)
+    loop = time.time() - st
+
+    st = time.time()
+    scores = emb_utils.knn_scores(
+        ratings, distances, mask, args.metric,
+        ages=ages, half_life_days=args.half_life_days)
+    vectorized = time.time() - st
+
+    max_diff = float(np.max(np.abs(np.array(expected) - scores))) if len(scores) else 0.0
+
+    print("| scorer       |    time    | candidates/s |")
+    print("|--------------|------------|--------------|")
+    print(f"| python loop  | {loop:>9.4f}s | {args.candidates / loop:>12.0f} |")
+    print(f"| knn_scores   | {vectorized:>9.4f}s | {args.candidates / vectorized:>12.0f} |")
+    print(f"speedup: {loop / vectorized:.1f}x, max abs diff: {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    run(args)
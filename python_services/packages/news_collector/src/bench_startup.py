@@ -0,0 +1,149 @@
+"""
+Startup time of the Airflow entry points (af_*.py)
+
+Every task is a fresh python process, the imports are measured with
+`python -X importtime` in a subprocess, so nothing is cached.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --modules af_start,af_save --top 20
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Import time budget (seconds) of the short tasks
+BUDGETS = {
+    "af_start": 0.5,
+    "af_end": 0.5,
+}
+
+# The heavy providers must be loaded on first use, never at startup
+HEAVY_MODULES = (
+    "langchain",
+    "langchain_community",
+    "langchain_google_genai",
+    "google.generativeai",
+    "whisper",
+    "torch",
+    "sklearn",
+    "litellm",
+    "pymilvus",
+    "mysql.connector",
+    "notion_client",
+    "tweepy",
+)
+
+ENTRY_POINTS = (
+    "af_start",
+    "af_end",
+    "af_pull",
+    "af_save",
+    "af_sync",
+    "af_dist",
+    "af_publish",
+    "af_clean",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--modules", help="modules to import, comma separated",
+                    default=",".join(ENTRY_POINTS))
+parser.add_argument("--top", help="print the top n cumulative imports",
+                    type=int,
+                    default=10)
+
+
+def import_time(module, python=None):
+    """
+    Import the module in a fresh interpreter
+
+    @return {ok, error, wall, total, modules, top}
+            total - cumulative import time (s) of the top-level imports
+            modules - all the module names imported
+            top - [(cumulative_us, name)], sorted desc
+    """
+    st = time.time()
+
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True)
+
+    wall = time.time() - st
+    total = 0
+    modules = set()
+    top = []
+    errors = []
+
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+
+        if not m:
+            if not line.startswith("import time:"):
+                errors.append(line)
+            continue
+
+        cumulative, indent, name = int(m.group(2)), m.group(3), m.group(4)
+        modules.add(name)
+        top.append((cumulative, name))
+
+        # The top-level imports are indented by one space only
+        if len(indent) <= 1:
+            total += cumulative
+
+    top.sort(reverse=True)
+
+    return {
+        "ok": proc.returncode == 0,
+        "error": "\n".join(errors[-3:]),
+        "wall": wall,
+        "total": total / 1e6,
+        "modules": modules,
+        "top": top,
+    }
+
+
+def heavy_modules(modules):
+    return sorted(x for x in HEAVY_MODULES if x in modules)
+
+
+def run(args):
+    failed = False
+
+    print("| module       |  import   |   wall    | budget | heavy modules |")
+    print("|--------------|-----------|-----------|--------|---------------|")
+
+    for module in args.modules.split(","):
+        res = import_time(module)
+
+        if not res["ok"]:
+            print(f"| {module:<12} |  failed: {res['error']}")
+            continue
+
+        heavy = heavy_modules(res["modules"])
+        budget = BUDGETS.get(module)
+        over = budget is not None and res["total"] > budget
+        failed = failed or over or bool(heavy)
+
+        print(f"| {module:<12} | {res['total']:>8.3f}s | {res['wall']:>8.3f}s | {budget or '-':>6} | {','.join(heavy) or '-'} |")
+
+        if args.top > 0:
+            for cumulative, name in res["top"][:args.top]:
+                print(f"    {cumulative / 1e3:>9.1f}ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    sys.exit(run(args))
@@ -0,0 +1,140 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from local_index_cli import LocalIndexClient
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", help="number of indexed embeddings",
+                    type=int,
+                    default=20000)
+parser.add_argument("--queries", help="number of queries",
+                    type=int,
+                    default=200)
+parser.add_argument("--dim", help="embedding dimension",
+                    type=int,
+                    default=384)
+parser.add_argument("--topk", help="top-k per query",
+                    type=int,
+                    default=2)
+parser.add_argument("--nlist", help="IVF lists",
+                    type=int,
+                    default=64)
+parser.add_argument("--nprobe", help="IVF lists to scan per query",
+                    type=int,
+                    default=8)
+parser.add_argument("--metric", help="L2, IP or COSINE",
+                    default=os.getenv("MILVUS_SIMILARITY_METRICS", "L2"))
+parser.add_argument("--milvus", help="also benchmark MilvusClient on the same embeddings",
+                    action="store_true",
+                    default=False)
+
+
+def make_data(args):
+    """
+    Clustered and normalized embeddings, queries are perturbed rows
+    """
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(max(1, args.rows // 100), args.dim))
+    embs = centers[rng.integers(0, len(centers), args.rows)]
+    embs = embs + 0.3 * rng.normal(size=embs.shape)
+    embs /= np.linalg.norm(embs, axis=1, keepdims=True)
+
+    queries = embs[rng.integers(0, args.rows, args.queries)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    item_ids = [f"item_{i}" for i in range(args.rows)]
+    return embs.astype(np.float32), queries.astype(np.float32), item_ids
+
+
+def recall(expected, actual):
+    hit = tot = 0
+
+    for exp, act in zip(expected, actual):
+        exp_ids = {x["item_id"] for x in exp}
+        hit += len(exp_ids & {x["item_id"] for x in act})
+        tot += len(exp_ids)
+
+    return hit / tot if tot else 0.0
+
+
+def bench(name, client, collection_name, embs, queries, item_ids, args, baseline=None):
+    st = time.time()
+    client.createCollection(
+        collection_name, dim=args.dim, distance_metric=args.metric)
+
+    if isinstance(client, LocalIndexClient):
+        client.getCollection(collection_name).insert(embs, item_ids)
+    else:
+        collection = client.getCollection(collection_name)
+        for i in range(0, len(embs), 5000):
+            collection.insert([embs[i:i + 5000].tolist(), item_ids[i:i + 5000]])
+
+    client.flush(collection_name)
+
+    # the first query includes IVF training / collection loading
+    client.get_many(collection_name, [""], topk=args.topk, embs=[queries[0]])
+    build = time.time() - st
+
+    st = time.time()
+    res = client.get_many(
+        collection_name, [""] * len(queries), topk=args.topk, embs=queries)
+    batched = time.time() - st
+
+    st = time.time()
+    for query in queries:
+        client.get(collection_name, "", topk=args.topk, emb=query)
+    single = time.time() - st
+
+    rec = recall(baseline, res) if baseline else 1.0
+    print(f"| {name:<12} | {build:>8.3f}s | {len(queries) / batched:>10.1f} | {len(queries) / single:>10.1f} | {rec:>8.3f} |")
+    return res
+
+
+def run(args):
+    embs, queries, item_ids = make_data(args)
+    root_dir = tempfile.mkdtemp(prefix="bench_vector_index_")
+
+    print(f"rows: {args.rows}, queries: {args.queries}, dim: {args.dim}, topk: {args.topk}, metric: {args.metric}")
+    print("| backend      |    build  | batch qps  | single qps | recall   |")
+    print("|--------------|-----------|------------|------------|----------|")
+
+    try:
+        flat = LocalIndexClient(root_dir=root_dir, ivf_nlist=0)
+        baseline = bench("local-flat", flat, "bench_flat", embs, queries, item_ids, args)
+
+        ivf = LocalIndexClient(
+            root_dir=root_dir, ivf_nlist=args.nlist,
+            ivf_min_rows=1, nprobe=args.nprobe)
+        bench("local-ivf", ivf, "bench_ivf", embs, queries, item_ids, args, baseline=baseline)
+
+        if args.milvus:
+            from milvus_cli import MilvusClient
+
+            milvus_client = MilvusClient()
+            name = "bench_vector_index"
+
+            if milvus_client.exist(name):
+                milvus_client.drop(name)
+
+            try:
+                bench("milvus", milvus_client, name, embs, queries, item_ids, args, baseline=baseline)
+            finally:
+                milvus_client.drop(name)
+
+    finally:
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    load_dotenv()
+
+    run(args)
@@ -0,0 +1,163 @@
+"""
+Process-wide registry of the long-lived clients
+
+The clients (DB connection, embedding model, Milvus connection and
+Notion client) are expensive to build, e.g. the hf provider loads a
+SentenceTransformer model. They are created lazily on first use and
+shared by all the operators in the process.
+
+Usage:
+    client = client_registry.get_db_client()
+    emb_agent = client_registry.get_embedding_agent()
+"""
+import atexit
+import os
+import threading
+
+
+_lock = threading.RLock()
+
+# <key, client>
+_clients = {}
+
+
+def _get(key, factory):
+    client = _clients.get(key)
+
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+
+        if client is None:
+            print(f"[ClientRegistry] Initializing client: {key}")
+            client = factory()
+            _clients[key] = client
+
+        return client
+
+
+def get_db_client():
+    from db_cli import DBClient
+
+    return _get(("db",), DBClient)
+
+
+def get_embedding_agent(provider="", model_name=""):
+    from embedding_agent import EmbeddingAgent
+
+    provider = provider or os.getenv("EMBEDDING_PROVIDER", "openai")
+    model_name = model_name or os.getenv("EMBEDDING_MODEL", "embedding-2")
+
+    return _get(
+        ("embedding", provider, model_name),
+        lambda: EmbeddingAgent(provider=provider, model_name=model_name))
+
+
+def get_milvus_client(alias="default"):
+    from milvus_cli import MilvusClient
+
+    return _get(
+        ("milvus", alias),
+        lambda: MilvusClient(alias=alias, emb_agent=get_embedding_agent()))
+
+
+def get_local_index_client():
+    from local_index_cli import LocalIndexClient
+
+    return _get(
+        ("local_index",),
+        lambda: LocalIndexClient(emb_agent=get_embedding_agent()))
+
+
+def get_vector_client():
+    """
+    The vector index backend for relevance scoring, VECTOR_INDEX_BACKEND:
+    - milvus (default): Milvus server
+    - local: in-process numpy index (LocalIndexClient)
+    """
+    backend = os.getenv("VECTOR_INDEX_BACKEND", "milvus")
+
+    if backend == "local":
+        return get_local_index_client()
+
+    return get_milvus_client()
+
+
+def get_llm_cache():
+    from llm_cache import LLMCache
+
+    return _get(("llm_cache",), lambda: LLMCache(db_client=get_db_client()))
+
+
+def get_content_cache():
+    from content_cache import ContentCache
+
+    return _get(("content_cache",), lambda: ContentCache(db_client=get_db_client()))
+
+
+def get_notion_agent(api_key=None):
+    from notion import NotionAgent
+
+    api_key = api_key or os.getenv("NOTION_TOKEN")
+
+    return _get(("notion", api_key), lambda: NotionAgent(api_key))
+
+
+def health_check():
+    """
+    Ping the initialized clients, the unhealthy ones are evicted and
+    will be re-created on next use
+
+    @return <key, healthy>
+    """
+    res = {}
+
+    with _lock:
+        for key, client in list(_clients.items()):
+            ping = getattr(client, "ping", None)
+            healthy = True
+
+            if ping:
+                try:
+                    healthy = bool(ping())
+                except Exception as e:
+                    print(f"[ERROR] Health check failed for client {key}: {e}")
+                    healthy = False
+
+            if not healthy:
+                print(f"[WARN] Client {key} is unhealthy, evict it")
+                _close(key, client)
+                _clients.pop(key, None)
+
+            res[key] = healthy
+
+    print(f"[ClientRegistry] Health check: {res}")
+    return res
+
+
+def _close(key, client):
+    try:
+        if key[0] in ("milvus", "local_index"):
+            client.disconnect()
+
+        elif hasattr(client, "close"):
+            client.close()
+
+    except Exception as e:
+        print(f"[ERROR] Failed to close client {key}: {e}")
+
+
+def shutdown():
+    """
+    Close all the clients, it's safe to call multiple times
+    """
+    with _lock:
+        for key, client in list(_clients.items()):
+            _close(key, client)
+
+        _clients.clear()
+
+
+atexit.register(shutdown)
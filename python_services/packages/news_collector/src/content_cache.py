@@ -0,0 +1,213 @@
+"""
+Shared cache of the fetched content (web pages, arXiv papers, YouTube
+transcripts)
+
+The extracted text is stored gzip compressed on disk
+(CONTENT_CACHE_DIR), the Redis index holds the path, fetch time and the
+HTTP validators (ETag / Last-Modified) with TTL (CONTENT_CACHE_TTL).
+
+Within CONTENT_CACHE_FRESH_TTL an entry is served directly, after that
+the fetcher is asked to revalidate it (conditional GET for the web
+pages), the immutable kinds (arXiv, YouTube) are served until the TTL.
+
+Usage:
+    cache = client_registry.get_content_cache()
+    entry = cache.get_or_fetch("web", canonical_url(url), fetch)
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Tracking query params, dropped from the canonical url
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src", "ref_url", "igshid")
+
+
+def canonical_url(url: str):
+    """
+    Lowercase scheme and host, no fragment, no tracking params, sorted
+    query
+    """
+    if not url:
+        return url
+
+    parts = urlsplit(url.strip())
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path or "/",
+        urlencode(sorted(query)),
+        "",
+    ))
+
+
+class ContentCache:
+    def __init__(
+        self,
+        db_client=None,
+        root_dir=None,
+        ttl=None,
+        fresh_ttl=None,
+    ):
+        self.client = db_client
+        self.root_dir = root_dir or os.getenv("CONTENT_CACHE_DIR", "./content_cache")
+        self.ttl = int(ttl or os.getenv("CONTENT_CACHE_TTL", 86400 * 7))
+        self.fresh_ttl = int(fresh_ttl or os.getenv("CONTENT_CACHE_FRESH_TTL", 86400))
+
+        self.lock = threading.Lock()
+
+        self.stats = {
+            "hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+        }
+
+    def _db(self):
+        if self.client is None:
+            import client_registry
+            self.client = client_registry.get_db_client()
+
+        return self.client
+
+    def _id(self, key):
+        return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+    def _path(self, kind, item_id):
+        return os.path.join(self.root_dir, kind, item_id[:2], f"{item_id}.json.gz")
+
+    def _inc(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def get(self, kind, key):
+        """
+        @return {text, metadata, fetched_at, etag, last_modified} or None
+        """
+        item_id = self._id(key)
+        data = self._db().get_content_cache_item_id(kind, item_id)
+
+        if not data:
+            return None
+
+        index = json.loads(data)
+
+        try:
+            with gzip.open(index["path"], "rt", encoding="utf-8") as f:
+                content = json.load(f)
+
+        except (OSError, ValueError) as e:
+            print(f"[WARN] ContentCache failed to read {index['path']}, drop it: {e}")
+            self.invalidate(kind, key)
+            return None
+
+        index.update(content)
+        return index
+
+    def put(self, kind, key, text, metadata=None, etag=None, last_modified=None):
+        item_id = self._id(key)
+        path = self._path(kind, item_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a tmp file first, the concurrent readers never see a
+        # partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"text": text, "metadata": metadata or {}}, f, default=str)
+
+        os.replace(tmp_path, path)
+
+        entry = {
+            "key": key,
+            "path": path,
+            "fetched_at": time.time(),
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+        }
+
+        self._set_index(kind, item_id, entry)
+
+        entry["text"] = text
+        entry["metadata"] = metadata or {}
+        return entry
+
+    def touch(self, kind, key, entry):
+        """
+        The entry was revalidated (not modified), restart its fresh window
+        """
+        index = {x: entry[x] for x in ("key", "path", "etag", "last_modified")}
+        index["fetched_at"] = entry["fetched_at"] = time.time()
+
+        self._set_index(kind, self._id(key), index)
+        return entry
+
+    def _set_index(self, kind, item_id, index):
+        self._db().set_content_cache_item_id(
+            kind, item_id, json.dumps(index),
+            expired_time=self.ttl, overwrite=True)
+
+    def invalidate(self, kind, key):
+        item_id = self._id(key)
+        self._db().delete_content_cache_item_id(kind, item_id)
+
+        try:
+            os.remove(self._path(kind, item_id))
+        except OSError:
+            pass
+
+    def get_or_fetch(self, kind, key, fetch, revalidate=True):
+        """
+        @param fetch - fetch(entry) -> {text, metadata, etag, last_modified},
+               entry is the stale cached entry (or None), fetch returns
+               None if it's not modified
+        @param revalidate - False for immutable content, the entry is
+               served until it expires
+        @return the entry, or None if nothing fetched
+        """
+        entry = self.get(kind, key)
+
+        if entry is not None and (not revalidate or time.time() - entry["fetched_at"] < self.fresh_ttl):
+            print(f"[ContentCache] Hit, kind: {kind}, key: {key}")
+            self._inc("hits")
+            return entry
+
+        res = fetch(entry)
+
+        if res is None and entry is not None:
+            print(f"[ContentCache] Not modified, kind: {kind}, key: {key}")
+            self._inc("revalidated")
+            return self.touch(kind, key, entry)
+
+        self._inc("misses")
+
+        if not res or not res.get("text"):
+            return None
+
+        return self.put(
+            kind, key, res["text"],
+            metadata=res.get("metadata"),
+            etag=res.get("etag"),
+            last_modified=res.get("last_modified"))
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+
+        tot = sum(stats.values())
+        stats["hit_rate"] = (stats["hits"] + stats["revalidated"]) / tot if tot else 0.0
+        return stats
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print(f"[ContentCache] hits: {stats['hits']}, revalidated: {stats['revalidated']}, misses: {stats['misses']}, hit_rate: {stats['hit_rate']:.2%}")
+
+    def close(self):
+        self.print_stats()
@@ -0,0 +1,177 @@
+"""
+Parallel content enrichment (loading the linked web pages, arXiv papers,
+video transcripts of the pulled posts)
+
+- A worker pool (ENRICH_CONCURRENCY)
+- Per-domain concurrency cap (ENRICH_PER_DOMAIN), the tasks are
+  interleaved by domain so one slow site doesn't hold all the workers
+- Exponential backoff with jitter between the retries
+- A total deadline (ENRICH_DEADLINE) for the whole batch, the workers
+  are daemon threads (see daemon_pool), a task stuck after the deadline
+  doesn't hold the process at exit
+- ENRICH_REQUEST_TIMEOUT: the per-request timeout for the loaders
+
+A task that fails, returns nothing or misses the deadline degrades to its
+fallback value instead of blocking the batch.
+
+Usage:
+    enricher = ContentEnricher()
+    texts = enricher.run([
+        {"url": url, "load": lambda: utils.load_web(url), "fallback": selftext},
+        ...
+    ])
+"""
+import os
+import time
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import wait
+from urllib.parse import urlsplit
+
+from daemon_pool import DaemonThreadPool
+
+
+def get_domain(url: str):
+    netloc = urlsplit(url or "").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+class ContentEnricher:
+    def __init__(
+        self,
+        max_workers=None,
+        per_domain=None,
+        retries=None,
+        backoff_base=None,
+        backoff_max=None,
+        deadline=None,
+        request_timeout=None,
+    ):
+        self.max_workers = int(max_workers or os.getenv("ENRICH_CONCURRENCY", 8))
+        self.per_domain = int(per_domain or os.getenv("ENRICH_PER_DOMAIN", 2))
+        self.retries = int(retries if retries is not None else os.getenv("ENRICH_RETRIES", 2))
+        self.backoff_base = float(backoff_base or os.getenv("ENRICH_BACKOFF_BASE", 1))
+        self.backoff_max = float(backoff_max or os.getenv("ENRICH_BACKOFF_MAX", 16))
+        self.deadline = float(deadline or os.getenv("ENRICH_DEADLINE", 180))
+        self.request_timeout = float(request_timeout or os.getenv("ENRICH_REQUEST_TIMEOUT", 30))
+
+        # <domain, Semaphore>
+        self.domains = {}
+        self.lock = threading.Lock()
+
+    def _domain_slot(self, domain):
+        with self.lock:
+            if domain not in self.domains:
+                self.domains[domain] = threading.BoundedSemaphore(self.per_domain)
+
+            return self.domains[domain]
+
+    def _interleave(self, tasks):
+        """
+        Round-robin the task indexes over the domains
+        """
+        groups = OrderedDict()
+
+        for i, task in enumerate(tasks):
+            groups.setdefault(get_domain(task.get("url")), []).append(i)
+
+        order = []
+        queues = list(groups.values())
+
+        while queues:
+            order.extend(q.pop(0) for q in queues)
+            queues = [q for q in queues if q]
+
+        return order
+
+    def _run_task(self, task, end_time):
+        """
+        @return (result, error), result is None if nothing loaded
+        """
+        url = task.get("url")
+        retries = task.get("retries", self.retries)
+        slot = self._domain_slot(get_domain(url))
+        error = None
+
+        for attempt in range(retries + 1):
+            remaining = end_time - time.monotonic()
+
+            if remaining <= 0 or not slot.acquire(timeout=remaining):
+                return None, error or "deadline exceeded"
+
+            try:
+                res = task["load"]()
+
+                # Empty / invalid content won't change by retrying
+                return res or None, None
+
+            except Exception as e:
+                error = e
+                print(f"[WARN] Enrich {url} failed, attempt {attempt + 1}/{retries + 1}: {e}")
+
+            finally:
+                slot.release()
+
+            if attempt < retries:
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                delay = delay * (0.5 + random.random() / 2)
+
+                if time.monotonic() + delay >= end_time:
+                    break
+
+                time.sleep(delay)
+
+        return None, error
+
+    def run(self, tasks: list):
+        """
+        tasks: [{url, load, fallback, [retries]}, ...], load() returns
+               the content
+
+        @return the contents in the same order of tasks, the fallback for
+                the failed / timed out ones
+        """
+        tasks = list(tasks)
+
+        if not tasks:
+            return []
+
+        st = time.monotonic()
+        end_time = st + self.deadline
+        results = [task.get("fallback") for task in tasks]
+        stats = {"loaded": 0, "empty": 0, "failed": 0, "timeout": 0}
+
+        executor = DaemonThreadPool(min(self.max_workers, len(tasks)), name="enrich")
+
+        futures = {
+            executor.submit(self._run_task, tasks[i], end_time): i
+            for i in self._interleave(tasks)
+        }
+
+        done, not_done = wait(futures, timeout=self.deadline)
+
+        # Don't wait for the stragglers, their results are dropped
+        executor.shutdown(cancel_futures=True)
+
+        for future in done:
+            i = futures[future]
+            res, error = future.result()
+
+            if res is not None:
+                results[i] = res
+                stats["loaded"] += 1
+
+            elif error is not None:
+                print(f"[ERROR] Enrich {tasks[i].get('url')} failed, use the fallback instead: {error}")
+                stats["failed"] += 1
+
+            else:
+                stats["empty"] += 1
+
+        for future in not_done:
+            print(f"[WARN] Enrich {tasks[futures[future]].get('url')} exceeded the deadline ({self.deadline}s), use the fallback instead")
+            stats["timeout"] += 1
+
+        print(f"[ContentEnricher] Finished {len(tasks)} tasks in {time.monotonic() - st:.2f}s, loaded: {stats['loaded']}, empty: {stats['empty']}, failed: {stats['failed']}, timeout: {stats['timeout']}")
+        return results
@@ -0,0 +1,75 @@
+"""
+A minimal thread pool of daemon workers
+
+ThreadPoolExecutor workers are joined at interpreter exit, even after
+shutdown(wait=False), so one stuck task (a hung socket, a long
+transcription) still holds the process after the caller's deadline.
+The daemon workers here are not joined, the deadline of the caller
+bounds the task run.
+
+The tasks return concurrent.futures.Future, so wait() / as_completed()
+work as with ThreadPoolExecutor.
+
+Usage:
+    pool = DaemonThreadPool(max_workers=8)
+    futures = [pool.submit(fn, x) for x in items]
+    done, not_done = wait(futures, timeout=deadline)
+    pool.shutdown(cancel_futures=True)
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class DaemonThreadPool:
+    def __init__(self, max_workers, name="daemon_pool"):
+        self.queue = queue.SimpleQueue()
+        self.threads = [
+            threading.Thread(target=self._worker, name=f"{name}_{i}", daemon=True)
+            for i in range(max(1, max_workers))
+        ]
+
+        for thread in self.threads:
+            thread.start()
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+
+            # Shutdown
+            if item is None:
+                return
+
+            future, fn, args, kwargs = item
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.queue.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        """
+        Never blocks, the running tasks finish in the background
+
+        @param cancel_futures - cancel the tasks not started yet
+        """
+        if cancel_futures:
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if item is not None:
+                    item[0].cancel()
+
+        for _ in self.threads:
+            self.queue.put(None)
@@ -49,7 +49,8 @@ OBSIDIAN_INBOX_ITEM_ID = "obsidian_inbox_item_id_{}_{}_{}"
 EMBEDDING_ITEM_ID = "embedding_item_id_{}_{}_{}"
 
 # key: prefix + provider + model_name + source_name + id
-# val: embedding data
+# val: embedding data, binary format (see embedding_utils.encode_embedding),
+#      legacy entries are json float lists
 # ttl: 4 weeks
 MILVUS_EMBEDDING_ITEM_ID = "milvus_embedding_item_id_{}_{}_{}_{}"
 
@@ -58,6 +59,11 @@ MILVUS_EMBEDDING_ITEM_ID = "milvus_embedding_item_id_{}_{}_{}_{}"
 # ttl: 4 weeks
 MILVUS_PERF_DATA_ITEM_ID = "milvus_collection_item_id_{}_{}_{}"
 
+# key: prefix + md5(feed_url)
+# val: json format: {"etag": xx, "last_modified": xx}
+# ttl: 4 weeks
+FEED_VALIDATOR_ITEM_ID = "feed_validator_item_id_{}"
+
 # key: page_id
 # val: json format: {"user_rating": xx}
 # ttl: 4 weeks
@@ -70,3 +76,45 @@ TODO_ITEM_ID = "todo_item_id_{}"
 # key: page_id
 # val: json format: {"last_edited_time": xx, "action": xx}
 ACTION_ITEM_ID = "action_item_id_{}"
+
+# key: prefix + namespace + ":" + digest
+#      namespace: hash(prompt template, model, temperature)
+#      digest: hash(normalized input text)
+# val: llm response
+# ttl: 2 weeks (LLM_CACHE_TTL)
+LLM_CACHE_ITEM_ID = "llm_cache_item_id_{}"
+
+# key: sorted set of the llm cache keys (namespace:digest), scored by
+#      the last access time, used for the LRU eviction
+LLM_CACHE_INDEX = "llm_cache_index"
+
+# The per-item llm responses (summary, category, ranking, enhanced
+# analysis) are stored as pointers to the llm cache:
+# "llm_cache:" + namespace + ":" + digest
+LLM_CACHE_POINTER_PREFIX = "llm_cache:"
+
+# key: prefix + kind (web/arxiv/youtube) + md5(canonical url, arxiv id or video id)
+# val: json format: {"path": xx, "fetched_at": xx, "etag": xx, "last_modified": xx}
+#      the compressed content is stored on disk (CONTENT_CACHE_DIR)
+# ttl: 1 week (CONTENT_CACHE_TTL)
+CONTENT_CACHE_ITEM_ID = "content_cache_item_id_{}_{}"
+
+# key: prefix + md5(url)
+# val: landing url after the redirections
+# ttl: 4 weeks
+URL_REDIRECT_ITEM_ID = "url_redirect_item_id_{}"
+
+# key: prefix + item_id (source + page id)
+# val: MinHash signature, binary format (uint32 array)
+# ttl: 1 week (NEAR_DEDUP_TTL)
+NEAR_DEDUP_SIGNATURE_ITEM_ID = "near_dedup_signature_item_id_{}"
+
+# key: prefix + band index + band hash
+# val: item_id of the representative page of the LSH bucket
+# ttl: 1 week (NEAR_DEDUP_TTL)
+NEAR_DEDUP_BAND_ITEM_ID = "near_dedup_band_item_id_{}"
+
+# key: prefix + notion page id
+# val: json format: {"last_edited_time": xx, "blocks": {block_id: block_data}}
+# ttl: 1 week (NOTION_BLOCK_CACHE_TTL)
+NOTION_BLOCKS_ITEM_ID = "notion_blocks_item_id_{}"
@@ -1,3 +1,5 @@
+import time
+
 from db_cli_base import DBClientBase
 from redis_cli import RedisClient
 
@@ -12,6 +14,104 @@ class DBClient(DBClientBase):
             self.driver = RedisClient()
             print("[INFO] Initialized default DB driver (Redis)")
 
+    def ping(self):
+        return self.driver.ping()
+
+    def close(self):
+        self.driver.close()
+
+    def get_many(self, keys: list):
+        """
+        Get multiple keys in one round trip
+
+        @return values in the same order of keys
+        """
+        return self.driver.get_many(keys)
+
+    def set_many(self, items: list, **kwargs):
+        """
+        Set multiple keys in one round trip
+
+        items: [(key, val), ...] or [(key, val, expired_time), ...]
+        """
+        return self.driver.set_many(items, **kwargs)
+
+    def scan_keys(self, pattern: str):
+        return self.driver.scan_keys(pattern)
+
+    def get_llm_cache_item_ids(self, keys: list):
+        key_tpl = data_model.LLM_CACHE_ITEM_ID
+        return self.get_many([key_tpl.format(x) for x in keys])
+
+    def set_llm_cache_item_id(self, key, val: str, **kwargs):
+        """
+        Store the llm response and refresh its position in the LRU index
+        """
+        key_tpl = data_model.LLM_CACHE_ITEM_ID
+        kwargs["overwrite"] = True
+        self.driver.set(key_tpl.format(key), val, **kwargs)
+        self.touch_llm_cache_item_ids([key])
+
+    def touch_llm_cache_item_ids(self, keys: list):
+        if keys:
+            now = time.time()
+            self.driver.zadd(data_model.LLM_CACHE_INDEX, {x: now for x in keys})
+
+    def evict_llm_cache_item_ids(self, max_entries: int, ttl: int):
+        """
+        Drop the index entries older than ttl (the keys are expired by
+        redis already), then the least recently used ones beyond
+        max_entries
+
+        @return number of evicted entries
+        """
+        index = data_model.LLM_CACHE_INDEX
+        key_tpl = data_model.LLM_CACHE_ITEM_ID
+
+        expired = self.driver.zrangebyscore(index, 0, time.time() - ttl) if ttl > 0 else []
+        self.driver.zrem(index, expired)
+
+        overflow = self.driver.zcard(index) - max_entries
+        if overflow <= 0:
+            return 0
+
+        evicted = [x for x, _ in self.driver.zpopmin(index, overflow)]
+        self.driver.delete([key_tpl.format(x) for x in evicted])
+        return len(evicted)
+
+    def _to_llm_cache_pointer(self, val, kwargs):
+        """
+        Replace the llm response with a pointer to the llm cache entry if
+        the caller passed its cache_key
+        """
+        cache_key = kwargs.pop("cache_key", None)
+
+        if not cache_key:
+            return val
+
+        return data_model.LLM_CACHE_POINTER_PREFIX + cache_key
+
+    def _resolve_llm_cache_pointer(self, val, cache_ns=None):
+        """
+        Follow the pointer to the llm cache, the legacy values (the
+        responses themselves) are returned as is
+
+        @return None if the cache entry is gone, or it was produced by a
+                different prompt/model (cache_ns mismatch)
+        """
+        prefix = data_model.LLM_CACHE_POINTER_PREFIX.encode("utf-8")
+
+        if not isinstance(val, bytes) or not val.startswith(prefix):
+            return val
+
+        cache_key = val[len(prefix):].decode("utf-8")
+
+        if cache_ns and not cache_key.startswith(f"{cache_ns}:"):
+            print(f"[INFO] Stale llm cache pointer {cache_key}, namespace changed to {cache_ns}")
+            return None
+
+        return self.get_llm_cache_item_ids([cache_key])[0]
+
     def get_notion_inbox_created_time(self, source, category):
         key_tpl = data_model.NOTION_INBOX_CREATED_TIME_KEY
         key = key_tpl.format(source, category)
@@ -27,11 +127,21 @@ class DBClient(DBClientBase):
         key = key_tpl.format(source, category, item_id)
         return self.driver.get(key)
 
+    def get_notion_toread_item_ids(self, source, category, item_ids: list):
+        key_tpl = data_model.NOTION_TOREAD_ITEM_ID
+        keys = [key_tpl.format(source, category, x) for x in item_ids]
+        return self.get_many(keys)
+
     def set_notion_toread_item_id(self, source, category, item_id, **kwargs):
         key_tpl = data_model.NOTION_TOREAD_ITEM_ID
         key = key_tpl.format(source, category, item_id)
         self.driver.set(key, "true", **kwargs)
 
+    def set_notion_toread_item_ids(self, source, category, item_ids: list, **kwargs):
+        key_tpl = data_model.NOTION_TOREAD_ITEM_ID
+        items = [(key_tpl.format(source, category, x), "true") for x in item_ids]
+        return self.set_many(items, **kwargs)
+
     def get_notion_last_edited_time(self, source, category):
         key_tpl = data_model.NOTION_TOREAD_LAST_EDITED_KEY
         key = key_tpl.format(source, category)
@@ -42,10 +152,14 @@ class DBClient(DBClientBase):
         key = key_tpl.format(source, category)
         self.driver.set(key, t, **kwargs)
 
-    def get_notion_ranking_item_id(self, source, category, item_id):
+    def get_notion_ranking_item_id(self, source, category, item_id, cache_ns=None):
+        """
+        cache_ns: the llm cache namespace of the current agent, see
+                  _resolve_llm_cache_pointer
+        """
         key_tpl = data_model.NOTION_RANKING_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        return self.driver.get(key)
+        return self._resolve_llm_cache_pointer(self.driver.get(key), cache_ns)
 
     def set_notion_ranking_item_id(
         self,
@@ -57,12 +171,16 @@ class DBClient(DBClientBase):
     ):
         key_tpl = data_model.NOTION_RANKING_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        self.driver.set(key, r, **kwargs)
+        self.driver.set(key, self._to_llm_cache_pointer(r, kwargs), **kwargs)
 
-    def get_notion_summary_item_id(self, source, category, item_id):
+    def get_notion_summary_item_id(self, source, category, item_id, cache_ns=None):
+        """
+        cache_ns: the llm cache namespace of the current agent, see
+                  _resolve_llm_cache_pointer
+        """
         key_tpl = data_model.NOTION_SUMMARY_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        return self.driver.get(key)
+        return self._resolve_llm_cache_pointer(self.driver.get(key), cache_ns)
 
     def set_notion_summary_item_id(
         self,
@@ -74,16 +192,30 @@ class DBClient(DBClientBase):
     ):
         key_tpl = data_model.NOTION_SUMMARY_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        self.driver.set(key, s, **kwargs)
+        self.driver.set(key, self._to_llm_cache_pointer(s, kwargs), **kwargs)
+
+    def set_notion_summary_item_ids(self, source, items: list, **kwargs):
+        """
+        items: [(category, item_id, summary, cache_key), ...], a non-empty
+               cache_key stores a pointer to the llm cache entry instead
+               of the summary, see _to_llm_cache_pointer
+        """
+        key_tpl = data_model.NOTION_SUMMARY_ITEM_ID
+        items = [
+            (key_tpl.format(source, category, item_id),
+             self._to_llm_cache_pointer(s, {"cache_key": cache_key}))
+            for category, item_id, s, cache_key in items
+        ]
+        return self.set_many(items, **kwargs)
 
-    def get_notion_enhanced_analysis_item_id(self, source, category, item_id):
+    def get_notion_enhanced_analysis_item_id(self, source, category, item_id, cache_ns=None):
         """
         Get cached enhanced analysis for an item
         Key pattern: notion:enhanced_analysis:{source}:{list_name}:{item_id}
         """
         key_tpl = data_model.NOTION_ENHANCED_ANALYSIS_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        return self.driver.get(key)
+        return self._resolve_llm_cache_pointer(self.driver.get(key), cache_ns)
 
     def set_notion_enhanced_analysis_item_id(
         self,
@@ -99,12 +231,16 @@ class DBClient(DBClientBase):
         """
         key_tpl = data_model.NOTION_ENHANCED_ANALYSIS_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        self.driver.set(key, analysis_json, **kwargs)
+        self.driver.set(key, self._to_llm_cache_pointer(analysis_json, kwargs), **kwargs)
 
-    def get_notion_category_item_id(self, source, category, item_id):
+    def get_notion_category_item_id(self, source, category, item_id, cache_ns=None):
+        """
+        cache_ns: the llm cache namespace of the current agent, see
+                  _resolve_llm_cache_pointer
+        """
         key_tpl = data_model.NOTION_CATEGORY_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        return self.driver.get(key)
+        return self._resolve_llm_cache_pointer(self.driver.get(key), cache_ns)
 
     def set_notion_category_item_id(
         self,
@@ -116,7 +252,7 @@ class DBClient(DBClientBase):
     ):
         key_tpl = data_model.NOTION_CATEGORY_ITEM_ID
         key = key_tpl.format(source, category, item_id)
-        self.driver.set(key, c, **kwargs)
+        self.driver.set(key, self._to_llm_cache_pointer(c, kwargs), **kwargs)
 
     def get_obsidian_inbox_item_id(self, source, category, item_id):
         key_tpl = data_model.OBSIDIAN_INBOX_ITEM_ID
@@ -128,6 +264,11 @@ class DBClient(DBClientBase):
         key = key_tpl.format(source, category, item_id)
         self.driver.set(key, "true", **kwargs)
 
+    def set_obsidian_inbox_item_ids(self, source, category, item_ids: list, **kwargs):
+        key_tpl = data_model.OBSIDIAN_INBOX_ITEM_ID
+        items = [(key_tpl.format(source, category, x), "true") for x in item_ids]
+        return self.set_many(items, **kwargs)
+
     def get_milvus_embedding_item_id(
         self,
         provider,
@@ -152,11 +293,42 @@ class DBClient(DBClientBase):
         key = key_tpl.format(provider, model_name, source, item_id)
         self.driver.set(key, embed, **kwargs)
 
+    def get_milvus_embedding_item_ids(
+        self,
+        provider,
+        model_name,
+        source,
+        item_ids: list
+    ):
+        key_tpl = data_model.MILVUS_EMBEDDING_ITEM_ID
+        keys = [key_tpl.format(provider, model_name, source, x) for x in item_ids]
+        return self.get_many(keys)
+
+    def set_milvus_embedding_item_ids(
+        self,
+        provider,
+        model_name,
+        source,
+        items: list,
+        **kwargs
+    ):
+        """
+        items: [(item_id, embed), ...]
+        """
+        key_tpl = data_model.MILVUS_EMBEDDING_ITEM_ID
+        items = [(key_tpl.format(provider, model_name, source, item_id), embed) for item_id, embed in items]
+        return self.set_many(items, **kwargs)
+
     def get_milvus_perf_data_item_id(self, source, dt: str, item_id):
         key_tpl = data_model.MILVUS_PERF_DATA_ITEM_ID
         key = key_tpl.format(source, dt, item_id)
         return self.driver.get(key)
 
+    def get_milvus_perf_data_item_ids(self, source, dt: str, item_ids: list):
+        key_tpl = data_model.MILVUS_PERF_DATA_ITEM_ID
+        keys = [key_tpl.format(source, dt, x) for x in item_ids]
+        return self.get_many(keys)
+
     def set_milvus_perf_data_item_id(
         self,
         source,
@@ -168,11 +340,110 @@ class DBClient(DBClientBase):
         key = key_tpl.format(source, dt, item_id)
         self.driver.set(key, "true", **kwargs)
 
+    def set_milvus_perf_data_item_ids(self, source, dt: str, item_ids: list, **kwargs):
+        key_tpl = data_model.MILVUS_PERF_DATA_ITEM_ID
+        items = [(key_tpl.format(source, dt, x), "true") for x in item_ids]
+        return self.set_many(items, **kwargs)
+
+    def get_feed_validator_item_id(self, item_id):
+        key_tpl = data_model.FEED_VALIDATOR_ITEM_ID
+        key = key_tpl.format(item_id)
+        return self.driver.get(key)
+
+    def set_feed_validator_item_id(
+        self,
+        item_id,
+        json_data: str,
+        **kwargs
+    ):
+        key_tpl = data_model.FEED_VALIDATOR_ITEM_ID
+        key = key_tpl.format(item_id)
+        self.driver.set(key, json_data, **kwargs)
+
+    def get_content_cache_item_id(self, kind, item_id):
+        key_tpl = data_model.CONTENT_CACHE_ITEM_ID
+        key = key_tpl.format(kind, item_id)
+        return self.driver.get(key)
+
+    def set_content_cache_item_id(
+        self,
+        kind,
+        item_id,
+        json_data: str,
+        **kwargs
+    ):
+        key_tpl = data_model.CONTENT_CACHE_ITEM_ID
+        key = key_tpl.format(kind, item_id)
+        self.driver.set(key, json_data, **kwargs)
+
+    def delete_content_cache_item_id(self, kind, item_id):
+        key_tpl = data_model.CONTENT_CACHE_ITEM_ID
+        return self.driver.delete([key_tpl.format(kind, item_id)])
+
+    def get_url_redirect_item_id(self, item_id):
+        key_tpl = data_model.URL_REDIRECT_ITEM_ID
+        key = key_tpl.format(item_id)
+        return self.driver.get(key)
+
+    def set_url_redirect_item_id(
+        self,
+        item_id,
+        url: str,
+        **kwargs
+    ):
+        key_tpl = data_model.URL_REDIRECT_ITEM_ID
+        key = key_tpl.format(item_id)
+        self.driver.set(key, url, **kwargs)
+
+    def get_notion_blocks_item_id(self, page_id):
+        key_tpl = data_model.NOTION_BLOCKS_ITEM_ID
+        key = key_tpl.format(page_id)
+        return self.driver.get(key)
+
+    def set_notion_blocks_item_id(
+        self,
+        page_id,
+        data: str,
+        **kwargs
+    ):
+        key_tpl = data_model.NOTION_BLOCKS_ITEM_ID
+        key = key_tpl.format(page_id)
+        self.driver.set(key, data, **kwargs)
+
+    def get_near_dedup_signature_item_ids(self, item_ids: list):
+        key_tpl = data_model.NEAR_DEDUP_SIGNATURE_ITEM_ID
+        return self.get_many([key_tpl.format(x) for x in item_ids])
+
+    def set_near_dedup_signature_item_ids(self, items: list, **kwargs):
+        """
+        items: [(item_id, signature_bytes), ...]
+        """
+        key_tpl = data_model.NEAR_DEDUP_SIGNATURE_ITEM_ID
+        items = [(key_tpl.format(item_id), sig) for item_id, sig in items]
+        return self.set_many(items, **kwargs)
+
+    def get_near_dedup_band_item_ids(self, bands: list):
+        key_tpl = data_model.NEAR_DEDUP_BAND_ITEM_ID
+        return self.get_many([key_tpl.format(x) for x in bands])
+
+    def set_near_dedup_band_item_ids(self, items: list, **kwargs):
+        """
+        items: [(band, item_id), ...]
+        """
+        key_tpl = data_model.NEAR_DEDUP_BAND_ITEM_ID
+        items = [(key_tpl.format(band), item_id) for band, item_id in items]
+        return self.set_many(items, **kwargs)
+
     def get_page_item_id(self, item_id):
         key_tpl = data_model.PAGE_ITEM_ID
         key = key_tpl.format(item_id)
         return self.driver.get(key)
 
+    def get_page_item_ids(self, item_ids: list):
+        key_tpl = data_model.PAGE_ITEM_ID
+        keys = [key_tpl.format(x) for x in item_ids]
+        return self.get_many(keys)
+
     def set_page_item_id(
         self,
         item_id,
@@ -183,6 +454,14 @@ class DBClient(DBClientBase):
         key = key_tpl.format(item_id)
         self.driver.set(key, json_data, **kwargs)
 
+    def set_page_item_ids(self, items: list, **kwargs):
+        """
+        items: [(item_id, json_data), ...]
+        """
+        key_tpl = data_model.PAGE_ITEM_ID
+        items = [(key_tpl.format(item_id), data) for item_id, data in items]
+        return self.set_many(items, **kwargs)
+
     # TODO: Switch to MySQL driver
     def get_todo_item_id(self, item_id):
         key_tpl = data_model.TODO_ITEM_ID
@@ -1,8 +1,18 @@
 from abc import abstractmethod
+import os
 import re
 
+import client_registry
+import embedding_utils as emb_utils
+
 
 class Embedding:
+    # The provider name used in the embedding cache key
+    cache_provider = ""
+
+    # Default number of texts per request for create_many()
+    default_batch_size = 16
+
     def __init__(self, model_name):
         self.model_name = model_name
 
@@ -16,6 +26,27 @@ class Embedding:
         sanitized_start_date = start_date.replace('-', '_')
         return f"{prefix}_{sanitized_model_name}__{sanitized_start_date}"
 
+    def get_rolling_name(self, prefix="news"):
+        """
+        Get the name of the rolling milvus collection, one partition
+        per day (see get_partition_name)
+        """
+        sanitized_model_name = re.sub(r'\W+', '_', self.model_name)
+        return f"{prefix}_{sanitized_model_name}__rolling"
+
+    def get_partition_name(self, start_date):
+        sanitized_start_date = start_date.replace('-', '_')
+        return f"p_{sanitized_start_date}"
+
+    def batch_size(self):
+        return int(os.getenv("EMBEDDING_BATCH_SIZE", self.default_batch_size))
+
+    def max_input_length(self):
+        """
+        Max input chars, None means no truncation
+        """
+        return None
+
     @abstractmethod
     def dim(self):
         pass
@@ -24,6 +55,81 @@ class Embedding:
     def create(self, text: str):
         pass
 
+    def create_many(self, texts: list):
+        """
+        Create embeddings for a list of texts, the backends override it
+        with a provider batch call
+        """
+        return [self.create(text) for text in texts]
+
     @abstractmethod
     def get_or_create(self, text: str, source="", page_id="", db_client=None):
         pass
+
+    def get_or_create_many(
+        self,
+        texts: list,
+        page_ids: list,
+        source="",
+        db_client=None,
+        key_ttl=86400 * 30
+    ):
+        """
+        Get embeddings from cache (or create if not exist) in bulk
+
+        - Cache hits are resolved in one round trip
+        - Only the misses are sent to the model, in batches of
+          batch_size()
+        - The created embeddings are written back in one pipeline
+
+        @return embeddings in the same order of texts
+        """
+        client = db_client or client_registry.get_db_client()
+        provider = self.cache_provider
+        res = [None] * len(texts)
+
+        cached = client.get_milvus_embedding_item_ids(
+            provider, self.model_name, source, page_ids)
+
+        # <page_id, [idx, ...]>, the same page_id is created once
+        misses = {}
+
+        for idx, (page_id, data) in enumerate(zip(page_ids, cached)):
+            embedding = emb_utils.decode_embedding(data)
+
+            if embedding is not None:
+                res[idx] = embedding
+            else:
+                misses.setdefault(page_id, []).append(idx)
+
+        print(f"[Embedding] get_or_create_many: provider: {provider}, total: {len(texts)}, cache misses: {len(misses)}")
+
+        if not misses:
+            return res
+
+        max_length = self.max_input_length()
+        miss_ids = list(misses.keys())
+        miss_texts = [texts[misses[x][0]] for x in miss_ids]
+
+        if max_length:
+            miss_texts = [x[:max_length] for x in miss_texts]
+
+        batch_size = max(1, self.batch_size())
+        items = []
+
+        for i in range(0, len(miss_ids), batch_size):
+            batch_ids = miss_ids[i:i + batch_size]
+            embeddings = self.create_many(miss_texts[i:i + batch_size])
+
+            for page_id, embedding in zip(batch_ids, embeddings):
+                for idx in misses[page_id]:
+                    res[idx] = embedding
+
+                items.append((page_id, emb_utils.encode_embedding(embedding)))
+
+        # store embeddings into redis (ttl = 1 month)
+        client.set_milvus_embedding_item_ids(
+            provider, self.model_name, source, items,
+            expired_time=key_ttl)
+
+        return res
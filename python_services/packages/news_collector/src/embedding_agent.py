@@ -1,8 +1,6 @@
 import os
-from embedding_openai import EmbeddingOpenAI
-from embedding_hf import EmbeddingHuggingFace
-from embedding_hf_inst import EmbeddingHuggingFaceInstruct
-from embedding_ollama import EmbeddingOllama
+
+from ops_stats import timed_call
 
 
 class EmbeddingAgent:
@@ -23,16 +21,21 @@ class EmbeddingAgent:
 
         self.model = None
 
+        # Only the selected provider (and its deps) is imported
         if self.provider == "openai":
+            from embedding_openai import EmbeddingOpenAI
             self.model = EmbeddingOpenAI(model_name=self.model_name)
 
         elif self.provider == "hf":
+            from embedding_hf import EmbeddingHuggingFace
             self.model = EmbeddingHuggingFace(model_name=self.model_name)
 
         elif self.provider == "hf_inst":
+            from embedding_hf_inst import EmbeddingHuggingFaceInstruct
             self.model = EmbeddingHuggingFaceInstruct(model_name=self.model_name)
 
         elif self.provider == "ollama":
+            from embedding_ollama import EmbeddingOllama
             self.model = EmbeddingOllama(model_name=self.model_name)
 
         else:
@@ -45,8 +48,20 @@ class EmbeddingAgent:
     def getname(self, start_date, prefix="news"):
         return self.model.getname(start_date, prefix)
 
+    def get_rolling_name(self, prefix="news"):
+        return self.model.get_rolling_name(prefix)
+
+    def get_partition_name(self, start_date):
+        return self.model.get_partition_name(start_date)
+
+    @timed_call("embedding")
     def create(self, text: str):
         return self.model.create(text)
 
+    @timed_call("embedding")
     def get_or_create(self, text: str, source="", page_id="", db_client=None, key_ttl=86400 * 30):
         return self.model.get_or_create(text, source, page_id, db_client, key_ttl)
+
+    @timed_call("embedding")
+    def get_or_create_many(self, texts: list, page_ids: list, source="", db_client=None, key_ttl=86400 * 30):
+        return self.model.get_or_create_many(texts, page_ids, source, db_client, key_ttl)
@@ -1,9 +1,6 @@
-import json
-
 from langchain.embeddings import HuggingFaceEmbeddings
 from embedding import Embedding
-from db_cli import DBClient
-import utils
+import client_registry
 import embedding_utils as emb_utils
 
 
@@ -12,6 +9,9 @@ class EmbeddingHuggingFace(Embedding):
     Embedding with Sentence Transformers Embeddings (model downloaded
     from HuggingFace)
     """
+    cache_provider = "hf"
+    default_batch_size = 32
+
     def __init__(self, model_name="all-MiniLM-L6-v2"):
         super().__init__(model_name)
 
@@ -33,6 +33,17 @@ class EmbeddingHuggingFace(Embedding):
 
         return emb
 
+    def create_many(self, texts: list, normalize=True):
+        """
+        Encode a batch of texts in one forward pass
+        """
+        embs = self.api.embed_documents(texts)
+
+        if normalize:
+            embs = [emb_utils.l2_norm(emb) for emb in embs]
+
+        return embs
+
     def get_or_create(
         self,
         text: str,
@@ -44,15 +55,16 @@ class EmbeddingHuggingFace(Embedding):
         """
         Get embedding from cache (or create if not exist)
         """
-        client = db_client or DBClient()
+        client = db_client or client_registry.get_db_client()
 
-        embedding = client.get_milvus_embedding_item_id(
-            "hf",
-            self.model_name,
-            source,
-            page_id)
+        embedding = emb_utils.decode_embedding(
+            client.get_milvus_embedding_item_id(
+                "hf",
+                self.model_name,
+                source,
+                page_id))
 
-        if not embedding:
+        if embedding is None:
             embedding = self.create(text)
 
             # store embedding into redis (ttl = 1 month)
@@ -61,10 +73,7 @@ class EmbeddingHuggingFace(Embedding):
                 self.model_name,
                 source,
                 page_id,
-                json.dumps(embedding),
+                emb_utils.encode_embedding(embedding),
                 expired_time=key_ttl)
 
-        else:
-            embedding = utils.fix_and_parse_json(embedding)
-
         return embedding
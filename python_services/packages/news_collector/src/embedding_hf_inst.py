@@ -1,9 +1,6 @@
-import json
-
 from langchain.embeddings import HuggingFaceInstructEmbeddings
 from embedding import Embedding
-from db_cli import DBClient
-import utils
+import client_registry
 import embedding_utils as emb_utils
 
 
@@ -12,6 +9,9 @@ class EmbeddingHuggingFaceInstruct(Embedding):
     Embedding with Instruct Embeddings (model downloaded
     from HuggingFace)
     """
+    cache_provider = "hf_inst"
+    default_batch_size = 32
+
     def __init__(self, model_name="hkunlp/instructor-xl"):
         super().__init__(model_name)
 
@@ -33,6 +33,22 @@ class EmbeddingHuggingFaceInstruct(Embedding):
 
         return emb
 
+    def create_many(self, texts: list, normalize=True):
+        """
+        Encode a batch of texts in one forward pass
+
+        Same query instruction as create() (embed_documents would use
+        the document instruction), so both paths cache the same vector
+        """
+        instruction_pairs = [[self.api.query_instruction, text] for text in texts]
+        embs = self.api.client.encode(instruction_pairs, **self.api.encode_kwargs)
+        embs = [emb.tolist() for emb in embs]
+
+        if normalize:
+            embs = [emb_utils.l2_norm(emb) for emb in embs]
+
+        return embs
+
     def get_or_create(
         self,
         text: str,
@@ -44,15 +60,16 @@ class EmbeddingHuggingFaceInstruct(Embedding):
         """
         Get embedding from cache (or create if not exist)
         """
-        client = db_client or DBClient()
+        client = db_client or client_registry.get_db_client()
 
-        embedding = client.get_milvus_embedding_item_id(
-            "hf_inst",
-            self.model_name,
-            source,
-            page_id)
+        embedding = emb_utils.decode_embedding(
+            client.get_milvus_embedding_item_id(
+                "hf_inst",
+                self.model_name,
+                source,
+                page_id))
 
-        if not embedding:
+        if embedding is None:
             embedding = self.create(text)
 
             # store embedding into redis (ttl = 1 month)
@@ -61,10 +78,7 @@ class EmbeddingHuggingFaceInstruct(Embedding):
                 self.model_name,
                 source,
                 page_id,
-                json.dumps(embedding),
+                emb_utils.encode_embedding(embedding),
                 expired_time=key_ttl)
 
-        else:
-            embedding = utils.fix_and_parse_json(embedding)
-
         return embedding
@@ -1,18 +1,20 @@
 import os
-import json
 import time
 
 import numpy as np
 
 from embedding import Embedding
 from langchain_community.embeddings import OllamaEmbeddings
-import utils
+import embedding_utils as emb_utils
 
 
 class EmbeddingOllama(Embedding):
     """
     Embedding via Ollama
     """
+    cache_provider = "ollama-norm"
+    default_batch_size = 16
+
     def __init__(self, model_name="nomic-embed-text", base_url=""):
         super().__init__(model_name)
 
@@ -69,6 +71,43 @@ class EmbeddingOllama(Embedding):
 
         return emb
 
+    def max_input_length(self):
+        # Most of the emb models have 8k tokens, exceed it will
+        # throw exceptions. Here we simply limited it <= 5000 chars
+        # for the input
+        return int(os.getenv("EMBEDDING_MAX_LENGTH", 5000))
+
+    def create_many(
+        self,
+        texts: list,
+        num_retries=3,
+        error_wait_time=0.5,
+        normalize=True,
+    ):
+        embs = None
+
+        for i in range(1, num_retries + 1):
+            try:
+                # Same query embedding as create() (embed_documents would
+                # use the document instruction), so both paths cache the
+                # same vector. Ollama embeds one text per request anyway
+                embs = [self.client.embed_query(text) for text in texts]
+
+                if normalize:
+                    embs = [(np.array(emb) / np.linalg.norm(emb)).tolist() for emb in embs]
+
+                break
+
+            except Exception as e:
+                print(f"[ERROR] APIError during batch embedding ({i}/{num_retries}): {e}")
+
+                if i == num_retries:
+                    raise
+
+                time.sleep(error_wait_time)
+
+        return embs
+
     def get_or_create(
         self,
         text: str,
@@ -86,25 +125,21 @@ class EmbeddingOllama(Embedding):
         if client:
             # Tips: the quickest way to get rid of all previous
             # cache, change the provider (1st arg)
-            embedding = client.get_milvus_embedding_item_id(
-                "ollama-norm",
-                self.model_name,
-                source,
-                page_id)
-
-        if embedding:
+            embedding = emb_utils.decode_embedding(
+                client.get_milvus_embedding_item_id(
+                    "ollama-norm",
+                    self.model_name,
+                    source,
+                    page_id))
+
+        if embedding is not None:
             print("[EmbeddingOllama] Embedding got from cache")
-            return utils.fix_and_parse_json(embedding)
+            return embedding
 
         # Not found in cache, generate one
         print("[EmbeddingOllama] Embedding not found, create a new one and cache it")
 
-        # Most of the emb models have 8k tokens, exceed it will
-        # throw exceptions. Here we simply limited it <= 5000 chars
-        # for the input
-
-        EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", 5000))
-        embedding = self.create(text[:EMBEDDING_MAX_LENGTH])
+        embedding = self.create(text[:self.max_input_length()])
 
         # store embedding into redis (ttl = 1 month)
         if client:
@@ -113,7 +148,7 @@ class EmbeddingOllama(Embedding):
                 self.model_name,
                 source,
                 page_id,
-                json.dumps(embedding),
+                emb_utils.encode_embedding(embedding),
                 expired_time=key_ttl)
 
         return embedding
@@ -6,6 +6,8 @@ from embedding_openai_1x import EmbeddingOpenAI_1x
 
 
 class EmbeddingOpenAI(Embedding):
+    cache_provider = "openai"
+
     def __init__(self, model_name=""):
         super().__init__(model_name)
 
@@ -49,3 +51,18 @@ class EmbeddingOpenAI(Embedding):
             page_id=page_id,
             db_client=db_client,
             key_ttl=key_ttl)
+
+    def batch_size(self):
+        return self.instance.batch_size()
+
+    def max_input_length(self):
+        return self.instance.max_input_length()
+
+    def create_many(
+        self,
+        texts: list,
+        num_retries=3
+    ):
+        return self.instance.create_many(
+            texts=texts,
+            num_retries=num_retries)
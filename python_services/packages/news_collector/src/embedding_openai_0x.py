@@ -1,19 +1,21 @@
 import os
-import json
 import time
 
 import httpx
 import openai
 
 from embedding import Embedding
-from db_cli import DBClient
-import utils
+import client_registry
+import embedding_utils as emb_utils
 
 
 class EmbeddingOpenAI_0x(Embedding):
     """
     For The implementation for openai < 1.*
     """
+    cache_provider = "openai"
+    default_batch_size = 64
+
     def __init__(self, model_name="text-embedding-ada-002"):
         super().__init__(model_name)
         print(f"Initialized EmbeddingOpenAI 0x: {openai.__version__}, model_name: {model_name}")
@@ -21,6 +23,12 @@ class EmbeddingOpenAI_0x(Embedding):
     def dim(self):
         return 1536
 
+    def max_input_length(self):
+        # OpenAI embedding model accept 8k tokens, exceed it will
+        # throw exceptions. Here we simply limited it <= 5000 chars
+        # for the input
+        return int(os.getenv("EMBEDDING_MAX_LENGTH", 5000))
+
     def create(
         self,
         text: str,
@@ -29,6 +37,16 @@ class EmbeddingOpenAI_0x(Embedding):
         """
         It creates the embedding with 1536 dimentions by default
         """
+        return self.create_many([text], num_retries=num_retries)[0]
+
+    def create_many(
+        self,
+        texts: list,
+        num_retries=3
+    ):
+        """
+        Create embeddings for a batch of texts in one request
+        """
         api_key = os.getenv("OPENAI_API_KEY")
         emb = None
 
@@ -40,15 +58,17 @@ class EmbeddingOpenAI_0x(Embedding):
 
                     emb = openai.Embedding.create(
                         http_client=client,
-                        input=[text],
+                        input=texts,
                         api_key=api_key,
                         model=self.model_name)
                 else:
                     emb = openai.Embedding.create(
-                        input=[text],
+                        input=texts,
                         api_key=api_key,
                         model=self.model_name)
 
+                break
+
             except openai.error.RateLimitError as e:
                 print(f"[ERROR] RateLimit error during embedding ({i}/{num_retries}): {e}")
 
@@ -65,7 +85,8 @@ class EmbeddingOpenAI_0x(Embedding):
                 else:
                     time.sleep(1)
 
-        return emb["data"][0]["embedding"]
+        # The response order follows the input order (by index)
+        return [x["embedding"] for x in sorted(emb["data"], key=lambda x: x["index"])]
 
     def get_or_create(
         self,
@@ -78,21 +99,17 @@ class EmbeddingOpenAI_0x(Embedding):
         """
         Get embedding from cache (or create if not exist)
         """
-        client = db_client or DBClient()
+        client = db_client or client_registry.get_db_client()
 
-        embedding = client.get_milvus_embedding_item_id(
-            "openai",
-            self.model_name,
-            source,
-            page_id)
-
-        if not embedding:
-            # OpenAI embedding model accept 8k tokens, exceed it will
-            # throw exceptions. Here we simply limited it <= 5000 chars
-            # for the input
+        embedding = emb_utils.decode_embedding(
+            client.get_milvus_embedding_item_id(
+                "openai",
+                self.model_name,
+                source,
+                page_id))
 
-            EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", 5000))
-            embedding = self.create(text[:EMBEDDING_MAX_LENGTH])
+        if embedding is None:
+            embedding = self.create(text[:self.max_input_length()])
 
             # store embedding into redis (ttl = 1 month)
             client.set_milvus_embedding_item_id(
@@ -100,10 +117,7 @@ class EmbeddingOpenAI_0x(Embedding):
                 self.model_name,
                 source,
                 page_id,
-                json.dumps(embedding),
+                emb_utils.encode_embedding(embedding),
                 expired_time=key_ttl)
 
-        else:
-            embedding = utils.fix_and_parse_json(embedding)
-
         return embedding
@@ -1,5 +1,4 @@
 import os
-import json
 import time
 
 import httpx
@@ -7,14 +6,17 @@ import openai
 from openai import OpenAI
 
 from embedding import Embedding
-from db_cli import DBClient
-import utils
+import client_registry
+import embedding_utils as emb_utils
 
 
 class EmbeddingOpenAI_1x(Embedding):
     """
     For The implementation for openai < 1.*
     """
+    cache_provider = "openai"
+    default_batch_size = 64
+
     def __init__(self, model_name="embedding-2"):
         super().__init__(model_name)
 
@@ -31,6 +33,12 @@ class EmbeddingOpenAI_1x(Embedding):
     def dim(self):
         return 1536
 
+    def max_input_length(self):
+        # OpenAI embedding model accept 8k tokens, exceed it will
+        # throw exceptions. Here we simply limited it <= 5000 chars
+        # for the input
+        return int(os.getenv("EMBEDDING_MAX_LENGTH", 5000))
+
     def create(
         self,
         text: str,
@@ -39,6 +47,16 @@ class EmbeddingOpenAI_1x(Embedding):
         """
         It creates the embedding with 1536 dimentions by default
         """
+        return self.create_many([text], num_retries=num_retries)[0]
+
+    def create_many(
+        self,
+        texts: list,
+        num_retries=3
+    ):
+        """
+        Create embeddings for a batch of texts in one request
+        """
         retry_wait_time = 3  # seconds to wait
         error_wait_time = 2  # seconds to wait
         emb = None
@@ -46,9 +64,11 @@ class EmbeddingOpenAI_1x(Embedding):
         for i in range(1, num_retries + 1):
             try:
                 emb = self.client.embeddings.create(
-                    input=[text],
+                    input=texts,
                     model=self.model_name)
 
+                break
+
             except openai.RateLimitError as e:
                 print(f"[ERROR] RateLimitError during embedding ({i}/{num_retries}): {e}")
 
@@ -73,7 +93,8 @@ class EmbeddingOpenAI_1x(Embedding):
 
                 time.sleep(error_wait_time)
 
-        return emb.data[0].embedding
+        # The response order follows the input order (by index)
+        return [x.embedding for x in sorted(emb.data, key=lambda x: x.index)]
 
     def get_or_create(
         self,
@@ -86,21 +107,17 @@ class EmbeddingOpenAI_1x(Embedding):
         """
         Get embedding from cache (or create if not exist)
         """
-        client = db_client or DBClient()
-
-        embedding = client.get_milvus_embedding_item_id(
-            "openai",
-            self.model_name,
-            source,
-            page_id)
+        client = db_client or client_registry.get_db_client()
 
-        if not embedding:
-            # OpenAI embedding model accept 8k tokens, exceed it will
-            # throw exceptions. Here we simply limited it <= 5000 chars
-            # for the input
+        embedding = emb_utils.decode_embedding(
+            client.get_milvus_embedding_item_id(
+                "openai",
+                self.model_name,
+                source,
+                page_id))
 
-            EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", 5000))
-            embedding = self.create(text[:EMBEDDING_MAX_LENGTH])
+        if embedding is None:
+            embedding = self.create(text[:self.max_input_length()])
 
             # store embedding into redis (ttl = 1 month)
             client.set_milvus_embedding_item_id(
@@ -108,10 +125,7 @@ class EmbeddingOpenAI_1x(Embedding):
                 self.model_name,
                 source,
                 page_id,
-                json.dumps(embedding),
+                emb_utils.encode_embedding(embedding),
                 expired_time=key_ttl)
 
-        else:
-            embedding = utils.fix_and_parse_json(embedding)
-
         return embedding
@@ -1,8 +1,26 @@
 ########################################################################
 # Embedding Utils
 ########################################################################
+import os
+import json
+
 import numpy as np
 
+# Binary embedding cache format:
+#   magic (3 bytes) + version (1 byte) + dtype (1 byte) + raw vector
+# The vector is stored in little-endian, dtype 'f' (float32) or
+# 'e' (float16)
+EMB_CODEC_MAGIC = b"EMB"
+EMB_CODEC_VERSION = 1
+EMB_CODEC_HEADER_SIZE = 5
+
+EMB_CODEC_DTYPES = {
+    "float32": (b"f", np.dtype("<f4")),
+    "float16": (b"e", np.dtype("<f2")),
+}
+
+EMB_CODEC_DTYPE_CODES = {code: dtype for code, dtype in EMB_CODEC_DTYPES.values()}
+
 
 def similarity_topk(embedding_items: list, metric_type, threshold=None, k=3):
     """
@@ -20,6 +38,85 @@ def similarity_topk(embedding_items: list, metric_type, threshold=None, k=3):
         raise Exception(f"Unknown metric_type: {metric_type}")
 
 
+def dedup_item_ids(embedding_items: list, metric_type):
+    """
+    Keep the most similar hit per item_id (the same item can be in
+    several partitions), sorted by most similar -> least similar
+    """
+    sorted_items = similarity_topk(embedding_items, metric_type, k=len(embedding_items))
+
+    seen = set()
+    res = []
+
+    for item in sorted_items:
+        if item["item_id"] not in seen:
+            seen.add(item["item_id"])
+            res.append(item)
+
+    return res
+
+
+def get_similarity_threshold(metric_type, default=None):
+    """
+    Per metric type threshold, override via
+    MILVUS_SIMILARITY_THRESHOLD_{L2|IP|COSINE}
+    """
+    val = os.getenv(f"MILVUS_SIMILARITY_THRESHOLD_{metric_type}", "")
+    return float(val) if val else default
+
+
+def knn_scores(
+    ratings,
+    distances,
+    mask,
+    metric_type,
+    weighting="uniform",
+    ages=None,
+    half_life_days=0,
+    eps=1e-6,
+):
+    """
+    Vectorized kNN rating for a batch of candidates
+
+    @param ratings, distances, ages (days) - (n, k) padded matrices
+    @param mask - (n, k), False for the padding
+    @param weighting - uniform: plain average
+                       distance: closer neighbours weigh more, L2 uses
+                       1 / distance, IP/COSINE use the similarity
+    @param half_life_days - rating weight halves every half_life_days
+           of rating age, 0 to disable
+    @return (n,) scores, -1 for the candidates without neighbours
+    """
+    ratings = np.asarray(ratings, dtype=np.float64)
+    distances = np.asarray(distances, dtype=np.float64)
+    mask = np.asarray(mask, dtype=bool)
+
+    if weighting == "uniform":
+        weights = np.ones_like(distances)
+    elif weighting == "distance":
+        if metric_type == "L2":
+            weights = 1.0 / (distances + eps)
+        elif metric_type in ("IP", "COSINE"):
+            weights = np.maximum(distances, eps)
+        else:
+            raise Exception(f"Unknown metric_type: {metric_type}")
+    else:
+        raise Exception(f"Unknown weighting: {weighting}")
+
+    if ages is not None and half_life_days > 0:
+        ages = np.maximum(np.asarray(ages, dtype=np.float64), 0)
+        weights = weights * np.power(0.5, ages / half_life_days)
+
+    weights = np.where(mask, weights, 0)
+    tot = weights.sum(axis=1)
+
+    scores = np.full(len(ratings), -1.0)
+    valid = tot > 0
+    scores[valid] = (weights * ratings).sum(axis=1)[valid] / tot[valid]
+
+    return scores
+
+
 def similarity_topk_l2(items: list, threshold, k):
     """
     metric_type L2, the value range [0, +inf)
@@ -70,3 +167,53 @@ def similarity_topk_cosine(items: list, threshold, k):
 
 def l2_norm(emb):
     return (np.array(emb) / np.linalg.norm(emb)).tolist()
+
+
+def encode_embedding(emb, dtype=None) -> bytes:
+    """
+    Encode an embedding into the compact binary cache format
+
+    @param dtype float32 (default) or float16, override via
+           EMBEDDING_CACHE_DTYPE
+    """
+    dtype = dtype or os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+
+    if dtype not in EMB_CODEC_DTYPES:
+        raise Exception(f"Unknown embedding cache dtype: {dtype}")
+
+    code, np_dtype = EMB_CODEC_DTYPES[dtype]
+    header = EMB_CODEC_MAGIC + bytes([EMB_CODEC_VERSION]) + code
+
+    return header + np.asarray(emb, dtype=np_dtype).tobytes()
+
+
+def decode_embedding(data):
+    """
+    Decode an embedding from the cache, both binary and legacy JSON
+    (a list of floats) formats are accepted
+
+    @return float32 numpy array, or None if data is empty/invalid
+    """
+    if not data:
+        return None
+
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    if data[:3] == EMB_CODEC_MAGIC:
+        version = data[3]
+        np_dtype = EMB_CODEC_DTYPE_CODES.get(data[4:5])
+
+        if version != EMB_CODEC_VERSION or np_dtype is None:
+            print(f"[ERROR] Unsupported embedding cache format, version: {version}, dtype: {data[4:5]}")
+            return None
+
+        emb = np.frombuffer(data, dtype=np_dtype, offset=EMB_CODEC_HEADER_SIZE)
+        return emb.astype(np.float32, copy=False)
+
+    # Legacy format: json.dumps(list_of_floats)
+    try:
+        return np.asarray(json.loads(data), dtype=np.float32)
+    except Exception as e:
+        print(f"[ERROR] cannot decode legacy embedding: {data[:64]}, error: {e}")
+        return None
@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+from dotenv import load_dotenv
+
+import embedding_utils as emb_utils
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--input", help="rated pages jsonl: {page_id, user_rating, last_edited_time, embedding}",
+                    default="./rated_pages.jsonl")
+parser.add_argument("--export", help="export the rated pages from redis into --input first",
+                    action="store_true",
+                    default=False)
+parser.add_argument("--metric", help="L2, IP or COSINE",
+                    default=os.getenv("MILVUS_SIMILARITY_METRICS", "L2"))
+parser.add_argument("--max-distance", help="similarity threshold",
+                    type=float,
+                    default=0.45)
+parser.add_argument("--topk", help="comma separated top-k values",
+                    default="2,5,10")
+parser.add_argument("--half-life-days", help="comma separated half lifes, 0 to disable",
+                    default="0,14,60")
+parser.add_argument("--min-score", help="a page is relevant if rating >= min-score",
+                    type=float,
+                    default=4)
+parser.add_argument("--temporal", help="only use the neighbours rated before the page",
+                    action="store_true",
+                    default=False)
+
+
+def export(path):
+    """
+    Join the stored page ratings with the cached embeddings of the
+    current embedding provider/model
+    """
+    import client_registry
+
+    client = client_registry.get_db_client()
+    emb_agent = client_registry.get_embedding_agent()
+
+    provider = emb_agent.model.cache_provider
+    model_name = emb_agent.model_name
+
+    # key format: milvus_embedding_item_id_{provider}_{model}_{source}_{page_id}
+    emb_keys = client.scan_keys(f"milvus_embedding_item_id_{provider}_{model_name}_*")
+    emb_keys = {x.rsplit("_", 1)[-1]: x for x in emb_keys}
+
+    meta_keys = client.scan_keys("page_item_id_*")
+    metas = client.get_many(meta_keys)
+
+    # Only the rated pages with a cached embedding, in one round trip
+    page_ids = [key[len("page_item_id_"):] for key in meta_keys]
+    rated = [(page_id, data) for page_id, data in zip(page_ids, metas) if data and page_id in emb_keys]
+    embeddings = client.get_many([emb_keys[page_id] for page_id, _ in rated])
+
+    cnt = 0
+
+    with open(path, "w") as f:
+        for (page_id, data), emb_data in zip(rated, embeddings):
+            embedding = emb_utils.decode_embedding(emb_data)
+
+            if embedding is None:
+                continue
+
+            meta = json.loads(data)
+
+            f.write(json.dumps({
+                "page_id": page_id,
+                "user_rating": meta["user_rating"],
+                "last_edited_time": meta.get("last_edited_time", ""),
+                "embedding": embedding.tolist(),
+            }) + "\n")
+
+            cnt += 1
+
+    print(f"Exported {cnt} rated pages into {path}")
+
+
+def load(path):
+    pages = []
+
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                pages.append(json.loads(line))
+
+    embs = np.array([x["embedding"] for x in pages], dtype=np.float32)
+    ratings = np.array([x["user_rating"] for x in pages], dtype=np.float64)
+
+    times = []
+    for x in pages:
+        try:
+            dt = datetime.fromisoformat(x["last_edited_time"].replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            times.append(dt.timestamp() / 86400)
+        except Exception:
+            times.append(np.nan)
+
+    return embs, ratings, np.array(times)
+
+
+def pairwise(embs, metric):
+    """
+    Distances in Milvus convention, the diagonal (page itself) is
+    excluded
+    """
+    dots = embs @ embs.T
+
+    if metric == "L2":
+        sq = np.einsum("ij,ij->i", embs, embs)
+        dist = np.maximum(sq[:, None] + sq[None, :] - 2 * dots, 0)
+        np.fill_diagonal(dist, np.inf)
+        return dist
+
+    if metric == "COSINE":
+        norms = np.linalg.norm(embs, axis=1)
+        dots = dots / np.maximum(norms[:, None] * norms[None, :], 1e-12)
+
+    np.fill_diagonal(dots, -np.inf)
+    return dots
+
+
+def neighbours(dist, times, args, k):
+    """
+    @return (idx, distances, mask) of the top-k valid neighbours
+    """
+    valid = dist <= args.max_distance if args.metric == "L2" else dist >= args.max_distance
+
+    if args.temporal:
+        # the pages without last_edited_time are excluded
+        valid &= times[None, :] < times[:, None]
+
+    keyed = dist if args.metric == "L2" else -dist
+    keyed = np.where(valid, keyed, np.inf)
+
+    k = min(k, dist.shape[1] - 1)
+    idx = np.argsort(keyed, axis=1)[:, :k]
+
+    mask = np.isfinite(np.take_along_axis(keyed, idx, axis=1))
+    return idx, np.take_along_axis(dist, idx, axis=1), mask
+
+
+def evaluate(scores, ratings, min_score):
+    covered = scores >= 0
+
+    if not covered.any():
+        return {"coverage": 0.0, "mae": np.nan, "rmse": np.nan, "precision": np.nan, "recall": np.nan}
+
+    err = scores[covered] - ratings[covered]
+    pred = scores[covered] >= min_score
+    truth = ratings[covered] >= min_score
+
+    return {
+        "coverage": covered.mean(),
+        "mae": np.abs(err).mean(),
+        "rmse": np.sqrt((err ** 2).mean()),
+        "precision": (pred & truth).sum() / max(pred.sum(), 1),
+        "recall": (pred & truth).sum() / max(truth.sum(), 1),
+    }
+
+
+def run(args):
+    if args.export:
+        export(args.input)
+
+    embs, ratings, times = load(args.input)
+    print(f"pages: {len(ratings)}, metric: {args.metric}, max_distance: {args.max_distance}, temporal: {args.temporal}")
+
+    if len(ratings) < 2:
+        print("[ERROR] Not enough rated pages to evaluate")
+        return
+
+    dist = pairwise(embs, args.metric)
+
+    print("| weighting | topk | half_life | coverage |   mae  |  rmse  | precision | recall |")
+    print("|-----------|------|-----------|----------|--------|--------|-----------|--------|")
+
+    for k in [int(x) for x in args.topk.split(",")]:
+        idx, distances, mask = neighbours(dist, times, args, k)
+        nb_ratings = ratings[idx]
+        ages = np.nan_to_num(times[:, None] - times[idx], nan=0.0)
+
+        for weighting in ("uniform", "distance"):
+            for half_life in [float(x) for x in args.half_life_days.split(",")]:
+                scores = emb_utils.knn_scores(
+                    nb_ratings, distances, mask, args.metric,
+                    weighting=weighting,
+                    ages=np.abs(ages),
+                    half_life_days=half_life)
+
+                res = evaluate(scores, ratings, args.min_score)
+                print(f"| {weighting:<9} | {k:>4} | {half_life:>9.1f} | {res['coverage']:>8.2%} | {res['mae']:>6.3f} | {res['rmse']:>6.3f} | {res['precision']:>9.3f} | {res['recall']:>6.3f} |")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    load_dotenv()
+
+    run(args)
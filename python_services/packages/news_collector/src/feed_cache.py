@@ -0,0 +1,128 @@
+import json
+
+import client_registry
+import utils
+
+
+class FeedValidatorCache:
+    """
+    Persistent ETag / Last-Modified cache keyed by feed url
+
+    The validators are sent back as If-None-Match / If-Modified-Since,
+    a 304 response means the feed has no new entries since last poll,
+    the caller can skip feedparser entirely
+
+    New validators are kept pending and only persisted by commit(),
+    the caller commits them after the pulled articles are saved, so a
+    failed save does not turn the next poll into a 304
+    """
+    def __init__(self, db_client=None, key_ttl=86400 * 30):
+        self.client = db_client or client_registry.get_db_client()
+        self.key_ttl = key_ttl
+
+        # <feed_url, {etag, last_modified}>
+        self.validators = {}
+
+        # <feed_url, {etag, last_modified}>, not persisted yet
+        self.pending = {}
+
+        self.hits = 0    # 304 not modified
+        self.misses = 0  # full body downloaded
+
+    def _key(self, url):
+        return utils.hashcode_md5(url.encode("utf-8"))
+
+    def get(self, url):
+        """
+        @return {etag, last_modified} or {} if never seen
+        """
+        if url in self.validators:
+            return self.validators[url]
+
+        data = self.client.get_feed_validator_item_id(self._key(url))
+        validator = utils.fix_and_parse_json(data) or {}
+
+        self.validators[url] = validator
+        return validator
+
+    def headers(self, url):
+        """
+        Conditional request headers for the url
+        """
+        validator = self.get(url)
+        headers = {}
+
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+
+        return headers
+
+    def update(self, url, etag=None, last_modified=None):
+        if not etag and not last_modified:
+            return
+
+        validator = {
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+        }
+
+        if self.get(url) == validator:
+            return
+
+        self.pending[url] = validator
+
+    def commit(self, validators=None):
+        """
+        Persist the pending validators (or the given ones, e.g. the
+        pending validators saved by the pull step)
+
+        @param validators - <feed_url, {etag, last_modified}>
+        """
+        validators = self.pending if validators is None else validators
+
+        for url, validator in validators.items():
+            self.validators[url] = validator
+            self.client.set_feed_validator_item_id(
+                self._key(url), json.dumps(validator),
+                expired_time=self.key_ttl, overwrite=True)
+
+        print(f"[FeedValidatorCache] Committed {len(validators)} validators")
+
+        if validators is self.pending:
+            self.pending = {}
+
+    def update_from_headers(self, url, headers):
+        headers = headers or {}
+
+        self.update(
+            url,
+            etag=headers.get("ETag") or headers.get("etag"),
+            last_modified=headers.get("Last-Modified") or headers.get("last-modified"))
+
+    def is_not_modified(self, url, status):
+        """
+        Record a hit (304) or a miss (others) for the url
+        """
+        if status == 304:
+            self.hits += 1
+            print(f"[FeedValidatorCache] Not modified, skip parsing: {url}")
+            return True
+
+        self.misses += 1
+        return False
+
+    def stats(self):
+        tot = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / tot if tot else 0.0,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"[FeedValidatorCache] hits: {stats['hits']}, misses: {stats['misses']}, hit_rate: {stats['hit_rate']:.2%}")
@@ -0,0 +1,258 @@
+import os
+import time
+import threading
+from concurrent.futures import wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from daemon_pool import DaemonThreadPool
+from ops_stats import timed_call
+
+
+# Fetch RSS feed with proper headers to avoid being blocked by Reddit
+DEFAULT_FEED_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/rss+xml, application/xml, text/xml, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+class FeedFetcher:
+    """
+    Fetch feed urls concurrently with a bounded thread pool
+
+    - One keep-alive session per host, the connection pool size of
+      the session is capped by max_per_host
+    - fetch_many schedules at most max_per_host lanes per host, so
+      a host with many feeds cannot take all the workers (fetch also
+      holds a per-host semaphore for the direct callers)
+    - A total deadline, the feeds which are still running after the
+      deadline are reported as timeout instead of stalling the caller,
+      the workers are daemon threads (see daemon_pool) so they don't
+      hold the process at exit either
+    - close() keeps the sessions still used by the timed out fetches,
+      the last of them closes the session when it finishes
+    """
+    def __init__(
+        self,
+        max_workers=None,
+        max_per_host=None,
+        timeout=None,
+        deadline=None,
+        headers=None,
+    ):
+        self.max_workers = int(max_workers or os.getenv("RSS_FETCH_CONCURRENCY", 16))
+        self.max_per_host = int(max_per_host or os.getenv("RSS_FETCH_PER_HOST", 2))
+        self.timeout = float(timeout or os.getenv("RSS_FETCH_TIMEOUT", 10))
+        self.deadline = float(deadline or os.getenv("RSS_FETCH_DEADLINE", 120))
+        self.headers = headers or DEFAULT_FEED_HEADERS
+
+        self.lock = threading.Lock()
+
+        # <host, session>, <host, semaphore>
+        self.sessions = {}
+        self.host_slots = {}
+
+        # <session, in-flight fetches>, the closed sessions still in use
+        self.inflight = {}
+        self.retired = set()
+
+        print(f"[FeedFetcher] max_workers: {self.max_workers}, max_per_host: {self.max_per_host}, timeout: {self.timeout}, deadline: {self.deadline}")
+
+    def _host(self, url):
+        return urlparse(url).netloc.lower()
+
+    def _get_session(self, host):
+        with self.lock:
+            session = self.sessions.get(host)
+
+            if not session:
+                session = requests.Session()
+                session.headers.update(self.headers)
+
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.max_per_host)
+
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+
+                self.sessions[host] = session
+                self.host_slots[host] = threading.BoundedSemaphore(
+                    self.max_per_host)
+
+            return session, self.host_slots[host]
+
+    @timed_call("http")
+    def fetch(self, url, headers=None):
+        """
+        Fetch one feed url
+
+        @return {url, ok, status, content, headers, elapsed, error}
+        """
+        host = self._host(url)
+        session, slot = self._get_session(host)
+
+        res = {
+            "url": url,
+            "ok": False,
+            "status": None,
+            "content": b"",
+            "headers": {},
+            "elapsed": 0.0,
+            "error": "",
+        }
+
+        with self.lock:
+            self.inflight[session] = self.inflight.get(session, 0) + 1
+
+        try:
+            with slot:
+                st = time.time()
+
+                try:
+                    response = session.get(
+                        url, headers=headers, timeout=self.timeout)
+
+                    res["status"] = response.status_code
+                    res["headers"] = response.headers
+
+                    # 304 is a valid answer for the conditional requests
+                    if response.status_code != 304:
+                        response.raise_for_status()
+                        res["content"] = response.content
+
+                    res["ok"] = True
+
+                except Exception as e:
+                    print(f"[ERROR] Failed to fetch feed {url}: {e}")
+                    res["error"] = str(e)
+
+                res["elapsed"] = time.time() - st
+
+        finally:
+            self._release_session(session)
+
+        return res
+
+    def _release_session(self, session):
+        with self.lock:
+            self.inflight[session] -= 1
+
+            if self.inflight[session] > 0:
+                return
+
+            del self.inflight[session]
+
+            if session not in self.retired:
+                return
+
+            self.retired.discard(session)
+
+        session.close()
+
+    def _fetch_lane(self, lane: list, headers_fn, results: dict, stop_at):
+        """
+        Fetch the urls of one host lane one by one, stop taking new
+        urls after the deadline
+        """
+        for url in lane:
+            if time.time() >= stop_at:
+                break
+
+            headers = headers_fn(url) if headers_fn else None
+            results[url] = self.fetch(url, headers)
+
+    def fetch_many(self, urls: list, headers_fn=None):
+        """
+        Fetch a list of feed urls concurrently
+
+        The urls are grouped by host and split into at most max_per_host
+        lanes per host, each lane is one pool task. So a busy host never
+        holds more than max_per_host workers, and no worker sits idle
+        waiting for a host slot.
+
+        @param headers_fn - optional callable(url) -> extra headers
+        @return <url, result> in the same order as the input urls
+        """
+        results = {}
+
+        if not urls:
+            return results
+
+        urls = list(dict.fromkeys(urls))
+
+        # <host, [url]>
+        hosts = {}
+        for url in urls:
+            hosts.setdefault(self._host(url), []).append(url)
+
+        lanes = []
+        for host_urls in hosts.values():
+            num_lanes = min(self.max_per_host, len(host_urls))
+            lanes.extend(host_urls[i::num_lanes] for i in range(num_lanes))
+
+        st = time.time()
+        stop_at = st + self.deadline
+        fetched = {}
+
+        executor = DaemonThreadPool(self.max_workers, name="feed_fetcher")
+        futures = [
+            executor.submit(self._fetch_lane, lane, headers_fn, fetched, stop_at)
+            for lane in lanes
+        ]
+
+        wait(futures, timeout=self.deadline)
+
+        # Do not wait the hung feeds, they are reported as timeout
+        executor.shutdown(cancel_futures=True)
+
+        num_timeout = 0
+        for url in urls:
+            res = fetched.get(url)
+
+            if res:
+                results[url] = res
+            else:
+                num_timeout += 1
+                print(f"[WARN] Feed fetching exceeded deadline {self.deadline}s, skip it: {url}")
+                results[url] = {
+                    "url": url,
+                    "ok": False,
+                    "status": None,
+                    "content": b"",
+                    "headers": {},
+                    "elapsed": time.time() - st,
+                    "error": "deadline exceeded",
+                }
+
+        print(f"[FeedFetcher] Fetched {len(urls) - num_timeout}/{len(urls)} feeds over {len(hosts)} hosts in {time.time() - st:.2f}s, timeout: {num_timeout}")
+        return results
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions.values():
+                # Closed by the last fetch still running on it
+                if self.inflight.get(session):
+                    self.retired.add(session)
+                else:
+                    session.close()
+
+            self.sessions.clear()
+            self.host_slots.clear()
+
+
+def print_latency_report(results: dict, topk=10):
+    """
+    Print the slowest feeds first
+    """
+    ranked = sorted(
+        results.values(),
+        key=lambda res: res["elapsed"],
+        reverse=True)
+
+    print(f"[FeedFetcher] Per-feed latency (slowest {topk}):")
+    for res in ranked[:topk]:
+        print(f" - {res['elapsed']:.3f}s, status: {res['status']}, ok: {res['ok']}, url: {res['url']}, error: {res['error']}")
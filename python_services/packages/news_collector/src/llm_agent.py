@@ -1,43 +1,125 @@
 import os
+import json
+import math
+import time
+import threading
 
-import httpx
-from langchain import LLMChain
-from langchain.text_splitter import (
-    RecursiveCharacterTextSplitter
-)
-from langchain.prompts import PromptTemplate
-from langchain.chat_models import ChatOpenAI
-from langchain.chains.summarize import load_summarize_chain
-from langchain_community.chat_models import ChatOllama
-from langchain_community.document_loaders import YoutubeLoader
-from langchain_community.document_loaders import WebBaseLoader
-from langchain_community.document_loaders import ArxivLoader
-from langchain.utilities.arxiv import ArxivAPIWrapper
-from langchain_google_genai import ChatGoogleGenerativeAI
-import google.generativeai as genai
+import requests
 
+# Note: langchain, the LLM providers and the loaders are imported on
+# first use, importing this module stays cheap for the short tasks
+import llm_cache
+import llm_const
 import llm_prompts
+from llm_executor import LLMExecutor
+from ops_stats import timed_call
 
 
 #######################################################################
 # Loaders
 #######################################################################
+def _load_docs_cached(kind, key, load, revalidate=False):
+    """
+    Serve the loaded docs from the content cache, load() is only called
+    on cache miss
+    """
+    if os.getenv("CONTENT_CACHE_ENABLED", "true").lower() != "true":
+        return load()
+
+    def fetch(entry):
+        docs = load()
+
+        if not docs:
+            return {}
+
+        return {
+            "text": "\n".join(x.page_content for x in docs),
+            "metadata": {
+                "docs": [{"page_content": x.page_content, "metadata": x.metadata} for x in docs],
+            },
+        }
+
+    try:
+        import client_registry
+        entry = client_registry.get_content_cache().get_or_fetch(
+            kind, key, fetch, revalidate=revalidate)
+
+    except Exception as e:
+        print(f"[ERROR] Content cache failed, kind: {kind}, key: {key}, load it directly: {e}")
+        return load()
+
+    if not entry:
+        return []
+
+    from langchain.docstore.document import Document
+
+    return [Document(page_content=x["page_content"], metadata=x["metadata"])
+            for x in entry["metadata"]["docs"]]
+
+
 class LLMWebLoader:
-    def load(self, url: str) -> list:
+    # Add headers to avoid being blocked by sites like Reddit
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+    }
+
+    @timed_call("http")
+    def load(self, url: str, timeout=None) -> list:
         if not url:
             return []
 
-        # Add headers to avoid being blocked by sites like Reddit
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-        }
+        from langchain_community.document_loaders import WebBaseLoader
 
-        loader = WebBaseLoader([url], header_template=headers)
+        loader = WebBaseLoader(
+            [url], header_template=self.headers,
+            requests_kwargs={"timeout": timeout} if timeout else None)
         docs = loader.load()
         return docs
 
+    @timed_call("http")
+    def fetch(self, url: str, entry=None, timeout=30):
+        """
+        Fetch and extract the page text like WebBaseLoader does, the
+        validators of the cached entry are sent as a conditional GET
+
+        @return {text, etag, last_modified}, None if not modified, or
+                {} if the response is not 2xx (not cached)
+        """
+        headers = dict(self.headers)
+
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = requests.get(url, headers=headers, timeout=timeout)
+
+        if resp.status_code == 304 and entry:
+            return None
+
+        if not 200 <= resp.status_code < 300:
+            print(f"[WARN] LLMWebLoader fetch {url} failed, status_code: {resp.status_code}")
+            return {}
+
+        # requests falls back to ISO-8859-1 without a charset in the
+        # Content-Type, detect it like WebBaseLoader does
+        if "charset" not in resp.headers.get("Content-Type", "").lower():
+            resp.encoding = resp.apparent_encoding
+
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(resp.text, "html.parser")
+
+        return {
+            "text": soup.get_text(),
+            "metadata": {"source": url, "status_code": resp.status_code},
+            "etag": resp.headers.get("ETag", ""),
+            "last_modified": resp.headers.get("Last-Modified", ""),
+        }
+
 
 class LLMYoutubeLoader:
     def load(
@@ -49,23 +131,33 @@ class LLMYoutubeLoader:
         if not url:
             return []
 
-        docs = []
+        from langchain_community.document_loaders import YoutubeLoader
 
-        try:
-            loader = YoutubeLoader.from_youtube_url(
-                url,
-                add_video_info=True,
-                language=language,
-                continue_on_failure=continue_on_failure
-            )
+        def load():
+            docs = []
 
-            docs = loader.load()
+            try:
+                loader = YoutubeLoader.from_youtube_url(
+                    url,
+                    add_video_info=True,
+                    language=language,
+                    continue_on_failure=continue_on_failure
+                )
 
-        except Exception as e:
-            print(f"[WARN] LLMYoutubeLoader load transcript failed: {e}")
-            # traceback.print_exc()
+                docs = loader.load()
 
-        return docs
+            except Exception as e:
+                print(f"[WARN] LLMYoutubeLoader load transcript failed: {e}")
+                # traceback.print_exc()
+
+            return docs
+
+        try:
+            video_id = YoutubeLoader.extract_video_id(url)
+        except Exception:
+            video_id = url
+
+        return _load_docs_cached("youtube", f"{video_id}:{language}", load)
 
 
 class LLMArxivLoader:
@@ -137,40 +229,60 @@ class LLMArxivLoader:
         """
         Load doc and metadata, doc has 4000 chars limitation
         """
-        docs = []
+        def load():
+            docs = []
 
-        try:
-            docs = ArxivLoader(
-                query=arxiv_id,
-                load_all_available_meta=load_all_available_meta
-            ).load()
+            try:
+                from langchain_community.document_loaders import ArxivLoader
 
-        except Exception as e:
-            print(f"[ERROR] LLMArxivLoader.load failed: {e}")
+                docs = ArxivLoader(
+                    query=arxiv_id,
+                    load_all_available_meta=load_all_available_meta
+                ).load()
 
-        return docs
+            except Exception as e:
+                print(f"[ERROR] LLMArxivLoader.load failed: {e}")
+
+            return docs
+
+        return _load_docs_cached(
+            "arxiv", f"loader:{arxiv_id}:{load_all_available_meta}", load)
 
     def load_doc_from_id(self, arxiv_id, load_all_available_meta=True, max_chars=100000):
-        docs = []
+        def load():
+            docs = []
 
-        try:
-            arxiv_client = ArxivAPIWrapper(
-                load_max_docs=100,
-                load_all_available_meta=load_all_available_meta,
-                doc_content_chars_max=max_chars,
-            )
+            try:
+                from langchain.utilities.arxiv import ArxivAPIWrapper
 
-            docs = arxiv_client.load(query=arxiv_id)
+                arxiv_client = ArxivAPIWrapper(
+                    load_max_docs=100,
+                    load_all_available_meta=load_all_available_meta,
+                    doc_content_chars_max=max_chars,
+                )
 
-        except Exception as e:
-            print(f"[ERROR] LLMArxivLoader.load_doc failed: {e}")
+                docs = arxiv_client.load(query=arxiv_id)
 
-        return docs
+            except Exception as e:
+                print(f"[ERROR] LLMArxivLoader.load_doc failed: {e}")
+
+            return docs
+
+        return _load_docs_cached(
+            "arxiv", f"doc:{arxiv_id}:{load_all_available_meta}:{max_chars}", load)
 
 
 #######################################################################
 # Agents
 #######################################################################
+def _is_json(text):
+    try:
+        json.loads(text)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
 class LLMAgentBase:
     def __init__(self, api_key, model_name):
         self.api_key = api_key
@@ -179,7 +291,16 @@ class LLMAgentBase:
         self.llm = None
         self.llmchain = None
 
+        # llm response cache, see init_llm()
+        self.cache = None
+        self.cache_model = ""
+        self.llm_model = ""
+        self.provider = ""
+        self.temperature = 0
+
     def _init_prompt(self, prompt=None):
+        from langchain.prompts import PromptTemplate
+
         prompt_tpl = PromptTemplate(
             input_variables=["content"],
             template=prompt,
@@ -200,9 +321,13 @@ class LLMAgentBase:
 
         # TODO: support non-openAI llm
         if provider == "openai":
+            from langchain.chat_models import ChatOpenAI
+
             model_name = model_name or os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
             proxy = os.getenv('OPENAI_PROXY')
             if proxy and proxy.strip():
+                import httpx
+
                 client = httpx.Client(proxies={"http://": proxy,
                                             "https://": proxy})
                 llm = ChatOpenAI(
@@ -225,6 +350,8 @@ class LLMAgentBase:
                     openai_api_base="https://api.z.ai/api/coding/paas/v4")
 
         elif provider == "google":
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
             model_name = model_name or os.getenv("GOOGLE_MODEL", "gemini-pro")
 
             llm = ChatGoogleGenerativeAI(
@@ -232,6 +359,8 @@ class LLMAgentBase:
                 temperature=temperature)
 
         elif provider == "ollama":
+            from langchain_community.chat_models import ChatOllama
+
             model_name = model_name or os.getenv("OLLAMA_MODEL", "llama3")
             ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
 
@@ -246,9 +375,22 @@ class LLMAgentBase:
             raise
 
         self.llm = llm
+        self.provider = provider
+        self.temperature = temperature
+
+        # The model actually serving the requests, e.g. openai provider
+        # is pinned to a model regardless of model_name
+        self.llm_model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or model_name
+        self.cache_model = f"{provider}/{self.llm_model}"
+
+        if os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true":
+            import client_registry
+            self.cache = client_registry.get_llm_cache()
 
         # Create a default chain
         if create_default_chain:
+            from langchain import LLMChain
+
             self.llmchain = LLMChain(llm=self.llm, prompt=self.prompt_tpl)
 
         print(f"LLM chain initalized, provider: {provider}, model_name: {model_name}, temperature: {temperature}")
@@ -256,6 +398,59 @@ class LLMAgentBase:
     def get_num_tokens(self, text):
         return self.llm.get_num_tokens(text)
 
+    def get_context_window(self):
+        """
+        Context window (tokens) of the serving model, LLM_CONTEXT_WINDOW
+        overrides it
+        """
+        context_window = int(os.getenv("LLM_CONTEXT_WINDOW", 0))
+
+        if context_window > 0:
+            return context_window
+
+        model = (getattr(self, "llm_model", None) or "").lower()
+        matched = [x for x in llm_const.LLM_CONTEXT_WINDOWS if model.startswith(x)]
+
+        if not matched:
+            return llm_const.LLM_DEFAULT_CONTEXT_WINDOW
+
+        return llm_const.LLM_CONTEXT_WINDOWS[max(matched, key=len)]
+
+    def _cache_prompt(self):
+        """
+        The prompt part of the cache namespace
+        """
+        return self.prompt_tpl.template if self.prompt_tpl else ""
+
+    def cache_namespace(self, prompt=None):
+        """
+        @return None if the llm cache is disabled
+        """
+        if not self.cache:
+            return None
+
+        prompt = self._cache_prompt() if prompt is None else prompt
+        return llm_cache.make_namespace(prompt, self.cache_model, self.temperature)
+
+    def cache_key(self, text, prompt=None):
+        """
+        The llm cache key of run(text), the per-item caches store it as
+        a pointer (see DBClient.set_notion_summary_item_id cache_key)
+        """
+        namespace = self.cache_namespace(prompt)
+        return llm_cache.make_key(text, namespace) if namespace else None
+
+    def _run_cached(self, text, fn, prompt=None, should_cache=None):
+        key = self.cache_key(text, prompt)
+
+        # Only the cache misses reach the LLM
+        fn = timed_call("llm")(fn)
+
+        if not key:
+            return fn()
+
+        return self.cache.get_or_create(key, fn, should_cache=should_cache)
+
 
 class LLMAgentCategoryAndRanking(LLMAgentBase):
     def __init__(self, api_key="", model_name="gpt-3.5-turbo"):
@@ -280,22 +475,42 @@ class LLMAgentCategoryAndRanking(LLMAgentBase):
         tokens = self.get_num_tokens(text)
         print(f"[LLM] Category and Ranking, number of tokens: {tokens}")
 
-        response = self.llmchain.run(text)
+        response = self._run_cached(text, lambda: self.llmchain.run(text))
         return response
 
 
 class LLMAgentSummary(LLMAgentBase):
+    """
+    Summary agent, the chain is picked per input (chain_type="auto"):
+    - stuff: the text fits into the model context budget, one call
+    - refine: a few chunks, one sequential call per chunk
+    - map_reduce: many chunks, concurrent map calls + one combine call
+
+    The chunks are sized in tokens from the model context window (see
+    llm_const.LLM_CONTEXT_WINDOWS)
+    """
     def __init__(self, api_key="", model_name="gpt-3.5-turbo"):
         super().__init__(api_key, model_name)
 
+        self.usage_lock = threading.Lock()
+        self.usage = {
+            "runs": 0,
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "legacy_calls": 0,
+        }
+
     def init_prompt(
         self,
         map_prompt=None,
         combine_prompt=None,
-        translation_enabled=True
+        translation_enabled=True,
+        refine_prompt=None,
     ):
         self.map_prompt = map_prompt
         self.combine_prompt = combine_prompt
+        self.refine_prompt = refine_prompt or llm_prompts.LLM_PROMPT_SUMMARY_REFINE_PROMPT
 
         if not self.combine_prompt:
             translation_lang = os.getenv("TRANSLATION_LANG")
@@ -310,10 +525,20 @@ class LLMAgentSummary(LLMAgentBase):
             prompt_tpl = prompt_with_translation if translation_lang and translation_enabled else prompt_no_translation
             self.combine_prompt = prompt_tpl
 
+        from langchain.prompts import PromptTemplate
+
         self.combine_prompt_tpl = PromptTemplate(
             template=self.combine_prompt,
             input_variables=["text"])
 
+        self.map_prompt_tpl = PromptTemplate(
+            template=self.map_prompt or llm_prompts.LLM_PROMPT_SUMMARY_MAP_PROMPT,
+            input_variables=["text"])
+
+        self.refine_prompt_tpl = PromptTemplate(
+            template=self.refine_prompt,
+            input_variables=["existing_answer", "text"])
+
         print(f"[LLMAgentSummary] Initialized prompt: {self.combine_prompt_tpl}")
 
     def init_llm(
@@ -321,54 +546,250 @@ class LLMAgentSummary(LLMAgentBase):
         provider=None,
         model_name=None,
         temperature=0,
-        chain_type="map_reduce",
+        chain_type="auto",
         verbose=False
     ):
+        """
+        chain_type: auto, stuff, refine or map_reduce
+        """
         super().init_llm(
             provider,
             model_name,
             temperature,
             create_default_chain=False)
 
-        self.llmchain = load_summarize_chain(
-            self.llm,
-            combine_prompt=self.combine_prompt_tpl,
-            chain_type=chain_type,
-            verbose=verbose)
+        from langchain import LLMChain
 
-        print(f"[LLMAgentSummary] LLM chain initalized, provider: {provider}, model_name: {model_name}, temperature: {temperature}, chain_type: {chain_type}")
+        self.combine_chain = LLMChain(llm=self.llm, prompt=self.combine_prompt_tpl, verbose=verbose)
+        self.map_chain = LLMChain(llm=self.llm, prompt=self.map_prompt_tpl, verbose=verbose)
+        self.refine_chain = LLMChain(llm=self.llm, prompt=self.refine_prompt_tpl, verbose=verbose)
 
-    def run(
-        self,
-        text: str,
-        chunk_size=None,
-        chunk_overlap=None,
-    ):
-        chunk_size = chunk_size or int(os.getenv("TEXT_CHUNK_SIZE", 2048))
-        chunk_overlap = chunk_overlap or int(os.getenv("TEXT_CHUNK_OVERLAP", 256))
+        # The stuff chain
+        self.llmchain = self.combine_chain
 
-        print(f"[LLM] input text ({len(text)} chars), chunk_size: {chunk_size}, chunk_overlap: {chunk_overlap}, text: {text[:200]}")
+        self.chain_type = chain_type
 
-        if not text:
-            print("[LLM] Empty input text, return empty summary")
-            return ""
+        # Reserved for the response, and the refine step takes the
+        # previous summary as input as well
+        self.max_output_tokens = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", 2048))
+        self.chunk_overlap_tokens = int(os.getenv("TEXT_CHUNK_OVERLAP_TOKENS", 128))
+        self.refine_max_chunks = int(os.getenv("SUMMARY_REFINE_MAX_CHUNKS", 2))
 
-        tokens = self.get_num_tokens(text)
-        print(f"[LLM] Summary, number of tokens needed: {tokens}")
+        print(f"[LLMAgentSummary] LLM chain initalized, provider: {provider}, model_name: {model_name}, temperature: {temperature}, chain_type: {chain_type}, context_window: {self.get_context_window()}")
+
+    def _cache_prompt(self):
+        """
+        The chain selection and the chunking change the summary as well
+        """
+        return "\n".join([
+            self.chain_type,
+            f"{self.get_context_window()}/{self.max_output_tokens}/{self.chunk_overlap_tokens}/{self.refine_max_chunks}",
+            self.map_prompt_tpl.template,
+            self.combine_prompt,
+            self.refine_prompt,
+        ])
+
+    def get_input_budget(self):
+        """
+        Max input tokens of one call: context window - the longest
+        prompt template (combine / map / refine) - the response
+        """
+        prompt_tokens = max(
+            self.get_num_tokens(self.combine_prompt),
+            self.get_num_tokens(self.map_prompt_tpl.template),
+            self.get_num_tokens(self.refine_prompt))
+        budget = self.get_context_window() - prompt_tokens - self.max_output_tokens
+
+        return max(budget, 256)
+
+    def select_chain(self, tokens, budget):
+        """
+        @return (chain_type, number of chunks)
+        """
+        chain_type = self.chain_type
+
+        if chain_type == "auto":
+            if tokens <= budget:
+                chain_type = "stuff"
+            else:
+                # refine: n calls, map_reduce: n + 1 calls but the map
+                # calls run concurrently
+                n = math.ceil(tokens / max(budget - self.max_output_tokens, 256))
+                chain_type = "refine" if n <= self.refine_max_chunks else "map_reduce"
+
+        if chain_type == "stuff":
+            return chain_type, 1
+
+        # refine carries the previous summary in every call
+        if chain_type == "refine":
+            budget -= self.max_output_tokens
+
+        budget = max(budget, 256)
+        return chain_type, math.ceil(tokens / budget)
+
+    def split(self, text, tokens, n):
+        """
+        Split text into n chunks of about the same number of tokens
+        """
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        chunk_size = math.ceil(tokens / n) + self.chunk_overlap_tokens
 
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=self.chunk_overlap_tokens,
+            length_function=self.get_num_tokens,
         )
 
-        docs = text_splitter.create_documents([text])
-        print(f"[LLM] number of splitted docs: {len(docs)}")
+        return text_splitter.split_text(text)
+
+    def _call(self, chain, step, calls: list, **inputs):
+        """
+        One llm call, the token usage is taken from the provider
+        response if available, otherwise estimated by get_num_tokens
+        """
+        st = time.time()
+        result = chain.generate([inputs])
+        response = result.generations[0][0].text
+
+        token_usage = (result.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens") or self.get_num_tokens(chain.prompt.format(**inputs))
+        completion_tokens = token_usage.get("completion_tokens") or self.get_num_tokens(response)
+
+        usage = {
+            "step": step,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency": time.time() - st,
+        }
+
+        print(f"[LLM] Summary call: {usage}")
+        calls.append(usage)
+        return response
+
+    def _stuff(self, text, calls):
+        return self._call(self.combine_chain, "stuff", calls, text=text)
+
+    def _refine(self, chunks, calls):
+        summary = self._call(self.combine_chain, "refine", calls, text=chunks[0])
+
+        for chunk in chunks[1:]:
+            summary = self._call(
+                self.refine_chain, "refine", calls,
+                existing_answer=summary, text=chunk)
+
+        return summary
+
+    def _truncate(self, text, tokens, budget):
+        """
+        Cut text to at most budget tokens
+        """
+        while tokens > budget:
+            text = text[:max(1, int(len(text) * budget / tokens * 0.95))]
+            tokens = self.get_num_tokens(text)
 
-        summary_resp = self.llmchain.run(docs)
+        return text
+
+    def _map_reduce(self, chunks, budget, calls, max_rounds=5):
+        executor = LLMExecutor(provider=self.provider)
+
+        def map_chunk(chunk):
+            return executor.call(self._call, self.map_chain, "map", calls, text=chunk)
+
+        summaries = executor.map(map_chunk, chunks)
+        text = "\n\n".join(summaries)
+        tokens = self.get_num_tokens(text)
+
+        # Collapse the map summaries until they fit into one call, stop
+        # early if a round does not shrink them
+        chunk_budget = max(budget - self.chunk_overlap_tokens, 256)
+
+        for _ in range(max_rounds):
+            if tokens <= budget:
+                break
+
+            summaries = executor.map(map_chunk, self.split(text, tokens, math.ceil(tokens / chunk_budget)))
+            collapsed = "\n\n".join(summaries)
+            collapsed_tokens = self.get_num_tokens(collapsed)
+
+            shrunk = collapsed_tokens < tokens
+            text, tokens = collapsed, collapsed_tokens
+
+            if not shrunk:
+                break
+
+        if tokens > budget:
+            print(f"[WARN] Map summaries still exceed the input budget ({tokens} > {budget}), truncated")
+            text = self._truncate(text, tokens, budget)
+
+        return self._call(self.combine_chain, "combine", calls, text=text)
+
+    def _record_usage(self, chain_type, calls, legacy_calls):
+        prompt_tokens = sum(x["prompt_tokens"] for x in calls)
+        completion_tokens = sum(x["completion_tokens"] for x in calls)
+
+        with self.usage_lock:
+            self.usage["runs"] += 1
+            self.usage["calls"] += len(calls)
+            self.usage["prompt_tokens"] += prompt_tokens
+            self.usage["completion_tokens"] += completion_tokens
+            self.usage["legacy_calls"] += legacy_calls
+
+        print(f"[LLM] Summary chain: {chain_type}, calls: {len(calls)} (legacy map_reduce: {legacy_calls}, saved: {legacy_calls - len(calls)}), prompt_tokens: {prompt_tokens}, completion_tokens: {completion_tokens}")
+
+    def get_usage(self):
+        """
+        Accumulated token usage of the runs, legacy_calls is the number
+        of calls the fixed 2048 chars map_reduce chain would have made
+        """
+        with self.usage_lock:
+            usage = dict(self.usage)
+
+        usage["saved_calls"] = usage["legacy_calls"] - usage["calls"]
+        return usage
+
+    def run(self, text: str):
+        print(f"[LLM] input text ({len(text)} chars), text: {text[:200]}")
+
+        if not text:
+            print("[LLM] Empty input text, return empty summary")
+            return ""
+
+        def summarize():
+            tokens = self.get_num_tokens(text)
+            budget = self.get_input_budget()
+            chain_type, n = self.select_chain(tokens, budget)
+            print(f"[LLM] Summary, number of tokens needed: {tokens}, input budget: {budget}, chain_type: {chain_type}, chunks: {n}")
+
+            calls = []
+
+            if chain_type == "stuff":
+                summary = self._stuff(text, calls)
+
+            else:
+                chunks = self.split(text, tokens, n)
+                print(f"[LLM] number of splitted docs: {len(chunks)}")
+
+                if chain_type == "refine":
+                    summary = self._refine(chunks, calls)
+                else:
+                    summary = self._map_reduce(chunks, budget, calls)
+
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+            legacy_splitter = RecursiveCharacterTextSplitter(chunk_size=2048, chunk_overlap=256)
+            self._record_usage(chain_type, calls, len(legacy_splitter.split_text(text)) + 1)
+
+            return summary
+
+        summary_resp = self._run_cached(text, summarize)
         return summary_resp
 
     def init_enhanced_analysis_prompt(self, prompt=None):
         """Initialize prompt for enhanced analysis"""
+        from langchain import LLMChain
+        from langchain.prompts import PromptTemplate
+
         prompt = prompt or llm_prompts.LLM_PROMPT_ENHANCED_ANALYSIS
         self.enhanced_analysis_prompt_tpl = PromptTemplate(
             template=prompt,
@@ -380,6 +801,9 @@ class LLMAgentSummary(LLMAgentBase):
         )
         print(f"[LLMAgentSummary] Enhanced analysis prompt initialized")
 
+    def enhanced_analysis_cache_prompt(self):
+        return self.enhanced_analysis_prompt_tpl.template
+
     def run_enhanced_analysis(self, text: str):
         """
         Run enhanced analysis to get why_it_matters, insights, examples
@@ -387,12 +811,14 @@ class LLMAgentSummary(LLMAgentBase):
         @param text: Content to analyze
         @return: dict with keys: why_it_matters, insights, examples
         """
-        import json
-
         tokens = self.get_num_tokens(text)
         print(f"[LLM] Enhanced Analysis, number of tokens: {tokens}")
 
-        response = self.enhanced_analysis_chain.run(text)
+        response = self._run_cached(
+            text,
+            lambda: self.enhanced_analysis_chain.run(text),
+            prompt=self.enhanced_analysis_cache_prompt(),
+            should_cache=_is_json)
         print(f"[LLM] Enhanced Analysis raw response: {response[:200]}...")
 
         # Parse JSON response
@@ -424,7 +850,7 @@ class LLMAgentJournal(LLMAgentBase):
         tokens = self.get_num_tokens(text)
         print(f"[LLMAgentJournal] number of tokens: {tokens}")
 
-        response = self.llmchain.run(text)
+        response = self._run_cached(text, lambda: self.llmchain.run(text))
         return response
 
 
@@ -446,7 +872,7 @@ class LLMAgentTranslation(LLMAgentBase):
         tokens = self.get_num_tokens(text)
         print(f"[LLMAgentTranslation] number of tokens: {tokens}")
 
-        response = self.llmchain.run(text)
+        response = self._run_cached(text, lambda: self.llmchain.run(text))
         return response
 
 
@@ -462,7 +888,7 @@ class LLMAgentGeneric(LLMAgentBase):
         tokens = self.get_num_tokens(text)
         print(f"[LLMAgentGeneric] number of tokens: {tokens}")
 
-        response = self.llmchain.run(text)
+        response = self._run_cached(text, lambda: self.llmchain.run(text))
         return response
 
 
@@ -474,6 +900,8 @@ class LLMAgentGemini:
         self.api_key = api_key if api_key else os.getenv("GOOGLE_API_KEY")
         self.model_name = model_name or os.getenv("GOOGLE_MODEL", "gemini-pro")
 
+        import google.generativeai as genai
+
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(self.model_name)
         self.temperature = temperature
@@ -488,7 +916,10 @@ class LLMAgentGemini:
     def init_llm(self):
         pass
 
+    @timed_call("llm")
     def run(self, text: str):
+        import google.generativeai as genai
+
         prompt = self.prompt.format(text)
         print(f"[LLMAgentGemini] prompt: {prompt}")
 
@@ -0,0 +1,170 @@
+"""
+Content-addressed cache of the LLM responses
+
+The key is (namespace, digest):
+- namespace: hash of the prompt template, model and temperature
+- digest: hash of the normalized input text
+
+So the same article pulled from different sources or lists is sent to
+the LLM only once per prompt, and a prompt/model change gets a new
+namespace instead of serving the stale responses.
+
+Storage:
+- A bounded in-process LRU in front of
+- Redis entries with TTL (LLM_CACHE_TTL), bounded by LLM_CACHE_MAX_ENTRIES
+  via an LRU index (see DBClient.evict_llm_cache_item_ids)
+"""
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text: str):
+    """
+    Unicode NFC, whitespace collapsed, so the formatting differences of
+    the same content map to the same digest
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def make_namespace(prompt: str, model: str, temperature):
+    data = "\x1f".join([prompt or "", model or "", str(temperature)])
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def make_key(text: str, namespace: str):
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:32]
+    return f"{namespace}:{digest}"
+
+
+class LLMCache:
+    def __init__(
+        self,
+        db_client=None,
+        ttl=None,
+        max_entries=None,
+        local_max_entries=None,
+        evict_interval=None,
+    ):
+        self.client = db_client
+        self.ttl = int(ttl or os.getenv("LLM_CACHE_TTL", 86400 * 14))
+        self.max_entries = int(max_entries or os.getenv("LLM_CACHE_MAX_ENTRIES", 50000))
+        self.local_max_entries = int(local_max_entries or os.getenv("LLM_CACHE_LOCAL_MAX_ENTRIES", 1000))
+
+        # Run the eviction once per N writes
+        self.evict_interval = int(evict_interval or os.getenv("LLM_CACHE_EVICT_INTERVAL", 20))
+
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.stats = {
+            "hits": 0,
+            "local_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+    def _db(self):
+        if self.client is None:
+            import client_registry
+            self.client = client_registry.get_db_client()
+
+        return self.client
+
+    def _inc(self, name, delta=1):
+        with self.lock:
+            self.stats[name] += delta
+
+    def _set_local(self, key, val):
+        with self.lock:
+            self.local[key] = val
+            self.local.move_to_end(key)
+
+            while len(self.local) > self.local_max_entries:
+                self.local.popitem(last=False)
+
+    def get(self, key):
+        """
+        @return the cached response (str) or None
+        """
+        with self.lock:
+            val = self.local.get(key)
+
+            if val is not None:
+                self.local.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["local_hits"] += 1
+                return val
+
+        val = self._db().get_llm_cache_item_ids([key])[0]
+
+        if val is None:
+            self._inc("misses")
+            return None
+
+        if isinstance(val, bytes):
+            val = val.decode("utf-8")
+
+        self._inc("hits")
+        self._set_local(key, val)
+        self._db().touch_llm_cache_item_ids([key])
+        return val
+
+    def set(self, key, val: str):
+        self._set_local(key, val)
+        self._db().set_llm_cache_item_id(key, val, expired_time=self.ttl)
+
+        with self.lock:
+            self.stats["writes"] += 1
+            evict = self.stats["writes"] % self.evict_interval == 0
+
+        if evict:
+            self.evict()
+
+    def evict(self):
+        evicted = self._db().evict_llm_cache_item_ids(self.max_entries, self.ttl)
+
+        if evicted:
+            print(f"[LLMCache] Evicted {evicted} entries (max_entries: {self.max_entries})")
+            self._inc("evictions", evicted)
+
+        return evicted
+
+    def get_or_create(self, key, fn, should_cache=None):
+        """
+        @param fn - produce the response on cache miss
+        @param should_cache - check the response before caching it,
+               empty responses are never cached
+        """
+        val = self.get(key)
+
+        if val is not None:
+            print(f"[LLMCache] Hit, key: {key}")
+            return val
+
+        val = fn()
+
+        if val and (should_cache is None or should_cache(val)):
+            self.set(key, val)
+
+        return val
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def print_stats(self):
+        stats = self.get_stats()
+        print(f"[LLMCache] hits: {stats['hits']} (local: {stats['local_hits']}), misses: {stats['misses']}, hit_rate: {stats['hit_rate']:.2%}, writes: {stats['writes']}, evictions: {stats['evictions']}")
+
+    def close(self):
+        self.print_stats()
@@ -1,3 +1,25 @@
 # This file is used for defining all the constant values of LLM
 
 LLM_INVALID_RESPONSES = ["n/a", "None", "None."]
+
+# Context window (tokens) per model, matched by the longest prefix of
+# the model name, LLM_CONTEXT_WINDOW env overrides it
+LLM_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "glm-4": 128000,
+    "glm-4.5": 128000,
+    "gemini-pro": 32760,
+    "gemini-1.5": 1048576,
+    "gemini-2": 1048576,
+    "llama3": 8192,
+    "llama3.1": 131072,
+    "llama3.2": 131072,
+    "qwen2.5": 32768,
+    "mistral": 32768,
+}
+
+LLM_DEFAULT_CONTEXT_WINDOW = 4096
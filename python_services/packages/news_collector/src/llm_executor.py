@@ -0,0 +1,205 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket, refilled at `rate` tokens per second up
+    to `capacity`
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Block until the tokens are available
+
+        @return the seconds waited
+        """
+        waited = 0.0
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+
+                delay = (tokens - self.tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+
+# Set in the map() workers, a nested map() runs its items one by one
+_worker_state = threading.local()
+
+# <provider, TokenBucket>, shared by all the executors in the process
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider):
+    """
+    Process-wide rate limiter per provider, configured by
+    LLM_RATE_LIMIT_{PROVIDER} (or LLM_RATE_LIMIT) requests/second and
+    LLM_RATE_BURST
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate = float(os.getenv(
+                f"LLM_RATE_LIMIT_{provider.upper()}",
+                os.getenv("LLM_RATE_LIMIT", 2)))
+
+            burst = float(os.getenv("LLM_RATE_BURST", 0)) or None
+
+            _limiters[provider] = TokenBucket(rate, burst)
+            print(f"[LLMExecutor] Rate limiter for {provider}: {rate} req/s, burst: {_limiters[provider].capacity}")
+
+        return _limiters[provider]
+
+
+def is_rate_limited(e):
+    """
+    Check whether the exception is a 429 / rate limit error, the
+    providers (openai, google, ollama) raise different types
+    """
+    status = getattr(e, "status_code", None) or getattr(e, "code", None)
+
+    response = getattr(e, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+
+    if status == 429:
+        return True
+
+    msg = str(e).lower()
+    return "429" in msg or "rate limit" in msg or "ratelimit" in msg or "resource has been exhausted" in msg
+
+
+def _retry_after(e):
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or {}
+
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMExecutor:
+    """
+    Run LLM calls (and the IO around them) concurrently
+
+    - Bounded in-flight requests (max_workers)
+    - Per provider token bucket (see get_rate_limiter)
+    - Exponential backoff with jitter on 429, Retry-After respected
+    - map() keeps the original order of the inputs
+    - A map() called from a map() worker (e.g. the map_reduce chain of
+      a page summarized concurrently) runs its items sequentially, so
+      nested maps stay within LLM_CONCURRENCY in-flight calls
+
+    Usage:
+        executor = LLMExecutor()
+        summaries = executor.map(
+            lambda text: executor.call(llm_agent.run, text), texts)
+    """
+    def __init__(
+        self,
+        provider=None,
+        max_workers=None,
+        max_retries=None,
+        backoff_base=None,
+        backoff_max=None,
+    ):
+        self.provider = provider or os.getenv("LLM_PROVIDER", "openai")
+        self.max_workers = int(max_workers or os.getenv("LLM_CONCURRENCY", 4))
+        self.max_retries = int(max_retries or os.getenv("LLM_MAX_RETRIES", 5))
+        self.backoff_base = float(backoff_base or os.getenv("LLM_BACKOFF_BASE", 2))
+        self.backoff_max = float(backoff_max or os.getenv("LLM_BACKOFF_MAX", 60))
+
+        self.limiter = get_rate_limiter(self.provider)
+
+        print(f"[LLMExecutor] provider: {self.provider}, max_workers: {self.max_workers}, max_retries: {self.max_retries}")
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Rate-limited call with 429-aware retries, other errors are
+        raised immediately
+        """
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+
+            try:
+                return fn(*args, **kwargs)
+
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                    delay = delay * (0.5 + random.random() / 2)
+
+                print(f"[WARN] LLM rate limited ({self.provider}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def map(self, fn, items: list, return_exceptions=False):
+        """
+        Run fn(item) concurrently
+
+        @param return_exceptions - if True, a failed item gets its
+               exception as the result, otherwise the first exception is
+               raised after all the items finished
+        @return results in the same order of items
+        """
+        items = list(items)
+
+        if not items:
+            return []
+
+        st = time.time()
+
+        def run_item(item):
+            _worker_state.in_map = True
+            return fn(item)
+
+        max_workers = min(self.max_workers, len(items))
+
+        if getattr(_worker_state, "in_map", False):
+            max_workers = 1
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_item, item) for item in items]
+
+        results = []
+        first_error = None
+
+        for future in futures:
+            e = future.exception()
+
+            if e is None:
+                results.append(future.result())
+                continue
+
+            print(f"[ERROR] LLMExecutor task failed: {e}")
+            results.append(e)
+            first_error = first_error or e
+
+        print(f"[LLMExecutor] Finished {len(items)} tasks in {time.time() - st:.2f}s, errors: {sum(isinstance(x, Exception) for x in results)}")
+
+        if first_error is not None and not return_exceptions:
+            raise first_error
+
+        return results
@@ -138,6 +138,26 @@ LLM_PROMPT_SUMMARY_COMBINE_PROMPT_SUFFIX = """
 NUMBERED LIST SUMMARY IN BOTH ENGLISH AND {}, AFTER FINISHING ALL ENGLISH PART, THEN FOLLOW BY {} PART, USE '===' AS THE SEPARATOR:
 """
 
+# Map step of the map_reduce summary (the same as langchain's default)
+LLM_PROMPT_SUMMARY_MAP_PROMPT = """
+Write a concise summary of the following:
+
+
+"{text}"
+
+
+CONCISE SUMMARY:
+"""
+
+# Refine step of the refine summary
+LLM_PROMPT_SUMMARY_REFINE_PROMPT = """
+Here is an existing summary of the first part of a text:
+{existing_answer}
+
+Refine the existing summary with the next part of the text below delimited by triple backquotes, keep the same language and output format, don't drop the existing key points and numbers. If the next part isn't useful, return the existing summary.
+```{text}```
+"""
+
 # One-liner summary
 LLM_PROMPT_SUMMARY_ONE_LINER = """
 Write a concise and precise one-liner summary of the following text without losing any numbers and key points (English numbers need to be converted to digital numbers):
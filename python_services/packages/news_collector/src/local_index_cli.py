@@ -0,0 +1,586 @@
+import os
+import json
+import shutil
+import threading
+
+import numpy as np
+
+
+class LocalIndexCollection:
+    """
+    One collection on local disk:
+    - {path}/meta.json: dim, metric, description
+    - {path}/item_ids.jsonl: item_id per row, one json per line
+    - {path}/embeddings.f32: raw float32 matrix (rows x dim), mapped
+      into memory with np.memmap
+
+    New rows are buffered in memory until flush(), which appends the
+    vectors first and then the ids. Both files are append-only, a
+    crash in between leaves orphan vector rows (or a partial line),
+    they are truncated on load
+    """
+    def __init__(self, path, dim=None, desc="", distance_metric="L2"):
+        self.path = path
+        self.lock = threading.RLock()
+
+        meta_file = os.path.join(path, "meta.json")
+
+        if os.path.exists(meta_file):
+            with open(meta_file) as f:
+                meta = json.load(f)
+        else:
+            if not dim:
+                raise Exception(f"Collection {path} does not exist")
+
+            os.makedirs(path, exist_ok=True)
+            meta = {"dim": dim, "metric": distance_metric, "description": desc}
+
+            with open(meta_file, "w") as f:
+                json.dump(meta, f)
+
+        self.dim = int(meta["dim"])
+        self.metric = meta["metric"]
+        self.description = meta.get("description", "")
+
+        self.item_ids = []
+        self.matrix = np.zeros((0, self.dim), dtype=np.float32)
+
+        # squared l2 norm per row, used by the L2 metric
+        self.sq_norms = np.zeros(0, dtype=np.float32)
+
+        # un-flushed rows
+        self.pending_ids = []
+        self.pending_embs = []
+
+        # IVF state
+        self.centroids = None
+        self.lists = None  # [np.array(row indexes), ...]
+        self.ivf_trained_rows = 0
+
+        self._load()
+
+    def _emb_file(self):
+        return os.path.join(self.path, "embeddings.f32")
+
+    def _ids_file(self):
+        return os.path.join(self.path, "item_ids.jsonl")
+
+    def _legacy_ids_file(self):
+        return os.path.join(self.path, "item_ids.json")
+
+    def _truncate(self, path, size):
+        if os.path.exists(path) and os.path.getsize(path) > size:
+            print(f"[LocalIndex] Truncate {path} to {size} bytes (unfinished flush)")
+            os.truncate(path, size)
+
+    def _migrate_legacy_ids(self):
+        """
+        item_ids.json (rewritten on every flush) -> item_ids.jsonl
+        """
+        legacy_file = self._legacy_ids_file()
+
+        if not os.path.exists(legacy_file) or os.path.exists(self._ids_file()):
+            return
+
+        with open(legacy_file) as f:
+            item_ids = json.load(f)
+
+        tmp_file = self._ids_file() + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write("".join(json.dumps(x) + "\n" for x in item_ids))
+
+        os.replace(tmp_file, self._ids_file())
+        os.remove(legacy_file)
+
+    def _load(self):
+        self._migrate_legacy_ids()
+
+        ids_file = self._ids_file()
+        row_bytes = self.dim * 4
+
+        if not os.path.exists(ids_file):
+            # vectors of a flush which never got its ids
+            self._truncate(self._emb_file(), 0)
+            return
+
+        with open(ids_file, "rb") as f:
+            lines = f.read().split(b"\n")
+
+        # the last chunk is empty unless the last append was cut off
+        lines = lines[:-1]
+
+        emb_rows = 0
+        if os.path.exists(self._emb_file()):
+            emb_rows = os.path.getsize(self._emb_file()) // row_bytes
+
+        # ids without vectors can only come from a damaged file, keep
+        # the rows having both
+        lines = lines[:emb_rows]
+
+        self._truncate(ids_file, sum(len(x) + 1 for x in lines))
+        self._truncate(self._emb_file(), len(lines) * row_bytes)
+
+        self.item_ids = [json.loads(x) for x in lines]
+        rows = len(self.item_ids)
+
+        if rows > 0:
+            self.matrix = np.memmap(
+                self._emb_file(), dtype=np.float32, mode="r",
+                shape=(rows, self.dim))
+
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    @property
+    def num_entities(self):
+        return len(self.item_ids) + len(self.pending_ids)
+
+    def insert(self, embs, item_ids):
+        embs = np.asarray(embs, dtype=np.float32).reshape(-1, self.dim)
+
+        with self.lock:
+            self.pending_embs.extend(embs)
+            self.pending_ids.extend(item_ids)
+
+    def flush(self):
+        with self.lock:
+            if not self.pending_ids:
+                return
+
+            embs = np.vstack(self.pending_embs).astype(np.float32)
+
+            # vectors first, the ids make the rows visible
+            with open(self._emb_file(), "ab") as f:
+                f.write(embs.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self._ids_file(), "a") as f:
+                f.write("".join(json.dumps(x) + "\n" for x in self.pending_ids))
+
+            self.item_ids.extend(self.pending_ids)
+
+            self.pending_ids = []
+            self.pending_embs = []
+
+            self.matrix = np.memmap(
+                self._emb_file(), dtype=np.float32, mode="r",
+                shape=(len(self.item_ids), self.dim))
+
+            self.sq_norms = np.concatenate(
+                [self.sq_norms, np.einsum("ij,ij->i", embs, embs)])
+
+            # Assign the new rows to the trained lists, the lists are
+            # re-trained once the collection doubled
+            if self.centroids is not None:
+                if len(self.item_ids) >= 2 * self.ivf_trained_rows:
+                    self.centroids = None
+                    self.lists = None
+                else:
+                    start = len(self.item_ids) - len(embs)
+                    self._assign(embs, offset=start)
+
+    def _scores(self, queries, rows=None):
+        """
+        @return distances in Milvus convention:
+                L2 - squared euclidean distance, smaller is better
+                IP/COSINE - similarity, larger is better
+        """
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        dots = queries @ matrix.T
+
+        if self.metric == "L2":
+            sq_norms = self.sq_norms if rows is None else self.sq_norms[rows]
+            q_norms = np.einsum("ij,ij->i", queries, queries)
+            return np.maximum(q_norms[:, None] + sq_norms[None, :] - 2 * dots, 0)
+
+        if self.metric == "COSINE":
+            sq_norms = self.sq_norms if rows is None else self.sq_norms[rows]
+            q_norms = np.linalg.norm(queries, axis=1)
+            denom = q_norms[:, None] * np.sqrt(sq_norms)[None, :]
+            return dots / np.maximum(denom, 1e-12)
+
+        return dots
+
+    def _topk(self, scores, k):
+        """
+        @return (indexes, scores) per query, best first
+        """
+        k = min(k, scores.shape[1])
+
+        if k == 0:
+            return (np.zeros((scores.shape[0], 0), dtype=np.int64),
+                    np.zeros((scores.shape[0], 0), dtype=np.float32))
+
+        # smaller is better for L2
+        keyed = scores if self.metric == "L2" else -scores
+
+        idx = np.argpartition(keyed, k - 1, axis=1)[:, :k]
+        part = np.take_along_axis(keyed, idx, axis=1)
+        order = np.argsort(part, axis=1)
+
+        idx = np.take_along_axis(idx, order, axis=1)
+        return idx, np.take_along_axis(scores, idx, axis=1)
+
+    def train_ivf(self, nlist, niter=10, sample_size=20000, seed=42):
+        """
+        Partition the rows with k-means (IVF), the search only scans
+        the nprobe closest lists
+        """
+        with self.lock:
+            rows = len(self.item_ids)
+            nlist = min(nlist, rows)
+
+            if nlist < 2:
+                return
+
+            rng = np.random.default_rng(seed)
+            sample_idx = rng.choice(rows, size=min(sample_size, rows), replace=False)
+            sample = np.asarray(self.matrix[np.sort(sample_idx)])
+
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+            for _ in range(niter):
+                assign = self._nearest_centroid(sample, centroids)
+
+                for c in range(nlist):
+                    members = sample[assign == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+
+            self.centroids = centroids
+            self.lists = [np.zeros(0, dtype=np.int64) for _ in range(nlist)]
+            self.ivf_trained_rows = rows
+
+            self._assign(np.asarray(self.matrix), offset=0)
+            print(f"[LocalIndex] Trained IVF, path: {self.path}, rows: {rows}, nlist: {nlist}")
+
+    def _nearest_centroid(self, embs, centroids):
+        c_norms = np.einsum("ij,ij->i", centroids, centroids)
+        dist = c_norms[None, :] - 2 * (embs @ centroids.T)
+        return np.argmin(dist, axis=1)
+
+    def _assign(self, embs, offset, batch_size=8192):
+        for i in range(0, len(embs), batch_size):
+            assign = self._nearest_centroid(embs[i:i + batch_size], self.centroids)
+            rows = np.arange(offset + i, offset + i + len(assign))
+
+            for c in np.unique(assign):
+                self.lists[c] = np.concatenate([self.lists[c], rows[assign == c]])
+
+    def search(self, queries, topk, nprobe=8):
+        """
+        Exact top-k (brute-force) or IVF top-k if the lists are trained
+
+        @return [[(item_id, distance), ...], ...] per query
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+
+        with self.lock:
+            if self.pending_ids:
+                self.flush()
+
+            if not self.item_ids:
+                return [[] for _ in range(len(queries))]
+
+            if self.centroids is None:
+                scores = self._scores(queries)
+                idx, dists = self._topk(scores, topk)
+                return [self._hits(idx[i], dists[i]) for i in range(len(queries))]
+
+            res = []
+            probes = np.argsort(
+                -2 * (queries @ self.centroids.T)
+                + np.einsum("ij,ij->i", self.centroids, self.centroids)[None, :],
+                axis=1)[:, :nprobe]
+
+            for i, query in enumerate(queries):
+                rows = np.concatenate([self.lists[c] for c in probes[i]])
+
+                if len(rows) == 0:
+                    res.append([])
+                    continue
+
+                scores = self._scores(query[None, :], rows=rows)
+                idx, dists = self._topk(scores, topk)
+                res.append(self._hits(rows[idx[0]], dists[0]))
+
+            return res
+
+    def _hits(self, idx, dists):
+        return [(self.item_ids[j], float(d)) for j, d in zip(idx, dists)]
+
+
+class LocalIndexClient:
+    """
+    In-process vector index with the same surface as MilvusClient
+    (createCollection/exist/add/get/get_many/drop/...), one directory
+    per collection under root_dir
+
+    Notes: the distances follow the Milvus convention, so
+           emb_utils.similarity_topk thresholds apply as-is
+
+    Usage:
+        client = LocalIndexClient(emb_agent=emb_agent)
+        client.createCollection("news_xxx", dim=384)
+        client.add("news_xxx", page_id, text, embed=emb)
+        client.get("news_xxx", text, topk=2, emb=emb)
+    """
+    def __init__(
+        self,
+        root_dir="",
+        emb_agent=None,
+        ivf_nlist=None,
+        ivf_min_rows=None,
+        nprobe=None,
+    ):
+        self.root_dir = root_dir or os.getenv("LOCAL_INDEX_DIR", "./local_index")
+
+        # IVF is only trained when a collection has >= ivf_min_rows,
+        # set ivf_nlist = 0 to always use brute-force
+        self.ivf_nlist = int(ivf_nlist if ivf_nlist is not None else os.getenv("LOCAL_INDEX_IVF_NLIST", 0))
+        self.ivf_min_rows = int(ivf_min_rows or os.getenv("LOCAL_INDEX_IVF_MIN_ROWS", 50000))
+        self.nprobe = int(nprobe or os.getenv("LOCAL_INDEX_NPROBE", 8))
+
+        self.emb_agent = emb_agent
+        self.lock = threading.Lock()
+
+        # <name, collection>
+        self.collections = {}
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        print(f"[LocalIndexClient] root_dir: {self.root_dir}, ivf_nlist: {self.ivf_nlist}, ivf_min_rows: {self.ivf_min_rows}, nprobe: {self.nprobe}")
+
+    def _path(self, name):
+        return os.path.join(self.root_dir, name)
+
+    def _partition_path(self, name, partition_name):
+        return os.path.join(self._path(name), "partitions", partition_name)
+
+    def disconnect(self):
+        for collection in list(self.collections.values()):
+            collection.flush()
+
+    def ping(self):
+        return os.path.isdir(self.root_dir)
+
+    def createCollection(
+        self,
+        name="embedding_table",
+        desc="embeddings",
+        dim=1536,
+        distance_metric="",
+    ):
+        distance_metric = distance_metric or os.getenv("MILVUS_SIMILARITY_METRICS", "L2")
+
+        with self.lock:
+            collection = LocalIndexCollection(
+                self._path(name), dim=dim, desc=desc,
+                distance_metric=distance_metric)
+
+            self.collections[name] = collection
+            return collection
+
+    def loadCollection(self, name):
+        return self.getCollection(name)
+
+    def getCollection(self, name, partition_name=None):
+        key = (name, partition_name) if partition_name else name
+
+        with self.lock:
+            collection = self.collections.get(key)
+
+            if not collection:
+                if partition_name:
+                    collection = LocalIndexCollection(
+                        self._partition_path(name, partition_name))
+                else:
+                    collection = LocalIndexCollection(self._path(name))
+
+                self.collections[key] = collection
+
+            return collection
+
+    def createPartition(self, name, partition_name):
+        parent = self.getCollection(name)
+
+        with self.lock:
+            if os.path.exists(self._partition_path(name, partition_name)):
+                return
+
+            self.collections[(name, partition_name)] = LocalIndexCollection(
+                self._partition_path(name, partition_name),
+                dim=parent.dim, desc=parent.description,
+                distance_metric=parent.metric)
+
+            print(f"[INFO] Created partition {partition_name} in collection {name}")
+
+    def list_partitions(self, name) -> list:
+        path = os.path.join(self._path(name), "partitions")
+
+        if not os.path.isdir(path):
+            return []
+
+        return sorted(os.listdir(path))
+
+    def drop_partition(self, name, partition_name):
+        with self.lock:
+            self.collections.pop((name, partition_name), None)
+            shutil.rmtree(
+                self._partition_path(name, partition_name),
+                ignore_errors=True)
+
+        print(f"[INFO] Dropped partition {partition_name} in collection {name}")
+
+    def _maybe_train(self, collection):
+        if (self.ivf_nlist > 0
+                and collection.centroids is None
+                and collection.num_entities >= self.ivf_min_rows):
+            collection.flush()
+            collection.train_ivf(self.ivf_nlist)
+
+    def add(
+        self,
+        name: str,    # collection name
+        item_id: str,
+        text: str,
+        embed: list = None,
+        partition_name: str = None,
+    ):
+        emb = embed if embed is not None else self.emb_agent.create(text)
+        collection = self.getCollection(name, partition_name)
+
+        collection.insert([emb], [item_id])
+        print(f"[LocalIndexClient] Inserted data into {name}, item_id: {item_id}")
+
+    def get(
+        self,
+        name: str,  # collection name
+        text: str,
+        topk=1,
+        fallback=None,
+        emb=None,
+        distance_metric="",
+        timeout=60,
+    ):
+        embs = [emb] if emb is not None else None
+
+        return self.get_many(
+            name, [text], topk=topk, fallback=fallback, embs=embs)[0]
+
+    def get_many(
+        self,
+        name: str,  # collection name
+        texts: list,
+        topk=1,
+        fallback=None,
+        embs=None,
+        distance_metric="",
+        timeout=60,
+        batch_size=256,
+        partition_names=None,
+    ):
+        """
+        @param partition_names - only search these partitions (optional)
+        @return [[{item_id, distance}, ...], ...] in the same order
+                of texts
+        """
+        if not self.exist(name):
+            print(f"[ERROR] Collection {name} does not exist")
+
+            if fallback:
+                print(f"Using fallback collection: {fallback}")
+                return self.get_many(fallback, texts, topk=topk, embs=embs, batch_size=batch_size)
+            else:
+                return [[] for _ in texts]
+
+        if partition_names:
+            collections = [
+                self.getCollection(name, x) for x in partition_names
+                if os.path.exists(self._partition_path(name, x))
+            ]
+        else:
+            collections = [self.getCollection(name)]
+
+        for collection in collections:
+            self._maybe_train(collection)
+
+        if embs is None:
+            embs = [self.emb_agent.create(text) for text in texts]
+
+        res = []
+
+        for i in range(0, len(embs), batch_size):
+            hits_arr = [[] for _ in embs[i:i + batch_size]]
+
+            for collection in collections:
+                for hits, partial in zip(hits_arr, collection.search(
+                        embs[i:i + batch_size], topk, nprobe=self.nprobe)):
+                    hits.extend(partial)
+
+            # merge the partitions, smaller is better for L2. The same
+            # item can be in several partitions, keep its best hit
+            reverse = collections and collections[0].metric != "L2"
+
+            for hits in hits_arr:
+                best = {}
+
+                for item_id, distance in sorted(hits, key=lambda x: x[1], reverse=reverse):
+                    best.setdefault(item_id, distance)
+
+                hits = list(best.items())[:topk]
+
+                res.append([{
+                    "item_id": item_id,
+                    "distance": distance,
+                } for item_id, distance in hits])
+
+        print(f"[LocalIndexClient] get relevant results for {len(res)} queries")
+        return res
+
+    def exist(self, name):
+        return name in self.collections or os.path.exists(
+            os.path.join(self._path(name), "meta.json"))
+
+    def drop(self, name):
+        with self.lock:
+            for key in self._keys(name):
+                self.collections.pop(key, None)
+
+            shutil.rmtree(self._path(name), ignore_errors=True)
+
+    def release(self, name):
+        with self.lock:
+            collections = [self.collections.pop(x) for x in self._keys(name)]
+
+        for collection in collections:
+            collection.flush()
+
+    def _keys(self, name):
+        """
+        The loaded keys of the collection and its partitions
+        """
+        return [
+            x for x in self.collections
+            if x == name or (isinstance(x, tuple) and x[0] == name)
+        ]
+
+    def flush(self, name, partition_name=None):
+        self.getCollection(name, partition_name).flush()
+
+    def get_stats(self, name):
+        collection = self.getCollection(name)
+
+        return {
+            "name": name,
+            "description": collection.description,
+            "is_empty": collection.num_entities == 0,
+            "num_entities": collection.num_entities,
+            "dim": collection.dim,
+            "metric": collection.metric,
+            "ivf_lists": len(collection.lists) if collection.lists else 0,
+        }
+
+    def list_collections(self) -> list:
+        return sorted(
+            x for x in os.listdir(self.root_dir)
+            if os.path.exists(os.path.join(self._path(x), "meta.json")))
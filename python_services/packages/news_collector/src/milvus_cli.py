@@ -10,6 +10,8 @@ from pymilvus import (
     exceptions
 )
 
+from ops_stats import timed_call
+
 
 class MilvusClient:
     def __init__(
@@ -44,6 +46,14 @@ class MilvusClient:
     def disconnect(self):
         connections.disconnect(self.alias)
 
+    def ping(self):
+        try:
+            utility.get_server_version(using=self.alias)
+            return True
+        except Exception as e:
+            print(f"[ERROR] Milvus ping {self.host}:{self.port} failed: {e}")
+            return False
+
     def createCollection(
         self,
         name="embedding_table",
@@ -129,21 +139,24 @@ class MilvusClient:
 
         self._create_index(collection)
 
+    @timed_call("milvus")
     def add(
         self,
         name: str,    # collection name
         item_id: str,
         text: str,
         embed: list = None,
+        partition_name: str = None,
     ):
         """ Insert embedding and data into collection (table)
         """
-        emb = embed or self.emb_agent.create(text)
+        emb = embed if embed is not None else self.emb_agent.create(text)
         collection = self.getCollection(name)
 
-        result = collection.insert([[emb], [item_id]])
+        result = collection.insert([[emb], [item_id]], partition_name=partition_name)
         print(f"[Milvus Client] Inserted data into memory at primary key: {result.primary_keys[0]}:\n data: {text}, item_id: {item_id}")
 
+    @timed_call("milvus")
     def get(
         self,
         name: str,  # collection name
@@ -165,7 +178,9 @@ class MilvusClient:
 
             if fallback:
                 print(f"Using fallback collection: {fallback}")
-                return self.get(fallback, text, topk=topk, emb=emb)
+                return self.get(
+                    fallback, text, topk=topk, emb=emb,
+                    distance_metric=distance_metric, timeout=timeout)
             else:
                 return []
 
@@ -178,7 +193,7 @@ class MilvusClient:
             "params": {"nprobe": 8},
         }
 
-        emb = emb or self.emb_agent.create(text)
+        emb = emb if emb is not None else self.emb_agent.create(text)
 
         result = collection.search(
             [emb],
@@ -196,9 +211,115 @@ class MilvusClient:
             "distance": hit.distance
         } for hit in result[0]]
 
+    @timed_call("milvus")
+    def get_many(
+        self,
+        name: str,  # collection name
+        texts: list,
+        topk=1,
+        fallback=None,
+        embs=None,
+        distance_metric="",
+        timeout=60,  # timeout (unit second)
+        batch_size=256,
+        partition_names=None,
+    ):
+        """
+        Multi-vector search, one search call per batch_size queries
+
+        @param partition_names - only search these partitions (optional)
+        @return [[{item_id, distance}, ...], ...] in the same order
+                of texts
+        """
+        distance_metric = distance_metric or os.getenv("MILVUS_SIMILARITY_METRICS", "L2")
+        collection = None
+
+        try:
+            collection = self.getCollection(name)
+
+        except exceptions.SchemaNotReadyException as e:
+            print(f"[ERROR] Schema {name} is not ready yet: {e}")
+
+            if fallback:
+                print(f"Using fallback collection: {fallback}")
+                return self.get_many(
+                    fallback, texts, topk=topk, embs=embs,
+                    distance_metric=distance_metric, timeout=timeout,
+                    batch_size=batch_size)
+            else:
+                return [[] for _ in texts]
+
+        except Exception as e:
+            print(f"[ERROR] Failed to get collection: {e}")
+            return [[] for _ in texts]
+
+        search_params = {
+            "metric_type": distance_metric,
+            "params": {"nprobe": 8},
+        }
+
+        if embs is None:
+            embs = [self.emb_agent.create(text) for text in texts]
+
+        res = []
+
+        for i in range(0, len(embs), batch_size):
+            result = collection.search(
+                embs[i:i + batch_size],
+                "embeddings",
+                search_params,
+                topk,
+                output_fields=["item_id"],
+                timeout=timeout,
+                partition_names=partition_names,
+            )
+
+            for hits in result:
+                res.append([{
+                    "item_id": hit.entity.get("item_id"),
+                    "distance": hit.distance
+                } for hit in hits])
+
+        print(f"[Milvus Client] get relevant results for {len(res)} queries")
+        return res
+
     def exist(self, name):
         return utility.has_collection(name)
 
+    def createPartition(self, name, partition_name):
+        """
+        Create a partition if not exist, and load it for searching
+        """
+        collection = self.getCollection(name)
+
+        if collection.has_partition(partition_name):
+            return
+
+        partition = collection.create_partition(partition_name)
+        print(f"[INFO] Created partition {partition_name} in collection {name}")
+
+        try:
+            partition.load()
+        except Exception as e:
+            print(f"[WARN] Failed to load partition {partition_name}: {e}")
+
+    def list_partitions(self, name) -> list:
+        collection = self.getCollection(name)
+        return [x.name for x in collection.partitions]
+
+    def drop_partition(self, name, partition_name):
+        """
+        Drop all the data of a partition (TTL eviction)
+        """
+        collection = self.getCollection(name)
+
+        if not collection.has_partition(partition_name):
+            return
+
+        collection.partition(partition_name).release()
+        collection.drop_partition(partition_name)
+        print(f"[INFO] Dropped partition {partition_name} in collection {name}")
+
     def clear(self, name):
         """ Clear the index in memory
         """
@@ -1,6 +1,5 @@
 import os
 from datetime import datetime
-import mysql.connector
 
 import db_tables
 
@@ -23,6 +22,8 @@ class MySQLClient:
         print(f"MySQL client initialization finished, host: {self.host}, port: {self.port}, user: {self.user}")
 
     def connect(self):
+        import mysql.connector
+
         return mysql.connector.connect(
             host=self.host,
             port=self.port,
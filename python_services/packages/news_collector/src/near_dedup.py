@@ -0,0 +1,193 @@
+"""
+Cross-source near-duplicate detection (MinHash LSH)
+
+The exact-id dedup of each operator can't catch the same story
+syndicated across feeds, subreddits and newsletters. The pages are
+reduced to MinHash signatures of their title + summary word shingles,
+banded for LSH, and the candidates sharing a band are verified by the
+estimated Jaccard similarity.
+
+The signatures and band buckets of the delivered pages are stored in
+Redis with TTL (NEAR_DEDUP_TTL), a rolling index shared by all the
+sources, so a story that passed through RSS earlier is dropped from
+Reddit later. dedup() doesn't write the index, commit() registers the
+pages once they are pushed, the ones filtered out or failed to push
+never become representatives.
+"""
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+
+import client_registry
+import utils
+
+
+# Mersenne prime 2^31 - 1, (a * x + b) fits into uint64 for x < 2^32
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, k=3):
+    """
+    Word k-grams of the normalized text
+    """
+    words = re.findall(r"\w+", (text or "").lower())
+
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=64, seed=42):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str, k=3):
+        """
+        @return uint32 array (num_perm,) or None for empty text
+        """
+        grams = shingles(text, k)
+
+        if not grams:
+            return None
+
+        x = np.array([zlib.crc32(g.encode("utf-8")) for g in grams], dtype=np.uint64)
+        hashes = (x[:, None] * self.a[None, :] + self.b[None, :]) % _PRIME
+
+        return hashes.min(axis=0).astype(np.uint32)
+
+
+def jaccard(sig1, sig2):
+    """
+    Estimated Jaccard similarity of two MinHash signatures
+    """
+    return float(np.mean(sig1 == sig2))
+
+
+def band_keys(sig, bands):
+    """
+    LSH band buckets: the pages sharing any bucket are candidates
+    """
+    rows = len(sig) // bands
+
+    return [
+        f"{i}_{hashlib.md5(sig[i * rows:(i + 1) * rows].tobytes()).hexdigest()[:16]}"
+        for i in range(bands)
+    ]
+
+
+class NearDedup:
+    def __init__(
+        self,
+        db_client=None,
+        num_perm=None,
+        bands=None,
+        threshold=None,
+        ttl=None,
+    ):
+        self.client = db_client or client_registry.get_db_client()
+        self.num_perm = int(num_perm or os.getenv("NEAR_DEDUP_NUM_PERM", 64))
+        self.bands = int(bands or os.getenv("NEAR_DEDUP_BANDS", 16))
+        self.threshold = float(threshold or os.getenv("NEAR_DEDUP_THRESHOLD", 0.6))
+        self.ttl = int(ttl or os.getenv("NEAR_DEDUP_TTL", 86400 * 7))
+
+        self.hasher = MinHasher(self.num_perm)
+
+    def dedup(self, items: list):
+        """
+        items: [(item_id, text), ...], item_id is unique across sources
+
+        @return (kept item_ids, <dup item_id, representative item_id>,
+                 <kept item_id, signature>), pass the signatures of
+                 the delivered items to commit()
+        """
+        sigs = {}
+        bands = {}
+
+        for item_id, text in items:
+            sig = self.hasher.signature(text)
+
+            if sig is not None:
+                sigs[item_id] = sig
+                bands[item_id] = band_keys(sig, self.bands)
+
+        # The representatives stored by the previous runs / sources
+        all_bands = sorted({b for x in bands.values() for b in x})
+        stored = dict(zip(all_bands, self.client.get_near_dedup_band_item_ids(all_bands)))
+
+        stored = {k: utils.bytes2str(v) for k, v in stored.items() if v}
+        candidates = sorted(set(stored.values()))
+        stored_sigs = {}
+
+        for item_id, data in zip(candidates, self.client.get_near_dedup_signature_item_ids(candidates)):
+            if data:
+                stored_sigs[item_id] = np.frombuffer(data, dtype=np.uint32)
+
+        kept = []
+        kept_set = set()
+        dups = {}
+
+        # <band, item_id> of the kept items in this batch
+        local = {}
+
+        for item_id, _ in items:
+            if item_id not in sigs:
+                kept.append(item_id)
+                continue
+
+            sig = sigs[item_id]
+            rep = None
+
+            for band in bands[item_id]:
+                for cand in (local.get(band), stored.get(band)):
+                    # A re-run sees its own signature in the index
+                    if not cand or cand == item_id:
+                        continue
+
+                    cand_sig = sigs[cand] if cand in kept_set else stored_sigs.get(cand)
+
+                    if cand_sig is not None and len(cand_sig) == len(sig) and jaccard(sig, cand_sig) >= self.threshold:
+                        rep = cand
+                        break
+
+                if rep:
+                    break
+
+            if rep:
+                dups[item_id] = rep
+                continue
+
+            kept.append(item_id)
+            kept_set.add(item_id)
+
+            for band in bands[item_id]:
+                local.setdefault(band, item_id)
+
+        print(f"[NearDedup] total: {len(items)}, kept: {len(kept)}, near-duplicates: {len(dups)}")
+        return kept, dups, {x: sigs[x] for x in kept if x in sigs}
+
+    def commit(self, sigs: dict):
+        """
+        Register the delivered items into the rolling index
+
+        sigs: <item_id, signature> returned by dedup()
+        """
+        if not sigs:
+            return
+
+        self.client.set_near_dedup_signature_item_ids(
+            [(x, sig.tobytes()) for x, sig in sigs.items()],
+            expired_time=self.ttl)
+
+        self.client.set_near_dedup_band_item_ids(
+            [(band, x) for x, sig in sigs.items() for band in band_keys(sig, self.bands)],
+            expired_time=self.ttl)
+
+        print(f"[NearDedup] committed: {len(sigs)}")
+
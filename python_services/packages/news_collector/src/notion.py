@@ -2,11 +2,14 @@ import os
 import time
 import html
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from notion_client import Client
 import llm_const
 
 import utils
+import notion_api
+from ops_stats import timed_call
 
 
 class NotionAgent:
@@ -19,8 +22,29 @@ class NotionAgent:
         self.api = self._init_client(self.api_key)
         self.databases = {}  # <source, {database_id}>
 
+        # Concurrent page/block reads, throttled by the shared rate limiter
+        self.max_workers = int(os.getenv("NOTION_CONCURRENCY", 4))
+
+        self.block_cache = None
+        if os.getenv("NOTION_BLOCK_CACHE_ENABLED", "true").lower() == "true":
+            self.block_cache = notion_api.NotionBlockCache()
+
     def _init_client(self, api_key):
-        return Client(auth=api_key)
+        client = Client(auth=api_key)
+
+        # All the endpoints go through Client.request
+        client.request = notion_api.rate_limited_request(
+            timed_call("notion")(client.request))
+
+        return client
+
+    def _queryDatabase(self, query_data):
+        """
+        databases.query of all the result pages
+        """
+        pages = notion_api.paginate(self.api.databases.query, **query_data)
+        print(f"[NotionAgent] Queried database {query_data['database_id']}, total pages: {len(pages)}")
+        return pages
 
     def addDatabase(self, source_name, database_id):
         self.databases[source_name] = {
@@ -147,7 +171,7 @@ class NotionAgent:
         # block_id -> block data
         blocks = {}
 
-        childs = self.api.blocks.children.list(block_id=block_id).get("results")
+        childs = notion_api.paginate(self.api.blocks.children.list, block_id=block_id)
         # print(f"n: {len(childs)}, childs: {childs}")
 
         for block in childs:
@@ -194,8 +218,8 @@ class NotionAgent:
             text = self.extractHeading_3(block)
 
         elif block["type"] == "table":
-            # depth forward in the child blocks
-            pros, blocks = self.extractPage(block_id)
+            # depth forward in the child blocks (table rows)
+            blocks = self.extractBlocks(block_id)
             text = self.concatBlocksText(blocks)
 
         elif block["type"] == "table_row":
@@ -257,17 +281,24 @@ class NotionAgent:
             page_id,
             extract_blocks=True,
             retrieval_retry=3,
+            page=None,
     ):
+        """
+        @param page - the page object if already queried (e.g. the
+               databases.query results), saves the pages.retrieve
+        """
         properties = {}
 
         # block_id -> block data
         blocks = {}
 
-        page = None
         trying_cnt = 0
         retry_sleep_time = 5  # 5 seconds
 
-        while trying_cnt < retrieval_retry:
+        if page:
+            properties = self._extractPageProps(page)
+
+        while not page and trying_cnt < retrieval_retry:
             trying_cnt += 1
 
             try:
@@ -285,10 +316,55 @@ class NotionAgent:
             return properties, blocks
 
         if extract_blocks:
-            blocks = self.extractBlocks(page_id)
+            blocks = self._extractBlocksCached(page_id, properties["last_edited_time"])
 
         return properties, blocks
 
+    def _extractBlocksCached(self, page_id, last_edited_time):
+        if not self.block_cache:
+            return self.extractBlocks(page_id)
+
+        try:
+            blocks = self.block_cache.get(page_id, last_edited_time)
+
+            if blocks is not None:
+                print(f"[NotionAgent] Block cache hit, page_id: {page_id}, last_edited_time: {last_edited_time}")
+                return blocks
+
+        except Exception as e:
+            print(f"[ERROR] Notion block cache get failed, page_id: {page_id}: {e}")
+
+        blocks = self.extractBlocks(page_id)
+
+        try:
+            self.block_cache.set(page_id, last_edited_time, blocks)
+        except Exception as e:
+            print(f"[ERROR] Notion block cache set failed, page_id: {page_id}: {e}")
+
+        return blocks
+
+    def extractPages(self, pages: list, extract_blocks=True):
+        """
+        Extract the queried pages concurrently
+
+        @return <page_id, (properties, blocks)>
+        """
+        if not pages:
+            return {}
+
+        st = time.time()
+
+        def extract(page):
+            return self.extractPage(page["id"], extract_blocks=extract_blocks, page=page)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pages))) as executor:
+            res = list(executor.map(extract, pages))
+
+        stats = self.block_cache.get_stats() if self.block_cache else {}
+        print(f"[NotionAgent] Extracted {len(pages)} pages in {time.time() - st:.2f}s, block cache: {stats}")
+
+        return {page["id"]: x for page, x in zip(pages, res)}
+
     def queryDatabase_RSSList(self, database_id):
         query_data = {
             "database_id": database_id,
@@ -311,7 +387,7 @@ class NotionAgent:
             }
         }
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
         extracted_pages = []
 
         for page in pages:
@@ -351,7 +427,7 @@ class NotionAgent:
             }
         }
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
         extracted_pages = {}
 
         for page in pages:
@@ -395,7 +471,7 @@ class NotionAgent:
             }
         }
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
         extracted_pages = {}
 
         for page in pages:
@@ -438,7 +514,7 @@ class NotionAgent:
             }
         }
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
         extracted_pages = []
 
         for page in pages:
@@ -466,7 +542,7 @@ class NotionAgent:
             ],
         }
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
         extracted_pages = []
 
         for page in pages:
@@ -505,14 +581,16 @@ class NotionAgent:
                 }
             })
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
 
         extracted_pages = {}
+        extracted = self.extractPages(pages)
+
         for page in pages:
             print(f"result: page id: {page['id']}")
 
             page_id = page["id"]
-            props, blocks = self.extractPage(page_id)
+            props, blocks = extracted[page_id]
             page_content = self.concatBlocksText(blocks)
 
             extracted_pages[page_id] = {
@@ -570,15 +648,17 @@ class NotionAgent:
 
         print(f"Query article inbox, query: {query_data}")
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
         print(f"Queried pages: {pages}")
 
         extracted_pages = {}
+        extracted = self.extractPages(pages)
+
         for page in pages:
             print(f"result: page id: {page['id']}")
 
             page_id = page["id"]
-            props, blocks = self.extractPage(page_id)
+            props, blocks = extracted[page_id]
             page_content = self.concatBlocksText(blocks)
 
             print(f"Extracting one page: {page}, props: {props}")
@@ -630,6 +710,10 @@ class NotionAgent:
         extraction_interval=0,
         require_user_rating=True,
     ):
+        """
+        @param extraction_interval - unused, the requests are throttled
+               by the shared rate limiter (NOTION_RATE_LIMIT)
+        """
         query_data = {
             "database_id": database_id,
             "sorts": [
@@ -668,14 +752,16 @@ class NotionAgent:
                 }
             })
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
 
         extracted_pages = {}
+        extracted = self.extractPages(pages)
+
         for page in pages:
             print(f"result: page id: {page['id']}")
 
             page_id = page["id"]
-            props, blocks = self.extractPage(page_id)
+            props, blocks = extracted[page_id]
 
             rating_prop = page["properties"]["User Rating"]["select"]
 
@@ -699,10 +785,6 @@ class NotionAgent:
                 "blocks": blocks,
             }
 
-            if extraction_interval > 0:
-                print(f"Extraction interval > 0, sleep for {extraction_interval}s")
-                time.sleep(extraction_interval)
-
         return extracted_pages
 
     def queryDatabaseInbox_Journal(
@@ -744,15 +826,17 @@ class NotionAgent:
 
         print(f"Query Journal inbox, query: {query_data}")
 
-        pages = self.api.databases.query(**query_data).get("results")
+        pages = self._queryDatabase(query_data)
         print(f"Queried pages: {pages}")
 
         extracted_pages = {}
+        extracted = self.extractPages(pages)
+
         for page in pages:
             print(f"result: page id: {page['id']}")
 
             page_id = page["id"]
-            props, blocks = self.extractPage(page_id)
+            props, blocks = extracted[page_id]
             page_content = self.concatBlocksText(blocks)
 
             print(f"Extracting one page: {page}, props: {props}")
@@ -0,0 +1,264 @@
+"""
+Notion API access layer
+
+- All the requests of the process share one token bucket
+  (NOTION_RATE_LIMIT, ~3 req/s is the Notion average limit)
+- 429 / 5xx / timeouts are retried, Retry-After respected, otherwise
+  exponential backoff with jitter
+- paginate() follows next_cursor of the list endpoints
+  (databases.query, blocks.children.list)
+- NotionBlockCache keeps the extracted block tree of a page keyed by its
+  last_edited_time, an unchanged page is not re-read
+
+Usage:
+    client.request = rate_limited_request(client.request)
+    pages = paginate(client.databases.query, database_id=database_id)
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from llm_executor import TokenBucket
+
+
+RETRYABLE_STATUS = (409, 429, 500, 502, 503, 504)
+RETRYABLE_CODES = (
+    "rate_limited",
+    "conflict_error",
+    "internal_server_error",
+    "service_unavailable",
+    "notionhq_client_request_timeout",
+)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Process-wide token bucket of the Notion requests
+    """
+    global _limiter
+
+    with _limiter_lock:
+        if _limiter is None:
+            rate = float(os.getenv("NOTION_RATE_LIMIT", 3))
+            burst = float(os.getenv("NOTION_RATE_BURST", 0)) or None
+
+            _limiter = TokenBucket(rate, burst)
+            print(f"[NotionAPI] Rate limiter: {rate} req/s, burst: {_limiter.capacity}")
+
+        return _limiter
+
+
+# The request was rejected before any write, safe to retry for every call
+SAFE_RETRYABLE_STATUS = (409, 429)
+SAFE_RETRYABLE_CODES = ("rate_limited", "conflict_error")
+
+
+def is_retryable(e):
+    return getattr(e, "status", None) in RETRYABLE_STATUS or getattr(e, "code", None) in RETRYABLE_CODES
+
+
+def is_safe_retryable(e):
+    return getattr(e, "status", None) in SAFE_RETRYABLE_STATUS or getattr(e, "code", None) in SAFE_RETRYABLE_CODES
+
+
+def is_idempotent(path, method):
+    """
+    Reads (GET, the POST query / search endpoints), updates and
+    deletes, but not the creates (POST pages) and the block appends
+    (PATCH blocks/{id}/children)
+    """
+    method = (method or "").upper()
+    path = (path or "").strip("/")
+
+    if method in ("GET", "DELETE"):
+        return True
+
+    if method == "PATCH":
+        return not path.endswith("/children")
+
+    return method == "POST" and (path == "search" or path.endswith("/query"))
+
+
+def retry_after(e):
+    headers = getattr(e, "headers", None) or {}
+
+    try:
+        return float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def rate_limited_request(request, max_retries=None, backoff_base=None, backoff_max=None):
+    """
+    Wrap notion_client Client.request, every endpoint goes through it
+
+    Timeouts and 5xx are retried for the idempotent calls only, a
+    create (e.g. pages.create) may have succeeded on the server side,
+    so it's retried on 429 / 409 only to avoid duplicates
+    """
+    max_retries = int(max_retries or os.getenv("NOTION_MAX_RETRIES", 5))
+    backoff_base = float(backoff_base or os.getenv("NOTION_BACKOFF_BASE", 1))
+    backoff_max = float(backoff_max or os.getenv("NOTION_BACKOFF_MAX", 60))
+    limiter = get_rate_limiter()
+
+    def wrapper(*args, **kwargs):
+        # Client.request(path, method, query=None, body=None, auth=None)
+        path = kwargs.get("path", args[0] if args else "")
+        method = kwargs.get("method", args[1] if len(args) > 1 else "")
+        retryable = is_retryable if is_idempotent(path, method) else is_safe_retryable
+
+        for attempt in range(max_retries + 1):
+            limiter.acquire()
+
+            try:
+                return request(*args, **kwargs)
+
+            except Exception as e:
+                if not retryable(e) or attempt >= max_retries:
+                    raise
+
+                delay = retry_after(e)
+                if delay is None:
+                    delay = min(backoff_max, backoff_base * (2 ** attempt))
+                    delay = delay * (0.5 + random.random() / 2)
+
+                print(f"[WARN] Notion request failed ({getattr(e, 'status', None)}, {getattr(e, 'code', None)}), retry {attempt + 1}/{max_retries} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    return wrapper
+
+
+def paginate(list_fn, page_size=100, max_results=None, **kwargs):
+    """
+    Call a list endpoint until has_more is False
+
+    @return all the results
+    """
+    results = []
+    cursor = None
+
+    while True:
+        if cursor:
+            kwargs["start_cursor"] = cursor
+
+        res = list_fn(page_size=page_size, **kwargs)
+        results.extend(res.get("results") or [])
+
+        if max_results and len(results) >= max_results:
+            return results[:max_results]
+
+        if not res.get("has_more") or not res.get("next_cursor"):
+            return results
+
+        cursor = res["next_cursor"]
+
+
+class NotionBlockCache:
+    """
+    Extracted blocks of a page, valid as long as the page
+    last_edited_time doesn't change
+
+    last_edited_time is rounded to the minute by Notion, a page edited
+    within the last NOTION_BLOCK_CACHE_SETTLE_SECONDS (default 120) is
+    not cached, a later edit in the same minute would keep the same
+    last_edited_time
+    """
+    def __init__(self, db_client=None, ttl=None, local_max_entries=None, settle_seconds=None):
+        self.client = db_client
+        self.ttl = int(ttl or os.getenv("NOTION_BLOCK_CACHE_TTL", 86400 * 7))
+        self.settle_seconds = int(settle_seconds or os.getenv("NOTION_BLOCK_CACHE_SETTLE_SECONDS", 120))
+        self.local_max_entries = int(local_max_entries or os.getenv("NOTION_BLOCK_CACHE_LOCAL_MAX_ENTRIES", 500))
+
+        # <page_id, (last_edited_time, blocks)>
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+        }
+
+    def _db(self):
+        if self.client is None:
+            import client_registry
+            self.client = client_registry.get_db_client()
+
+        return self.client
+
+    def _inc(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    def _set_local(self, page_id, last_edited_time, blocks):
+        with self.lock:
+            self.local[page_id] = (last_edited_time, blocks)
+            self.local.move_to_end(page_id)
+
+            while len(self.local) > self.local_max_entries:
+                self.local.popitem(last=False)
+
+    def get(self, page_id, last_edited_time):
+        """
+        @return blocks dict, or None if missing or stale
+        """
+        if not last_edited_time:
+            return None
+
+        with self.lock:
+            entry = self.local.get(page_id)
+
+        if entry and entry[0] == last_edited_time:
+            self._inc("hits")
+            return entry[1]
+
+        data = self._db().get_notion_blocks_item_id(page_id)
+
+        try:
+            entry = json.loads(data) if data else None
+        except ValueError:
+            entry = None
+
+        if not entry or entry.get("last_edited_time") != last_edited_time:
+            self._inc("misses")
+            return None
+
+        self._inc("hits")
+        self._set_local(page_id, last_edited_time, entry["blocks"])
+        return entry["blocks"]
+
+    def _is_settled(self, last_edited_time):
+        try:
+            dt = datetime.fromisoformat(last_edited_time.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+
+        return (datetime.now(timezone.utc) - dt).total_seconds() >= self.settle_seconds
+
+    def set(self, page_id, last_edited_time, blocks):
+        if not last_edited_time or not self._is_settled(last_edited_time):
+            return
+
+        self._set_local(page_id, last_edited_time, blocks)
+
+        data = json.dumps({"last_edited_time": last_edited_time, "blocks": blocks}, default=str)
+
+        self._db().set_notion_blocks_item_id(
+            page_id, data, expired_time=self.ttl, overwrite=True)
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+
+        tot = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / tot if tot else 0.0
+        return stats
@@ -5,7 +5,7 @@ import traceback
 from operator import itemgetter
 from datetime import timedelta, datetime
 
-from notion import NotionAgent
+import client_registry
 from llm_agent import (
     LLMAgentSummary,
     LLMWebLoader,
@@ -13,8 +13,8 @@ from llm_agent import (
 )
 import utils
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_notion import OperatorNotion
+from ops_stats import timed_stage
 
 
 class OperatorArticle(OperatorBase):
@@ -29,15 +29,16 @@ class OperatorArticle(OperatorBase):
     - publish
     """
 
+    @timed_stage("pull")
     def pull(self):
         print("#####################################################")
         print("# Pulling Articles")
         print("#####################################################")
         # 1. prepare notion agent and db connection
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         last_created_time = client.get_notion_inbox_created_time(
             "article", "default")
 
@@ -77,27 +78,33 @@ class OperatorArticle(OperatorBase):
 
         return pages
 
+    @timed_stage("dedup")
     def dedup(self, extractedPages, target="inbox"):
         print("#####################################################")
         print("# Dedup Articles")
         print("#####################################################")
         print(f"Number of pages: {len(extractedPages)}")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         deduped_pages = []
 
-        for page_id, page in extractedPages.items():
+        # One round trip for all the pages
+        page_ids = list(extractedPages.keys())
+        visited = client.get_notion_toread_item_ids(
+            "article", "default", page_ids)
+
+        for (page_id, page), is_visited in zip(extractedPages.items(), visited):
             title = page["title"]
             print(f"Dedupping page, title: {title}")
 
-            if client.get_notion_toread_item_id(
-                    "article", "default", page_id):
+            if is_visited:
                 print(f"Duplicated article found, skip. page_id: {page_id}")
             else:
                 deduped_pages.append(page)
 
         return deduped_pages
 
+    @timed_stage("summarize")
     def summarize(self, pages):
         print("#####################################################")
         print("# Summarize Articles")
@@ -110,12 +117,15 @@ class OperatorArticle(OperatorBase):
         llm_agent.init_prompt()
         llm_agent.init_llm()
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         redis_key_expire_time = os.getenv(
             "BOT_REDIS_KEY_EXPIRE_TIME", 604800)
 
         summarized_pages = []
 
+        # Summary cache writes, flushed in one round trip
+        summary_cache_items = []
+
         for page in pages:
             title = page["title"]
             page_id = page["id"]
@@ -128,7 +138,8 @@ class OperatorArticle(OperatorBase):
             st = time.time()
 
             llm_summary_resp = client.get_notion_summary_item_id(
-                "article", "default", page_id)
+                "article", "default", page_id,
+                cache_ns=llm_agent.cache_namespace())
 
             if not llm_summary_resp:
                 # Double check the content, if empty, load it from
@@ -152,9 +163,8 @@ class OperatorArticle(OperatorBase):
 
                 print(f"Cache llm response for {redis_key_expire_time}s, page_id: {page_id}, summary: {summary}")
 
-                client.set_notion_summary_item_id(
-                    "article", "default", page_id, summary,
-                    expired_time=int(redis_key_expire_time))
+                summary_cache_items.append(
+                    ("default", page_id, summary, llm_agent.cache_key(content)))
 
             else:
                 print("Found llm summary from cache, decoding (utf-8) ...")
@@ -175,6 +185,10 @@ class OperatorArticle(OperatorBase):
             print(f"Used {time.time() - st:.3f}s, Summarized page_id: {page_id}, summary: {summary}")
             summarized_pages.append(summarized_page)
 
+        client.set_notion_summary_item_ids(
+            "article", summary_cache_items,
+            expired_time=int(redis_key_expire_time))
+
         return summarized_pages
 
     def _get_top_items(self, items: list, k):
@@ -184,6 +198,7 @@ class OperatorArticle(OperatorBase):
         tops = sorted(items, key=itemgetter(1), reverse=True)
         return tops[:k]
 
+    @timed_stage("push")
     def push(self, ranked_data, targets, topk=3):
         print("#####################################################")
         print("# Push Articles")
@@ -203,7 +218,7 @@ class OperatorArticle(OperatorBase):
 
             if target == "notion":
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 # Get the latest toread database id from index db
@@ -217,52 +232,55 @@ class OperatorArticle(OperatorBase):
                     print("[ERROR] no index db pages found... skip")
                     break
 
-                for ranked_page in ranked_data:
-                    stat["total"] += 1
-
-                    try:
-                        page_id = ranked_page["id"]
-                        title = ranked_page["title"]
-                        print(f"Pushing page, title: {title}")
-
-                        topics = ranked_page["__topics"]
-                        topics_topk = self._get_top_items(topics, topk)
-                        topics_topk = [x[0].replace(",", " ")[:20] for x in topics_topk]
-
-                        categories = ranked_page["__categories"]
-                        categories_topk = self._get_top_items(categories, topk)
-                        categories_topk = [x[0].replace(",", " ")[:20] for x in categories_topk]
-
-                        new_page = notion_agent.createDatabaseItem_ToRead_Article(
-                            database_id,
-                            ranked_page,
-                            topics_topk,
-                            categories_topk)
-
-                        # Add Arxiv metadata as a comment
-                        if ranked_page.get("__arxiv_result"):
-                            try:
-                                new_page_id = new_page["id"]
-                                metadata_text = ranked_page["__arxiv_result"]["metadata_text"]
-
-                                notion_agent.createPageComment(
-                                    new_page_id, metadata_text)
-
-                            except Exception as e:
-                                print(f"[WARN] Failed to add Arxiv metadata, skip: {e}")
-
-                        self.markVisited(page_id, source="article", list_name="default")
-
-                        created_time = ranked_page["created_time"]
-                        self.updateCreatedTime(
-                            created_time,
-                            source="article",
-                            list_name="default")
-
-                    except Exception as e:
-                        print(f"[ERROR]: Push to notion failed, skip: {e}")
-                        traceback.print_exc()
-                        stat["error"] += 1
+                try:
+                    for ranked_page in ranked_data:
+                        stat["total"] += 1
+
+                        try:
+                            page_id = ranked_page["id"]
+                            title = ranked_page["title"]
+                            print(f"Pushing page, title: {title}")
+
+                            topics = ranked_page["__topics"]
+                            topics_topk = self._get_top_items(topics, topk)
+                            topics_topk = [x[0].replace(",", " ")[:20] for x in topics_topk]
+
+                            categories = ranked_page["__categories"]
+                            categories_topk = self._get_top_items(categories, topk)
+                            categories_topk = [x[0].replace(",", " ")[:20] for x in categories_topk]
+
+                            new_page = notion_agent.createDatabaseItem_ToRead_Article(
+                                database_id,
+                                ranked_page,
+                                topics_topk,
+                                categories_topk)
+
+                            # Add Arxiv metadata as a comment
+                            if ranked_page.get("__arxiv_result"):
+                                try:
+                                    new_page_id = new_page["id"]
+                                    metadata_text = ranked_page["__arxiv_result"]["metadata_text"]
+
+                                    notion_agent.createPageComment(
+                                        new_page_id, metadata_text)
+
+                                except Exception as e:
+                                    print(f"[WARN] Failed to add Arxiv metadata, skip: {e}")
+
+                            self.markVisited(page_id, source="article", list_name="default")
+
+                            created_time = ranked_page["created_time"]
+                            self.updateCreatedTime(
+                                created_time,
+                                source="article",
+                                list_name="default")
+
+                        except Exception as e:
+                            print(f"[ERROR]: Push to notion failed, skip: {e}")
+                            traceback.print_exc()
+                            stat["error"] += 1
+                finally:
+                    self.flushVisited()
 
             else:
                 print(f"[ERROR]: Unknown target {target}, skip")
@@ -1,5 +1,4 @@
 import os
-import whisper
 
 import utils
 
@@ -10,6 +9,8 @@ class OperatorAudioToText:
         self.model = self.load_model(self.model_name)
 
     def load_model(self, model_name):
+        import whisper
+
         return whisper.load_model(model_name)
 
     def extract_audio(self, page_id, url, data_folder="", run_id=""):
@@ -2,11 +2,10 @@ import os
 import time
 from datetime import datetime, timedelta
 
+import client_registry
 import utils
-from db_cli import DBClient
-from notion import NotionAgent
 from ops_notion import OperatorNotion
-from ops_stats import OpsStats
+from ops_stats import OpsStats, timed_stage
 
 
 class OperatorBase:
@@ -24,7 +23,7 @@ class OperatorBase:
         - Items with user rating
         """
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
 
         op_notion = OperatorNotion()
 
@@ -38,7 +37,7 @@ class OperatorBase:
             print("[ERROR] No valid ToRead databases found")
             return {}
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         last_edited_time = client.get_notion_last_edited_time(
             source, "default")
         last_edited_time = utils.bytes2str(last_edited_time)
@@ -95,7 +94,7 @@ class OperatorBase:
         list_name="default",
         db_client=None
     ):
-        client = db_client or DBClient()
+        client = db_client or client_registry.get_db_client()
 
         for page_id, page in data.items():
             last_edited_time = page["last_edited_time"]
@@ -186,6 +185,92 @@ class OperatorBase:
     def dedup(self, data, target):
         return
 
+    @timed_stage("near_dedup")
+    def near_dedup(self, pages, source, text_fn=None):
+        """
+        Drop the near-duplicates across sources and lists, only one
+        representative of each cluster goes to scoring/summarization
+        (see near_dedup.NearDedup), call near_dedup_commit() after the
+        push to register the delivered pages
+
+        pages: [page, ...] or {list_name: [page, ...]}
+        text_fn: page -> text to compare, title + summary by default
+        """
+        print("#####################################################")
+        print(f"# Near-duplicate Dedup {source}")
+        print("#####################################################")
+
+        from near_dedup import NearDedup
+
+        def default_text_fn(page):
+            body = page.get("summary") or page.get("text") or ""
+            return f"{page.get('title', '')} {body[:2000]}"
+
+        text_fn = text_fn or default_text_fn
+
+        grouped = isinstance(pages, dict)
+        if grouped:
+            flat = [(list_name, page) for list_name, items in pages.items() for page in items]
+        else:
+            flat = [(None, page) for page in pages]
+
+        item_ids = [f"{source}_{page['id']}" for _, page in flat]
+
+        try:
+            kept, dups, sigs = NearDedup().dedup(
+                [(item_id, text_fn(page)) for item_id, (_, page) in zip(item_ids, flat)])
+
+        except Exception as e:
+            print(f"[ERROR] Near-duplicate dedup failed, skip it: {e}")
+            return pages
+
+        # <item_id, (signature, visited id)>, committed after the push
+        pending = self.__dict__.setdefault("_near_dedup_pending", {})
+
+        for item_id, (_, page) in zip(item_ids, flat):
+            if item_id in sigs:
+                pending[item_id] = (sigs[item_id], self._visited_id(page))
+
+        for item_id, rep in dups.items():
+            print(f"Near-duplicate found, item_id: {item_id}, representative: {rep}, skip it")
+
+        kept = set(kept)
+
+        if not grouped:
+            return [page for item_id, (_, page) in zip(item_ids, flat) if item_id in kept]
+
+        deduped = {list_name: [] for list_name in pages}
+
+        for item_id, (list_name, page) in zip(item_ids, flat):
+            if item_id in kept:
+                deduped[list_name].append(page)
+
+        return deduped
+
+    def near_dedup_commit(self):
+        """
+        Register the pushed (visited) pages of near_dedup() into the
+        rolling index, the pages filtered out or failed to push are
+        dropped
+        """
+        pending = self.__dict__.pop("_near_dedup_pending", {})
+        visited = self.__dict__.get("_visited_ids", set())
+
+        sigs = {item_id: sig for item_id, (sig, visited_id) in pending.items() if visited_id in visited}
+
+        try:
+            from near_dedup import NearDedup
+            NearDedup().commit(sigs)
+
+        except Exception as e:
+            print(f"[ERROR] Near-duplicate commit failed, skip it: {e}")
+
+    def _visited_id(self, page):
+        """
+        The item_id passed to markVisited() for the page
+        """
+        return page["id"]
+
     def summarize(self, data):
         return
 
@@ -207,9 +292,32 @@ class OperatorBase:
     ):
         """
         Mark a notion toRead item as visited
+
+        The marks are buffered and written in one round trip per
+        (source, list_name) every VISITED_FLUSH_BATCH marks, the caller
+        calls flushVisited() in a finally block, so the pages already
+        created keep their marks if the push loop is interrupted
+        """
+        pending = self.__dict__.setdefault("_visited_pending", {})
+        pending.setdefault((source, list_name), []).append(item_id)
+        self.__dict__.setdefault("_visited_ids", set()).add(item_id)
+
+        if sum(len(x) for x in pending.values()) >= int(os.getenv("VISITED_FLUSH_BATCH", 10)):
+            self.flushVisited(db_client=db_client)
+
+    def flushVisited(self, db_client=None):
+        """
+        Write the buffered visited marks
         """
-        client = db_client or DBClient()
-        client.set_notion_toread_item_id(source, list_name, item_id)
+        pending = self.__dict__.pop("_visited_pending", {})
+
+        if not pending:
+            return
+
+        client = db_client or client_registry.get_db_client()
+
+        for (source, list_name), item_ids in pending.items():
+            client.set_notion_toread_item_ids(source, list_name, item_ids)
 
     def updateCreatedTime(
         self,
@@ -223,7 +331,7 @@ class OperatorBase:
             print("No last_created_time, skip updating")
             return
 
-        client = db_client or DBClient()
+        client = db_client or client_registry.get_db_client()
 
         curr_created_time = client.get_notion_inbox_created_time(source, list_name)
         curr_created_time = utils.bytes2str(curr_created_time)
@@ -246,7 +354,7 @@ class OperatorBase:
         db_client=None
     ):
         print(f"[updateLastEditedTime] last_edited_time: {last_edited_time}")
-        client = db_client or DBClient()
+        client = db_client or client_registry.get_db_client()
 
         curr_edited_time = client.get_notion_last_edited_time(source, list_name)
         curr_edited_time = utils.bytes2str(curr_edited_time)
@@ -310,7 +418,7 @@ class OperatorBase:
 
         # 1. prepare notion agent and db connection
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
         op_notion = OperatorNotion()
 
         # 2. get toread database indexes
@@ -333,7 +441,7 @@ class OperatorBase:
 
             for source in sources:
                 print(f"====== Pulling source: {source} ======")
-                client = DBClient()
+                client = client_registry.get_db_client()
 
                 last_edited_time = client.get_notion_last_edited_time(
                     source, category)
@@ -370,7 +478,7 @@ class OperatorBase:
         print("#####################################################")
         category = kwargs.setdefault("category", "todo")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         last_edited_time = client.get_notion_last_edited_time(
             "Journal", category)
 
@@ -384,7 +492,7 @@ class OperatorBase:
 
         # 1. prepare notion agent and db connection
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
         op_notion = OperatorNotion()
 
         # 2. get inbox database indexes
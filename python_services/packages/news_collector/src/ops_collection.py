@@ -4,10 +4,9 @@ import time
 import traceback
 from datetime import date, datetime, timedelta
 
+import client_registry
 import utils
-from notion import NotionAgent
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_milvus import OperatorMilvus
 from ops_notion import OperatorNotion
 
@@ -48,7 +47,7 @@ class OperatorCollection(OperatorBase):
 
         # 1. prepare notion agent and db connection
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
         op_notion = OperatorNotion()
 
         # 2. get toread database indexes
@@ -100,7 +99,7 @@ class OperatorCollection(OperatorBase):
         print(f"input size: {len(pages)}, min_score: {min_score}")
 
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
 
         # 1. filter all score >= min_score or contains take aways msg
         filtered1 = []
@@ -119,7 +118,7 @@ class OperatorCollection(OperatorBase):
 
     def get_takeaway_pages(self, pages, **kwargs):
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
         takeaway_pages = []
 
         for page in pages:
@@ -184,10 +183,10 @@ class OperatorCollection(OperatorBase):
         print(f"start_date: {start_date}, top_k_similar: {top_k_similar}, max_distance: {max_distance}")
 
         op_milvus = OperatorMilvus()
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
 
         scored_list = []
 
@@ -257,7 +256,7 @@ class OperatorCollection(OperatorBase):
                 err = 0
 
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 # Get the latest toread database id from index db
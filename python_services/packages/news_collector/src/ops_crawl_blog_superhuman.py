@@ -10,13 +10,14 @@ from abc import ABC, abstractmethod
 
 from pydantic import BaseModel, ConfigDict, Field
 
-from notion import NotionAgent
+import client_registry
 from llm_agent import LLMAgentSummary
+from llm_executor import LLMExecutor
 import utils
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_milvus import OperatorMilvus
 from ops_notion import OperatorNotion
+from ops_stats import timed_stage
 
 import requests
 from bs4 import BeautifulSoup, Tag
@@ -610,6 +611,7 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
             sections=sections,
         )
 
+    @timed_stage("pull")
     def pull(self):
         """
         Pull Superhuman Blog Posts
@@ -719,15 +721,29 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
         print(f"[INFO] Total articles created: {len(pages)}")
         return pages
 
+    @timed_stage("dedup")
     def dedup(self, extractedPages, target="inbox"):
         print("#####################################################")
         print("# Dedup CrawlBlogSuperhuman")
         print("#####################################################")
         print(f"Number of pages: {len(extractedPages)}")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         deduped_pages = []
 
+        # Look up all the visited flags in one round trip per list
+        visited = {}
+        page_ids_by_list = {}
+
+        for page_id, page in extractedPages.items():
+            page_ids_by_list.setdefault(page["list_name"], []).append(page_id)
+
+        for list_name, page_ids in page_ids_by_list.items():
+            flags = client.get_notion_toread_item_ids(
+                "superhuman_blog", list_name, page_ids
+            )
+            visited.update(zip(page_ids, flags))
+
         for page_id, page in extractedPages.items():
             title = page["title"]
             list_name = page["list_name"]
@@ -737,9 +753,7 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
                 f"Dedupping page, title: {title}, list_name: {list_name}, created_time: {created_time}, page_id: {page_id}"
             )
 
-            if not client.get_notion_toread_item_id(
-                "superhuman_blog", list_name, page_id
-            ):
+            if not visited.get(page_id):
                 deduped_pages.append(page)
                 print(
                     f" - No duplicate Superhuman Blog article found, move to next. title: {title}, page_id: {page_id}"
@@ -747,6 +761,7 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
 
         return deduped_pages
 
+    @timed_stage("filter")
     def filter(self, pages, **kwargs):
         print("#####################################################")
         print("# Filter CrawlBlogSuperhuman (After Scoring)")
@@ -776,39 +791,59 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
         print(f"Filter output size: {len(filtered2)}")
         return filtered2
 
+    @timed_stage("score")
     def score(self, data, **kwargs):
         print("#####################################################")
         print("# Scoring CrawlBlogSuperhuman")
         print("#####################################################")
         start_date = kwargs.setdefault("start_date", "")
         max_distance = kwargs.setdefault("max_distance", 0.45)
-        print(f"start_date: {start_date}, max_distance: {max_distance}")
+        topk = kwargs.setdefault("topk", int(os.getenv("MILVUS_SCORE_TOPK", 2)))
+        print(f"start_date: {start_date}, max_distance: {max_distance}, topk: {topk}")
 
         op_milvus = OperatorMilvus()
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         scored_list = []
 
-        for page in data:
+        # Get a summary text (at most 1024 chars)
+        score_texts = [
+            f"{page['title']} - {page['list_name']} - {page['summary']}"[:1024]
+            for page in data
+        ]
+
+        # Search all the candidates in one batch, fallback to one by
+        # one if failed
+        try:
+            relevant_metas_arr = op_milvus.get_relevant_many(
+                start_date,
+                score_texts,
+                topk=topk,
+                max_distance=max_distance,
+                db_client=client,
+            )
+            page_scores = op_milvus.score_many(relevant_metas_arr)
+        except Exception as e:
+            print(f"[ERROR]: Batch scoring failed, fallback to one by one: {e}")
+            traceback.print_exc()
+            page_scores = [None] * len(data)
+
+        for page, score_text, page_score in zip(
+            data, score_texts, page_scores
+        ):
             try:
                 title = page["title"]
-
-                # Get a summary text (at most 1024 chars)
-                score_text = (
-                    f"{page['title']} - {page['list_name']} - {page['summary']}"
-                )
-                score_text = score_text[:1024]
                 print(f"Scoring page: {title}, score_text: {score_text}")
 
-                relevant_metas = op_milvus.get_relevant(
-                    start_date,
-                    score_text,
-                    topk=2,
-                    max_distance=max_distance,
-                    db_client=client,
-                )
-
-                page_score = op_milvus.score(relevant_metas)
+                if page_score is None:
+                    relevant_metas = op_milvus.get_relevant(
+                        start_date,
+                        score_text,
+                        topk=topk,
+                        max_distance=max_distance,
+                        db_client=client,
+                    )
+                    page_score = op_milvus.score(relevant_metas)
 
                 scored_page = copy.deepcopy(page)
                 scored_page["__relevant_score"] = page_score
@@ -823,6 +858,7 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
         print(f"Scored_pages ({len(scored_list)}): {scored_list}")
         return scored_list
 
+    @timed_stage("summarize")
     def summarize(self, pages):
         print("#####################################################")
         print("# Summarize CrawlBlogSuperhuman Articles")
@@ -835,12 +871,15 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
         llm_agent.init_prompt()
         llm_agent.init_llm()
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         redis_key_expire_time = os.getenv("BOT_REDIS_KEY_EXPIRE_TIME", 604800)
 
-        summarized_pages = []
+        executor = LLMExecutor()
 
-        for page in pages:
+        # Summary cache writes, flushed in one round trip
+        summary_cache_items = []
+
+        def summarize_page(page):
             page_id = page["id"]
             title = page["title"]
             content = page["content"]
@@ -852,7 +891,8 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
             st = time.time()
 
             llm_summary_resp = client.get_notion_summary_item_id(
-                "superhuman_blog", list_name, page_id
+                "superhuman_blog", list_name, page_id,
+                cache_ns=llm_agent.cache_namespace(),
             )
 
             if not llm_summary_resp:
@@ -885,20 +925,16 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
                             print(
                                 "[ERROR] Empty Web page loaded via WebBaseLoader, skip it"
                             )
-                            continue
+                            return None
 
                 content = content[:SUMMARY_MAX_LENGTH]
-                summary = llm_agent.run(content)
+                summary = executor.call(llm_agent.run, content)
 
                 print(
                     f"Cache llm response for {redis_key_expire_time}s, page_id: {page_id}, summary: {summary}"
                 )
-                client.set_notion_summary_item_id(
-                    "superhuman_blog",
-                    list_name,
-                    page_id,
-                    summary,
-                    expired_time=int(redis_key_expire_time),
+                summary_cache_items.append(
+                    (list_name, page_id, summary, llm_agent.cache_key(content))
                 )
 
             else:
@@ -912,7 +948,16 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
             print(
                 f"Used {time.time() - st:.3f}s, Summarized page_id: {page_id}, summary: {summary}"
             )
-            summarized_pages.append(summarized_page)
+            return summarized_page
+
+        try:
+            summarized_pages = [x for x in executor.map(summarize_page, pages) if x]
+        finally:
+            client.set_notion_summary_item_ids(
+                "superhuman_blog",
+                summary_cache_items,
+                expired_time=int(redis_key_expire_time),
+            )
 
         return summarized_pages
 
@@ -923,6 +968,7 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
         tops = sorted(items, key=itemgetter(1), reverse=True)
         return tops[:k]
 
+    @timed_stage("push")
     def push(self, pages, targets, topk=3):
         print("#####################################################")
         print("# Push Crawl Blog Superhuman")
@@ -941,7 +987,7 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
 
             if target == "notion":
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 # Get the latest toread database id from index db
@@ -957,35 +1003,38 @@ class OperatorCrawlBlogSuperhuman(OperatorBase):
                     print("[ERROR] no index db pages found... skip")
                     break
 
-                for page in pages:
-                    stat["total"] += 1
+                try:
+                    for page in pages:
+                        stat["total"] += 1
 
-                    try:
-                        page_id = page["id"]
-                        list_name = page["list_name"]
-                        title = page["title"]
-                        tags = page["tags"]
+                        try:
+                            page_id = page["id"]
+                            list_name = page["list_name"]
+                            title = page["title"]
+                            tags = page["tags"]
 
-                        print(f"Pushing page, title: {title}")
+                            print(f"Pushing page, title: {title}")
 
-                        topics_topk = [x["term"].replace(",", " ")[:20] for x in tags]
-                        topics_topk = topics_topk[:topk]
+                            topics_topk = [x["term"].replace(",", " ")[:20] for x in tags]
+                            topics_topk = topics_topk[:topk]
 
-                        categories_topk = []
+                            categories_topk = []
 
-                        # NOTE: using same structure as RSS (ops_rss.py)
-                        notion_agent.createDatabaseItem_ToRead_RSS(
-                            database_id, page, topics_topk, categories_topk
-                        )
+                            # NOTE: using same structure as RSS (ops_rss.py)
+                            notion_agent.createDatabaseItem_ToRead_RSS(
+                                database_id, page, topics_topk, categories_topk
+                            )
 
-                        self.markVisited(
-                            page_id, source="superhuman_blog", list_name=list_name
-                        )
+                            self.markVisited(
+                                page_id, source="superhuman_blog", list_name=list_name
+                            )
 
-                    except Exception as e:
-                        print(f"[ERROR]: Push to notion failed, skip: {e}")
-                        stat["error"] += 1
-                        traceback.print_exc()
+                        except Exception as e:
+                            print(f"[ERROR]: Push to notion failed, skip: {e}")
+                            stat["error"] += 1
+                            traceback.print_exc()
+                finally:
+                    self.flushVisited()
 
             else:
                 print(f"[ERROR]: Unknown target {target}, skip")
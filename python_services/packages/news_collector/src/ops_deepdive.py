@@ -4,10 +4,9 @@ import json
 import traceback
 from datetime import date
 
+import client_registry
 import utils
-from notion import NotionAgent
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_notion import OperatorNotion
 
 import llm_prompts
@@ -58,7 +57,7 @@ class OperatorDeepDive(OperatorBase):
         trigger the deep dive action again
         """
         dedup_pages = {}
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         for page_id, page in pages.items():
             last_edited_time = page["last_edited_time"]
@@ -277,7 +276,7 @@ class OperatorDeepDive(OperatorBase):
 
     def _get_takeaways_from_pages(self, pages, **kwargs):
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
         takeaway_pages = []
 
         for page_id, raw_page in pages.items():
@@ -303,7 +302,7 @@ class OperatorDeepDive(OperatorBase):
 
         start_date = kwargs.setdefault("start_date", date.today().isoformat())
         print(f"Start date: {start_date}")
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         for target in targets:
             print(f"Pushing data to target: {target} ...")
@@ -313,7 +312,7 @@ class OperatorDeepDive(OperatorBase):
                 err = 0
 
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 db_index_id = op_notion.get_index_toread_dbid()
@@ -2,10 +2,9 @@ import os
 import time
 from datetime import date, datetime, timedelta
 
+import client_registry
 import utils
-from notion import NotionAgent
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_notion import OperatorNotion
 import llm_prompts
 from llm_agent import (
@@ -40,7 +39,7 @@ class OperatorJournal(OperatorBase):
         print(f"sources: {sources}")
 
         # 0. Get last_created_time
-        client = DBClient()
+        client = client_registry.get_db_client()
         last_created_time = client.get_notion_inbox_created_time(
             "journal", "default")
 
@@ -54,7 +53,7 @@ class OperatorJournal(OperatorBase):
 
         # 1. prepare notion agent and db connection
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
         op_notion = OperatorNotion()
 
         # 2. get inbox database indexes
@@ -223,7 +222,7 @@ class OperatorJournal(OperatorBase):
                 err = 0
 
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 # Get the latest toread database id from index db
@@ -2,12 +2,11 @@ import os
 import json
 import copy
 import traceback
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 
-from db_cli import DBClient
-from notion import NotionAgent
-from milvus_cli import MilvusClient
-from embedding_agent import EmbeddingAgent
+import numpy as np
+
+import client_registry
 import embedding_utils as emb_utils
 import utils
 
@@ -24,30 +23,38 @@ class OperatorMilvus:
         print("#####################################################")
         print("# Dedup Milvus pages")
         print("#####################################################")
-        client = DBClient()
+        client = client_registry.get_db_client()
         deduped_pages = []
         updated_pages = []  # user rating changed
         source = kwargs.setdefault("source", date.today().isoformat())
         start_date = kwargs.setdefault(
             "start_date", date.today().isoformat())
 
+        # Resolve the visited flags, then the metadata of the visited
+        # pages, each in one round trip
+        page_ids = list(pages.keys())
+        visited = client.get_milvus_perf_data_item_ids(
+            source, start_date, page_ids)
+
+        visited_flags = dict(zip(page_ids, visited))
+        visited_ids = [x for x in page_ids if visited_flags[x]]
+        page_metadatas = self._get_page_metas(visited_ids, db_client=client)
+
         for page_id, page in pages.items():
             name = page["name"]
             new_user_rating = int(page["user_rating"])
             print(f"Dedupping page, title: {name}, source: {source}, user_rating: {new_user_rating}")
 
-            if client.get_milvus_perf_data_item_id(
-                    source, start_date, page_id):
+            if visited_flags[page_id]:
                 print(f"Duplicated page found, skip. page_id: {page_id}")
-                page_metadatas = self.get_pages([page_id], db_client=client)
+                page_metadata = page_metadatas.get(page_id)
 
-                if len(page_metadatas) == 0:
+                if not page_metadata:
                     print("Not page metadata found, push to updating queue")
                     updated_pages.append(page)
                     continue
 
                 # Check user_rating changed or not
-                page_metadata = page_metadatas[0]
                 cur_user_rating = page_metadata.get("user_rating")
 
                 if cur_user_rating != new_user_rating:
@@ -66,10 +73,11 @@ class OperatorMilvus:
         print("#####################################################")
         print("# Update Milvus pages")
         print("#####################################################")
-        client = DBClient()
+        client = client_registry.get_db_client()
         tot = 0
         err = 0
         key_ttl = 86400 * 30
+        items = []
 
         for page in pages:
             page_id = page["id"]
@@ -83,34 +91,38 @@ class OperatorMilvus:
                 "user_rating": user_rating,
             }
 
-            try:
-                print(f"Updating page_id: {page_id}, with ttl: {key_ttl}, data: {data}")
-                client.set_page_item_id(
-                    page_id, json.dumps(data), expired_time=key_ttl)
+            print(f"Updating page_id: {page_id}, with ttl: {key_ttl}, data: {data}")
+            items.append((page_id, json.dumps(data)))
 
-            except Exception as e:
-                print(f"[ERROR] Failed to update page metadata: {e}")
-                err += 1
+        # Write all the page metadata in one pipeline
+        if not client.set_page_item_ids(items, expired_time=key_ttl):
+            print("[ERROR] Failed to update page metadata")
+            err = tot
 
         print(f"Pages updating finished, total {tot}, errors: {err}")
 
-    def get_pages(self, page_ids: list, db_client=None):
-        client = db_client or DBClient()
-        pages = []
+    def _get_page_metas(self, page_ids: list, db_client=None):
+        """
+        @return <page_id, page_metadata>, missing pages are skipped
+        """
+        client = db_client or client_registry.get_db_client()
+        res = {}
 
-        for page_id in page_ids:
-            # format: {user_rating: xx, ...}
-            page_metadata = client.get_page_item_id(page_id)
+        # format: {user_rating: xx, ...}
+        page_metadatas = client.get_page_item_ids(page_ids)
 
+        for page_id, page_metadata in zip(page_ids, page_metadatas):
             if not page_metadata:
                 print(f"[WARN] cannot find any metadata for page_id: {page_id}, skip it")
                 continue
 
-            page_metadata = utils.fix_and_parse_json(page_metadata)
+            res[page_id] = utils.fix_and_parse_json(page_metadata)
 
-            pages.append(page_metadata)
+        return res
 
-        return pages
+    def get_pages(self, page_ids: list, db_client=None):
+        page_metas = self._get_page_metas(page_ids, db_client=db_client)
+        return list(page_metas.values())
 
     def get_relevant(
         self,
@@ -119,103 +131,265 @@ class OperatorMilvus:
         topk: int = 2,
         max_distance: float = 0.45,
         db_client=None,
-        fallback=None
+        fallback=None,
+        embedding=None
     ):
         """
         @param max_distance - filter out if distance > max_distance
+        @param embedding - precomputed embedding of text (optional)
 
         Notes: distance is in [0.0, 1.0], tune the max_distance for best
         needs
 
         Ref: https://milvus.io/blog/optimizing-billion-scale-image-search-milvus-part-2.md
         """
-        # print("#####################################################")
-        # print("# Get relevant Milvus pages")
-        # print("#####################################################")
+        embeddings = [embedding] if embedding is not None else None
 
-        emb_agent = EmbeddingAgent()
+        return self.get_relevant_many(
+            start_date, [text], topk=topk,
+            max_distance=max_distance,
+            db_client=db_client,
+            fallback=fallback,
+            embeddings=embeddings)[0]
 
-        collection_name = emb_agent.getname(start_date)
-        print(f"[get_relevant] collection_name: {collection_name}")
+    def get_relevant_many(
+        self,
+        start_date,
+        texts: list,
+        topk: int = 2,
+        max_distance: float = 0.45,
+        db_client=None,
+        fallback=None,
+        embeddings=None
+    ):
+        """
+        Batch version of get_relevant()
 
-        client = db_client or DBClient()
-        milvus_client = MilvusClient(emb_agent=emb_agent)
+        - texts are embedded in bulk (cache hits in one round trip)
+        - one multi-vector Milvus search for all the texts
+        - one MGET for the metadata of all the hits
 
-        # get a fallback collection name
-        if not fallback:
-            yesterday = (date.fromisoformat(start_date) - timedelta(days=1)).isoformat()
-            fallback = emb_agent.getname(yesterday)
+        @param embeddings - precomputed embeddings of texts (optional)
+        @return [[page_metadata, ...], ...] in the same order of texts
+        """
+        if not texts:
+            return []
 
-        print(f"[get_relevant] Fallback collection name: {fallback}")
+        emb_agent = client_registry.get_embedding_agent()
+        client = db_client or client_registry.get_db_client()
+        milvus_client = client_registry.get_vector_client()
 
-        key_ttl = 86400 * 30  # 30 days
-        embedding = emb_agent.get_or_create(
-            text,
-            source="default",
-            page_id=utils.hashcode_md5(text.encode('utf-8')),
-            db_client=client,
-            key_ttl=key_ttl)
-
-        # response_arr: [{item_id, distance}, ...]
-        response_arr = milvus_client.get(
-            collection_name, text, topk=topk,
-            fallback=fallback, emb=embedding)
+        partition_names = None
+
+        if self._is_rolling():
+            collection_name = emb_agent.get_rolling_name()
+            partition_names = self._get_window_partitions(
+                emb_agent, milvus_client, collection_name, start_date)
+
+            print(f"[get_relevant_many] collection_name: {collection_name}, partitions: {partition_names}, texts: {len(texts)}")
+
+        else:
+            collection_name = emb_agent.getname(start_date)
+            print(f"[get_relevant_many] collection_name: {collection_name}, texts: {len(texts)}")
+
+            # get a fallback collection name
+            if not fallback:
+                yesterday = (date.fromisoformat(start_date) - timedelta(days=1)).isoformat()
+                fallback = emb_agent.getname(yesterday)
+
+            print(f"[get_relevant_many] Fallback collection name: {fallback}")
+
+        # Notes: empty partition_names means all the partitions in
+        # Milvus, so skip the search if nothing in the window
+        if partition_names is not None and not partition_names:
+            return [[] for _ in texts]
+
+        if embeddings is None:
+            embeddings = self.get_embeddings(texts, db_client=client)
+
+        # af_dist re-pushes the rated pages every day, so one page can
+        # be in several day partitions, over-fetch and keep the best hit
+        # per item_id below
+        search_topk = topk * len(partition_names) if partition_names else topk
+
+        # response_arrs: [[{item_id, distance}, ...], ...]
+        response_arrs = milvus_client.get_many(
+            collection_name, texts, topk=search_topk,
+            fallback=fallback, embs=embeddings,
+            partition_names=partition_names)
 
         # filter by distance (similiarity value) according to the
         # metrics type
         metric_type = os.getenv("MILVUS_SIMILARITY_METRICS", "L2")
-        valid_embs = emb_utils.similarity_topk(response_arr, metric_type, max_distance, topk)
-        print(f"[get_relevant] metric_type: {metric_type}, max_distance: {max_distance}, raw emb response_arr size: {len(response_arr)}, post emb_utils.topk: {len(valid_embs)}")
+        max_distance = emb_utils.get_similarity_threshold(metric_type, max_distance)
+
+        valid_embs_arr = [
+            emb_utils.similarity_topk(
+                emb_utils.dedup_item_ids(response_arr, metric_type),
+                metric_type, max_distance, topk)
+            for response_arr in response_arrs
+        ]
+
+        hit_ids = {x["item_id"] for valid_embs in valid_embs_arr for x in valid_embs}
+        print(f"[get_relevant_many] metric_type: {metric_type}, max_distance: {max_distance}, queries: {len(response_arrs)}, unique hits post emb_utils.topk: {len(hit_ids)}")
+
+        page_metas = self._get_page_metas(list(hit_ids), db_client=client)
 
         res = []
 
-        for response in valid_embs:
-            print(f"[get_relevant] Processing response: {response}")
+        for valid_embs in valid_embs_arr:
+            relevant_metas = []
 
-            page_id = response["item_id"]
-            distance = response["distance"]
+            for response in valid_embs:
+                page_id = response["item_id"]
 
-            page_metadata = client.get_page_item_id(page_id)
+                if page_id not in page_metas:
+                    continue
 
-            if not page_metadata:
-                print(f"[WARN] cannot find any metadata for page_id: {page_id}, skip it")
-                continue
+                copied_page_metadata = copy.deepcopy(page_metas[page_id])
+                copied_page_metadata["distance"] = response["distance"]
 
-            page_metadata = utils.fix_and_parse_json(page_metadata)
-            copied_page_metadata = copy.deepcopy(page_metadata)
-            copied_page_metadata["distance"] = distance
+                relevant_metas.append(copied_page_metadata)
 
-            res.append(copied_page_metadata)
-            print(f"[get_relevant] found page_metadata: {copied_page_metadata}")
+            res.append(relevant_metas)
 
         return res
 
-    def score(self, relevant_page_metas: list):
+    def _is_rolling(self):
+        """
+        MILVUS_COLLECTION_MODE:
+        - daily (default): one collection per day
+        - rolling: one collection, one partition per day, the search
+          queries the last MILVUS_ROLLING_WINDOW_DAYS days
+        """
+        return os.getenv("MILVUS_COLLECTION_MODE", "daily") == "rolling"
+
+    def _get_window_partitions(self, emb_agent, milvus_client, collection_name, start_date):
         """
-        K-Mean score
+        @return the existing partitions in [start_date - window, start_date]
+        """
+        if not milvus_client.exist(collection_name):
+            return []
 
-        TODO: calculate score consider distance, the shorter distance
-        the higher weight of the user rating
+        window = int(os.getenv("MILVUS_ROLLING_WINDOW_DAYS", 3))
+        existing = set(milvus_client.list_partitions(collection_name))
 
-        @param relevant_page_metas: From get_relevant
+        dt = date.fromisoformat(start_date)
+        partition_names = [
+            emb_agent.get_partition_name((dt - timedelta(days=i)).isoformat())
+            for i in range(window)
+        ]
+
+        return [x for x in partition_names if x in existing]
+
+    def get_embeddings(
+        self,
+        texts: list,
+        source="default",
+        db_client=None,
+        key_ttl=86400 * 30
+    ):
+        """
+        Embed a batch of texts, keyed by md5(text), cache hits are
+        resolved in one round trip and the misses are created in
+        provider-sized batches
+        """
+        client = db_client or client_registry.get_db_client()
+        emb_agent = client_registry.get_embedding_agent()
+
+        page_ids = [utils.hashcode_md5(x.encode('utf-8')) for x in texts]
+
+        return emb_agent.get_or_create_many(
+            texts, page_ids, source=source,
+            db_client=client, key_ttl=key_ttl)
+
+    def score(self, relevant_page_metas: list):
+        """
+        kNN score of one candidate, see score_many()
 
-        @return the average rating of all the user ratings
+        @param relevant_page_metas: From get_relevant
         """
-        # print("#####################################################")
-        # print("# Score Milvus pages")
-        # print("#####################################################")
         print(f"relevant_page_metas({len(relevant_page_metas)}): {relevant_page_metas}")
 
-        tot = 0
-        n = len(relevant_page_metas)
+        return self.score_many([relevant_page_metas])[0]
+
+    def score_many(
+        self,
+        relevant_metas_arr: list,
+        metric_type=None,
+        weighting=None,
+        half_life_days=None,
+        now=None
+    ):
+        """
+        Vectorized kNN score for a batch of candidates, the closer
+        (and the fresher) the neighbour, the higher weight of its user
+        rating
+
+        - MILVUS_SCORE_WEIGHTING: uniform (default, the plain average)
+          or distance (opt-in, the closer neighbours weigh more)
+        - MILVUS_SCORE_HALF_LIFE_DAYS: time decay on the rating age
+          (last_edited_time), 0 (default) to disable
+
+        @param relevant_metas_arr: From get_relevant_many
+        @return [score, ...], -1 for unknown score
+        """
+        metric_type = metric_type or os.getenv("MILVUS_SIMILARITY_METRICS", "L2")
+        weighting = weighting or os.getenv("MILVUS_SCORE_WEIGHTING", "uniform")
+
+        if half_life_days is None:
+            half_life_days = float(os.getenv("MILVUS_SCORE_HALF_LIFE_DAYS", 0))
+
+        n = len(relevant_metas_arr)
+        k = max([len(x) for x in relevant_metas_arr], default=0)
 
         if n == 0:
-            return -1  # unknown score
+            return []
+
+        if k == 0:
+            return [-1] * n
 
-        for page_metadata in relevant_page_metas:
-            tot += page_metadata["user_rating"]
+        ratings = np.zeros((n, k))
+        distances = np.zeros((n, k))
+        ages = np.zeros((n, k))
+        mask = np.zeros((n, k), dtype=bool)
 
-        return tot / n
+        now = now or datetime.now(timezone.utc)
+
+        for i, relevant_metas in enumerate(relevant_metas_arr):
+            for j, page_metadata in enumerate(relevant_metas):
+                ratings[i, j] = page_metadata["user_rating"]
+                distances[i, j] = page_metadata["distance"]
+                mask[i, j] = True
+
+                if half_life_days > 0:
+                    ages[i, j] = self._get_age_days(page_metadata, now)
+
+        scores = emb_utils.knn_scores(
+            ratings, distances, mask, metric_type,
+            weighting=weighting,
+            ages=ages,
+            half_life_days=half_life_days)
+
+        return [float(x) if x >= 0 else -1 for x in scores]
+
+    def _get_age_days(self, page_metadata, now):
+        last_edited_time = page_metadata.get("last_edited_time")
+
+        if not last_edited_time:
+            return 0
+
+        try:
+            dt = datetime.fromisoformat(last_edited_time.replace("Z", "+00:00"))
+
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+
+            return (now - dt).total_seconds() / 86400
+
+        except Exception as e:
+            print(f"[WARN] Invalid last_edited_time: {last_edited_time}, {e}")
+            return 0
 
     def push(self, pages, **kwargs):
         """
@@ -231,22 +405,34 @@ class OperatorMilvus:
         start_date = kwargs.setdefault(
             "start_date", date.today().isoformat())
 
-        client = DBClient()
-        notion_agent = NotionAgent()
-        emb_agent = EmbeddingAgent()
-        milvus_client = MilvusClient(emb_agent=emb_agent)
+        client = client_registry.get_db_client()
+        notion_agent = client_registry.get_notion_agent()
+        emb_agent = client_registry.get_embedding_agent()
+        milvus_client = client_registry.get_vector_client()
 
-        collection_name = emb_agent.getname(start_date)
-        print(f"source: {source}, start_date: {start_date}, collection name: {collection_name}")
+        partition_name = None
+
+        if self._is_rolling():
+            collection_name = emb_agent.get_rolling_name()
+            partition_name = emb_agent.get_partition_name(start_date)
+            desc = f"Rolling collection, dim: {emb_agent.dim()}"
+        else:
+            collection_name = emb_agent.getname(start_date)
+            desc = f"Collection end by {start_date}, dim: {emb_agent.dim()}"
+
+        print(f"source: {source}, start_date: {start_date}, collection name: {collection_name}, partition: {partition_name}")
 
         if not milvus_client.exist(collection_name):
             milvus_client.createCollection(
                 collection_name,
-                desc=f"Collection end by {start_date}, dim: {emb_agent.dim()}",
+                desc=desc,
                 dim=emb_agent.dim())
 
             print(f"[INFO] No collection {collection_name} found, created a new one")
 
+        if partition_name:
+            milvus_client.createPartition(collection_name, partition_name)
+
         # The collection exists, add new embeddings
         milvus_client.getCollection(collection_name)
 
@@ -255,59 +441,106 @@ class OperatorMilvus:
         skipped = 0
         key_ttl = 86400 * 30  # 30 days
 
+        # 1. Extract the page contents
+        page_ids = []
+        contents = []
+
         for page in pages:
             page_id = page["id"]
             tot += 1
-            skipped = 0
 
             try:
                 content = notion_agent.concatBlocksText(
                     page["blocks"], separator="\n")
 
-                # Notes: the page does not exist, but the embedding
-                #        maybe exist
-                embedding = emb_agent.get_or_create(
-                    content,
-                    source=source,
-                    page_id=page_id,
-                    db_client=client,
-                    key_ttl=key_ttl)
+                page_ids.append(page_id)
+                contents.append(content)
+
+            except Exception as e:
+                print(f"[ERROR] Failed to extract page content: {e}")
+                traceback.print_exc()
+                err += 1
+
+        # 2. Create embeddings in bulk
+        # Notes: the page does not exist, but the embedding maybe exist
+        try:
+            embeddings = emb_agent.get_or_create_many(
+                contents,
+                page_ids,
+                source=source,
+                db_client=client,
+                key_ttl=key_ttl)
+
+        except Exception as e:
+            print(f"[ERROR] Failed to create embeddings in bulk, fallback to one by one: {e}")
+            traceback.print_exc()
+            embeddings = [None] * len(page_ids)
+
+        # 3. push to milvus
+        visited_ids = []
+
+        for page_id, content, embedding in zip(page_ids, contents, embeddings):
+            try:
+                if embedding is None:
+                    embedding = emb_agent.get_or_create(
+                        content,
+                        source=source,
+                        page_id=page_id,
+                        db_client=client,
+                        key_ttl=key_ttl)
 
-                # push to milvus
                 milvus_client.add(
                     collection_name,
                     page_id,
                     content,
-                    embed=embedding)
+                    embed=embedding,
+                    partition_name=partition_name)
 
-                self.markVisisted(
-                    source, page_id, start_date,
-                    db_client=client, key_ttl=key_ttl)
+                visited_ids.append(page_id)
 
             except Exception as e:
                 print(f"[ERROR] Failed to push to Milvus: {e}")
                 traceback.print_exc()
                 err += 1
 
+        # The local index buffers the new rows until the next search,
+        # persist them before the task may be killed
+        if os.getenv("VECTOR_INDEX_BACKEND", "milvus") == "local":
+            milvus_client.flush(collection_name, partition_name=partition_name)
+
+        self.markVisisted(
+            source, visited_ids, start_date,
+            db_client=client, key_ttl=key_ttl)
+
         print(f"[INFO] Finished, total {tot}, skipped: {skipped}, errors: {err}")
 
-    def markVisisted(self, source, page_id, dt, db_client=None, key_ttl=86400 * 15):
-        client = db_client or DBClient()
-        client.set_milvus_perf_data_item_id(
-            source, dt, page_id, expired_time=key_ttl)
+    def markVisisted(self, source, page_ids: list, dt, db_client=None, key_ttl=86400 * 15):
+        client = db_client or client_registry.get_db_client()
+        client.set_milvus_perf_data_item_ids(
+            source, dt, page_ids, expired_time=key_ttl)
 
     def clear(self, cleanup_date):
         """
         Clean up all collections on or before the clean date
         """
-        milvus_client = MilvusClient()
+        milvus_client = client_registry.get_vector_client()
 
         collections = milvus_client.list_collections()
         print(f"Collections: {collections}")
 
         for name in collections:
             suffix = name.split("__")[-1]
-            dt = date.fromisoformat(suffix.replace("_", "-"))
+
+            if suffix == "rolling":
+                self._clear_partitions(milvus_client, name, cleanup_date)
+                continue
+
+            try:
+                dt = date.fromisoformat(suffix.replace("_", "-"))
+            except ValueError:
+                print(f"Skip collection {name}, no date suffix")
+                continue
+
             stats = milvus_client.get_stats(name)
 
             print(f"Checking collection: {name}, stats: {stats}")
@@ -316,3 +549,25 @@ class OperatorMilvus:
                 print(f"- Cleanup collection {name}")
                 milvus_client.release(name)
                 milvus_client.drop(name)
+
+    def _clear_partitions(self, milvus_client, name, cleanup_date):
+        """
+        TTL eviction for the rolling collection: drop the day
+        partitions on or before the clean date
+        """
+        partitions = milvus_client.list_partitions(name)
+        print(f"Checking rolling collection: {name}, partitions: {partitions}")
+
+        for partition_name in partitions:
+            if not partition_name.startswith("p_"):
+                continue
+
+            try:
+                dt = date.fromisoformat(partition_name[2:].replace("_", "-"))
+            except ValueError:
+                print(f"Skip partition {name}.{partition_name}, no date suffix")
+                continue
+
+            if dt <= cleanup_date:
+                print(f"- Cleanup partition {name}.{partition_name}")
+                milvus_client.drop_partition(name, partition_name)
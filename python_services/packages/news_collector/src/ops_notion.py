@@ -1,5 +1,5 @@
 import os
-from notion import NotionAgent
+import client_registry
 from mysql_cli import MySQLClient
 
 
@@ -23,7 +23,7 @@ class OperatorNotion:
 
         # Initialize notion index pages
         notion_api_key = os.getenv("NOTION_TOKEN")
-        agent = NotionAgent(notion_api_key)
+        agent = client_registry.get_notion_agent(notion_api_key)
 
         try:
             entry_page_id = os.getenv("NOTION_ENTRY_PAGE_ID")
@@ -129,7 +129,7 @@ class OperatorNotion:
         agent = notion_agent
         if not agent:
             notion_api_key = os.getenv("NOTION_TOKEN")
-            agent = NotionAgent(notion_api_key)
+            agent = client_registry.get_notion_agent(notion_api_key)
 
         db_cli = MySQLClient()
         indexes = db_cli.index_pages_table_load()
@@ -172,7 +172,7 @@ class OperatorNotion:
 
         if not agent:
             notion_api_key = os.getenv("NOTION_TOKEN")
-            agent = NotionAgent(notion_api_key)
+            agent = client_registry.get_notion_agent(notion_api_key)
 
         db_cli = MySQLClient()
         indexes = db_cli.index_pages_table_load()
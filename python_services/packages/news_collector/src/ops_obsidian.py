@@ -1,7 +1,7 @@
 import os
 import traceback
 
-from db_cli import DBClient
+import client_registry
 from notion import NotionAgent
 import tpl_obsidian
 
@@ -18,7 +18,7 @@ class OperatorObsidian:
         print("#####################################################")
         print("# Dedup Obsidian pages")
         print("#####################################################")
-        client = DBClient()
+        client = client_registry.get_db_client()
         deduped_pages = []
 
         for page_id, page in pages.items():
@@ -78,11 +78,12 @@ class OperatorObsidian:
 
         print(f"Data folder: {data_folder}, total pages: {len(pages)}")
 
-        client = DBClient()
-        notion_agent = NotionAgent()
+        client = client_registry.get_db_client()
+        notion_agent = client_registry.get_notion_agent()
         tot = 0
         err = 0
         skipped = 0
+        visited_ids = []
 
         for page in pages:
             page_id = page["id"]
@@ -95,7 +96,7 @@ class OperatorObsidian:
                 if self._save_ob_page(data_folder, filename, content):
                     print(f"[INFO] Gen obsidian page, filename: {filename}")
                     print(f"[INFO] Gen obsidian body, content: {content}")
-                    self.markVisisted(page_id, db_client=client)
+                    visited_ids.append(page_id)
                 else:
                     skipped += 1
 
@@ -104,12 +105,13 @@ class OperatorObsidian:
                 traceback.print_exc()
                 err += 1
 
+        self.markVisisted(visited_ids, db_client=client)
         print(f"[INFO] Finished, total {tot}, skipped: {skipped}, errors: {err}")
 
-    def markVisisted(self, page_id, db_client=None):
-        client = db_client or DBClient()
-        client.set_obsidian_inbox_item_id(
-            "obsidian", "default", page_id)
+    def markVisisted(self, page_ids: list, db_client=None):
+        client = db_client or client_registry.get_db_client()
+        client.set_obsidian_inbox_item_ids(
+            "obsidian", "default", page_ids)
 
     def _gen_ob_page(self, page, notion_agent: NotionAgent = None):
         # print(f"[_gen_ob_page] page: {page}")
@@ -5,14 +5,14 @@ import traceback
 from operator import itemgetter
 
 from reddit_agent import RedditAgent
-from notion import NotionAgent
+import client_registry
 from llm_agent import LLMAgentSummary
+from llm_executor import LLMExecutor
 import utils
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_milvus import OperatorMilvus
 from ops_notion import OperatorNotion
-from ops_stats import OpsStats
+from ops_stats import OpsStats, timed_stage
 
 
 class OperatorReddit(OperatorBase):
@@ -28,10 +28,11 @@ class OperatorReddit(OperatorBase):
     """
     def __init__(self):
         notion_api_key = os.getenv("NOTION_TOKEN")
-        self.notion_agent = NotionAgent(notion_api_key)
+        self.notion_agent = client_registry.get_notion_agent(notion_api_key)
         self.reddit_agent = RedditAgent()
         self.op_notion = OperatorNotion()
 
+    @timed_stage("pull")
     def pull(self, pulling_count, pulling_interval, **kwargs):
         print("#####################################################")
         print("# Pulling Reddit")
@@ -61,7 +62,9 @@ class OperatorReddit(OperatorBase):
 
             subreddit_names.update(name_dict)
 
-        # pull subreddit posts
+        # pull subreddit posts, all the lists at once, the requests are
+        # scheduled by the Reddit rate limit budget
+        tasks = []  # [(list_name, subreddit), ...]
         data = {}
 
         for list_name, subreddit_names in subreddit_names.items():
@@ -69,26 +72,24 @@ class OperatorReddit(OperatorBase):
             name_list = [x['subreddit'] for x in subreddit_names]
             print(f"name_list: {name_list}")
 
-            # pull all the subreddits in this list
+            data.setdefault(list_name, [])
+            tasks.extend([(list_name, subreddit) for subreddit in name_list])
 
-            list_posts = data.setdefault(list_name, [])
+        print(f"Pulling {len(tasks)} subreddits...")
 
-            for subreddit in name_list:
-                print(f"Pulling subreddit {subreddit}...")
+        results = self.reddit_agent.get_subreddits_posts(
+            [subreddit for _, subreddit in tasks],
+            limit=pulling_count,
+            data_folder=data_folder, run_id=run_id,
+            min_interval=float(pulling_interval or 0))
 
-                posts = self.reddit_agent.get_subreddit_posts(
-                    subreddit, limit=pulling_count,
-                    data_folder=data_folder, run_id=run_id)
-
-                list_posts.extend(posts)
-
-                if pulling_interval > 0:
-                    print(f"sleep {pulling_interval}s ...")
-                    time.sleep(pulling_interval)
+        for (list_name, _), posts in zip(tasks, results):
+            data[list_name].extend(posts)
 
         print(f"Pulled from Reddit: {data}")
         return data
 
+    @timed_stage("dedup")
     def dedup(self, posts, target="toread"):
         """
         posts: {
@@ -101,7 +102,7 @@ class OperatorReddit(OperatorBase):
         print("#####################################################")
         print(f"Target: {target}")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         reddit_deduped = {}
         tot = 0
         dup = 0
@@ -110,13 +111,16 @@ class OperatorReddit(OperatorBase):
         for list_name, data in posts.items():
             reddit_list = reddit_deduped.setdefault(list_name, [])
 
-            for post in data:
+            # One round trip for the whole list
+            visited = client.get_notion_toread_item_ids(
+                "reddit", list_name, [x["hash_id"] for x in data])
+
+            for post, is_visited in zip(data, visited):
                 post_hash_id = post["hash_id"]
                 post_long_id = post["long_id"]
                 tot += 1
 
-                if client.get_notion_toread_item_id(
-                        "reddit", list_name, post_hash_id):
+                if is_visited:
                     dup += 1
                     print(f"Duplicated post found, post_hash_id: {post_hash_id}, long_id: {post_long_id}, skip it")
 
@@ -127,6 +131,7 @@ class OperatorReddit(OperatorBase):
         print(f"reddit_deduped (total: {tot}, duplicated: {dup}, new: {cnt}): {reddit_deduped}")
         return reddit_deduped
 
+    @timed_stage("push")
     def push(self, data, targets, topics_topk=3, categories_topk=3):
         """
         data is the ranked reddit posts
@@ -159,27 +164,30 @@ class OperatorReddit(OperatorBase):
                     print("[ERROR] no index db pages found... skip")
                     break
 
-                for list_name, posts in data.items():
-                    stat = stats.setdefault(list_name, {"total": 0, "error": 0})
-
-                    for ranked_post in posts:
-                        tot += 1
-                        stat["total"] += 1
-
-                        try:
-                            self._push_to_read_notion(
-                                self.notion_agent,
-                                database_id,
-                                list_name,
-                                ranked_post,
-                                topics_topk,
-                                categories_topk)
-
-                        except Exception as e:
-                            print(f"[ERROR]: Push to notion failed, skip: {e}")
-                            err += 1
-                            stat["error"] += 1
-                            traceback.print_exc()
+                try:
+                    for list_name, posts in data.items():
+                        stat = stats.setdefault(list_name, {"total": 0, "error": 0})
+
+                        for ranked_post in posts:
+                            tot += 1
+                            stat["total"] += 1
+
+                            try:
+                                self._push_to_read_notion(
+                                    self.notion_agent,
+                                    database_id,
+                                    list_name,
+                                    ranked_post,
+                                    topics_topk,
+                                    categories_topk)
+
+                            except Exception as e:
+                                print(f"[ERROR]: Push to notion failed, skip: {e}")
+                                err += 1
+                                stat["error"] += 1
+                                traceback.print_exc()
+                finally:
+                    self.flushVisited()
 
             else:
                 print(f"[ERROR]: Unknown target {target}, skip")
@@ -187,16 +195,18 @@ class OperatorReddit(OperatorBase):
             print(f"Push Reddit posts to notion finished, total: {tot}, err: {err}")
             return stats
 
+    @timed_stage("score")
     def score(self, data, **kwargs):
         print("#####################################################")
         print("# Score Reddit Posts")
         print("#####################################################")
         start_date = kwargs.setdefault("start_date", "")
         max_distance = kwargs.setdefault("max_distance", 0.45)
-        print(f"start_date: {start_date}, max_distance: {max_distance}")
+        topk = kwargs.setdefault("topk", int(os.getenv("MILVUS_SCORE_TOPK", 2)))
+        print(f"start_date: {start_date}, max_distance: {max_distance}, topk: {topk}")
 
         op_milvus = OperatorMilvus()
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         scored_pages = {}
 
@@ -204,18 +214,31 @@ class OperatorReddit(OperatorBase):
             scored_list = scored_pages.setdefault(list_name, [])
             print(f"Scoring list {list_name}, total {len(posts)} reddit posts")
 
-            for post in posts:
+            contents = [
+                f"{list_name} {post['title']}: {post['text']}"
+                for post in posts
+            ]
+
+            # Search the whole list in one batch, fallback to one by
+            # one if failed
+            # Notes: k = 10 looks too noisy, tune k = 2
+            try:
+                relevant_metas_arr = op_milvus.get_relevant_many(
+                    start_date, contents, topk=topk,
+                    max_distance=max_distance, db_client=client)
+                page_scores = op_milvus.score_many(relevant_metas_arr)
+            except Exception as e:
+                print(f"[ERROR]: Batch scoring failed, fallback to one by one: {e}")
+                traceback.print_exc()
+                page_scores = [None] * len(posts)
+
+            for post, content, page_score in zip(posts, contents, page_scores):
                 try:
-                    title = post["title"]
-                    text = post["text"]
-                    content = f"{list_name} {title}: {text}"
-
-                    # Notes: k = 10 looks too noisy, tune k = 2
-                    relevant_metas = op_milvus.get_relevant(
-                        start_date, content, topk=2,
-                        max_distance=max_distance, db_client=client)
-
-                    page_score = op_milvus.score(relevant_metas)
+                    if page_score is None:
+                        relevant_metas = op_milvus.get_relevant(
+                            start_date, content, topk=topk,
+                            max_distance=max_distance, db_client=client)
+                        page_score = op_milvus.score(relevant_metas)
 
                     scored_page = copy.deepcopy(post)
                     scored_page["__relevant_score"] = page_score
@@ -230,6 +253,7 @@ class OperatorReddit(OperatorBase):
         print(f"Scored_pages ({len(scored_pages)}): {scored_pages}")
         return scored_pages
 
+    @timed_stage("filter")
     def filter(self, pages, **kwargs):
         print("#####################################################")
         print("# Filter Reddit Posts (After Scoring)")
@@ -280,6 +304,7 @@ class OperatorReddit(OperatorBase):
         print(f"Filter output size: {cnt} / {tot}")
         return filtered
 
+    @timed_stage("summarize")
     def summarize(self, pages):
         print("#####################################################")
         print("# Summarize Reddit Post")
@@ -292,75 +317,104 @@ class OperatorReddit(OperatorBase):
         llm_agent.init_prompt()
         llm_agent.init_llm()
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         redis_key_expire_time = os.getenv(
             "BOT_REDIS_KEY_EXPIRE_TIME", 604800)
 
-        summarized_pages = {}
+        executor = LLMExecutor()
+        fallback_executor = None
+        if os.getenv("LLM_PROVIDER", "") != "openai":
+            fallback_executor = LLMExecutor(provider="openai")
 
-        for list_name, posts in pages.items():
-            list_pages = summarized_pages.setdefault(list_name, [])
+        # Summary cache writes, flushed in one round trip
+        summary_cache_items = []
 
-            for page in posts:
-                title = page["title"]
-                page_id = page["hash_id"]
-                content = page["text"]
-                source_url = page["url"]
+        def summarize_page(task):
+            list_name, page = task
 
-                if len(content) <= 200:
-                    print(f"Post title: {title}, content length <= 200, skip summarization")
-                    list_pages.append(page)
-                    continue
+            title = page["title"]
+            page_id = page["hash_id"]
+            content = page["text"]
+            source_url = page["url"]
 
-                print(f"Summarying page, title: {title}, source_url: {source_url}")
-                print(f"Page content ({len(content)} chars): {content[:200]}...")
+            if len(content) <= 200:
+                print(f"Post title: {title}, content length <= 200, skip summarization")
+                return page
 
-                st = time.time()
-                summary = ""
+            print(f"Summarying page, title: {title}, source_url: {source_url}")
+            print(f"Page content ({len(content)} chars): {content[:200]}...")
 
-                llm_summary_resp = client.get_notion_summary_item_id(
-                    "reddit", list_name, page_id)
+            st = time.time()
+            summary = ""
 
-                if not llm_summary_resp:
-                    if not content:
-                        print(f"[ERROR] Empty Reddit posts, title: {title}, source_url: {source_url}, skip it")
-                        continue
+            llm_summary_resp = client.get_notion_summary_item_id(
+                "reddit", list_name, page_id,
+                cache_ns=llm_agent.cache_namespace())
 
-                    content = content[:SUMMARY_MAX_LENGTH]
+            if not llm_summary_resp:
+                if not content:
+                    print(f"[ERROR] Empty Reddit posts, title: {title}, source_url: {source_url}, skip it")
+                    return None
 
-                    try:
-                        summary = llm_agent.run(content)
+                content = content[:SUMMARY_MAX_LENGTH]
+
+                try:
+                    summary = executor.call(llm_agent.run, content)
 
-                        print(f"Cache llm response for {redis_key_expire_time}s, page_id: {page_id}, summary: {summary}")
+                    print(f"Cache llm response for {redis_key_expire_time}s, page_id: {page_id}, summary: {summary}")
 
-                        client.set_notion_summary_item_id(
-                            "reddit", list_name, page_id, summary,
-                            expired_time=int(redis_key_expire_time))
+                    if summary:
+                        summary_cache_items.append(
+                            (list_name, page_id, summary, llm_agent.cache_key(content)))
+
+                except Exception as e:
+                    print(f"[ERROR] Exception from llm_agent.run(): {e}")
 
+                if not summary and fallback_executor:
+                    try:
+                        print("Fallback to OpenAI")
+                        fallback_agent = LLMAgentSummary()
+                        fallback_agent.init_prompt()
+                        fallback_agent.init_llm(provider="openai")
+
+                        summary = fallback_executor.call(fallback_agent.run, content)
+
+                        # Same per-item key as the normal path. Store the
+                        # summary itself, a pointer into the fallback
+                        # model's llm cache namespace would be treated as
+                        # stale by the lookup above
+                        if summary:
+                            summary_cache_items.append(
+                                (list_name, page_id, summary, None))
                     except Exception as e:
-                        print(f"[ERROR] Exception from llm_agent.run(): {e}")
+                        print(f"[ERROR] Exception from fallback_agent.run(): {e}")
 
-                    if not summary and os.getenv("LLM_PROVIDER", "") != "openai":
-                        try:
-                            print("Fallback to OpenAI")
-                            fallback_agent = LLMAgentSummary()
-                            fallback_agent.init_prompt()
-                            fallback_agent.init_llm(provider="openai")
+            else:
+                print("Found llm summary from cache, decoding (utf-8) ...")
+                summary = utils.bytes2str(llm_summary_resp)
 
-                            summary = fallback_agent.run(content)
-                        except Exception as e:
-                            print(f"[ERROR] Exception from fallback_agent.run(): {e}")
+            # assemble summary into page
+            summarized_page = copy.deepcopy(page)
+            summarized_page["__summary"] = summary
 
-                else:
-                    print("Found llm summary from cache, decoding (utf-8) ...")
-                    summary = utils.bytes2str(llm_summary_resp)
+            print(f"Used {time.time() - st:.3f}s, Summarized page_id: {page_id}, summary: {summary}")
+            return summarized_page
 
-                # assemble summary into page
-                summarized_page = copy.deepcopy(page)
-                summarized_page["__summary"] = summary
+        # Flatten the posts of all the subreddits, so the LLM calls run
+        # concurrently across lists, then group them back in order
+        tasks = [(list_name, page) for list_name, posts in pages.items() for page in posts]
+        try:
+            results = executor.map(summarize_page, tasks)
+        finally:
+            client.set_notion_summary_item_ids(
+                "reddit", summary_cache_items,
+                expired_time=int(redis_key_expire_time))
 
-                print(f"Used {time.time() - st:.3f}s, Summarized page_id: {page_id}, summary: {summary}")
-                list_pages.append(summarized_page)
+        summarized_pages = {list_name: [] for list_name in pages}
+
+        for (list_name, _), summarized_page in zip(tasks, results):
+            if summarized_page:
+                summarized_pages[list_name].append(summarized_page)
 
         return summarized_pages
 
@@ -406,6 +460,9 @@ class OperatorReddit(OperatorBase):
             source="reddit",
             list_name=list_name)
 
+    def _visited_id(self, page):
+        return page["hash_id"]
+
     def printStats(self, source, data, inbox_data_deduped, data_ranked):
         print("#####################################################")
         print(f"# Stats of {source}")
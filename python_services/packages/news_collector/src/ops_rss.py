@@ -1,18 +1,22 @@
 import os
 import time
 import copy
+import json
+import threading
 import traceback
 from operator import itemgetter
 from datetime import date, datetime
 from time import mktime
 
-from notion import NotionAgent
-from llm_agent import LLMAgentSummary
+import client_registry
+import llm_prompts
+from llm_agent import LLMAgentSummary, LLMAgentGeneric
+from llm_executor import LLMExecutor
 import utils
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_milvus import OperatorMilvus
 from ops_notion import OperatorNotion
+from ops_stats import timed_stage
 # Use config_loader with fallback to legacy config
 try:
     from config_loader import get_enabled_feeds
@@ -20,7 +24,8 @@ except ImportError:
     from config.rss_feeds import get_enabled_feeds
 
 import feedparser
-import requests
+from feed_fetcher import FeedFetcher, print_latency_report
+from feed_cache import FeedValidatorCache
 
 
 class OperatorRSS(OperatorBase):
@@ -35,33 +40,38 @@ class OperatorRSS(OperatorBase):
     - publish
     """
 
-    def _fetch_articles(self, list_name, feed_url, count=3):
+    def _fetch_articles(self, list_name, feed_url, count=3, fetcher=None):
         """
         Fetch artciles from feed url (pull last n)
         """
         print(f"[fetch_articles] list_name: {list_name}, feed_url: {feed_url}, count: {count}")
 
-        # Fetch RSS feed with proper headers to avoid being blocked by Reddit
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/rss+xml, application/xml, text/xml, */*',
-            'Accept-Language': 'en-US,en;q=0.9',
-        }
+        if fetcher:
+            res = fetcher.fetch(feed_url)
+        else:
+            fetcher = FeedFetcher()
+            try:
+                res = fetcher.fetch(feed_url)
+            finally:
+                fetcher.close()
 
-        try:
-            response = requests.get(feed_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            feed = feedparser.parse(response.content)
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch RSS feed: {e}")
+        return self._parse_articles(list_name, res, count=count)
+
+    def _parse_articles(self, list_name, res, count=3):
+        """
+        Parse the articles from a FeedFetcher result (keep last n)
+        """
+        if res["ok"]:
+            feed = feedparser.parse(res["content"])
+        else:
+            print(f"[ERROR] Failed to fetch RSS feed: {res['error']}")
             feed = feedparser.parse('')  # Empty feed to avoid errors
 
         # Debug information
         print(f"[DEBUG] feed.bozo: {feed.bozo}, entries count: {len(feed.entries)}")
         if feed.bozo:
             print(f"[DEBUG] feed.bozo_exception: {feed.bozo_exception}")
-        if hasattr(feed, 'status'):
-            print(f"[DEBUG] HTTP status: {feed.status}")
+        print(f"[DEBUG] HTTP status: {res['status']}, elapsed: {res['elapsed']:.3f}s")
 
         pulled_cnt = 0
 
@@ -120,6 +130,7 @@ class OperatorRSS(OperatorBase):
 
         return articles
 
+    @timed_stage("pull")
     def pull(self):
         """
         Pull RSS
@@ -134,33 +145,69 @@ class OperatorRSS(OperatorBase):
         rss_list = get_enabled_feeds()
         print(f"Loaded {len(rss_list)} enabled RSS feeds from config")
 
-        # Fetch articles from rss list
+        # Fetch all the feeds concurrently (conditional GET), then
+        # parse them in the configured order
+        validator_cache = FeedValidatorCache()
+        fetcher = FeedFetcher()
+        try:
+            results = fetcher.fetch_many(
+                [rss["url"] for rss in rss_list],
+                headers_fn=validator_cache.headers)
+        finally:
+            fetcher.close()
+
+        print_latency_report(results)
+
         pages = {}
 
         for rss in rss_list:
             name = rss["name"]
             url = rss["url"]
             count = rss.get("count", 3)  # Use configured count or default to 3
-            print(f"Fetching RSS: {name}, url: {url}, count: {count}")
+            res = results[url]
 
-            articles = self._fetch_articles(name, url, count=count)
+            if validator_cache.is_not_modified(url, res["status"]):
+                print(f"RSS not modified since last poll, no new entries: {name}, url: {url}")
+                continue
+
+            print(f"Parsing RSS: {name}, url: {url}, count: {count}")
+            articles = self._parse_articles(name, res, count=count)
             print(f"articles: {articles}")
 
+            if res["ok"]:
+                validator_cache.update_from_headers(url, res["headers"])
+
             for article in articles:
                 page_id = article["id"]
                 pages[page_id] = article
 
+        validator_cache.print_stats()
+
+        # Persisted by the save step once the articles are saved
+        self.pending_validators = validator_cache.pending
         return pages
 
+    @timed_stage("dedup")
     def dedup(self, extractedPages, target="inbox"):
         print("#####################################################")
         print("# Dedup RSS")
         print("#####################################################")
         print(f"Number of pages: {len(extractedPages)}")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         deduped_pages = []
 
+        # Look up all the visited flags in one round trip per list
+        visited = {}
+        page_ids_by_list = {}
+
+        for page_id, page in extractedPages.items():
+            page_ids_by_list.setdefault(page["list_name"], []).append(page_id)
+
+        for list_name, page_ids in page_ids_by_list.items():
+            flags = client.get_notion_toread_item_ids("rss", list_name, page_ids)
+            visited.update(zip(page_ids, flags))
+
         for page_id, page in extractedPages.items():
             title = page["title"]
             list_name = page["list_name"]
@@ -168,13 +215,13 @@ class OperatorRSS(OperatorBase):
 
             print(f"Dedupping page, title: {title}, list_name: {list_name}, created_time: {created_time}, page_id: {page_id}")
 
-            if not client.get_notion_toread_item_id(
-                    "rss", list_name, page_id):
+            if not visited.get(page_id):
                 deduped_pages.append(page)
                 print(f" - No duplicate RSS article found, move to next. title: {title}, page_id: {page_id}")
 
         return deduped_pages
 
+    @timed_stage("filter")
     def filter(self, pages, **kwargs):
         print("#####################################################")
         print("# Filter RSS (After Scoring)")
@@ -202,33 +249,49 @@ class OperatorRSS(OperatorBase):
         print(f"Filter output size: {len(filtered2)}")
         return filtered2
 
+    @timed_stage("score")
     def score(self, data, **kwargs):
         print("#####################################################")
         print("# Scoring RSS")
         print("#####################################################")
         start_date = kwargs.setdefault("start_date", "")
         max_distance = kwargs.setdefault("max_distance", 0.45)
-        print(f"start_date: {start_date}, max_distance: {max_distance}")
+        topk = kwargs.setdefault("topk", int(os.getenv("MILVUS_SCORE_TOPK", 2)))
+        print(f"start_date: {start_date}, max_distance: {max_distance}, topk: {topk}")
 
         op_milvus = OperatorMilvus()
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         scored_list = []
 
-        for page in data:
+        # Get a summary text (at most 1024 chars)
+        score_texts = [
+            f"{page['title']} - {page['list_name']} - {page['summary']}"[:1024]
+            for page in data
+        ]
+
+        # Search all the candidates in one batch, fallback to one by
+        # one if failed
+        try:
+            relevant_metas_arr = op_milvus.get_relevant_many(
+                start_date, score_texts, topk=topk,
+                max_distance=max_distance, db_client=client)
+            page_scores = op_milvus.score_many(relevant_metas_arr)
+        except Exception as e:
+            print(f"[ERROR]: Batch scoring failed, fallback to one by one: {e}")
+            traceback.print_exc()
+            page_scores = [None] * len(data)
+
+        for page, score_text, page_score in zip(data, score_texts, page_scores):
             try:
                 title = page["title"]
-
-                # Get a summary text (at most 1024 chars)
-                score_text = f"{page['title']} - {page['list_name']} - {page['summary']}"
-                score_text = score_text[:1024]
                 print(f"Scoring page: {title}, score_text: {score_text}")
 
-                relevant_metas = op_milvus.get_relevant(
-                    start_date, score_text, topk=2,
-                    max_distance=max_distance, db_client=client)
-
-                page_score = op_milvus.score(relevant_metas)
+                if page_score is None:
+                    relevant_metas = op_milvus.get_relevant(
+                        start_date, score_text, topk=topk,
+                        max_distance=max_distance, db_client=client)
+                    page_score = op_milvus.score(relevant_metas)
 
                 scored_page = copy.deepcopy(page)
                 scored_page["__relevant_score"] = page_score
@@ -243,6 +306,7 @@ class OperatorRSS(OperatorBase):
         print(f"Scored_pages ({len(scored_list)}): {scored_list}")
         return scored_list
 
+    @timed_stage("summarize")
     def summarize(self, pages):
         print("#####################################################")
         print("# Summarize RSS Articles")
@@ -251,41 +315,52 @@ class OperatorRSS(OperatorBase):
         print(f"Number of pages: {len(pages)}")
         print(f"Summary max length: {SUMMARY_MAX_LENGTH}")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         redis_key_expire_time = os.getenv(
             "BOT_REDIS_KEY_EXPIRE_TIME", 604800)
 
-        summarized_pages = []
+        executor = LLMExecutor()
+        agents_lock = threading.Lock()
 
-        # Track current feed to reuse LLM agent for same feed
-        current_feed_name = None
-        llm_agent = None
+        # Summary cache writes, flushed in one round trip
+        summary_cache_items = []
 
-        for page in pages:
+        # One LLM agent per feed, shared by the workers
+        llm_agents = {}
+
+        def get_llm_agent(list_name):
+            with agents_lock:
+                if list_name not in llm_agents:
+                    feed_prompt = llm_prompts.get_rss_prompt(list_name)
+                    print(f"[INFO] Initializing LLM agent for feed: {list_name}")
+                    print(f"[INFO] Using prompt: {feed_prompt[:100]}...")
+
+                    llm_agent = LLMAgentSummary()
+                    llm_agent.init_prompt(combine_prompt=feed_prompt)
+                    llm_agent.init_llm()
+                    llm_agents[list_name] = llm_agent
+
+                return llm_agents[list_name]
+
+        category_agent = LLMAgentGeneric()
+        category_agent.init_prompt(llm_prompts.LLM_PROMPT_CATEGORIZATION)
+        category_agent.init_llm()
+
+        def summarize_page(page):
             page_id = page["id"]
             title = page["title"]
             content = page["content"]
             list_name = page["list_name"]
             source_url = page["url"]
             print(f"Summarying page, title: {title}, list_name: {list_name}")
-
-            # Initialize or reinitialize LLM agent when feed changes
-            if current_feed_name != list_name or llm_agent is None:
-                import llm_prompts
-                feed_prompt = llm_prompts.get_rss_prompt(list_name)
-                print(f"[INFO] Initializing LLM agent for feed: {list_name}")
-                print(f"[INFO] Using prompt: {feed_prompt[:100]}...")
-
-                llm_agent = LLMAgentSummary()
-                llm_agent.init_prompt(combine_prompt=feed_prompt)
-                llm_agent.init_llm()
-                current_feed_name = list_name
             # print(f"Page content ({len(content)} chars): {content}")
 
             st = time.time()
+            llm_agent = get_llm_agent(list_name)
 
             llm_summary_resp = client.get_notion_summary_item_id(
-                "rss", list_name, page_id)
+                "rss", list_name, page_id,
+                cache_ns=llm_agent.cache_namespace())
 
             if not llm_summary_resp:
                 # Double check the content, if empty, load it from
@@ -311,14 +386,13 @@ class OperatorRSS(OperatorBase):
                             print(f"Using RSS summary as fallback: {len(content)} chars")
                         else:
                             print("[ERROR] Both web load and RSS summary failed, skip it")
-                            continue
+                            return None
 
-                summary = llm_agent.run(content)
+                summary = executor.call(llm_agent.run, content)
 
                 print(f"Cache llm response for {redis_key_expire_time}s, page_id: {page_id}, summary: {summary}")
-                client.set_notion_summary_item_id(
-                    "rss", list_name, page_id, summary,
-                    expired_time=int(redis_key_expire_time))
+                summary_cache_items.append(
+                    (list_name, page_id, summary, llm_agent.cache_key(content)))
 
             else:
                 print("Found llm summary from cache, decoding (utf-8) ...")
@@ -328,30 +402,23 @@ class OperatorRSS(OperatorBase):
             print(f"Categorizing page, title: {title}, list_name: {list_name}")
 
             llm_category_resp = client.get_notion_category_item_id(
-                "rss", list_name, page_id)
+                "rss", list_name, page_id,
+                cache_ns=category_agent.cache_namespace())
 
             if not llm_category_resp:
-                # Initialize categorization LLM agent
-                from llm_agent import LLMAgentGeneric
-                import llm_prompts
-
-                category_agent = LLMAgentGeneric()
-                category_agent.init_prompt(llm_prompts.LLM_PROMPT_CATEGORIZATION)
-                category_agent.init_llm()
-
                 # Run categorization on summary
-                category_response = category_agent.run(summary)
+                category_response = executor.call(category_agent.run, summary)
 
                 print(f"Cache llm category response for {redis_key_expire_time}s, page_id: {page_id}, category: {category_response}")
                 client.set_notion_category_item_id(
                     "rss", list_name, page_id, category_response,
+                    cache_key=category_agent.cache_key(summary),
                     expired_time=int(redis_key_expire_time))
             else:
                 print("Found llm category from cache, decoding (utf-8) ...")
                 category_response = utils.bytes2str(llm_category_resp)
 
             # Parse category JSON (multi-select)
-            import json
             try:
                 category_data = json.loads(category_response)
                 categories = category_data.get("categories", [])
@@ -366,14 +433,25 @@ class OperatorRSS(OperatorBase):
             summarized_page["__categories"] = categories
 
             print(f"Used {time.time() - st:.3f}s, Summarized page_id: {page_id}, categories: {categories}, summary: {summary}")
-            summarized_pages.append(summarized_page)
+            return summarized_page
 
+        # Web loading and LLM calls of the pages run concurrently, the
+        # order of the pages is kept
+        try:
+            summarized_pages = [
+                x for x in executor.map(summarize_page, pages) if x
+            ]
+        finally:
+            client.set_notion_summary_item_ids(
+                "rss", summary_cache_items,
+                expired_time=int(redis_key_expire_time))
 
         print("[INFO] Enhanced analysis enabled for RSS, running analysis...")
         summarized_pages = self.analyze_enhanced(summarized_pages)
 
         return summarized_pages
 
+    @timed_stage("analyze_enhanced")
     def analyze_enhanced(self, pages):
         """
         Generate enhanced analysis (why_it_matters, insights, examples)
@@ -392,12 +470,13 @@ class OperatorRSS(OperatorBase):
         llm_agent.init_llm()
         llm_agent.init_enhanced_analysis_prompt()
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         redis_key_expire_time = os.getenv("BOT_REDIS_KEY_EXPIRE_TIME", 604800)
 
-        analyzed_pages = []
+        executor = LLMExecutor()
+        analysis_prompt = llm_agent.enhanced_analysis_cache_prompt()
 
-        for page in pages:
+        def analyze_page(page):
             page_id = page["id"]
             title = page["title"]
             content = page.get("content", "")
@@ -410,12 +489,12 @@ class OperatorRSS(OperatorBase):
 
             # Check cache
             cached_analysis = client.get_notion_enhanced_analysis_item_id(
-                "rss", list_name, page_id
+                "rss", list_name, page_id,
+                cache_ns=llm_agent.cache_namespace(analysis_prompt)
             )
 
             if cached_analysis:
                 print("Found cached enhanced analysis")
-                import json
                 analysis = json.loads(utils.bytes2str(cached_analysis))
             else:
                 # Determine input: content first, then summary fallback
@@ -423,20 +502,20 @@ class OperatorRSS(OperatorBase):
 
                 if not analysis_input:
                     print("[WARN] No content or summary available, skipping analysis")
-                    continue
+                    return None
 
                 # Truncate to max length
                 analysis_input = analysis_input[:ANALYSIS_MAX_LENGTH]
                 print(f"Analysis input length: {len(analysis_input)} chars")
 
                 # Run LLM
-                analysis = llm_agent.run_enhanced_analysis(analysis_input)
+                analysis = executor.call(llm_agent.run_enhanced_analysis, analysis_input)
 
                 # Cache result
-                import json
                 analysis_json = json.dumps(analysis, ensure_ascii=False)
                 client.set_notion_enhanced_analysis_item_id(
                     "rss", list_name, page_id, analysis_json,
+                    cache_key=llm_agent.cache_key(analysis_input, analysis_prompt),
                     expired_time=int(redis_key_expire_time)
                 )
                 print(f"Cached enhanced analysis for {redis_key_expire_time}s")
@@ -452,7 +531,11 @@ class OperatorRSS(OperatorBase):
             print(f"  - Insights: {len(analyzed_page['__insights'])} items")
             print(f"  - Examples: {len(analyzed_page['__examples'])} items")
 
-            analyzed_pages.append(analyzed_page)
+            return analyzed_page
+
+        analyzed_pages = [
+            x for x in executor.map(analyze_page, pages) if x
+        ]
 
         return analyzed_pages
 
@@ -463,6 +546,7 @@ class OperatorRSS(OperatorBase):
         tops = sorted(items, key=itemgetter(1), reverse=True)
         return tops[:k]
 
+    @timed_stage("push")
     def push(self, pages, targets, topk=3):
         print("#####################################################")
         print("# Push RSS")
@@ -481,7 +565,7 @@ class OperatorRSS(OperatorBase):
 
             if target == "notion":
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 # Get the latest toread database id from index db
@@ -497,34 +581,37 @@ class OperatorRSS(OperatorBase):
                     print("[ERROR] no index db pages found... skip")
                     break
 
-                for page in pages:
-                    stat["total"] += 1
+                try:
+                    for page in pages:
+                        stat["total"] += 1
 
-                    try:
-                        page_id = page["id"]
-                        list_name = page["list_name"]
-                        title = page["title"]
-                        tags = page["tags"]
+                        try:
+                            page_id = page["id"]
+                            list_name = page["list_name"]
+                            title = page["title"]
+                            tags = page["tags"]
 
-                        print(f"Pushing page, title: {title}")
+                            print(f"Pushing page, title: {title}")
 
-                        topics_topk = [x["term"].replace(",", " ")[:20] for x in tags]
-                        topics_topk = topics_topk[:topk]
+                            topics_topk = [x["term"].replace(",", " ")[:20] for x in tags]
+                            topics_topk = topics_topk[:topk]
 
-                        categories_topk = []
+                            categories_topk = []
 
-                        notion_agent.createDatabaseItem_ToRead_RSS(
-                            database_id,
-                            page,
-                            topics_topk,
-                            categories_topk)
+                            notion_agent.createDatabaseItem_ToRead_RSS(
+                                database_id,
+                                page,
+                                topics_topk,
+                                categories_topk)
 
-                        self.markVisited(page_id, source="rss", list_name=list_name)
+                            self.markVisited(page_id, source="rss", list_name=list_name)
 
-                    except Exception as e:
-                        print(f"[ERROR]: Push to notion failed, skip: {e}")
-                        stat["error"] += 1
-                        traceback.print_exc()
+                        except Exception as e:
+                            print(f"[ERROR]: Push to notion failed, skip: {e}")
+                            stat["error"] += 1
+                            traceback.print_exc()
+                finally:
+                    self.flushVisited()
 
             else:
                 print(f"[ERROR]: Unknown target {target}, skip")
@@ -1,3 +1,33 @@
+"""
+Operator stats: item counters per source/list (OpsStats) and the
+process-wide timing histograms (OpsMetrics)
+
+Timing is collected per stage (pull, dedup, score, filter, summarize,
+push, ...) and per external call type (redis, milvus, embedding, llm,
+notion, http):
+
+    @timed_stage("dedup")
+    def dedup(self, pages, **kwargs): ...
+
+    @timed_call("redis")
+    def get(self, key): ...
+
+    with timer("call", "llm"):
+        ...
+
+At the end of a task, export() writes a JSON run report next to the
+run's data, a Prometheus textfile (OPS_METRICS_PROMETHEUS_DIR) and sends
+the counters to StatsD (OPS_METRICS_STATSD_HOST), the timers are sent to
+StatsD as they're observed.
+"""
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 
 
 class OpsCounter:
@@ -39,6 +69,13 @@ class OpsStats:
         """
         return self.stats_map.get(name)
 
+    def to_dict(self):
+        return {
+            "source": self.name,
+            "category": self.sub_name,
+            "counters": {key: stat.get() for key, stat in self.stats_map.items()},
+        }
+
     def print(self):
         print(f"{self.name}:")
 
@@ -47,3 +84,360 @@ class OpsStats:
 
         for key, stat in self.stats_map.items():
             print(f" - {key}: {stat.get()}")
+
+
+#######################################################################
+# Timing
+#######################################################################
+# Upper bounds (seconds), from a redis round trip to a whole stage
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class OpsHistogram:
+    def __init__(self, kind, name, source="", buckets=DEFAULT_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.source = source
+        self.buckets = tuple(buckets)
+
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.items = 0
+        self.errors = 0
+
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, items=0, error=False):
+        idx = len(self.buckets)
+
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                idx = i
+                break
+
+        with self.lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.sum += seconds
+            self.items += items or 0
+            self.errors += 1 if error else 0
+            self.min = seconds if self.min is None else min(self.min, seconds)
+            self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def quantile(self, q):
+        """
+        Estimated by the bucket upper bound
+        """
+        with self.lock:
+            if not self.count:
+                return 0.0
+
+            rank = q * self.count
+            acc = 0
+
+            for i, cnt in enumerate(self.counts):
+                acc += cnt
+
+                if acc >= rank:
+                    return self.buckets[i] if i < len(self.buckets) else self.max
+
+        return self.max
+
+    def to_dict(self):
+        with self.lock:
+            res = {
+                "kind": self.kind,
+                "name": self.name,
+                "source": self.source,
+                "count": self.count,
+                "errors": self.errors,
+                "sum": round(self.sum, 6),
+                "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+                "min": round(self.min or 0.0, 6),
+                "max": round(self.max or 0.0, 6),
+                "items": self.items,
+                "items_per_sec": round(self.items / self.sum, 3) if self.sum > 0 else 0.0,
+                "buckets": dict(zip([str(x) for x in self.buckets] + ["+Inf"], self.counts)),
+            }
+
+        res["p50"] = self.quantile(0.5)
+        res["p95"] = self.quantile(0.95)
+        return res
+
+
+class StatsDClient:
+    """
+    Fire-and-forget UDP, a lost packet is fine for metrics
+    """
+    def __init__(self, host, port=8125, prefix="auto_news"):
+        self.addr = (host, int(port))
+        self.prefix = prefix
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _send(self, metric):
+        try:
+            self.sock.sendto(f"{self.prefix}.{metric}".encode("utf-8"), self.addr)
+        except OSError as e:
+            print(f"[WARN] StatsD send failed: {e}")
+
+    def timing(self, name, seconds):
+        self._send(f"{name}:{seconds * 1000:.3f}|ms")
+
+    def gauge(self, name, value):
+        self._send(f"{name}:{value}|g")
+
+    def close(self):
+        self.sock.close()
+
+
+def _statsd_name(*parts):
+    return ".".join(str(x).replace(".", "_").replace(" ", "_") for x in parts if x)
+
+
+class OpsMetrics:
+    def __init__(self):
+        # <(kind, name, source), OpsHistogram>
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+        self.statsd = None
+        statsd_host = os.getenv("OPS_METRICS_STATSD_HOST")
+
+        if statsd_host:
+            self.statsd = StatsDClient(
+                statsd_host,
+                os.getenv("OPS_METRICS_STATSD_PORT", 8125),
+                os.getenv("OPS_METRICS_STATSD_PREFIX", "auto_news"))
+
+    def histogram(self, kind, name, source=""):
+        key = (kind, name, source or "")
+
+        with self.lock:
+            if key not in self.histograms:
+                self.histograms[key] = OpsHistogram(kind, name, source or "")
+
+            return self.histograms[key]
+
+    def observe(self, kind, name, seconds, source="", items=0, error=False):
+        self.histogram(kind, name, source).observe(seconds, items, error)
+
+        if self.statsd:
+            self.statsd.timing(_statsd_name(kind, name, source), seconds)
+
+    def get(self, kind=None):
+        with self.lock:
+            hists = list(self.histograms.values())
+
+        return [x.to_dict() for x in hists if kind is None or x.kind == kind]
+
+    def to_prometheus(self, stats=None):
+        lines = []
+
+        for kind, label in (("stage", "stage"), ("call", "call")):
+            hists = self.get(kind)
+            if not hists:
+                continue
+
+            metric = f"auto_news_{kind}_duration_seconds"
+            lines.append(f"# HELP {metric} Duration of the operator {kind}s")
+            lines.append(f"# TYPE {metric} histogram")
+
+            for h in hists:
+                labels = f'{label}="{h["name"]}",source="{h["source"]}"'
+                acc = 0
+
+                for bound, cnt in h["buckets"].items():
+                    acc += cnt
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {acc}')
+
+                lines.append(f"{metric}_sum{{{labels}}} {h['sum']}")
+                lines.append(f"{metric}_count{{{labels}}} {h['count']}")
+
+            metric = f"auto_news_{kind}_items_total"
+            lines.append(f"# TYPE {metric} counter")
+
+            for h in hists:
+                lines.append(f'{metric}{{{label}="{h["name"]}",source="{h["source"]}"}} {h["items"]}')
+
+            metric = f"auto_news_{kind}_errors_total"
+            lines.append(f"# TYPE {metric} counter")
+
+            for h in hists:
+                lines.append(f'{metric}{{{label}="{h["name"]}",source="{h["source"]}"}} {h["errors"]}')
+
+        if stats:
+            metric = "auto_news_items"
+            lines.append(f"# TYPE {metric} gauge")
+
+            for stat in stats:
+                for counter, value in stat.to_dict()["counters"].items():
+                    lines.append(f'{metric}{{source="{stat.name}",category="{stat.sub_name}",counter="{counter}"}} {value}')
+
+        return "\n".join(lines) + "\n"
+
+    def print(self):
+        print("| kind  | name             | source               | count |    total   |    avg    |    p95    |   max     | items/s |")
+        print("|-------|------------------|----------------------|-------|------------|-----------|-----------|-----------|---------|")
+
+        for h in sorted(self.get(), key=lambda x: (x["kind"] != "stage", -x["sum"])):
+            print(f"| {h['kind']:<5} | {h['name']:<16} | {h['source'][:20]:<20} | {h['count']:>5} | {h['sum']:>9.2f}s | {h['avg']:>8.3f}s | {h['p95']:>8.3f}s | {h['max']:>8.3f}s | {h['items_per_sec']:>7.1f} |")
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.started_at = time.time()
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Process-wide metrics registry
+    """
+    global _metrics
+
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = OpsMetrics()
+
+        return _metrics
+
+
+def _num_items(data):
+    """
+    The number of pages, the grouped payloads ({list_name: [pages]})
+    count the pages of all the lists
+    """
+    try:
+        if isinstance(data, dict):
+            return sum(len(x) if isinstance(x, (list, tuple, dict)) else 1 for x in data.values())
+
+        return len(data)
+
+    except TypeError:
+        return 0
+
+
+@contextmanager
+def timer(kind, name, source="", items=0):
+    st = time.monotonic()
+    error = False
+
+    try:
+        yield
+
+    except Exception:
+        error = True
+        raise
+
+    finally:
+        get_metrics().observe(kind, name, time.monotonic() - st, source, items, error)
+
+
+def timed_stage(stage):
+    """
+    Time an operator method, the source is the operator name (e.g.
+    OperatorRSS -> RSS), the items are the pages of the first argument
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            source = type(self).__name__.replace("Operator", "", 1)
+            items = _num_items(args[0]) if args else 0
+
+            with timer("stage", stage, source, items):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_call(call_type):
+    """
+    Time an external call (redis, milvus, embedding, llm, notion, http)
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer("call", call_type):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def export(task, data_folder="", run_id="", stats=None):
+    """
+    Export the metrics of this task run:
+    - JSON report: {WORKDIR}/{data_folder}/{run_id}/ops_report_{task}.json
+    - Prometheus textfile: {OPS_METRICS_PROMETHEUS_DIR}/auto_news_{task}.prom
+    - StatsD gauges of the item counters
+    """
+    metrics = get_metrics()
+    stats = stats or []
+
+    print("#####################################################")
+    print(f"# Timing ({task})")
+    print("#####################################################")
+    metrics.print()
+
+    report = {
+        "task": task,
+        "run_id": run_id,
+        "started_at": datetime.fromtimestamp(metrics.started_at).isoformat(),
+        "finished_at": datetime.now().isoformat(),
+        "elapsed": round(time.time() - metrics.started_at, 3),
+        "stages": metrics.get("stage"),
+        "calls": metrics.get("call"),
+        "stats": [x.to_dict() for x in stats],
+    }
+
+    if data_folder or run_id:
+        try:
+            workdir = os.getenv("WORKDIR")
+            data_path = f"{workdir}/{data_folder}/{run_id}"
+            os.makedirs(data_path, exist_ok=True)
+
+            full_path = f"{data_path}/ops_report_{task}.json"
+
+            with open(full_path, "w") as f:
+                json.dump(report, f, indent=2)
+
+            print(f"[INFO] Saved ops report to {full_path}")
+
+        except OSError as e:
+            print(f"[ERROR] Save ops report failed: {e}")
+
+    prom_dir = os.getenv("OPS_METRICS_PROMETHEUS_DIR")
+
+    if prom_dir:
+        try:
+            os.makedirs(prom_dir, exist_ok=True)
+            full_path = os.path.join(prom_dir, f"auto_news_{task}.prom")
+
+            # node_exporter may read it anytime, never expose a partial file
+            tmp_path = f"{full_path}.{os.getpid()}.tmp"
+
+            with open(tmp_path, "w") as f:
+                f.write(metrics.to_prometheus(stats))
+
+            os.replace(tmp_path, full_path)
+            print(f"[INFO] Saved prometheus metrics to {full_path}")
+
+        except OSError as e:
+            print(f"[ERROR] Save prometheus metrics failed: {e}")
+
+    if metrics.statsd:
+        for stat in stats:
+            for counter, value in stat.to_dict()["counters"].items():
+                metrics.statsd.gauge(_statsd_name("items", stat.name, stat.sub_name, counter), value)
+
+    return report
@@ -5,10 +5,9 @@ import json
 import traceback
 from datetime import date, datetime, timedelta
 
+import client_registry
 import utils
-from notion import NotionAgent
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_notion import OperatorNotion
 
 import llm_prompts
@@ -61,7 +60,7 @@ class OperatorTODO(OperatorBase):
 
     def _dedup(self, pages):
         dedup_pages = {}
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         for page_id, page in pages.items():
             last_edited_time = page["last_edited_time"]
@@ -155,7 +154,7 @@ class OperatorTODO(OperatorBase):
 
     def _get_takeaways_from_pages(self, pages, **kwargs):
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
         takeaway_pages = []
 
         for page_id, raw_page in pages.items():
@@ -196,7 +195,7 @@ class OperatorTODO(OperatorBase):
 
         start_date = kwargs.setdefault("start_date", date.today().isoformat())
         print(f"Start date: {start_date}")
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         for target in targets:
             print(f"Pushing data to target: {target} ...")
@@ -206,7 +205,7 @@ class OperatorTODO(OperatorBase):
                 err = 0
 
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 db_index_id = op_notion.get_index_toread_dbid()
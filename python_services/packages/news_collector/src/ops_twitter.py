@@ -5,13 +5,12 @@ import traceback
 from operator import itemgetter
 
 from tweets import TwitterAgent
-from notion import NotionAgent
+import client_registry
 import utils
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_milvus import OperatorMilvus
 from ops_notion import OperatorNotion
-from ops_stats import OpsStats
+from ops_stats import OpsStats, timed_stage
 
 
 class OperatorTwitter(OperatorBase):
@@ -25,13 +24,14 @@ class OperatorTwitter(OperatorBase):
     - ranking
     - publish
     """
+    @timed_stage("pull")
     def pull(self, pulling_count, pulling_interval):
         print("#####################################################")
         print("# Pulling Twitter")
         print("#####################################################")
         # Get twitter lists
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
 
         op_notion = OperatorNotion()
         db_index_id = op_notion.get_index_inbox_dbid()
@@ -70,6 +70,7 @@ class OperatorTwitter(OperatorBase):
         print(f"Pulled from twitter: {data}")
         return data
 
+    @timed_stage("dedup")
     def dedup(self, tweets, target="toread"):
         """
         tweets: {
@@ -82,7 +83,7 @@ class OperatorTwitter(OperatorBase):
         print("#####################################################")
         print(f"Target: {target}")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         tweets_deduped = {}
         tot = 0
         dup = 0
@@ -91,12 +92,15 @@ class OperatorTwitter(OperatorBase):
         for list_name, data in tweets.items():
             tweets_list = tweets_deduped.setdefault(list_name, [])
 
-            for tweet in data:
+            # One round trip for the whole list
+            visited = client.get_notion_toread_item_ids(
+                "twitter", list_name, [x["tweet_id"] for x in data])
+
+            for tweet, is_visited in zip(data, visited):
                 tweet_id = tweet["tweet_id"]
                 tot += 1
 
-                if client.get_notion_toread_item_id(
-                        "twitter", list_name, tweet_id):
+                if is_visited:
                     dup += 1
                     print(f"Duplicated tweet found, tweet_id: {tweet_id}, skip")
 
@@ -107,6 +111,7 @@ class OperatorTwitter(OperatorBase):
         print(f"tweets_deduped (total: {tot}, duplicated: {dup}, new: {cnt}): {tweets_deduped}")
         return tweets_deduped
 
+    @timed_stage("push")
     def push(self, data, targets, topics_topk=3, categories_topk=3):
         """
         data is the ranked tweets
@@ -130,7 +135,7 @@ class OperatorTwitter(OperatorBase):
                 err = 0
 
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 # Get the latest toread database id from index db
@@ -144,27 +149,30 @@ class OperatorTwitter(OperatorBase):
                     print("[ERROR] no index db pages found... skip")
                     break
 
-                for list_name, tweets in data.items():
-                    stat = stats.setdefault(list_name, {"total": 0, "error": 0})
-
-                    for ranked_tweet in tweets:
-                        tot += 1
-                        stat["total"] += 1
-
-                        try:
-                            self._push_to_read_notion(
-                                notion_agent,
-                                database_id,
-                                list_name,
-                                ranked_tweet,
-                                topics_topk,
-                                categories_topk)
-
-                        except Exception as e:
-                            print(f"[ERROR]: Push to notion failed, skip: {e}")
-                            err += 1
-                            stat["error"] += 1
-                            traceback.print_exc()
+                try:
+                    for list_name, tweets in data.items():
+                        stat = stats.setdefault(list_name, {"total": 0, "error": 0})
+
+                        for ranked_tweet in tweets:
+                            tot += 1
+                            stat["total"] += 1
+
+                            try:
+                                self._push_to_read_notion(
+                                    notion_agent,
+                                    database_id,
+                                    list_name,
+                                    ranked_tweet,
+                                    topics_topk,
+                                    categories_topk)
+
+                            except Exception as e:
+                                print(f"[ERROR]: Push to notion failed, skip: {e}")
+                                err += 1
+                                stat["error"] += 1
+                                traceback.print_exc()
+                finally:
+                    self.flushVisited()
 
             else:
                 print(f"[ERROR]: Unknown target {target}, skip")
@@ -172,16 +180,18 @@ class OperatorTwitter(OperatorBase):
             print(f"Push Tweets to notion finished, total: {tot}, err: {err}")
             return stats
 
+    @timed_stage("score")
     def score(self, data, **kwargs):
         print("#####################################################")
         print("# Score Tweets")
         print("#####################################################")
         start_date = kwargs.setdefault("start_date", "")
         max_distance = kwargs.setdefault("max_distance", 0.45)
-        print(f"start_date: {start_date}, max_distance: {max_distance}")
+        topk = kwargs.setdefault("topk", int(os.getenv("MILVUS_SCORE_TOPK", 2)))
+        print(f"start_date: {start_date}, max_distance: {max_distance}, topk: {topk}")
 
         op_milvus = OperatorMilvus()
-        client = DBClient()
+        client = client_registry.get_db_client()
 
         scored_pages = {}
 
@@ -189,19 +199,35 @@ class OperatorTwitter(OperatorBase):
             scored_list = scored_pages.setdefault(list_name, [])
             print(f"Scoring list {list_name}, total {len(tweets)} tweets")
 
+            texts = []
             for tweet in tweets:
+                text = ""
+                if tweet["reply_text"]:
+                    text += f"{tweet['reply_to_name']}: {tweet['reply_text']}"
+                text += f"{tweet['name']}: {tweet['text']}"
+
+                texts.append(text)
+
+            # Search the whole list in one batch, fallback to one by
+            # one if failed
+            # Notes: k = 10 looks too noisy, tune k = 2
+            try:
+                relevant_metas_arr = op_milvus.get_relevant_many(
+                    start_date, texts, topk=topk,
+                    max_distance=max_distance, db_client=client)
+                page_scores = op_milvus.score_many(relevant_metas_arr)
+            except Exception as e:
+                print(f"[ERROR]: Batch scoring failed, fallback to one by one: {e}")
+                traceback.print_exc()
+                page_scores = [None] * len(tweets)
+
+            for tweet, text, page_score in zip(tweets, texts, page_scores):
                 try:
-                    text = ""
-                    if tweet["reply_text"]:
-                        text += f"{tweet['reply_to_name']}: {tweet['reply_text']}"
-                    text += f"{tweet['name']}: {tweet['text']}"
-
-                    # Notes: k = 10 looks too noisy, tune k = 2
-                    relevant_metas = op_milvus.get_relevant(
-                        start_date, text, topk=2,
-                        max_distance=max_distance, db_client=client)
-
-                    page_score = op_milvus.score(relevant_metas)
+                    if page_score is None:
+                        relevant_metas = op_milvus.get_relevant(
+                            start_date, text, topk=topk,
+                            max_distance=max_distance, db_client=client)
+                        page_score = op_milvus.score(relevant_metas)
 
                     scored_page = copy.deepcopy(tweet)
                     scored_page["__relevant_score"] = page_score
@@ -216,6 +242,7 @@ class OperatorTwitter(OperatorBase):
         print(f"Scored_pages ({len(scored_pages)}): {scored_pages}")
         return scored_pages
 
+    @timed_stage("filter")
     def filter(self, pages, **kwargs):
         print("#####################################################")
         print("# Filter Tweets (After Scoring)")
@@ -307,6 +334,9 @@ class OperatorTwitter(OperatorBase):
             source="twitter",
             list_name=list_name)
 
+    def _visited_id(self, page):
+        return page["tweet_id"]
+
     def printStats(self, source, data, inbox_data_deduped, data_ranked):
         print("#####################################################")
         print(f"# Stats of {source}")
@@ -5,12 +5,12 @@ import traceback
 from datetime import timedelta, datetime
 
 import pytz
-from notion import NotionAgent
+import client_registry
 from llm_agent import LLMAgentSummary
 import utils
 from ops_base import OperatorBase
-from db_cli import DBClient
 from ops_notion import OperatorNotion
+from ops_stats import timed_stage
 
 
 class OperatorYoutube(OperatorBase):
@@ -24,6 +24,7 @@ class OperatorYoutube(OperatorBase):
     - ranking
     - publish
     """
+    @timed_stage("pull")
     def pull(self, **kwargs):
         print("#####################################################")
         print("# Pulling Youtube video transcripts")
@@ -34,9 +35,9 @@ class OperatorYoutube(OperatorBase):
 
         # 1. prepare notion agent and db connection
         notion_api_key = os.getenv("NOTION_TOKEN")
-        notion_agent = NotionAgent(notion_api_key)
+        notion_agent = client_registry.get_notion_agent(notion_api_key)
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         last_created_time = client.get_notion_inbox_created_time(
             "youtube", "default")
 
@@ -125,27 +126,33 @@ class OperatorYoutube(OperatorBase):
 
         return pages
 
+    @timed_stage("dedup")
     def dedup(self, extractedPages, target="toread"):
         print("#####################################################")
         print("# Dedup Youtube pages")
         print("#####################################################")
         print(f"Number of pages: {len(extractedPages)}")
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         deduped_pages = []
 
-        for page_id, page in extractedPages.items():
+        # One round trip for all the pages
+        page_ids = list(extractedPages.keys())
+        visited = client.get_notion_toread_item_ids(
+            "youtube", "default", page_ids)
+
+        for (page_id, page), is_visited in zip(extractedPages.items(), visited):
             title = page["title"]
             print(f"Dedupping page, title: {title}")
 
-            if client.get_notion_toread_item_id(
-                    "youtube", "default", page_id):
+            if is_visited:
                 print(f"Duplicated youtube found, skip. page_id: {page_id}")
             else:
                 deduped_pages.append(page)
 
         return deduped_pages
 
+    @timed_stage("summarize")
     def summarize(self, pages):
         print("#####################################################")
         print("# Summarize Youtube transcripts")
@@ -158,12 +165,15 @@ class OperatorYoutube(OperatorBase):
         llm_agent.init_prompt()
         llm_agent.init_llm()
 
-        client = DBClient()
+        client = client_registry.get_db_client()
         redis_key_expire_time = os.getenv(
             "BOT_REDIS_KEY_EXPIRE_TIME", 604800)
 
         summarized_pages = []
 
+        # Summary cache writes, flushed in one round trip
+        summary_cache_items = []
+
         for page in pages:
             title = page["title"]
             page_id = page["id"]
@@ -178,7 +188,8 @@ class OperatorYoutube(OperatorBase):
             summary = ""
 
             llm_summary_resp = client.get_notion_summary_item_id(
-                "youtube", "default", page_id)
+                "youtube", "default", page_id,
+                cache_ns=llm_agent.cache_namespace())
 
             if not llm_summary_resp:
                 if not content:
@@ -192,9 +203,8 @@ class OperatorYoutube(OperatorBase):
 
                     print(f"Cache llm response for {redis_key_expire_time}s, page_id: {page_id}, summary: {summary}")
 
-                    client.set_notion_summary_item_id(
-                        "youtube", "default", page_id, summary,
-                        expired_time=int(redis_key_expire_time))
+                    summary_cache_items.append(
+                        ("default", page_id, summary, llm_agent.cache_key(content)))
 
                 except Exception as e:
                     print(f"[ERROR] Exception during llm_agent.run(): {e}")
@@ -207,6 +217,12 @@ class OperatorYoutube(OperatorBase):
 
                     summary = fallback_agent.run(content)
 
+                    # Same per-item key as the normal path, see
+                    # OperatorReddit.summarize
+                    if summary:
+                        summary_cache_items.append(
+                            ("default", page_id, summary, None))
+
             else:
                 print("Found llm summary from cache, decoding (utf-8) ...")
                 summary = utils.bytes2str(llm_summary_resp)
@@ -218,8 +234,13 @@ class OperatorYoutube(OperatorBase):
             print(f"Used {time.time() - st:.3f}s, Summarized page_id: {page_id}, summary: {summary}")
             summarized_pages.append(summarized_page)
 
+        client.set_notion_summary_item_ids(
+            "youtube", summary_cache_items,
+            expired_time=int(redis_key_expire_time))
+
         return summarized_pages
 
+    @timed_stage("push")
     def push(self, ranked_data, targets, topk=3):
         print("#####################################################")
         print("# Push Youtubes")
@@ -238,7 +259,7 @@ class OperatorYoutube(OperatorBase):
 
             if target == "notion":
                 notion_api_key = os.getenv("NOTION_TOKEN")
-                notion_agent = NotionAgent(notion_api_key)
+                notion_agent = client_registry.get_notion_agent(notion_api_key)
                 op_notion = OperatorNotion()
 
                 # Get the latest toread database id from index db
@@ -253,37 +274,40 @@ class OperatorYoutube(OperatorBase):
                     print("[ERROR] no index db pages found... skip")
                     break
 
-                for ranked_page in ranked_data:
-                    stat["total"] += 1
-
-                    try:
-                        page_id = ranked_page["id"]
-                        title = ranked_page.get("__title") or ranked_page["title"]
-                        print(f"Pushing page, title: {title}")
-
-                        topics = ranked_page["__topics"]
-                        topics_topk = utils.get_top_items(topics, topk)
-                        topics_topk = [x[0].replace(",", " ")[:20] for x in topics_topk]
-
-                        categories = ranked_page["__categories"]
-                        categories_topk = utils.get_top_items(categories, topk)
-                        categories_topk = [x[0].replace(",", " ")[:20] for x in categories_topk]
-
-                        notion_agent.createDatabaseItem_ToRead_Youtube(
-                            database_id,
-                            ranked_page,
-                            topics_topk,
-                            categories_topk)
-
-                        self.markVisited(page_id, source="youtube", list_name="default")
-
-                        created_time = ranked_page["created_time"]
-                        self.updateCreatedTime(created_time, source="youtube", list_name="default")
-
-                    except Exception as e:
-                        print(f"[ERROR]: Push to notion failed, skip: {e}")
-                        stat["error"] += 1
-                        traceback.print_exc()
+                try:
+                    for ranked_page in ranked_data:
+                        stat["total"] += 1
+
+                        try:
+                            page_id = ranked_page["id"]
+                            title = ranked_page.get("__title") or ranked_page["title"]
+                            print(f"Pushing page, title: {title}")
+
+                            topics = ranked_page["__topics"]
+                            topics_topk = utils.get_top_items(topics, topk)
+                            topics_topk = [x[0].replace(",", " ")[:20] for x in topics_topk]
+
+                            categories = ranked_page["__categories"]
+                            categories_topk = utils.get_top_items(categories, topk)
+                            categories_topk = [x[0].replace(",", " ")[:20] for x in categories_topk]
+
+                            notion_agent.createDatabaseItem_ToRead_Youtube(
+                                database_id,
+                                ranked_page,
+                                topics_topk,
+                                categories_topk)
+
+                            self.markVisited(page_id, source="youtube", list_name="default")
+
+                            created_time = ranked_page["created_time"]
+                            self.updateCreatedTime(created_time, source="youtube", list_name="default")
+
+                        except Exception as e:
+                            print(f"[ERROR]: Push to notion failed, skip: {e}")
+                            stat["error"] += 1
+                            traceback.print_exc()
+                finally:
+                    self.flushVisited()
 
             else:
                 print(f"[ERROR]: Unknown target {target}, skip")
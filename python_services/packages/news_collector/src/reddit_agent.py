@@ -1,6 +1,8 @@
 import os
 import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
@@ -8,6 +10,7 @@ from llm_agent import (
     LLMArxivLoader
 )
 
+from content_enricher import ContentEnricher
 import utils
 
 
@@ -21,9 +24,28 @@ class RedditAgent:
         self.app_id = os.getenv("REDDIT_APP_ID", "app_reddit_api")
         self.app_version = os.getenv("REDDIT_APP_VERSION") or "1.0.0"
         self.user_agent = f"auto_news:{self.app_id}:{self.app_version}"
-        self.access_token = self.auth()
+
+        # Keep this many requests of the quota for the other clients
+        self.ratelimit_reserve = int(os.getenv("REDDIT_RATELIMIT_RESERVE", 5))
+        self.max_workers = int(os.getenv("REDDIT_PULL_CONCURRENCY", 4))
+
+        # One authenticated session (connection pool) shared by the workers
+        self.session = requests.Session()
+        self.session.mount("https://", requests.adapters.HTTPAdapter(
+            pool_connections=2, pool_maxsize=max(10, self.max_workers)))
+        self.session.headers.update({'User-Agent': self.user_agent})
+
+        self.ratelimit_cond = threading.Condition()
+        self.ratelimit_inflight = 0
+        self.ratelimit_last_request = 0.0
+        self.ratelimit_waiting_for = None
         self._save_ratelimit_info()
 
+        self.enricher = ContentEnricher()
+
+        self.access_token = self.auth()
+        self.session.headers.update({'Authorization': f'Bearer {self.access_token}'})
+
         print(f"[INFO] Initialized RedditAgent, user_agent: {self.user_agent}")
 
     def auth(self):
@@ -34,10 +56,9 @@ class RedditAgent:
         auth = requests.auth.HTTPBasicAuth(
             self.client_id, self.client_secret)
 
-        response = requests.post(self.AUTH_URL,
-                                 data=data,
-                                 headers={'User-Agent': self.user_agent},
-                                 auth=auth)
+        response = self.session.post(self.AUTH_URL,
+                                     data=data,
+                                     auth=auth)
 
         response.raise_for_status()
         return response.json()['access_token']
@@ -50,18 +71,9 @@ class RedditAgent:
         retries=3,
         data_folder="/tmp",
         run_id="",
+        min_interval=0,
+        enrich=True,
     ):
-        if self.ratelimit_remaining == 0 and wait_on_ratelimit:
-            print(f"Reaching ratelimit cap, wait {self.ratelimit_reset} seconds until cap reset...")
-
-            wait_secs = self.ratelimit_reset + 10
-            time.sleep(wait_secs)
-
-        headers = {
-            'User-Agent': self.user_agent,
-            'Authorization': f'Bearer {self.access_token}'
-        }
-
         params = {
             "limit": limit,
         }
@@ -70,27 +82,121 @@ class RedditAgent:
         print(f"[INFO] get_subreddit_posts for url: {URL}")
 
         def query():
-            response = requests.get(
-                URL,
-                headers=headers,
-                params=params)
+            self._acquire_ratelimit(wait_on_ratelimit, min_interval)
+
+            try:
+                response = self.session.get(URL, params=params)
+
+            finally:
+                self._release_ratelimit()
+
+            if response.status_code == 429:
+                self._save_ratelimit_info(response=response, exhausted=True)
 
             response.raise_for_status()
             self._save_ratelimit_info(response=response)
 
             return self._extractSubredditPosts(
-                response, data_folder, run_id)
+                response, data_folder, run_id, enrich=enrich)
 
         return utils.retry(query, retries=retries)
 
-    def _extractSubredditPosts(self, response, data_folder, run_id):
+    def get_subreddits_posts(
+        self,
+        subreddits: list,
+        limit=25,
+        max_workers=None,
+        data_folder="/tmp",
+        run_id="",
+        min_interval=0,
+    ):
+        """
+        Pull the subreddits concurrently, the requests are scheduled by
+        the rate limit budget (see _acquire_ratelimit), then enrich all
+        the posts in one stage
+
+        @return posts list per subreddit, in the same order of
+                subreddits, a failed subreddit gets an empty list
+        """
+        subreddits = list(subreddits)
+
+        if not subreddits:
+            return []
+
+        max_workers = int(max_workers or self.max_workers)
+        st = time.time()
+
+        def pull(subreddit):
+            try:
+                return self.get_subreddit_posts(
+                    subreddit, limit=limit,
+                    data_folder=data_folder, run_id=run_id,
+                    min_interval=min_interval, enrich=False)
+
+            except Exception as e:
+                print(f"[ERROR] Pulling subreddit {subreddit} failed: {e}")
+                return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(subreddits))) as executor:
+            res = list(executor.map(pull, subreddits))
+
+        self.enrich_posts(
+            [post for posts in res for post in posts],
+            data_folder=data_folder, run_id=run_id)
+
+        print(f"[RedditAgent] Pulled {len(subreddits)} subreddits in {time.time() - st:.2f}s, max_workers: {max_workers}, ratelimit_remaining: {self.ratelimit_remaining}, ratelimit_reset: {self.ratelimit_reset}")
+        return res
+
+    def _acquire_ratelimit(self, wait_on_ratelimit=True, min_interval=0):
+        """
+        Take one request from the budget of the current rate limit window,
+        the in-flight requests are counted since their headers are not
+        back yet. Block until the window resets if the budget is used up
+        """
+        with self.ratelimit_cond:
+            while True:
+                now = time.monotonic()
+
+                if now >= self.ratelimit_reset_at:
+                    # New window, the quota is refilled
+                    self.ratelimit_remaining = self.ratelimit_remaining + self.ratelimit_used
+                    self.ratelimit_used = 0
+                    self.ratelimit_reset_at = now + 60 * 10
+
+                budget = self.ratelimit_remaining - self.ratelimit_inflight - self.ratelimit_reserve
+                delay = self.ratelimit_last_request + min_interval - now
+
+                if budget > 0 and delay <= 0:
+                    self.ratelimit_inflight += 1
+                    self.ratelimit_last_request = now
+                    return
+
+                if budget <= 0:
+                    if not wait_on_ratelimit:
+                        raise RuntimeError(f"Reddit ratelimit budget exhausted, reset in {self.ratelimit_reset_at - now:.0f}s")
+
+                    delay = self.ratelimit_reset_at - now + 1
+
+                    if self.ratelimit_waiting_for != self.ratelimit_reset_at:
+                        self.ratelimit_waiting_for = self.ratelimit_reset_at
+                        print(f"Reaching ratelimit cap, wait {delay:.0f} seconds until cap reset...")
+
+                self.ratelimit_cond.wait(timeout=delay)
+
+    def _release_ratelimit(self):
+        with self.ratelimit_cond:
+            self.ratelimit_inflight -= 1
+            self.ratelimit_cond.notify_all()
+
+    def _extractSubredditPosts(self, response, data_folder, run_id, enrich=True):
+        """
+        Extract the posts from the listing, the linked content is loaded
+        by the enrichment stage (see enrich_posts)
+        """
         posts = response.json()["data"]["children"]
         ret = []
-        tot = 0
-        err = 0
 
         for post in posts:
-            tot += 1
             ts = post["data"]["created_utc"]
             dt_utc = datetime.fromtimestamp(ts).isoformat()
             dt_pdt = utils.convertUTC2PDT_str(dt_utc).isoformat()
@@ -114,49 +220,7 @@ class RedditAgent:
             video_blob = self._extract_video_url(post)
             text = post["data"]["selftext"]
 
-            print(f"[RedditAgent] Loading reddit post: {page_permalink}, page_url: {page_url}")
-
-            if not text and not is_video and not is_image and is_external_link:
-                arxiv_loader = LLMArxivLoader()
-                loaded, arxiv_res = arxiv_loader.load_from_url(page_url)
-
-                if loaded:  # if it's arxiv paper
-                    text = arxiv_res["metadata_text"]
-                    print(f"[RedditAgent] Loaded from arxiv, text summary: {text[:200]}..., arxiv_res: {arxiv_res}")
-
-                else:
-                    def load_web():
-                        print(f"[RedditAgent] Loading web page from {page_url} ...")
-                        return utils.load_web(page_url)
-
-                    try:
-                        text = utils.retry(load_web, retries=3)
-
-                    except Exception as e:
-                        print(f"[ERROR] Load web content failed from {page_url}, use empty string instead: {e}")
-                        err += 1
-
-                print(f"Post from external link (non-video/image), load from source {page_url}, text: {text[:200]}...")
-
-            elif is_video:
-                print(f"[RedditAgent] is_video: {is_video}, loading video: {video_blob} ...")
-                video_url = video_blob["video_url"]
-                audio_url = video_blob["audio_url"]
-
-                try:
-                    transcript, metadata = utils.load_video_transcript(
-                        video_url,
-                        audio_url,
-                        post_hash_id,
-                        data_folder,
-                        run_id)
-
-                    print(f"[RedditAgent] Loaded video {video_url}, audio {audio_url}, transcript: {transcript[:200]}...")
-                    text = transcript
-
-                except Exception as e:
-                    print(f"[ERROR] Load video {video_url}, audio {audio_url} failed: {e}")
-                    err += 1
+            print(f"[RedditAgent] Extracted reddit post: {page_permalink}, page_url: {page_url}")
 
             extracted_post = {
                 "id": post_hash_id,
@@ -195,9 +259,77 @@ class RedditAgent:
 
             ret.append(extracted_post)
 
-        print(f"Reddit post loaded total {tot}, error {err}")
+        print(f"Reddit post extracted total {len(ret)}")
+
+        if enrich:
+            self.enrich_posts(ret, data_folder, run_id)
+
         return ret
 
+    def enrich_posts(self, posts: list, data_folder="/tmp", run_id=""):
+        """
+        Load the content of the external links (arXiv, web page) and the
+        video transcripts in parallel, a failed one keeps its selftext
+        """
+        tasks = []
+        targets = []
+
+        for post in posts:
+            task = self._enrich_task(post, data_folder, run_id)
+
+            if task:
+                tasks.append(task)
+                targets.append(post)
+
+        print(f"[RedditAgent] Enriching {len(tasks)} of {len(posts)} posts ...")
+
+        for post, text in zip(targets, self.enricher.run(tasks)):
+            post["text"] = text or ""
+            print(f"[RedditAgent] Enriched post {post['permalink']}, page_url: {post['url']}, text: {post['text'][:200]}...")
+
+        return posts
+
+    def _enrich_task(self, post, data_folder, run_id):
+        page_url = post["url"]
+        text = post["text"]
+
+        if not text and not post["is_video"] and not post["is_image"] and post["is_external_link"]:
+            def load():
+                arxiv_loader = LLMArxivLoader()
+                loaded, arxiv_res = arxiv_loader.load_from_url(page_url)
+
+                if loaded:  # if it's arxiv paper
+                    print(f"[RedditAgent] Loaded from arxiv, arxiv_res: {arxiv_res}")
+                    return arxiv_res["metadata_text"]
+
+                print(f"[RedditAgent] Loading web page from {page_url} ...")
+                return utils.load_web(page_url, timeout=self.enricher.request_timeout)
+
+            return {"url": page_url, "load": load, "fallback": text}
+
+        video_blob = post["video"]
+
+        if post["is_video"] and video_blob and video_blob["video_url"]:
+            video_url = video_blob["video_url"]
+            audio_url = video_blob["audio_url"]
+
+            def load():
+                print(f"[RedditAgent] Loading video: {video_blob} ...")
+
+                transcript, metadata = utils.load_video_transcript(
+                    video_url,
+                    audio_url,
+                    post["id"],
+                    data_folder,
+                    run_id)
+
+                return transcript
+
+            # The transcription is expensive, don't retry it
+            return {"url": video_url, "load": load, "fallback": text, "retries": 0}
+
+        return None
+
     def _is_video(self, post, page_url):
         has_media = post["data"]["media"]
         is_video = post["data"]["is_video"] or "https://v.redd.it" in page_url
@@ -317,28 +449,52 @@ class RedditAgent:
 
         return res
 
-    def _save_ratelimit_info(self, response=None):
-        if not response:
+    def _save_ratelimit_info(self, response=None, exhausted=False):
+        if response is None:
             # Set default values (600 / 10mins) according to Reddit wiki
             self.ratelimit_remaining = 600
             self.ratelimit_used = 0
             self.ratelimit_reset = 60 * 10  # unit second
+            self.ratelimit_reset_at = time.monotonic() + self.ratelimit_reset
             return
 
-        if response.status_code != 200:
+        if response.status_code != 200 and not exhausted:
             print(f"[ERROR] Failure in response: headers: {response.headers}, body: {response.text}")
             return
 
-        prev_ratelimit_remaining = self.ratelimit_remaining
-        prev_ratelimit_used = self.ratelimit_used
-        prev_ratelimit_reset = self.ratelimit_reset
-
         # Extract rate limit info from response
         headers = response.headers
-        self.ratelimit_remaining = headers["x-ratelimit-remaining"]
-        self.ratelimit_used = headers["x-ratelimit-used"]
-        self.ratelimit_reset = headers["x-ratelimit-reset"]
 
-        print(f"prev ratelimit_remaining: {prev_ratelimit_remaining}, new ratelimit_remaining: {self.ratelimit_remaining}")
-        print(f"prev ratelimit_used: {prev_ratelimit_used}, new ratelimit_used: {self.ratelimit_used}")
-        print(f"prev ratelimit_reset: {prev_ratelimit_reset}, new ratelimit_reset: {self.ratelimit_reset}")
+        try:
+            remaining = float(headers["x-ratelimit-remaining"])
+            used = float(headers["x-ratelimit-used"])
+            reset = float(headers["x-ratelimit-reset"])
+
+        except (KeyError, TypeError, ValueError):
+            if not exhausted:
+                print(f"[WARN] No valid ratelimit headers: {headers}")
+                return
+
+            # 429 without headers, back off for the default window
+            remaining, used, reset = 0, self.ratelimit_remaining + self.ratelimit_used, 60 * 10
+
+        if exhausted:
+            remaining = 0
+
+        with self.ratelimit_cond:
+            prev_ratelimit_remaining = self.ratelimit_remaining
+            reset_at = time.monotonic() + reset
+
+            # The responses of the concurrent requests may come back out
+            # of order, within the same window the lowest remaining wins
+            if reset_at < self.ratelimit_reset_at + 1:
+                remaining = min(remaining, self.ratelimit_remaining)
+                used = max(used, self.ratelimit_used)
+
+            self.ratelimit_remaining = remaining
+            self.ratelimit_used = used
+            self.ratelimit_reset = reset
+            self.ratelimit_reset_at = reset_at
+            self.ratelimit_cond.notify_all()
+
+        print(f"[RedditAgent] ratelimit remaining: {prev_ratelimit_remaining} -> {remaining}, used: {used}, reset: {reset}s")
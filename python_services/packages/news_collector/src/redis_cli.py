@@ -1,6 +1,8 @@
 import os
 import redis
 
+from ops_stats import timed_call
+
 
 class RedisClient:
     def __init__(self, url=None):
@@ -17,6 +19,7 @@ class RedisClient:
 
         return conn
 
+    @timed_call("redis")
     def get(self, key: str):
         data = None
 
@@ -27,24 +30,163 @@ class RedisClient:
 
         return data
 
+    @timed_call("redis")
     def set(self, key: str, val: str, **kwargs):
         """
         expired_time: the key will be expired after expired_time seconds
         """
         expired_time = kwargs.setdefault("expired_time", 0)
         overwrite = kwargs.setdefault("overwrite", False)
-        print(f"[Redis Client] Set key: {key}, val: {val}, expired_time: {expired_time}, overwrite: {overwrite}")
+        print(f"[Redis Client] Set key: {key}, val: {str(val)[:64]}, expired_time: {expired_time}, overwrite: {overwrite}")
 
         try:
-            if expired_time <= 0:
-                if overwrite:
-                    self.api.set(key, val)
-                else:
-                    self.api.setnx(key, val)
+            self._set(self.api, key, val, expired_time, overwrite)
+            return True
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to set key {key}: {e}")
+            return False
+
+    def _set(self, api, key, val, expired_time, overwrite):
+        """
+        api: redis connection or pipeline
+        """
+        if expired_time <= 0:
+            if overwrite:
+                api.set(key, val)
             else:
-                self.api.setex(key, int(expired_time), val)
+                api.setnx(key, val)
+        else:
+            api.setex(key, int(expired_time), val)
+
+    @timed_call("redis")
+    def get_many(self, keys: list):
+        """
+        Get multiple keys in one round trip (MGET)
+
+        @return values in the same order of keys, None for the
+                missing keys (or all None if failed)
+        """
+        if not keys:
+            return []
+
+        try:
+            return self.api.mget(keys)
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to get {len(keys)} keys: {e}")
+            return [None] * len(keys)
+
+    @timed_call("redis")
+    def set_many(self, items: list, **kwargs):
+        """
+        Set multiple keys in one round trip (pipeline)
 
+        items: [(key, val), ...] or [(key, val, expired_time), ...],
+               the per-item expired_time overrides kwargs expired_time
+        """
+        if not items:
+            return True
+
+        expired_time = kwargs.setdefault("expired_time", 0)
+        overwrite = kwargs.setdefault("overwrite", False)
+        print(f"[Redis Client] Set {len(items)} keys, expired_time: {expired_time}, overwrite: {overwrite}")
+
+        try:
+            pipe = self.api.pipeline(transaction=False)
+
+            for item in items:
+                key, val = item[0], item[1]
+                ttl = item[2] if len(item) > 2 else expired_time
+                self._set(pipe, key, val, ttl, overwrite)
+
+            pipe.execute()
             return True
         except Exception as e:
-            print(f"[ERROR]: Redis client failed to set key {key} and val {val}: {e}")
+            print(f"[ERROR]: Redis client failed to set {len(items)} keys: {e}")
             return False
+
+    @timed_call("redis")
+    def scan_keys(self, pattern: str, count=1000):
+        """
+        Iterate the keys matching the pattern (SCAN, non-blocking)
+        """
+        try:
+            return [x.decode("utf-8") if isinstance(x, bytes) else x
+                    for x in self.api.scan_iter(match=pattern, count=count)]
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to scan {pattern}: {e}")
+            return []
+
+    @timed_call("redis")
+    def zadd(self, key: str, mapping: dict):
+        """
+        mapping: <member, score>
+        """
+        try:
+            return self.api.zadd(key, mapping)
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to zadd {len(mapping)} members into {key}: {e}")
+            return 0
+
+    @timed_call("redis")
+    def zcard(self, key: str):
+        try:
+            return self.api.zcard(key)
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to zcard {key}: {e}")
+            return 0
+
+    @timed_call("redis")
+    def zpopmin(self, key: str, count=1):
+        """
+        @return [(member, score), ...] with the lowest scores
+        """
+        try:
+            return [(x.decode("utf-8") if isinstance(x, bytes) else x, score)
+                    for x, score in self.api.zpopmin(key, count)]
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to zpopmin {key}: {e}")
+            return []
+
+    @timed_call("redis")
+    def zrangebyscore(self, key: str, min_score, max_score):
+        try:
+            return [x.decode("utf-8") if isinstance(x, bytes) else x
+                    for x in self.api.zrangebyscore(key, min_score, max_score)]
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to zrangebyscore {key}: {e}")
+            return []
+
+    @timed_call("redis")
+    def zrem(self, key: str, members: list):
+        if not members:
+            return 0
+
+        try:
+            return self.api.zrem(key, *members)
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to zrem {len(members)} members from {key}: {e}")
+            return 0
+
+    @timed_call("redis")
+    def delete(self, keys: list):
+        if not keys:
+            return 0
+
+        try:
+            return self.api.delete(*keys)
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to delete {len(keys)} keys: {e}")
+            return 0
+
+    def ping(self):
+        try:
+            return bool(self.api.ping())
+        except Exception as e:
+            print(f"[ERROR]: Redis client ping @{self.url} failed: {e}")
+            return False
+
+    def close(self):
+        try:
+            self.api.close()
+        except Exception as e:
+            print(f"[ERROR]: Redis client failed to close: {e}")
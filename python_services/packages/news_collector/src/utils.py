@@ -2,21 +2,19 @@ import os
 import json
 import time
 import hashlib
+import threading
 import traceback
 import subprocess
 from datetime import datetime
+from collections import OrderedDict
 from operator import itemgetter
 
 import pytz
 import requests
 
-from db_cli import DBClient
-from llm_agent import (
-    LLMWebLoader,
-    LLMYoutubeLoader
-)
-
-from ops_audio2text import OperatorAudioToText
+import client_registry
+from content_cache import canonical_url
+from ops_stats import timed_call
 
 
 def str2bool(v):
@@ -133,6 +131,7 @@ def get_top_items(items: list, k=3):
     return tops[:k]
 
 
+@timed_call("http")
 def urlGet(url, timeout=3):
     if not url:
         return False, {}
@@ -152,6 +151,7 @@ def urlGet(url, timeout=3):
         return False, {}
 
 
+@timed_call("http")
 def urlHead(url, timeout=3, allow_redirects=True):
     if not url:
         return False, {}
@@ -171,16 +171,51 @@ def urlHead(url, timeout=3, allow_redirects=True):
         return False, {}
 
 
+# <url, landing url>, memoized redirect resolutions of the process,
+# LRU bounded by URL_REDIRECT_LOCAL_MAX_ENTRIES
+_url_redirects = OrderedDict()
+_url_redirects_lock = threading.Lock()
+_url_redirects_max_entries = int(os.getenv("URL_REDIRECT_LOCAL_MAX_ENTRIES", 10000))
+
+
 def urlUnshorten(url):
+    """
+    Resolve the landing url, the resolution is memoized in process and
+    in redis (URL_REDIRECT_TTL)
+    """
     if not url:
         return url
 
-    # Fetch the metadata only (without body)
-    ok, resp = urlHead(url, allow_redirects=True)
-    if ok:
-        url = resp.url
+    with _url_redirects_lock:
+        if url in _url_redirects:
+            _url_redirects.move_to_end(url)
+            return _url_redirects[url]
+
+    client = client_registry.get_db_client()
+    url_hash = hashcode_md5(url.encode("utf-8"))
+
+    landing_page = bytes2str(client.get_url_redirect_item_id(url_hash))
 
-    return url
+    if not landing_page:
+        # Fetch the metadata only (without body)
+        ok, resp = urlHead(url, allow_redirects=True)
+        if not ok:
+            return url
+
+        landing_page = resp.url
+        client.set_url_redirect_item_id(
+            url_hash, landing_page,
+            expired_time=int(os.getenv("URL_REDIRECT_TTL", 86400 * 28)),
+            overwrite=True)
+
+    with _url_redirects_lock:
+        _url_redirects[url] = landing_page
+        _url_redirects.move_to_end(url)
+
+        while len(_url_redirects) > _url_redirects_max_entries:
+            _url_redirects.popitem(last=False)
+
+    return landing_page
 
 
 def splitSummaryTranslation(text):
@@ -308,7 +343,7 @@ def retry(func, retries=3, **kwargs):
                 time.sleep(5)
 
 
-def load_web(url, validate=True, min_length=200):
+def load_web(url, validate=True, min_length=200, timeout=None):
     """
     Load web content from URL with optional validation
 
@@ -316,6 +351,7 @@ def load_web(url, validate=True, min_length=200):
         url: URL to load
         validate: Whether to validate content (default: True)
         min_length: Minimum valid content length (default: 200)
+        timeout: Request timeout in seconds (default: WEB_LOAD_TIMEOUT or 30)
 
     Returns:
         Content string if valid, None if validation fails
@@ -323,15 +359,38 @@ def load_web(url, validate=True, min_length=200):
     landing_page = urlUnshorten(url)
     print(f"[load_web] origin url: {url}, landing page: {landing_page}")
 
+    from llm_agent import LLMWebLoader
+
+    timeout = float(timeout or os.getenv("WEB_LOAD_TIMEOUT", 30))
     loader = LLMWebLoader()
-    docs = loader.load(landing_page)
+    cache_key = canonical_url(landing_page)
+    content_cache = None
+
+    if os.getenv("CONTENT_CACHE_ENABLED", "true").lower() == "true":
+        content_cache = client_registry.get_content_cache()
 
-    content = ""
-    for doc in docs:
-        content += doc.page_content
-        content += "\n"
+    if content_cache:
+        def fetch(entry):
+            res = loader.fetch(landing_page, entry, timeout=timeout)
+
+            if res:
+                res["text"] = refine_content(res["text"])
+
+            return res
+
+        entry = content_cache.get_or_fetch("web", cache_key, fetch)
+        content = entry["text"] if entry else ""
+
+    else:
+        docs = loader.load(landing_page, timeout=timeout)
+
+        content = ""
+        for doc in docs:
+            content += doc.page_content
+            content += "\n"
+
+        content = refine_content(content)
 
-    content = refine_content(content)
     print(f"[load_web] finished, content (post refinement): {content[:200]}...")
 
     # Validate content if requested
@@ -356,6 +415,11 @@ def load_web(url, validate=True, min_length=200):
         # Validate content length and absence of error patterns
         if len(content) < min_length or has_invalid_pattern:
             print(f"[load_web] Validation failed: length={len(content)}, has_error_pattern={has_invalid_pattern}")
+
+            # Don't serve the invalid pages from the cache
+            if content_cache:
+                content_cache.invalidate("web", cache_key)
+
             return None
 
         print(f"[load_web] Validation passed: {len(content)} chars, valid content")
@@ -372,6 +436,8 @@ def load_video_transcript(
     audio2text=True,
     enable_cache=True
 ):
+    from llm_agent import LLMYoutubeLoader
+
     loader = LLMYoutubeLoader()
     transcript_langs = os.getenv("YOUTUBE_TRANSCRIPT_LANGS", "en")
     langs = transcript_langs.split(",")
@@ -385,7 +451,7 @@ def load_video_transcript(
             print(f"[WARN] Doesn't support load video transcript from {excluded_site}, SKIP and RETURN")
             return "", {}
 
-    client = DBClient()
+    client = client_registry.get_db_client()
     redis_key_expire_time = os.getenv(
         "BOT_REDIS_KEY_EXPIRE_TIME", 604800)
 
@@ -420,6 +486,8 @@ def load_video_transcript(
         if audio2text:
             st = time.time()
             print(f"Audio2Text enabled, transcribe it, page_id: {page_id}, url: {url}, audio_url: {audio_url} ...")
+            from ops_audio2text import OperatorAudioToText
+
             op_a2t = OperatorAudioToText(model_name="base")
 
             audio_file = op_a2t.extract_audio(
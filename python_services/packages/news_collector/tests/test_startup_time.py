@@ -0,0 +1,35 @@
+"""
+Startup budget of the Airflow entry points, see src/bench_startup.py
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import bench_startup  # noqa: E402
+
+
+def _import_time(module):
+    res = bench_startup.import_time(module)
+
+    if not res["ok"]:
+        pytest.skip(f"{module} cannot be imported in this environment: {res['error']}")
+
+    return res
+
+
+@pytest.mark.parametrize("module", sorted(bench_startup.BUDGETS))
+def test_short_task_budget(module):
+    res = _import_time(module)
+    budget = bench_startup.BUDGETS[module]
+
+    assert res["total"] < budget, f"{module} imports took {res['total']:.3f}s (budget {budget}s): {res['top'][:5]}"
+
+
+@pytest.mark.parametrize("module", bench_startup.ENTRY_POINTS)
+def test_no_heavy_modules_at_startup(module):
+    res = _import_time(module)
+
+    assert bench_startup.heavy_modules(res["modules"]) == []
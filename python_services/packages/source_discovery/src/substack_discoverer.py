@@ -22,6 +22,7 @@ if _env_path.exists():
     load_dotenv(_env_path)
 
 CHECKPOINT_FILE = Path(__file__).parent.parent / ".discovery_checkpoint.json"
+FEED_CACHE_FILE = Path(__file__).parent.parent / ".feed_validator_cache.json"
 @dataclass
 class SubstackCandidate:
     """A discovered Substack newsletter candidate."""
@@ -179,6 +180,83 @@ class DiscoveryCheckpoint:
         print("[Checkpoint] Reset complete")
 
 
+class FeedValidatorCache:
+    """
+    On-disk ETag / Last-Modified cache keyed by feed URL.
+    The last parsed RSS info is kept too, so a 304 can be answered
+    without downloading or parsing the feed again.
+    """
+
+    def __init__(self, cache_path: Path = FEED_CACHE_FILE):
+        self.cache_path = cache_path
+        self.entries: dict[str, dict] = {}
+        self.hits = 0  # 304 not modified
+        self.misses = 0  # full body downloaded
+        self._load()
+
+    def _load(self) -> None:
+        """Load cache entries from file."""
+        if not self.cache_path.exists():
+            return
+
+        try:
+            with open(self.cache_path, "r") as f:
+                self.entries = json.load(f)
+        except Exception as e:
+            print(f"[FeedCache] Error loading: {e}")
+            self.entries = {}
+
+    def save(self) -> None:
+        """Save cache entries to file."""
+        try:
+            with open(self.cache_path, "w") as f:
+                json.dump(self.entries, f)
+        except Exception as e:
+            print(f"[FeedCache] Error saving: {e}")
+
+    def headers(self, url: str) -> dict:
+        """Conditional request headers for a feed URL."""
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get_info(self, url: str) -> Optional[dict]:
+        """Cached RSS info of a feed URL, counted as a hit."""
+        info = self.entries.get(url, {}).get("info")
+        if info is not None:
+            self.hits += 1
+        return info
+
+    def update(self, url: str, headers, info: dict) -> None:
+        """
+        Store validators and RSS info of a full (200) response,
+        kept in memory until save() at the end of the discovery pass.
+        """
+        self.misses += 1
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+        self.entries[url] = {
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+            "info": info,
+        }
+
+    def stats(self) -> dict:
+        """Hit/miss counts of this run."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
 class SubstackDiscoverer:
     """
     Discovers Substack newsletters related to specific topics.
@@ -214,6 +292,9 @@ class SubstackDiscoverer:
         cp_path = checkpoint_path or CHECKPOINT_FILE
         self.checkpoint = DiscoveryCheckpoint(cp_path)
 
+        # Conditional GET support for RSS polling
+        self.feed_cache = FeedValidatorCache()
+
     def _load_config(self) -> None:
         """Load configuration from YAML file."""
         if not self.config_path.exists():
@@ -553,9 +634,23 @@ class SubstackDiscoverer:
             return match.group(1)
         return None
     def _get_rss_info(self, rss_url: str) -> Optional[dict]:
-        """Parse RSS feed to get post info."""
+        """Parse RSS feed to get post info (304 served from the feed cache)."""
         try:
-            feed = feedparser.parse(rss_url)
+            response = self.http_client.get(
+                rss_url,
+                headers=self.feed_cache.headers(rss_url),
+                follow_redirects=True
+            )
+            if response.status_code == 304:
+                info = self.feed_cache.get_info(rss_url)
+                if info is not None:
+                    print(f"[Substack] RSS not modified, using cached info: {rss_url}")
+                    return info
+                # Validators without info, fetch the full body again
+                response = self.http_client.get(rss_url, follow_redirects=True)
+            response.raise_for_status()
+
+            feed = feedparser.parse(response.content)
             if feed.bozo:
                 print(f"[Substack] RSS parse error for {rss_url}: {feed.bozo_exception}")
                 return None
@@ -566,11 +661,13 @@ class SubstackDiscoverer:
                     "link": entry.get("link", ""),
                     "published": entry.get("published", entry.get("pubDate", ""))
                 })
-            return {
+            info = {
                 "post_count": len(feed.entries),
                 "recent_posts": posts,
                 "feed_title": feed.feed.get("title", "")
             }
+            self.feed_cache.update(rss_url, response.headers, info)
+            return info
         except Exception as e:
             print(f"[Substack] RSS error: {e}")
             return None
@@ -772,13 +869,18 @@ class SubstackDiscoverer:
         print(f"\n{'='*60}")
         print(f"Substack Discovery: {topic}")
         print(f"{'='*60}\n")
-        # Discover candidates
-        candidates = self.discover(
-            topic=topic,
-            keywords=keywords,
-            max_results=max_results
-        )
+        # Discover candidates, the feed cache is written once per pass
+        try:
+            candidates = self.discover(
+                topic=topic,
+                keywords=keywords,
+                max_results=max_results
+            )
+        finally:
+            self.feed_cache.save()
         print(f"\nFound {len(candidates)} candidates meeting threshold")
+        cache_stats = self.feed_cache.stats()
+        print(f"RSS feed cache: {cache_stats['hits']} not modified, {cache_stats['misses']} fetched")
         if not candidates:
             return []
         # Sort by score